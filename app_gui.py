@@ -32,25 +32,11 @@ if sys.platform == "win32":
 
 # ... (下面的 class OcrApp 类定义保持不变) ...
 # ================= 核心模块导入区域 =================
-try:
-    from core.rapidocr import RapidOcrConverter as OcrConverter
-    OCR_ENGINE_NAME = "RapidOCR (极速)"
-except ImportError:
-    try:
-        from core.ocr_pdf_html import OcrConverter
-        OCR_ENGINE_NAME = "PaddleOCR (精准)"
-    except ImportError:
-        OCR_ENGINE_NAME = "未安装"
-
-try:
-    from core.word_pdf_html import DocToHtmlConverter
-except ImportError:
-    DocToHtmlConverter = None
-
-try:
-    from core.pdf_md import PdfMdConverter
-except ImportError as e:
-    PdfMdConverter = None
+# 转换器按模式延迟加载：启动时不导入 onnxruntime / PyMuPDF / WeasyPrint 等重型依赖，
+# 第一次使用某个模式时才由 registry 导入对应的 core 模块
+from core import registry
+from core.cancellation import CancelToken, STATUS_LABELS, CANCELLED, TIMEOUT
+from core.warmup import ConverterCache, STATE_LABELS, LOADING, READY, FAILED
 
 # ===================================================
 
@@ -74,6 +60,9 @@ class TextRedirector:
         pass
 
 class OcrApp:
+    # 整个文档的时限 (秒)，None 为不限 (随时可点"取消")
+    DOC_TIMEOUT_SEC = None
+
     def __init__(self, root):
         self.root = root
         self.root.title(f"智能文档审计系统 (全功能版)")
@@ -93,6 +82,10 @@ class OcrApp:
         self.file_path_var = tk.StringVar()
         self.output_dir_var = tk.StringVar() 
         self.mode_var = tk.StringVar(value="ocr") 
+        self.index_var = tk.BooleanVar(value=False)
+        self.cancel_token = None
+        # 转换器缓存：启动时就在后台加载所选模式的引擎，点"开始处理"时直接复用
+        self.converters = ConverterCache()
         
         self.init_ui()
         
@@ -101,12 +94,15 @@ class OcrApp:
         sys.stdout = TextRedirector(self.log_area, "stdout")
         sys.stderr = TextRedirector(self.log_area, "stderr")
 
+        # 重定向之后再预热，加载失败的提示才能显示在日志里
+        self.warm_up()
+        self.refresh_engine_state()
+
     def init_ui(self):
         # 1. 功能选择
         frame_mode = tk.LabelFrame(self.root, text="第一步：选择功能模式", padx=10, pady=10)
         frame_mode.pack(fill="x", padx=10, pady=5)
-        modes = [("📄 扫描件 OCR -> HTML", "ocr"), ("💻 数字 PDF -> HTML", "digital_pdf"),
-                 ("📝 Word -> HTML", "word"), ("⬇️ PDF -> Markdown", "pdf2md"), ("⬆️ Markdown -> PDF", "md2pdf")]
+        modes = [(spec["label"], mode) for mode, spec in registry.CONVERTERS.items()]
         for i, (text, mode) in enumerate(modes):
             tk.Radiobutton(frame_mode, text=text, variable=self.mode_var, value=mode, 
                            command=self.update_file_filter).grid(row=i//3, column=i%3, padx=10, pady=5, sticky="w")
@@ -122,13 +118,20 @@ class OcrApp:
         frame_out.pack(fill="x", padx=10, pady=5)
         tk.Entry(frame_out, textvariable=self.output_dir_var, width=65).pack(side="left", padx=5)
         tk.Button(frame_out, text="📂 选择文件夹", command=self.select_output_dir).pack(side="left", padx=5)
+        tk.Checkbutton(self.root, text="🔎 转换结果加入全文检索索引", variable=self.index_var,
+                       command=self.warm_up).pack(anchor="w", padx=15)
 
         # 4. 按钮
         frame_btn = tk.Frame(self.root, pady=5)
         frame_btn.pack(fill="x", padx=10)
         self.btn_run = tk.Button(frame_btn, text="🚀 开始处理", command=self.start_thread, 
                                  bg="#007bff", fg="white", font=("微软雅黑", 12, "bold"), height=2)
-        self.btn_run.pack(fill="x")
+        self.btn_run.pack(side="left", fill="x", expand=True)
+        self.btn_cancel = tk.Button(frame_btn, text="⏹️ 取消", command=self.cancel_run, state="disabled",
+                                    font=("微软雅黑", 12, "bold"), height=2, width=10)
+        self.btn_cancel.pack(side="left", padx=(5, 0))
+        self.engine_label = tk.Label(self.root, text=STATE_LABELS[None], fg="#6c757d", anchor="w")
+        self.engine_label.pack(fill="x", padx=15)
 
         # 5. 日志
         frame_log = tk.LabelFrame(self.root, text="运行日志 (实时)", padx=10, pady=10)
@@ -139,11 +142,50 @@ class OcrApp:
     def log(self, msg):
         print(msg) # 现在只需要 print，它会自动重定向到界面
 
-    def update_file_filter(self): self.file_path_var.set("")
+    def update_file_filter(self):
+        self.file_path_var.set("")
+        self.warm_up()
+
+    def converter_options(self, mode):
+        """ 该模式的转换器构造参数 (预热与正式转换用同一份，才能命中缓存) """
+        kwargs = {}
+        if mode == "ocr":
+            poppler = self.dist_poppler if os.path.exists(self.dist_poppler) else self.dev_poppler
+            if os.path.exists(poppler):
+                kwargs["poppler_path"] = poppler
+            else:
+                # 没有 Poppler 时改用 PyMuPDF 进程内渲染，不再直接报错退出
+                kwargs["renderer"] = "fitz"
+
+        if self.index_var.get() and registry.is_searchable(mode):
+            # 索引只用标准库 sqlite3，这里才导入
+            from core.search_index import default_index_path
+            kwargs["search_index"] = default_index_path()
+
+        if registry.is_resumable(mode):
+            # 逐页检查点：中断后重跑、或同一路径的文档改版后重跑，只处理变化的页
+            from core.app_paths import app_data_dir
+            kwargs["checkpoint_dir"] = app_data_dir("checkpoints")
+        return kwargs
+
+    def warm_up(self):
+        """
+        后台加载当前模式的引擎 (已加载的不重复)；模式或索引选项变化时调用
+        构造参数在这里算好记下，状态轮询只查缓存，不再每 300 ms 建目录、拼路径
+        """
+        mode = self.mode_var.get()
+        self.engine_options = (mode, self.converter_options(mode))
+        self.converters.start(*self.engine_options)
+
+    def refresh_engine_state(self):
+        mode, options = self.engine_options
+        state = self.converters.state(mode, options)
+        self.engine_label.config(text=f"{STATE_LABELS[state]} ({registry.CONVERTERS[mode]['label']})",
+                                 fg="#dc3545" if state == FAILED else "#6c757d")
+        self.root.after(300, self.refresh_engine_state)
     
     def select_file(self):
-        mode = self.mode_var.get()
-        ft = [("Word", "*.docx")] if mode=="word" else [("Markdown", "*.md")] if mode=="md2pdf" else [("PDF", "*.pdf")]
+        ft = registry.CONVERTERS[self.mode_var.get()]["file_types"]
         fn = filedialog.askopenfilename(filetypes=ft)
         if fn: self.file_path_var.set(fn)
 
@@ -154,9 +196,20 @@ class OcrApp:
     def start_thread(self):
         if not self.file_path_var.get(): return messagebox.showwarning("提示", "请选择文件")
         self.btn_run.config(state="disabled", text="⏳ 处理中...", bg="#6c757d")
+        # 单页时限按模式缩放，不检查单页时限的模式为 None (见 registry.page_timeout)
+        self.cancel_token = CancelToken(timeout=self.DOC_TIMEOUT_SEC,
+                                        page_timeout=registry.page_timeout(self.mode_var.get()))
+        self.btn_cancel.config(state="normal", text="⏹️ 取消")
         self.log_area.config(state='normal'); self.log_area.delete(1.0, tk.END); self.log_area.config(state='disabled')
         threading.Thread(target=self.run_logic, args=(self.file_path_var.get(),), daemon=True).start()
 
+    def cancel_run(self):
+        # 转换线程在页与页之间检查，当前这一页处理完即停止
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            print("\n⏹️ 已请求取消，当前页处理完后停止...")
+        self.btn_cancel.config(state="disabled", text="⏳ 正在取消...")
+
     def run_logic(self, input_path):
         mode = self.mode_var.get()
         base_name = os.path.splitext(os.path.basename(input_path))[0]
@@ -169,33 +222,31 @@ class OcrApp:
             success = False
             print(f"🔄 模式: {mode} | 文件: {base_name}")
             
-            if mode == "ocr":
-                poppler = self.dist_poppler if os.path.exists(self.dist_poppler) else self.dev_poppler
-                if not os.path.exists(poppler):
-                    print("❌ 致命错误: 未找到 Poppler 文件夹！")
-                    return
-                print(f"📂 Poppler路径: {poppler}")
-                
-                output_file = os.path.join(out_dir, f"{base_name}_ocr.html")
-                converter = OcrConverter(poppler_path=poppler)
-                success = converter.scanned_pdf_to_html(input_path, output_file)
-
-            elif mode == "digital_pdf":
-                output_file = os.path.join(out_dir, f"{base_name}_digital.html")
-                success = DocToHtmlConverter().pdf_to_html(input_path, output_file)
-            elif mode == "word":
-                output_file = os.path.join(out_dir, f"{base_name}_word.html")
-                success = DocToHtmlConverter().word_to_html(input_path, output_file)
-            elif mode == "pdf2md":
-                output_file = os.path.join(out_dir, f"{base_name}.md")
-                success = PdfMdConverter().pdf_to_markdown(input_path, output_file)
-            elif mode == "md2pdf":
-                output_file = os.path.join(out_dir, f"{base_name}_restored.pdf")
-                success = PdfMdConverter().markdown_to_pdf(input_path, output_file)
+            kwargs = self.converter_options(mode)
+            if "poppler_path" in kwargs:
+                print(f"📂 Poppler路径: {kwargs['poppler_path']}")
+            elif kwargs.get("renderer") == "fitz":
+                print("⚠️ 未找到 Poppler 文件夹，改用 PyMuPDF 渲染")
+
+            state = self.converters.state(mode, kwargs)
+            if state == LOADING:
+                print("⏳ 引擎仍在后台加载，完成后立即开始...")
+            elif state != READY:
+                print("📦 正在加载核心模块...")
+            converter = self.converters.get(mode, kwargs)
+            print(f"⚙️ 引擎: {registry.engine_name(mode)}")
+
+            output_file = os.path.join(out_dir, registry.output_name(mode, base_name))
+            success = registry.convert(mode, input_path, output_file, converter=converter,
+                                       cancel=self.cancel_token)
 
+            status = getattr(converter, "last_status", None)
             if success:
                 print(f"\n🎉 处理成功！文件已保存至: {output_file}")
                 messagebox.showinfo("成功", "处理完成！")
+            elif status in (CANCELLED, TIMEOUT):
+                print(f"\n⏹️ 任务{STATUS_LABELS[status]}。已完成的部分 (如有) 保存在: {output_file}")
+                messagebox.showwarning(STATUS_LABELS[status], f"任务{STATUS_LABELS[status]}，已保存部分结果")
             else:
                 print("\n❌ 核心程序返回失败。请查看上方具体报错信息。")
                 messagebox.showerror("失败", "处理失败，请查看日志")
@@ -206,6 +257,7 @@ class OcrApp:
             traceback.print_exc()
         finally:
             self.root.after(0, lambda: self.btn_run.config(state="normal", text="🚀 开始处理", bg="#007bff"))
+            self.root.after(0, lambda: self.btn_cancel.config(state="disabled", text="⏹️ 取消"))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,117 +1,217 @@
 import streamlit as st
 import os
+import uuid
+import hashlib
 import tempfile
-import shutil
-from streamlit_pdf_viewer import pdf_viewer 
 
 # === 导入共用核心模块 ===
-try:
-    from core.rapidocr import RapidOcrConverter
-    from core.word_pdf_html import DocToHtmlConverter
-    from core.pdf_md import PdfMdConverter
-except ImportError as e:
-    st.error(f"核心模块导入失败: {e}")
+# 只导入注册表，各模式的重型依赖在第一次使用时才加载
+from core import registry
+from core.app_paths import app_data_dir
+from core.cancellation import STATUS_LABELS, CANCELLED, TIMEOUT
+from core.scheduler import get_scheduler, AdmissionRejected
+from core.warmup import STATE_LABELS
+from core.warmup import FAILED as WARM_FAILED
 
 # === 页面配置 ===
 st.set_page_config(page_title="智能文档审计系统", layout="wide", page_icon="📄")
 
 st.title("📄 智能文档审计系统 (Web版)")
 
+# 所有会话共用一个调度器：固定数量的工作线程 + 公平队列，会话之间不再各建一套 OCR 引擎
+scheduler = get_scheduler()
+if "user_id" not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
+
 # (❌ 原来的 show_pdf 函数删掉，不再需要了)
 
+def job_options(mode, use_index):
+    """ 转换器构造参数 (预热与提交任务用同一份，工作线程才能直接复用预热好的引擎) """
+    kwargs = {"poppler_path": None} if mode == "ocr" else {}
+    if registry.is_resumable(mode):
+        # 中断后重跑只处理没完成的页 (入库的文件按内容分目录，同一份文件重新上传还是同一路径)
+        kwargs["checkpoint_dir"] = app_data_dir("checkpoints")
+    if use_index:
+        from core.search_index import default_index_path
+        kwargs["search_index"] = default_index_path()
+    return kwargs
+
 # === 侧边栏配置 ===
 with st.sidebar:
     st.header("功能设置")
     mode = st.radio(
         "选择功能模式",
-        (
-            "📄 扫描件 OCR -> HTML",
-            "💻 数字 PDF -> HTML",
-            "📝 Word -> HTML",
-            "⬇️ PDF -> Markdown",
-            "⬆️ Markdown -> PDF"
-        )
+        list(registry.CONVERTERS),
+        format_func=lambda m: registry.CONVERTERS[m]["label"]
     )
     st.markdown("---")
     uploaded_file = st.file_uploader("请上传文件", type=["pdf", "docx", "md"])
+    use_index = registry.is_searchable(mode) and st.checkbox(
+        "🔎 加入全文检索索引", value=False,
+        help="上传文件与转换结果保存到本地文档库，可在「全文检索」页面搜索"
+    )
+    # 任务在共用的工作线程里运行 (可随时取消)，时限兜底防止异常文档长期占住工作线程
+    timeout_min = st.number_input(
+        "⏱️ 单文档时限 (分钟，0 为不限)", min_value=0, value=30, step=5,
+        help="超时后停止处理，已完成的页照常输出"
+    )
+    # 选中模式就让工作线程在后台加载引擎 (已加载的不重复)，上传完文件时通常已就绪
+    # 加载失败的不会每次重跑都重试 (见 core/warmup.py)，要立即重试点下面的按钮
+    engine_options = job_options(mode, use_index)
+    scheduler.warm_up(mode, engine_options)
+    load = scheduler.stats()
+    st.caption(f"🖥️ 服务器负载：处理中 {load['running']}/{load['workers']}，排队 {load['queued']}")
+    engine_state = scheduler.warm_state(mode, engine_options)
+    st.caption(STATE_LABELS[engine_state])
+    if engine_state == WARM_FAILED:
+        st.button("🔄 重新加载引擎", on_click=scheduler.retry_warm_up, args=(mode, engine_options))
 
 # === 主逻辑区域 ===
+# 预览按页取：结果只读一次、切一次页 (按任务缓存)，每次重跑只把当前页发给浏览器，
+# 预览开销不再随文档大小增长
+PREVIEW_THUMBNAILS = 6
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_preview(job_id, output_name, _job, _source):
+    from core.preview import PagedResult
+    data = _job.result
+    if _job.output is not None:
+        with open(_job.output, "rb") as f:
+            data = f.read()
+    source_pdf = None
+    source_name = getattr(_source, "name", _source)
+    if isinstance(source_name, str) and source_name.lower().endswith(".pdf"):
+        # 源 PDF 与结果逐页对应时用来做缩略图
+        if isinstance(_source, str):
+            with open(_source, "rb") as f:
+                source_pdf = f.read()
+        else:
+            source_pdf = _source.getvalue()
+    return PagedResult(data, output_name, source_pdf=source_pdf)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def preview_page(job_id, index, _doc):
+    return _doc.page(index)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def preview_thumbnail(job_id, index, _doc):
+    return _doc.thumbnail(index)
+
+def _goto_page(page):
+    st.session_state.preview_page = page
+
+def show_preview(job, doc):
+    """ 翻页 + 缩略图条，只渲染当前页 """
+    total = len(doc)
+    if st.session_state.get("preview_job") != job.id:
+        st.session_state.preview_job = job.id
+        st.session_state.preview_page = 1
+    current = min(max(st.session_state.preview_page, 1), total)
+
+    if total > 1:
+        nav_prev, nav_page, nav_next, nav_info = st.columns([1, 2, 1, 4])
+        nav_prev.button("⬅️ 上一页", on_click=_goto_page, args=(current - 1,), disabled=current <= 1)
+        nav_next.button("下一页 ➡️", on_click=_goto_page, args=(current + 1,), disabled=current >= total)
+        nav_page.number_input("页码", min_value=1, max_value=total, key="preview_page",
+                              label_visibility="collapsed")
+        nav_info.caption(f"共 {total} 页" if doc.paginated else f"共 {total} 段 (按大小分段)")
+
+        if doc.has_thumbnails:
+            # 只取当前页附近的一小段缩略图
+            first = max(0, min(current - 1 - PREVIEW_THUMBNAILS // 2, total - PREVIEW_THUMBNAILS))
+            for col, index in zip(st.columns(PREVIEW_THUMBNAILS), range(first, min(first + PREVIEW_THUMBNAILS, total))):
+                image = preview_thumbnail(job.id, index, doc)
+                if image is not None:
+                    col.image(image, width="stretch")
+                col.button(f"{'▶ ' if index + 1 == current else ''}第 {index + 1} 页", key=f"thumb_{index}",
+                           on_click=_goto_page, args=(index + 1,))
+
+    page = preview_page(job.id, current - 1, doc)
+    if doc.kind == "html":
+        st.components.v1.html(page, height=800, scrolling=True)
+    elif doc.kind == "md":
+        st.markdown(page)
+    else:
+        st.image(page, width="stretch")
+
+def show_result(job):
+    """ 展示已结束的任务 """
+    output_name = st.session_state.job_output_name
+
+    if job.ok and (job.result is not None or job.output is not None):
+        st.success("✅ 转换成功！")
+        doc = load_preview(job.id, output_name, job, st.session_state.get("job_source"))
+
+        # 下载按钮
+        st.download_button(
+            label="💾 下载结果文件",
+            data=doc.data,
+            file_name=output_name,
+            mime="application/octet-stream"
+        )
+
+        st.markdown("### 📄 结果预览")
+        show_preview(job, doc)
+
+    elif job.status in (CANCELLED, TIMEOUT):
+        st.warning(f"⏹️ 任务{STATUS_LABELS[job.status]}，未完成全部页面。")
+    else:
+        st.error(f"❌ 转换失败，请检查文件内容或日志。{job.error or ''}")
+
+
 if uploaded_file:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        input_path = os.path.join(temp_dir, uploaded_file.name)
-        with open(input_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        st.info(f"正在处理: {uploaded_file.name}")
-        
-        base_name = os.path.splitext(uploaded_file.name)[0]
-        output_path = ""
-        success = False
-        
-        if st.button("🚀 开始处理", type="primary"):
-            with st.spinner("正在转换中，请稍候..."):
-                try:
-                    # --- 分发逻辑 ---
-                    if "OCR" in mode:
-                        output_path = os.path.join(temp_dir, f"{base_name}_ocr.html")
-                        converter = RapidOcrConverter(poppler_path=None) 
-                        success = converter.scanned_pdf_to_html(input_path, output_path)
-
-                    elif "数字 PDF" in mode:
-                        output_path = os.path.join(temp_dir, f"{base_name}_digital.html")
-                        converter = DocToHtmlConverter()
-                        success = converter.pdf_to_html(input_path, output_path)
-
-                    elif "Word" in mode:
-                        output_path = os.path.join(temp_dir, f"{base_name}.html")
-                        converter = DocToHtmlConverter()
-                        success = converter.word_to_html(input_path, output_path)
-
-                    elif "PDF -> Markdown" in mode:
-                        output_path = os.path.join(temp_dir, f"{base_name}.md")
-                        converter = PdfMdConverter()
-                        success = converter.pdf_to_markdown(input_path, output_path)
-
-                    elif "Markdown -> PDF" in mode:
-                        output_path = os.path.join(temp_dir, f"{base_name}_restored.pdf")
-                        converter = PdfMdConverter()
-                        success = converter.markdown_to_pdf(input_path, output_path)
-
-                    # --- 结果展示 ---
-                    if success and os.path.exists(output_path):
-                        st.success("✅ 转换成功！")
-                        
-                        # 下载按钮
-                        with open(output_path, "rb") as f:
-                            st.download_button(
-                                label="💾 下载结果文件",
-                                data=f,
-                                file_name=os.path.basename(output_path),
-                                mime="application/octet-stream"
-                            )
-                        
-                        st.markdown("### 📄 结果预览")
-                        
-                        if output_path.endswith(".html"):
-                            with open(output_path, "r", encoding="utf-8") as f:
-                                st.components.v1.html(f.read(), height=600, scrolling=True)
-                        
-                        elif output_path.endswith(".md"):
-                            with open(output_path, "r", encoding="utf-8") as f:
-                                st.markdown(f.read())
-                        
-                        elif output_path.endswith(".pdf"):
-                            # ✅ 使用新库进行预览 (它把PDF渲染成图片，Chrome 不会拦截)
-                            # width 设置为 800 或更大以适应宽屏
-                            pdf_viewer(input=output_path, width=800, height=1000)
-
-                    else:
-                        st.error("❌ 转换失败，请检查文件内容或日志。")
-
-                except Exception as e:
-                    st.error(f"发生系统错误: {e}")
-                    # 打印详细堆栈方便调试
-                    import traceback
-                    st.text(traceback.format_exc())
+    st.info(f"正在处理: {uploaded_file.name}")
+
+    base_name = os.path.splitext(uploaded_file.name)[0]
+    output_name = registry.output_name(mode, base_name)
+
+    if st.button("🚀 开始处理", type="primary"):
+        try:
+            registry.resolve(mode)
+        except ImportError as e:
+            st.error(f"核心模块导入失败: {e}")
+            st.stop()
+
+        kwargs = dict(engine_options)
+        source, output_path = uploaded_file, None
+        if use_index:
+            # 加入索引的文件要长期保存 (检索结果还要能打开)：源文件与结果写进本地文档库
+            # 按内容哈希分目录：不同会话上传同名的不同文件互不覆盖 (工作线程可能还在读旧文件)
+            data = uploaded_file.getvalue()
+            library = app_data_dir("library", hashlib.sha256(data).hexdigest()[:16])
+            source = os.path.join(library, uploaded_file.name)
+            if not os.path.exists(source):
+                # 先写临时文件再改名：并发上传同一份文件时，别的任务不会读到写了一半的源文件
+                fd, tmp_path = tempfile.mkstemp(dir=library, suffix=".part")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, source)
+            output_path = os.path.join(library, output_name)
+        # 不入库时全程在内存里转换：上传内容直接交给转换器，结果以 bytes 返回，不落盘
+
+        try:
+            st.session_state.job = scheduler.submit(
+                st.session_state.user_id, mode, source, output=output_path, options=kwargs,
+                timeout=timeout_min * 60 or None, page_timeout=registry.page_timeout(mode))
+            st.session_state.job_output_name = output_name
+            st.session_state.job_source = source
+        except AdmissionRejected as e:
+            st.warning(f"⏳ {e}")
+
+    # 任务对象保存在会话里：页面重跑 (点按钮、切换选项) 后仍能接着看进度和结果
+    job = st.session_state.get("job")
+    if job is not None:
+        if not job.done:
+            if st.button("⏹️ 取消任务"):
+                job.cancel()
+            status_box = st.empty()
+            while not job.wait(0.5):
+                position = job.position()
+                if position is None:
+                    status_box.info(f"⚙️ 正在转换 #{job.id}，请稍候...")
+                else:
+                    status_box.info(f"⏳ 排队中：前面还有 {position} 个任务")
+            status_box.empty()
+        show_result(job)
 else:
-    st.info("👈 请先在左侧侧边栏上传文件")
\ No newline at end of file
+    st.info("👈 请先在左侧侧边栏上传文件")
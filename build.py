@@ -1,6 +1,7 @@
 import os
 import PyInstaller.__main__
 import rapidocr_onnxruntime
+from core.registry import CONVERTERS
 
 # 1. 自动定位库的安装路径
 package_path = os.path.dirname(rapidocr_onnxruntime.__file__)
@@ -9,6 +10,9 @@ print(f"📍 RapidOCR 路径: {package_path}")
 # 2. 构造资源路径参数 (源路径;目标路径)
 add_data_arg = f"{package_path};rapidocr_onnxruntime"
 
+# 2.1 core 模块由 registry 延迟导入 (importlib)，PyInstaller 静态分析看不到，需显式声明
+hidden_imports = sorted({module for spec in CONVERTERS.values() for module, _, _ in spec["candidates"]})
+
 print("⏳ 开始强力打包 (包含 config.yaml 和模型)...")
 
 # 3. 执行打包
@@ -20,6 +24,6 @@ PyInstaller.__main__.run([
     '--noconfirm',
     '--clean',
     f'--add-data={add_data_arg}',  # <--- 这行代码解决了您的问题
-])
+] + [f'--hidden-import={m}' for m in hidden_imports])
 
 print("\n✅ 打包完成！")
\ No newline at end of file
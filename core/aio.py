@@ -0,0 +1,268 @@
+import io
+import os
+import asyncio
+import threading
+import concurrent.futures
+from core import registry
+from core.cancellation import CancelToken, OK, FAILED, CANCELLED
+from core.doc_io import is_path, read_bytes, source_name, write_output
+from core.warmup import ConverterCache
+
+# =========================================================================
+# asyncio 接口
+# 转换器的方法都是同步的 (OCR 一份扫描件要几十秒到几分钟)，在事件循环里直接调用会卡住整个服务。
+# 这里把整个转换交给线程池 (默认) 或进程池执行，事件循环只做等待：
+#   - await service.convert(...)                 结果与 registry.convert 相同 (True / False)
+#   - async for index, content in job: ...       逐页拿到结果 (由 CancelToken.page_done 转发)
+#   - 等待中的协程被取消 (task.cancel() / 超时) -> 通知转换器在下一页前停止，部分结果照常写出
+#   - 信号量限制同时在跑的重型任务数，其余任务在事件循环里排队，不占线程
+# 每个执行线程 / 进程各自缓存转换器 (热引擎)，同样的 (模式, 参数) 不重复加载模型
+# =========================================================================
+
+_DONE = object()
+_local = threading.local()
+
+
+def _worker_cache():
+    """ 当前执行线程 (或进程池里的当前进程) 的转换器缓存 """
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        cache = _local.cache = ConverterCache()
+    return cache
+
+
+def _execute(mode, source, output, options, token):
+    """
+    在执行线程 / 进程里运行；返回 (是否成功, 状态, 写进内存缓冲区的内容 或 None)
+    output 为 None 时内容可能是失败 / 取消前写出的部分结果，由调用方按"是否成功"决定怎么用
+    """
+    converter = _worker_cache().get(mode, options)
+    buffer = io.BytesIO() if output is None else output
+    ok = registry.convert(mode, source, buffer, converter=converter, cancel=token)
+    status = getattr(converter, "last_status", None) or (OK if ok else FAILED)
+    return ok, status, buffer.getvalue() if output is None else None
+
+
+def _execute_in_process(mode, source, output, options, timeout, page_timeout, event, pages):
+    """ 进程池入口 (须为模块级函数才能被 pickle)；取消与逐页结果都经由 Manager 代理对象跨进程传递 """
+    on_page = (lambda index, content: pages.put((index, content))) if pages is not None else None
+    token = CancelToken(timeout=timeout, page_timeout=page_timeout, on_page=on_page, event=event)
+    return _execute(mode, source, output, options, token)
+
+
+class AsyncJob:
+    """
+    由 AsyncConverter.submit() 创建，创建时即开始排队
+        async for index, content in job: ...   # 逐页结果 (可以不迭代，直接 await)
+        result = await job                      # 同 registry.convert / convert_to_bytes 的返回值
+        job.cancel()
+    status: 结束后为 ok / failed / cancelled / timeout (core/cancellation.py)
+    """
+
+    def __init__(self, service, mode, source, output, options, timeout, page_timeout, stream):
+        self.mode = mode
+        self.status = None
+        self._pages = asyncio.Queue() if stream else None
+        self._task = asyncio.ensure_future(
+            service._run(self, mode, source, output, options, timeout, page_timeout))
+
+    @property
+    def done(self):
+        return self._task.done()
+
+    def cancel(self):
+        self._task.cancel()
+
+    def __await__(self):
+        return self._task.__await__()
+
+    def _page(self, index, content):
+        if self._pages is not None:
+            self._pages.put_nowait((index, content))
+
+    def _close(self):
+        if self._pages is not None:
+            self._pages.put_nowait(_DONE)
+
+    def __aiter__(self):
+        if self._pages is None:
+            raise RuntimeError("submit(..., stream=False) 的任务不提供逐页结果")
+        return self
+
+    async def __anext__(self):
+        item = await self._pages.get()
+        if item is _DONE:
+            self._pages.put_nowait(_DONE)   # 再次迭代时立即结束
+            raise StopAsyncIteration
+        return item
+
+
+class AsyncConverter:
+    """
+    service = AsyncConverter(max_jobs=2)                          # 线程池
+    service = AsyncConverter(max_jobs=4, use_processes=True)      # 进程池 (绕开 GIL，适合多核跑多份 OCR)
+    ok = await service.convert("ocr", "scan.pdf", "scan.html", timeout=600)
+    data = await service.convert_to_bytes("pdf2md", uploaded_bytes)
+    job = service.submit("pdf2md", "a.pdf", "a.md"); async for i, md in job: ...; await job
+    也可以传入自己的 executor (ThreadPoolExecutor / ProcessPoolExecutor)，关闭由调用方负责
+    进程池模式下：文件对象输入会先读成 bytes 再传过去，可写流输出由子进程返回 bytes 后在本进程写入
+    """
+
+    def __init__(self, max_jobs=2, executor=None, use_processes=False):
+        self.max_jobs = max_jobs
+        self._own_executor = executor is None
+        if executor is None:
+            if use_processes:
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_jobs)
+            else:
+                # 让每个 OCR 引擎只拿 1/max_jobs 的核心 (见 core/ort_session.auto_thread_policy)
+                os.environ.setdefault("DOC_AUDIT_OCR_ENGINES", str(max_jobs))
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_jobs,
+                                                                 thread_name_prefix="aio-convert")
+        self.executor = executor
+        self.use_processes = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+        self._semaphore = asyncio.Semaphore(max_jobs)
+        self._manager = None
+        self.running = 0
+        self.queued = 0
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+    def submit(self, mode, source, output=None, timeout=None, page_timeout=None, stream=True, **options):
+        """
+        须在事件循环里调用；output 为 None 时结果以 bytes 返回
+        options 为转换器构造参数 (同 registry.create_converter)
+        """
+        if mode not in registry.CONVERTERS:
+            raise ValueError(f"未知模式: {mode}")
+        return AsyncJob(self, mode, source, output, options, timeout, page_timeout, stream)
+
+    async def convert(self, mode, source, output, timeout=None, page_timeout=None, **options):
+        """ 返回是否成功 (同 registry.convert)；被取消时抛 asyncio.CancelledError """
+        return await self.submit(mode, source, output, timeout, page_timeout, stream=False, **options)
+
+    async def convert_to_bytes(self, mode, source, timeout=None, page_timeout=None, **options):
+        """ 成功返回结果 bytes，失败 / 超时返回 None (同 registry.convert_to_bytes) """
+        return await self.submit(mode, source, None, timeout, page_timeout, stream=False, **options)
+
+    async def scanned_pdf_to_html(self, source, output, **kwargs):
+        return await self.convert("ocr", source, output, **kwargs)
+
+    async def pdf_to_markdown(self, source, output, **kwargs):
+        return await self.convert("pdf2md", source, output, **kwargs)
+
+    async def markdown_to_pdf(self, source, output, **kwargs):
+        return await self.convert("md2pdf", source, output, **kwargs)
+
+    async def word_to_html(self, source, output, **kwargs):
+        return await self.convert("word", source, output, **kwargs)
+
+    def shutdown(self, wait=True):
+        """ 关闭自建的执行器 (传入的 executor 由调用方关闭) """
+        if self._own_executor:
+            self.executor.shutdown(wait=wait)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+    async def _run(self, job, mode, source, output, options, timeout, page_timeout):
+        self.queued += 1
+        waiting = True
+        try:
+            async with self._semaphore:
+                self.queued, waiting = self.queued - 1, False
+                self.running += 1
+                try:
+                    if self.use_processes:
+                        return await self._run_in_process(job, mode, source, output, options, timeout, page_timeout)
+                    return await self._run_in_thread(job, mode, source, output, options, timeout, page_timeout)
+                finally:
+                    self.running -= 1
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            raise
+        finally:
+            if waiting:
+                self.queued -= 1
+            if job.status is None:
+                job.status = FAILED
+            job._close()
+
+    async def _wait(self, job, future, cancel):
+        """ 等执行结果，返回 (是否成功, 缓冲区内容)；被取消时通知转换器停止，等它写完部分结果再把取消继续往外抛 """
+        try:
+            ok, job.status, data = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+        return ok, data
+
+    async def _run_in_thread(self, job, mode, source, output, options, timeout, page_timeout):
+        loop = asyncio.get_running_loop()
+        on_page = lambda index, content: loop.call_soon_threadsafe(job._page, index, content)
+        token = CancelToken(timeout=timeout, page_timeout=page_timeout, on_page=on_page)
+        future = loop.run_in_executor(self.executor, _execute, mode, source, output, options, token)
+        ok, data = await self._wait(job, future, token.cancel)
+        # 同 registry.convert_to_bytes：失败 / 超时返回 None，不返回空的或只写了一半的内容
+        return (data if ok else None) if output is None else ok
+
+    async def _run_in_process(self, job, mode, source, output, options, timeout, page_timeout):
+        loop = asyncio.get_running_loop()
+        if self._manager is None:
+            import multiprocessing
+            self._manager = multiprocessing.Manager()
+        event = self._manager.Event()
+        pages = self._manager.Queue() if job._pages is not None else None
+
+        # 文件对象不能 pickle：读成 bytes (保留文件名，日志 / 标题 / 检查点用)；流输出由子进程返回 bytes
+        if not is_path(source) and not isinstance(source, (bytes, bytearray)):
+            name = source_name(source)
+            source = io.BytesIO(read_bytes(source))
+            source.name = name
+        target = output if output is None or is_path(output) else None
+
+        stop = threading.Event()
+        forwarder = None
+        if pages is not None:
+            def forward():
+                # 子进程的逐页结果 -> 事件循环；任务结束后把队列里剩下的取完
+                import queue
+                while True:
+                    try:
+                        item = pages.get(timeout=0.1)
+                    except queue.Empty:
+                        if stop.is_set():
+                            return
+                        continue
+                    loop.call_soon_threadsafe(job._page, *item)
+            forwarder = threading.Thread(target=forward, name="aio-pages", daemon=True)
+            forwarder.start()
+
+        future = loop.run_in_executor(self.executor, _execute_in_process, mode, source, target, options,
+                                      timeout, page_timeout, event, pages)
+        try:
+            ok, data = await self._wait(job, future, event.set)
+        finally:
+            stop.set()
+            if forwarder is not None:
+                await loop.run_in_executor(None, forwarder.join)
+        if output is None:
+            return data if ok else None
+        if not is_path(output) and data:
+            # 与线程模式一致：失败 / 取消前写出的部分结果照样写进调用方的流，返回值仍按是否成功
+            write_output(output, data)
+        return ok
@@ -0,0 +1,36 @@
+import os
+import json
+import tempfile
+
+# =========================================================================
+# 本地数据目录 (量化模型、缓存、本机校准结果等)
+# 默认 ~/.doc_audit，可用环境变量 DOC_AUDIT_HOME 改到别处 (例如服务器的数据盘)
+# =========================================================================
+
+def app_data_dir(*parts, create=True):
+    base = os.environ.get("DOC_AUDIT_HOME") or os.path.join(os.path.expanduser("~"), ".doc_audit")
+    path = os.path.join(base, *parts)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_json(path, data):
+    """
+    把 data 写成 JSON：先写同目录下的唯一临时文件再替换，中途中断不会留下半个 JSON；
+    两个进程同时保存时互不踩踏对方的临时文件，最后替换的那份完整生效
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+
+# =========================================================================
+# 取消与超时
+# 转换方法接受 cancel=CancelToken(...)：
+#   - 界面的"取消"按钮调用 token.cancel()
+#   - timeout: 整个文档的时限 (秒)；page_timeout: 单页的时限 (秒)
+# 转换器在页与页之间、同一页的各阶段之间检查 token：
+#   文档被取消 / 超时 -> 停止处理，已完成的页照常写出 (部分结果)，返回 False，
+#                        转换器的 last_status 为 "cancelled" / "timeout"
+#   单页超时          -> 放弃该页剩余的阶段 (输出占位或降级结果)，继续下一页
+# 正在执行的单次调用 (一次 OCR 推理、一次 find_tables) 无法从外部打断，
+# 取消最迟在当前这一步结束后生效
+# token 同时负责逐页进度：转换器每写完一页调用 token.page_done(页序号, 内容)，
+# 调用方通过 on_page 回调拿到逐页结果 (core/aio.py 的异步迭代就靠它)
+# 桌面界面启动时就会导入本模块 (见 test/startup_test.py)，这里不能引入第三方依赖
+# =========================================================================
+
+# 界面提交任务时的单页时限 (秒)：异常页 (超大图片、损坏的内容流) 超时后跳过，不拖住整个任务
+# 可通过环境变量 DOC_AUDIT_PAGE_TIMEOUT 修改，0 为不限；各模式按自己的单页开销缩放 (见 registry.page_timeout)
+PAGE_TIMEOUT_SEC = 120
+
+OK = "ok"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+STATUS_LABELS = {
+    OK: "完成",
+    FAILED: "失败",
+    CANCELLED: "已取消",
+    TIMEOUT: "已超时",
+}
+
+
+class ConversionCancelled(Exception):
+    """ 文档被取消或超出时限；status 为 CANCELLED / TIMEOUT """
+
+    def __init__(self, status):
+        super().__init__(STATUS_LABELS.get(status, status))
+        self.status = status
+
+
+class CancelToken:
+    """
+    token = CancelToken(timeout=600, page_timeout=60)
+    token.cancel()                  # 任意线程调用
+    token.check()                   # 已取消 / 超时则抛 ConversionCancelled
+    token.page_expired(t0)          # 本页 (从 t0 = time.perf_counter() 起) 是否超时
+    token.page_done(i, 内容)         # 转换器每写完一页调用，转给 on_page(i, 内容)
+    不带参数的 CancelToken() 永不超时，只响应 cancel()
+    """
+
+    def __init__(self, timeout=None, page_timeout=None, on_page=None, event=None):
+        """
+        on_page: 逐页回调 on_page(页序号, 内容)，在转换线程里调用；内容随模式不同
+            (OCR 为识别文字、pdf2md 为该页 Markdown、PDF -> HTML 为该页 HTML 片段)
+        event: 自带的事件对象 (需有 set / is_set)，例如 multiprocessing.Manager().Event()，
+            用于在另一个进程里转换时跨进程取消；默认 threading.Event
+        """
+        self.timeout = timeout
+        self.page_timeout = page_timeout
+        self.on_page = on_page
+        self._deadline = time.perf_counter() + timeout if timeout else None
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def child(self, on_page=None):
+        """ 共享取消事件与文档时限、另设逐页回调的 token (一个任务内部再调用其他转换器时用) """
+        token = CancelToken(page_timeout=self.page_timeout, on_page=on_page, event=self._event)
+        token.timeout, token._deadline = self.timeout, self._deadline
+        return token
+
+    @property
+    def status(self):
+        """ None 表示可以继续；否则为 CANCELLED / TIMEOUT """
+        if self._event.is_set():
+            return CANCELLED
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            return TIMEOUT
+        return None
+
+    def check(self):
+        status = self.status
+        if status is not None:
+            raise ConversionCancelled(status)
+
+    def remaining(self):
+        """ 距文档时限还剩多少秒 (没有时限为 None) """
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.perf_counter())
+
+    def page_expired(self, started):
+        return bool(self.page_timeout) and time.perf_counter() - started > self.page_timeout
+
+    def page_done(self, index, content):
+        """ 回调出错只打印，不影响转换本身 """
+        if self.on_page is None:
+            return
+        try:
+            self.on_page(index, content)
+        except Exception as e:
+            print(f"⚠️ 逐页回调出错 (第 {index + 1} 页): {e}")
+
+
+def page_timeout_from_env(default=PAGE_TIMEOUT_SEC):
+    """ 单页时限 (秒)，环境变量 DOC_AUDIT_PAGE_TIMEOUT 优先；0 或负数表示不限，返回 None """
+    try:
+        seconds = float(os.environ.get("DOC_AUDIT_PAGE_TIMEOUT", default))
+    except ValueError:
+        seconds = default
+    return seconds if seconds > 0 else None
+
+
+def ensure_token(cancel):
+    """ 转换方法的 cancel 参数可省略：返回一个永不超时的 token，调用处不必到处判断 None """
+    return cancel if cancel is not None else CancelToken()
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from core.doc_io import is_path, source_name, open_binary
+
+# =========================================================================
+# 逐页检查点：长任务中途失败可续跑，文档改版后只重做变化的页
+# 每个文档一个 JSON Lines 文件：
+#   第一行  {"version", "kind", "source", "signature"}   签名 = 影响结果的转换参数
+#   其余行  {"page", "fp", "result"}                      每完成一页追加一行 (写一行、刷一次盘)
+# 按页指纹 (而非页码) 复用：插页 / 删页后，没变的页照样能命中
+#   扫描件 -> 渲染后像素的哈希 (pixel_fingerprint)
+#   数字 PDF -> 内容流 + 页面尺寸 + 字体的哈希 (page_fingerprint)
+# 检查点按源文件的完整路径区分 (同一路径上的改版能复用)；内存数据没有路径，
+# 按 文件名 + 内容哈希 区分，只用于同一份内容的中断续跑。
+# 超过 CHECKPOINT_MAX_AGE_DAYS 天没有用过的检查点 (以及崩溃留下的临时文件) 会被清理
+# =========================================================================
+
+CHECKPOINT_VERSION = 2
+CHECKPOINT_MAX_AGE_DAYS = 30
+_pruned_dirs = set()
+
+
+def pixel_fingerprint(img_np):
+    """ 渲染图像的内容哈希 (形状 + 全部像素字节)；300 DPI 整页约 20ms """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((img_np.shape, str(img_np.dtype))).encode())
+    digest.update(memoryview(img_np if img_np.flags["C_CONTIGUOUS"] else img_np.copy()).cast("B"))
+    return digest.hexdigest()
+
+
+def page_fingerprint(page):
+    """ 数字 PDF 页的哈希 (PyMuPDF Page)：内容流、页面框、旋转、所用字体，不需要渲染或解析文字 """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(page.read_contents())
+    digest.update(repr((tuple(page.rect), page.rotation)).encode())
+    digest.update(repr(sorted(font[3] for font in page.get_fonts())).encode())
+    return digest.hexdigest()
+
+
+def source_identity(source):
+    """ 检查点的文档标识：路径取绝对路径；内存数据取 文件名#内容哈希 (从头读，读完恢复原读取位置) """
+    if is_path(source):
+        return os.path.abspath(os.fspath(source))
+    digest = hashlib.blake2b(digest_size=16)
+    with open_binary(source) as f:
+        position = f.tell()
+        f.seek(0)
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        f.seek(position)
+    return f"{source_name(source)}#{digest.hexdigest()}"
+
+
+def prune_checkpoints(directory, max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+    """ 删掉超过 max_age_days 天未修改的检查点 / 临时文件，返回删除的文件数 """
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        if not name.endswith((".jsonl", ".tmp")):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class PageCheckpoint:
+    """
+    checkpoint = PageCheckpoint(目录, 源文件 (路径或内存数据), "ocr", {影响结果的参数})
+    result = checkpoint.get(指纹)         # 上次同样内容的页面结果，没有则 None
+    checkpoint.record(页序号, 指纹, 结果)  # 每完成一页立即追加
+    checkpoint.finish()                   # 成功后压缩：只保留本次文档的页面
+    同一文档 (同类任务 + 同一路径，内存数据为同名同内容) 对应同一个检查点；签名不一致 (换了引擎 / 参数) 时作废重来
+    get 与 record 可以在不同线程里调用 (读旧记录、写新记录，互不干扰)
+    """
+
+    def __init__(self, directory, source, kind, signature=None):
+        os.makedirs(directory, exist_ok=True)
+        if directory not in _pruned_dirs:
+            # 每个进程每个目录清理一次
+            _pruned_dirs.add(directory)
+            prune_checkpoints(directory)
+        self.directory = directory
+        self.kind = kind
+        self.source = source_identity(source)
+        self.signature = signature or {}
+        key = hashlib.sha1(f"{kind}:{self.source}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{kind}_{key}.jsonl")
+
+        self._previous = self._load()
+        self._current = {}   # 页序号 -> {"page", "fp", "result"}
+        self.reused = 0
+        self._file = None
+
+    def _header(self):
+        return {"version": CHECKPOINT_VERSION, "kind": self.kind, "source": self.source,
+                "signature": self.signature}
+
+    def _load(self):
+        """ 返回 {指纹: 记录}；文件缺失、签名不符时为空；最后一行写了一半 (中途崩溃) 时忽略该行 """
+        if not os.path.exists(self.path):
+            return {}
+        records = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "null")
+                # 经过 JSON 往返再比较，元组 / 列表之类的差异不会导致误判
+                if header != json.loads(json.dumps(self._header())):
+                    return {}
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    records[record["fp"]] = record
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ 检查点无法读取，已忽略: {e}")
+            return {}
+        return records
+
+    def __len__(self):
+        return len(self._previous)
+
+    def get(self, fingerprint):
+        record = self._previous.get(fingerprint)
+        if record is None:
+            return None
+        self.reused += 1
+        return record["result"]
+
+    def record(self, page, fingerprint, result):
+        if self._file is None:
+            # 先把上次的记录原样保留 (本次如果又中断，已完成的页仍然有效)，再追加本次的
+            self._file = self._rewrite(list(self._previous.values()), keep_open=True)
+        entry = {"page": page, "fp": fingerprint, "result": result}
+        self._current[page] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _rewrite(self, entries, keep_open=False):
+        """
+        整体重写检查点 (先写临时文件再替换)；keep_open 时返回可继续追加的文件对象
+        临时文件名唯一：同一文档的两个任务同时重写时互不踩踏，最后替换的那份完整生效
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self._header(), ensure_ascii=False) + "\n")
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return open(self.path, "a", encoding="utf-8") if keep_open else None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """ 任务成功：只保留本次文档各页的记录 (按页序)，丢掉改版前旧页面的结果 """
+        self.close()
+        entries = [self._current[page] for page in sorted(self._current)]
+        self._rewrite(entries)
+        self._previous = {e["fp"]: e for e in entries}
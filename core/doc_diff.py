@@ -0,0 +1,341 @@
+import io
+import re
+import html
+import time
+import hashlib
+import difflib
+from core.cancellation import OK, FAILED, ConversionCancelled, ensure_token
+from core.doc_io import is_path, source_exists, source_name, read_text, open_binary, open_pdf, write_output
+
+# =========================================================================
+# 两个版本的文档比对 (合同 v3 vs v4)
+# 逐字全文比对几百页要比较几十万行；改版通常只动了几处，绝大多数页原样未变。
+# 这里分三层，越往下越细、处理的内容越少：
+#   1. 每行算指纹 (规范化空白后取 64 位哈希)，每页的指纹是行指纹序列的多项式滚动哈希
+#   2. 按页指纹对齐两个版本：指纹相同的页直接跳过 (每页 O(1))，只剩增删改过的页段
+#   3. 只在这些页段里按行指纹做行级比对，改动的行再做字符级比对，标出具体增删的字
+# 文字来源沿用现有的提取器：数字 PDF 用 PdfMdConverter 的版面行，扫描件用 OCR 识别行，
+# Word 用流式解析 (core/docx_stream.py) 的段落文字，Markdown 直接按行
+# Word / Markdown 没有页：按内容切块 (行指纹满足条件处断开)，插入内容只影响所在的块，不会让后面的块全部错位
+# 结果是一份 HTML 改动报告
+# =========================================================================
+
+KINDS = ("pdf", "ocr", "word", "md")
+
+_MASK = (1 << 64) - 1
+_BASE = 1099511628211          # 滚动哈希的乘数 (64 位 FNV 素数)
+_SPACE = re.compile(r"\s+")
+
+
+def line_fingerprint(line):
+    """ 规范化空白后的 64 位指纹；排版造成的空格 / 换行差异不算改动 """
+    digest = hashlib.blake2b(_SPACE.sub(" ", line).strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def page_fingerprint(line_fps):
+    """ 行指纹序列的多项式滚动哈希：行的内容或顺序变了，页指纹就变 """
+    fp = len(line_fps)
+    for h in line_fps:
+        fp = (fp * _BASE + h) & _MASK
+    return fp
+
+
+def chunk_lines(lines, min_lines=8, max_lines=120, divisor=32):
+    """
+    没有分页的文字 (Word / Markdown) 按内容切块：在指纹能被 divisor 整除的行后断开
+    断点只取决于行本身的内容，某处增删几行时，其余块的边界不变
+    """
+    pages, current = [], []
+    for line in lines:
+        current.append(line)
+        if len(current) >= max_lines or (len(current) >= min_lines and line_fingerprint(line) % divisor == 0):
+            pages.append(current)
+            current = []
+    if current:
+        pages.append(current)
+    return pages
+
+
+def _clean_lines(text):
+    return [line for line in (_SPACE.sub(" ", raw).strip() for raw in text.splitlines()) if line]
+
+
+class _Version:
+    """ 一个版本的逐页文字与指纹 """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.line_fps = [[line_fingerprint(line) for line in page] for page in pages]
+        self.page_fps = [page_fingerprint(fps) for fps in self.line_fps]
+
+
+def _char_diff(old, new):
+    """ 一对改动过的行 -> (旧行 HTML, 新行 HTML)，删掉的字 <del>、新增的字 <ins> """
+    old_html, new_html = [], []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        a, b = html.escape(old[i1:i2]), html.escape(new[j1:j2])
+        if tag == "equal":
+            old_html.append(a)
+            new_html.append(b)
+            continue
+        if a:
+            old_html.append(f"<del>{a}</del>")
+        if b:
+            new_html.append(f"<ins>{b}</ins>")
+    return "".join(old_html), "".join(new_html)
+
+
+def diff_versions(old_pages, new_pages, similar=0.5):
+    """
+    old_pages / new_pages: 每页一个行列表
+    返回 dict：
+        old_pages / new_pages   两个版本的页数
+        unchanged_pages         指纹相同、直接跳过的页数
+        hunks                   改动段列表，每段 {"old": (起页, 止页), "new": (起页, 止页), "lines": [...]}
+                                (页号从 0 开始、左闭右开)；lines 每项为
+                                {"op": "replace"/"delete"/"insert", "old_page", "new_page", "old", "new"}
+                                (old / new 为已转义、带 <del>/<ins> 标记的 HTML，没有的一侧为 None)
+        added / removed / changed   行数统计
+    """
+    old, new = _Version(old_pages), _Version(new_pages)
+    result = {"old_pages": len(old_pages), "new_pages": len(new_pages), "unchanged_pages": 0,
+              "hunks": [], "added": 0, "removed": 0, "changed": 0}
+
+    pages = difflib.SequenceMatcher(None, old.page_fps, new.page_fps, autojunk=False)
+    for tag, i1, i2, j1, j2 in pages.get_opcodes():
+        if tag == "equal":
+            result["unchanged_pages"] += i2 - i1
+            continue
+        hunk = {"old": (i1, i2), "new": (j1, j2), "lines": []}
+        _diff_lines(old, new, range(i1, i2), range(j1, j2), hunk["lines"], similar, result)
+        if hunk["lines"]:
+            result["hunks"].append(hunk)
+        else:
+            # 只有空白 / 行内排版不同：页指纹不同但逐行相同
+            result["unchanged_pages"] += i2 - i1
+    return result
+
+
+def _diff_lines(old, new, old_range, new_range, out, similar, stats):
+    """ 一段页内按行指纹比对；改动的行两两配对做字符级比对，差别太大的按删除 + 新增处理 """
+    old_lines = [(p, line) for p in old_range for line in old.pages[p]]
+    new_lines = [(p, line) for p in new_range for line in new.pages[p]]
+    old_fps = [h for p in old_range for h in old.line_fps[p]]
+    new_fps = [h for p in new_range for h in new.line_fps[p]]
+
+    def removed(i):
+        stats["removed"] += 1
+        out.append({"op": "delete", "old_page": old_lines[i][0], "new_page": None,
+                    "old": html.escape(old_lines[i][1]), "new": None})
+
+    def added(j):
+        stats["added"] += 1
+        out.append({"op": "insert", "old_page": None, "new_page": new_lines[j][0],
+                    "old": None, "new": html.escape(new_lines[j][1])})
+
+    matcher = difflib.SequenceMatcher(None, old_fps, new_fps, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        pairs = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(pairs):
+            a, b = old_lines[i1 + k][1], new_lines[j1 + k][1]
+            if difflib.SequenceMatcher(None, a, b, autojunk=False).quick_ratio() < similar:
+                removed(i1 + k)
+                added(j1 + k)
+                continue
+            stats["changed"] += 1
+            old_html, new_html = _char_diff(a, b)
+            out.append({"op": "replace", "old_page": old_lines[i1 + k][0], "new_page": new_lines[j1 + k][0],
+                        "old": old_html, "new": new_html})
+        for i in range(i1 + pairs, i2):
+            removed(i)
+        for j in range(j1 + pairs, j2):
+            added(j)
+
+
+class DocDiffer:
+    """
+    两个版本比对，输出 HTML 改动报告
+        differ = DocDiffer()                       # 按扩展名 / 内容自动判断文字来源
+        differ.compare("合同v3.pdf", "合同v4.pdf", "v3_vs_v4.html")
+        differ.last_result                         # diff_versions 的结果 (含耗时 timings)
+    输入输出同转换器，可以是路径或内存数据 (见 core/doc_io.py)
+    """
+
+    REPORT_CSS = """
+        body { font-family: "Microsoft YaHei", sans-serif; max-width: 1200px; margin: 20px auto; padding: 0 20px; color: #333; }
+        table.summary td { padding: 2px 12px 2px 0; }
+        section.hunk { margin: 1.5em 0; }
+        section.hunk h3 { font-size: 1em; background: #f2f2f2; padding: 4px 8px; margin: 0; }
+        table.diff { border-collapse: collapse; width: 100%; table-layout: fixed; }
+        table.diff td { border: 1px solid #ddd; padding: 3px 6px; vertical-align: top; word-wrap: break-word; }
+        table.diff td.page { width: 4em; color: #888; text-align: right; }
+        tr.delete td.old, tr.replace td.old { background: #fff0f0; }
+        tr.insert td.new, tr.replace td.new { background: #f0fff0; }
+        del { background: #ffc0c0; text-decoration: line-through; }
+        ins { background: #b0f0b0; text-decoration: none; }
+    """
+
+    def __init__(self, kind=None, ocr_converter=None, converters=None, ocr_options=None):
+        """
+        kind: 两个版本的文字来源，"pdf" / "ocr" / "word" / "md"；None 时按扩展名判断，
+            PDF 前几页基本没有文字层时按扫描件 (ocr) 处理
+        ocr_converter: 扫描件使用的 OCR 转换器 (可传入已预热的实例)，缺省时第一次用到才创建
+        converters: 转换器缓存 (core/warmup.py)；给出时 OCR 转换器用 ocr_options 从缓存里取，不另建引擎
+        """
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"未知 kind: {kind}，可选 {' / '.join(KINDS)}")
+        self.kind = kind
+        self.ocr_converter = ocr_converter
+        self.converters = converters
+        self.ocr_options = ocr_options
+        self.last_result = None
+        self.last_status = None
+
+    # ------------------------------------------------------------------
+    # 文字提取 (每页一个行列表)
+    # ------------------------------------------------------------------
+    def detect_kind(self, source, probe_pages=5):
+        name = source_name(source, "").lower()
+        if name.endswith(".docx"):
+            return "word"
+        if name.endswith((".md", ".markdown", ".txt")):
+            return "md"
+        doc = open_pdf(source)
+        try:
+            probe = min(probe_pages, len(doc))
+            text_pages = sum(1 for i in range(probe) if len(doc[i].get_text().strip()) >= 20)
+        finally:
+            doc.close()
+        return "pdf" if text_pages * 2 > probe else "ocr"
+
+    def extract_pages(self, source, kind=None, cancel=None):
+        cancel = ensure_token(cancel)
+        kind = kind or self.kind or self.detect_kind(source)
+        if kind == "pdf":
+            from core.pdf_md import PdfMdConverter
+            doc = open_pdf(source)
+            try:
+                return [_clean_lines("\n".join(contents))
+                        for contents in PdfMdConverter().iter_page_markdown(doc, cancel)]
+            finally:
+                doc.close()
+        if kind == "ocr":
+            return self._ocr_pages(source, cancel)
+        if kind == "word":
+            from core.docx_stream import iter_docx_html
+            lines = []
+            with open_binary(source) as f:
+                for _, text in iter_docx_html(f):
+                    cancel.check()
+                    lines.extend(_clean_lines(text))
+            return chunk_lines(lines)
+        # pdf2md 结果里的分页标记不算正文 (页号随增删页整体错位，会被当成改动)
+        from core.preview import MD_PAGE_MARKER
+        return chunk_lines(_clean_lines(MD_PAGE_MARKER.sub("", read_text(source))))
+
+    def _ocr_pages(self, source, cancel):
+        """ 走完整的 OCR 流水线 (预取、预处理、方向校正都照常)，逐页识别行由 page_done 收集 """
+        if self.ocr_converter is None and self.converters is not None:
+            self.ocr_converter = self.converters.get("ocr", self.ocr_options)
+        elif self.ocr_converter is None:
+            from core import registry
+            self.ocr_converter = registry.create_converter("ocr", **(self.ocr_options or {}))
+        texts = {}
+        token = cancel.child(on_page=lambda i, text: texts.__setitem__(i, text))
+        ok = self.ocr_converter.scanned_pdf_to_html(source, io.BytesIO(), cancel=token)
+        cancel.check()
+        if not ok:
+            raise RuntimeError(f"OCR 识别失败: {source_name(source)}")
+        count = max(texts) + 1 if texts else 0
+        return [_clean_lines(texts.get(i, "")) for i in range(count)]
+
+    # ------------------------------------------------------------------
+    # 比对 + 报告
+    # ------------------------------------------------------------------
+    def compare(self, old_source, new_source, output_path, cancel=None):
+        """ 返回 True / False；cancel 在提取每页前检查，取消 / 超时不写报告 """
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
+        for source in (old_source, new_source):
+            if not source_exists(source):
+                print(f"❌ 错误：找不到文件 {source}")
+                return False
+
+        old_name, new_name = source_name(old_source, "旧版"), source_name(new_source, "新版")
+        print(f"🔄 [版本比对] {old_name} ↔ {new_name}")
+        try:
+            t0 = time.perf_counter()
+            old_pages = self.extract_pages(old_source, cancel=cancel)
+            new_pages = self.extract_pages(new_source, cancel=cancel)
+            t1 = time.perf_counter()
+            result = diff_versions(old_pages, new_pages)
+            t2 = time.perf_counter()
+            result["timings"] = {"extract": t1 - t0, "diff": t2 - t1}
+            write_output(output_path, self.render_report(result, old_name, new_name))
+        except ConversionCancelled as e:
+            print(f"⏹️ [版本比对] {e}，未写出报告")
+            self.last_status = e.status
+            return False
+        except Exception as e:
+            print(f"❌ [失败] 版本比对出错: {e}")
+            return False
+
+        self.last_result = result
+        self.last_status = OK
+        changed_pages = result["old_pages"] - result["unchanged_pages"]
+        print(f"✅ [成功] 报告已保存至: {output_path if is_path(output_path) else '(输出流)'} "
+              f"({changed_pages}/{result['old_pages']} 页有改动，+{result['added']} -{result['removed']} "
+              f"~{result['changed']} 行；提取 {t1 - t0:.1f}s，比对 {(t2 - t1) * 1000:.0f} ms)")
+        return True
+
+    def render_report(self, result, old_name, new_name):
+        def pages(span):
+            start, stop = span
+            if stop - start == 0:
+                return "(无)"
+            return f"第 {start + 1} 页" if stop - start == 1 else f"第 {start + 1}–{stop} 页"
+
+        def page_no(p):
+            return "" if p is None else str(p + 1)
+
+        parts = []
+        for hunk in result["hunks"]:
+            rows = []
+            for line in hunk["lines"]:
+                rows.append(f'<tr class="{line["op"]}"><td class="page">{page_no(line["old_page"])}</td>'
+                            f'<td class="old">{line["old"] or ""}</td><td class="page">{page_no(line["new_page"])}</td>'
+                            f'<td class="new">{line["new"] or ""}</td></tr>')
+            parts.append(f'<section class="hunk"><h3>旧版 {pages(hunk["old"])} ↔ 新版 {pages(hunk["new"])}</h3>\n'
+                         f'<table class="diff">{"".join(rows)}</table></section>')
+        if not parts:
+            parts.append("<p>✅ 两个版本文字一致</p>")
+
+        title = f"{html.escape(old_name)} ↔ {html.escape(new_name)}"
+        summary = (f'<table class="summary">'
+                   f'<tr><td>页数</td><td>旧版 {result["old_pages"]} / 新版 {result["new_pages"]}</td></tr>'
+                   f'<tr><td>未改动的页</td><td>{result["unchanged_pages"]}</td></tr>'
+                   f'<tr><td>改动段</td><td>{len(result["hunks"])}</td></tr>'
+                   f'<tr><td>行</td><td>新增 {result["added"]}，删除 {result["removed"]}，修改 {result["changed"]}</td></tr>'
+                   f'</table>')
+        return (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>版本比对：{title}</title>\n'
+                f'<style>{self.REPORT_CSS}</style>\n</head>\n<body>\n<h1>版本比对：{title}</h1>\n{summary}\n'
+                + "\n".join(parts) + "\n</body>\n</html>\n")
+
+
+def diff_task(old_source, new_source, kind=None, ocr_options=None):
+    """
+    版本比对交给调度器 (core/scheduler.py 的 submit_task) 时用的任务：
+    在工作线程里比对，扫描件的 OCR 引擎取自该线程的转换器缓存 (热引擎)
+    结果为 {"report": 报告 HTML (bytes), "summary": diff_versions 的结果}，失败时为 None
+    """
+    def run(converters, cancel):
+        differ = DocDiffer(kind=kind, converters=converters, ocr_options=ocr_options)
+        report = io.BytesIO()
+        if not differ.compare(old_source, new_source, report, cancel=cancel):
+            return differ.last_status, None
+        return differ.last_status, {"report": report.getvalue(), "summary": differ.last_result}
+    return run
@@ -0,0 +1,101 @@
+import io
+import os
+import contextlib
+
+# =========================================================================
+# 转换器的输入 / 输出既可以是文件路径，也可以是内存数据：
+#   输入: 路径 (str / PathLike)、bytes / bytearray / memoryview、带 read() 的文件对象
+#         (例如 io.BytesIO、Streamlit 的 UploadedFile)
+#   输出: 路径，或带 write() 的可写流 (io.BytesIO / io.StringIO / 已打开的文件)
+# Web / 服务调用可以全程不落盘：不必先把上传内容写进临时目录、转换后再读回来
+# =========================================================================
+
+
+def is_path(obj):
+    return isinstance(obj, (str, os.PathLike))
+
+
+def source_name(source, default="document"):
+    """ 用于日志、标题、检查点的文件名；内存数据取其 name 属性 (UploadedFile 有)，没有时用 default """
+    if is_path(source):
+        return os.path.basename(os.fspath(source))
+    name = getattr(source, "name", None)
+    return os.path.basename(name) if isinstance(name, str) and name else default
+
+
+def source_key(source):
+    """ 全文索引里的文档标识：路径取绝对路径，内存数据只有文件名 """
+    return os.path.abspath(source) if is_path(source) else source_name(source)
+
+
+def source_exists(source):
+    return os.path.exists(source) if is_path(source) else True
+
+
+def read_bytes(source):
+    """ 内存输入 -> bytes；BytesIO / UploadedFile 用 getvalue()，不移动读取位置 """
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    return source.read()
+
+
+def read_text(source, encoding="utf-8"):
+    if is_path(source):
+        with open(source, "r", encoding=encoding) as f:
+            return f.read()
+    data = read_bytes(source)
+    return data if isinstance(data, str) else data.decode(encoding)
+
+
+def open_binary(source):
+    """
+    以二进制文件对象打开输入，用于 with 语句
+    调用方传入的文件对象原样交出、不替它关闭；bytes 包成 BytesIO (共享缓冲区，不复制)
+    """
+    if is_path(source):
+        return open(source, "rb")
+    if hasattr(source, "read"):
+        return contextlib.nullcontext(source)
+    return io.BytesIO(read_bytes(source))
+
+
+def open_pdf(source):
+    """ fitz.Document：路径直接打开，内存数据走 fitz.open(stream=...) """
+    import fitz
+    if is_path(source):
+        return fitz.open(source)
+    return fitz.open(stream=read_bytes(source), filetype="pdf")
+
+
+def write_output(output, content):
+    """ 写出结果 (str 或 bytes)：路径写文件；流直接 write (二进制流收到文本时按 UTF-8 编码) """
+    if is_path(output):
+        if isinstance(content, str):
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(content)
+        else:
+            with open(output, "wb") as f:
+                f.write(content)
+        return
+    if isinstance(content, str) and not isinstance(output, io.TextIOBase):
+        content = content.encode("utf-8")
+    output.write(content)
+
+
+@contextlib.contextmanager
+def open_text_output(output):
+    """
+    逐段写出文本，用于 with 语句：with open_text_output(out) as write: write("...")
+    大文档边转换边写，不必先在内存里拼出整篇；路径按 UTF-8 写文件，流同 write_output
+    """
+    if is_path(output):
+        with open(output, "w", encoding="utf-8") as f:
+            yield f.write
+    elif isinstance(output, io.TextIOBase):
+        yield output.write
+    else:
+        yield lambda text: output.write(text.encode("utf-8"))
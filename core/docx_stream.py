@@ -0,0 +1,312 @@
+import os
+import html
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# =========================================================================
+# .docx 流式转 HTML (大文件快速文字模式)
+# mammoth 先把整篇建成文档模型、再拼出整篇 HTML 才写出，几百页带大表格的标书又慢又占内存。
+# 这里直接从 zip 里边解压边解析 word/document.xml (iterparse)：
+#   - 正文的每个段落 / 顶层表格的每一行解析完就转成 HTML 片段交出去，随即从树上摘掉
+#     内存只与单个段落 / 表格行的大小有关，与文档总长度无关
+#   - 标题级别取自样式 (styles.xml 的 "heading N" / "Title") 或段落的大纲级别
+#   - 列表项按 numbering.xml 区分 <ul> / <ol> (不区分嵌套层级)
+#   - 纵向合并的单元格：流式输出时还不知道要合并几行，续行位置输出空单元格，保持列对齐
+#   - 图片默认跳过；给出 image_dir 时把引用到的图片解压到该目录并以相对路径引用
+# 只用标准库
+# =========================================================================
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+_V_IMAGE = "{urn:schemas-microsoft-com:vml}imagedata"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+_BODY, _P, _TBL, _TR, _TC, _R_RUN = _W + "body", _W + "p", _W + "tbl", _W + "tr", _W + "tc", _W + "r"
+_VAL = _W + "val"
+
+# 内容控件 / 自定义 XML：只是包装，里面照常是段落、表格、行、单元格
+_WRAPPERS = {_W + "sdt", _W + "sdtContent", _W + "customXml"}
+# 段落里不输出的部分：属性、修订删除的内容
+_SKIP = {_W + "pPr", _W + "rPr", _W + "del", _W + "moveFrom"}
+
+
+def _on(prop):
+    """ <w:b/>、<w:b w:val="true"/> 为开；w:val="0" / "false" 为关 """
+    return prop is not None and prop.get(_VAL, "true") not in ("0", "false", "off")
+
+
+def _children(elem, tag):
+    """ elem 下的 tag 子元素，包括被内容控件 / 自定义 XML 包着的 (<w:sdt><w:sdtContent><w:tr>) """
+    for child in elem:
+        if child.tag == tag:
+            yield child
+        elif child.tag in _WRAPPERS:
+            yield from _children(child, tag)
+
+
+def _read_xml(zf, name):
+    try:
+        with zf.open(name) as f:
+            return ET.parse(f).getroot()
+    except KeyError:
+        return None
+
+
+class DocxHtmlStream:
+    """
+    with zipfile.ZipFile(f) as zf:
+        for fragment, text in DocxHtmlStream(zf).blocks(): ...
+    fragment 为 HTML 片段 (依次拼接即是完整正文)，text 为其中的纯文字 (全文索引用)
+    """
+
+    def __init__(self, zf, image_dir=None):
+        self.zf = zf
+        self.image_dir = image_dir
+        self.saved_images = {}      # 关系 Id -> 文件名 (同一图片多处引用只解压一次)
+        self._load_styles()
+        self._load_numbering()
+        self._load_relationships()
+        self._list_tag = None       # 当前未闭合的列表 (ul / ol)
+
+    # ------------------------------------------------------------------
+    # 辅助部件 (样式 / 编号 / 关系都很小，一次读完)
+    # ------------------------------------------------------------------
+    def _load_styles(self):
+        """ 段落样式 Id -> (标题级别或 None, 样式里的编号 Id 或 None) """
+        self.styles = {}
+        root = _read_xml(self.zf, "word/styles.xml")
+        if root is None:
+            return
+        for style in root.iter(_W + "style"):
+            name_el = style.find(_W + "name")
+            name = (name_el.get(_VAL, "") if name_el is not None else "").lower()
+            level = None
+            if name == "title":
+                level = 1
+            elif name.startswith("heading ") and name[8:].isdigit():
+                level = int(name[8:])
+            outline = style.find(f"{_W}pPr/{_W}outlineLvl")
+            if level is None and outline is not None and outline.get(_VAL, "").isdigit():
+                level = int(outline.get(_VAL)) + 1
+            num = style.find(f"{_W}pPr/{_W}numPr/{_W}numId")
+            self.styles[style.get(_W + "styleId")] = (level, num.get(_VAL) if num is not None else None)
+
+    def _load_numbering(self):
+        """ 编号 Id -> "ul" (项目符号) / "ol" (数字编号)，按第一级的编号格式判断 """
+        self.numbering = {}
+        root = _read_xml(self.zf, "word/numbering.xml")
+        if root is None:
+            return
+        formats = {}
+        for abstract in root.iter(_W + "abstractNum"):
+            fmt = abstract.find(f"{_W}lvl/{_W}numFmt")
+            formats[abstract.get(_W + "abstractNumId")] = fmt.get(_VAL) if fmt is not None else "bullet"
+        for num in root.iter(_W + "num"):
+            ref = num.find(_W + "abstractNumId")
+            fmt = formats.get(ref.get(_VAL) if ref is not None else None, "bullet")
+            self.numbering[num.get(_W + "numId")] = "ul" if fmt == "bullet" else "ol"
+
+    def _load_relationships(self):
+        """ 关系 Id -> (目标, 是否外部链接)；图片与超链接都通过它找到实际地址 """
+        self.rels = {}
+        root = _read_xml(self.zf, "word/_rels/document.xml.rels")
+        if root is None:
+            return
+        for rel in root.iter(_PKG_REL):
+            self.rels[rel.get("Id")] = (rel.get("Target", ""), rel.get("TargetMode") == "External")
+
+    # ------------------------------------------------------------------
+    # 流式解析
+    # ------------------------------------------------------------------
+    def blocks(self):
+        """ 依次产出 (HTML 片段, 纯文字)；正文的子元素 / 表格行处理完即从树上移除 """
+        body = table = None
+        body_depth = depth = 0
+        with self.zf.open("word/document.xml") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if elem.tag == _BODY:
+                        body, body_depth = elem, depth
+                    elif elem.tag == _TBL and body is not None and depth == body_depth + 1:
+                        table = elem
+                        yield self._close_list() + "<table>", ""
+                    continue
+
+                level, depth = depth, depth - 1
+                if body is None:
+                    continue
+                if table is not None and elem.tag == _TR and level == body_depth + 2:
+                    yield self._row(elem)
+                    table.remove(elem)
+                elif level == body_depth + 1:
+                    if elem is table:
+                        # 流式交出的行已经摘掉，剩下的只有包在内容控件里的行
+                        rows = [self._row(tr) for tr in _children(table, _TR)]
+                        table = None
+                        yield "".join(h for h, _ in rows) + "</table>\n", "\n".join(t for _, t in rows)
+                    else:
+                        for block in self._block(elem):
+                            yield block
+                    body.remove(elem)
+        if self._list_tag:
+            yield self._close_list(), ""
+
+    def _close_list(self):
+        if self._list_tag is None:
+            return ""
+        tag, self._list_tag = self._list_tag, None
+        return f"</{tag}>"
+
+    def _block(self, elem):
+        """ 完整的正文子元素 (段落 / 内容控件 / 嵌套在其中的表格) -> 片段 """
+        if elem.tag == _P:
+            yield self._paragraph(elem)
+        elif elem.tag == _TBL:
+            rows = [self._row(tr) for tr in _children(elem, _TR)]
+            yield self._close_list() + "<table>" + "".join(h for h, _ in rows) + "</table>\n", \
+                "\n".join(t for _, t in rows)
+        elif elem.tag in _WRAPPERS:
+            # 内容控件 / 自定义 XML 包着的段落和表格
+            for child in elem:
+                yield from self._block(child)
+
+    # ------------------------------------------------------------------
+    # 段落
+    # ------------------------------------------------------------------
+    def _paragraph(self, p):
+        ppr = p.find(_W + "pPr")
+        level = num_id = None
+        if ppr is not None:
+            style = ppr.find(_W + "pStyle")
+            if style is not None:
+                level, num_id = self.styles.get(style.get(_VAL), (None, None))
+            outline = ppr.find(_W + "outlineLvl")
+            if level is None and outline is not None and outline.get(_VAL, "").isdigit():
+                level = int(outline.get(_VAL)) + 1
+            num = ppr.find(f"{_W}numPr/{_W}numId")
+            if num is not None:
+                num_id = num.get(_VAL)
+
+        parts, texts = [], []
+        self._inline(p, parts, texts)
+        inner, text = "".join(parts).strip(), "".join(texts).strip()
+
+        if level is not None and text:
+            tag = f"h{min(level, 6)}"
+            return f"{self._close_list()}<{tag}>{inner}</{tag}>\n", text
+        if num_id is not None and num_id != "0" and inner:
+            list_tag = self.numbering.get(num_id, "ul")
+            opening = ""
+            if self._list_tag != list_tag:
+                opening = self._close_list() + f"<{list_tag}>"
+                self._list_tag = list_tag
+            return f"{opening}<li>{inner}</li>\n", text
+        if not inner:
+            return self._close_list(), ""
+        return f"{self._close_list()}<p>{inner}</p>\n", text
+
+    def _inline(self, elem, parts, texts):
+        """ 段落里的文字 / 链接 / 图片 (插入、智能标记、域等容器照常往下找) """
+        for child in elem:
+            tag = child.tag
+            if tag == _R_RUN:
+                self._run(child, parts, texts)
+            elif tag == _W + "hyperlink":
+                inner_parts = []
+                self._inline(child, inner_parts, texts)
+                target, external = self.rels.get(child.get(_R + "id"), ("", False))
+                if external and target:
+                    parts.append(f'<a href="{html.escape(target)}">{"".join(inner_parts)}</a>')
+                else:
+                    parts.extend(inner_parts)
+            elif tag not in _SKIP:
+                self._inline(child, parts, texts)
+
+    def _run(self, run, parts, texts):
+        text = []
+        for child in run:
+            tag = child.tag
+            if tag == _W + "t":
+                text.append(child.text or "")
+            elif tag == _W + "tab":
+                text.append("\t")
+            elif tag in (_W + "br", _W + "cr"):
+                text.append("\n")
+            elif tag == _W + "noBreakHyphen":
+                text.append("-")
+        text = "".join(text)
+        if text:
+            texts.append(text)
+            content = html.escape(text, quote=False).replace("\n", "<br>")
+            rpr = run.find(_W + "rPr")
+            if rpr is not None:
+                if _on(rpr.find(_W + "i")):
+                    content = f"<em>{content}</em>"
+                if _on(rpr.find(_W + "b")):
+                    content = f"<strong>{content}</strong>"
+            parts.append(content)
+        if self.image_dir is not None:
+            for image in run.iter():
+                rid = image.get(_R + "embed") if image.tag == _BLIP else \
+                    image.get(_R + "id") if image.tag == _V_IMAGE else None
+                if rid:
+                    src = self._save_image(rid)
+                    if src:
+                        parts.append(f'<img src="{html.escape(src)}" alt="" loading="lazy">')
+
+    def _save_image(self, rid):
+        """ 把关系 rid 指向的图片从 zip 解压到 image_dir，返回相对路径 """
+        if rid not in self.saved_images:
+            target, external = self.rels.get(rid, ("", True))
+            if external or not target:
+                return None
+            member = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("word", target))
+            try:
+                data = self.zf.read(member)
+            except KeyError:
+                return None
+            os.makedirs(self.image_dir, exist_ok=True)
+            file_name = f"{rid}-{posixpath.basename(member)}"
+            with open(os.path.join(self.image_dir, file_name), "wb") as f:
+                f.write(data)
+            self.saved_images[rid] = file_name
+        return f"{os.path.basename(self.image_dir)}/{self.saved_images[rid]}"
+
+    # ------------------------------------------------------------------
+    # 表格
+    # ------------------------------------------------------------------
+    def _row(self, tr):
+        """ 一个表格行 -> (<tr>...</tr>, 以制表符分隔的单元格文字) """
+        trpr = tr.find(_W + "trPr")
+        cell_tag = "th" if trpr is not None and _on(trpr.find(_W + "tblHeader")) else "td"
+        cells, texts = [], []
+        for tc in _children(tr, _TC):
+            attrs = ""
+            tcpr = tc.find(_W + "tcPr")
+            if tcpr is not None:
+                span = tcpr.find(_W + "gridSpan")
+                if span is not None and span.get(_VAL, "1").isdigit() and int(span.get(_VAL)) > 1:
+                    attrs = f' colspan="{span.get(_VAL)}"'
+                merge = tcpr.find(_W + "vMerge")
+                if merge is not None and merge.get(_VAL, "continue") == "continue":
+                    cells.append(f"<{cell_tag}{attrs}></{cell_tag}>")
+                    continue
+            blocks = [b for child in tc for b in self._block(child) if b[0] or b[1]]
+            # 只有一个段落的单元格不再套 <p>
+            if len(blocks) == 1 and blocks[0][0].startswith("<p>"):
+                content = blocks[0][0].strip()[3:-4]
+            else:
+                content = "".join(h for h, _ in blocks).strip()
+            content += self._close_list()
+            cells.append(f"<{cell_tag}{attrs}>{content}</{cell_tag}>")
+            texts.append(" ".join(t for _, t in blocks if t))
+        return "<tr>" + "".join(cells) + "</tr>\n", "\t".join(texts)
+
+
+def iter_docx_html(docx_file, image_dir=None):
+    """ docx_file: 路径或可 seek 的二进制文件对象；产出 (HTML 片段, 纯文字) """
+    with zipfile.ZipFile(docx_file) as zf:
+        yield from DocxHtmlStream(zf, image_dir).blocks()
@@ -0,0 +1,425 @@
+import os
+import time
+from core.ocr_pipeline import OcrPipeline
+from core.page_render import iter_pdf_pages, to_array
+from core.preprocess import PageFilter, thumbnail, crop_to_content, resize_image, detect_orientation, rotate_image
+from core.search_index import index_pages
+from core.checkpoint import PageCheckpoint, pixel_fingerprint
+from core.doc_io import is_path, source_name, write_output
+from core.ocr_profiles import resolve_tuning, profile_from_env
+from core.ocr_result import OcrPage
+from core.cancellation import OK, FAILED, STATUS_LABELS, ConversionCancelled, ensure_token
+
+# 页面类型：除 PageFilter 的空白 / 重复 / 正文之外，检查点里已有结果的页、超出单页时限的页
+CACHED = "cached"
+TIMED_OUT = "timed_out"
+
+# =========================================================================
+# OCR 后端公共基类
+# 子类只负责"引擎"本身：初始化 self.ocr_engine、recognize() 调用引擎、
+# parse_result() 把引擎的原始结果整理成统一的 OcrPage (框 / 置信度 / 文字，见 core/ocr_result.py)
+# 页面循环 (渲染 -> 预处理 -> 推理 -> 写出)、后处理规则、HTML 输出都在这里，各后端共用
+# =========================================================================
+
+
+class BaseOcrConverter:
+    # 日志里显示的引擎名称
+    ENGINE_NAME = "OCR"
+    # 引擎不可用时的提示
+    UNAVAILABLE_HINT = "OCR 引擎不可用。"
+
+    # 关键词矫正字典 (形近字 / 常见误识别)
+    REPLACEMENTS = {
+        "冻于": "冻干",      # 修复：冻干甲型...
+        "国é采": "国e采",    # 修复：电子采购系统
+        "010--": "010-",    # 修复：电话号码
+        "卢的": "卢昀",      # 修复：人名 (根据上下文)
+    }
+
+    def __init__(self, poppler_path=None, queue_size=2, renderer="poppler", grayscale=False,
+                 skip_blank_pages=True, dedup_pages=True, crop_content=True, search_index=None,
+                 checkpoint_dir=None, profile=None, dpi=None, det_thresh=None, det_box_thresh=None,
+                 det_unclip_ratio=None, use_cls=None, auto_rotate=True, min_score=None, min_box_height=None,
+                 join_lines=False, drop_lone_symbols=True):
+        """
+        queue_size: 流水线相邻阶段之间最多缓存的页数 (决定内存上限)
+        renderer: "poppler" (pdf2image，默认) 或 "fitz" (PyMuPDF 进程内渲染，无需 Poppler)
+        grayscale: 以灰度渲染，页面内存降为 RGB 的 1/3
+        skip_blank_pages: 空白页不做推理，直接输出占位
+        dedup_pages: 与本次任务中已识别页面相同的页 (重复封面、条款页) 复用之前的结果
+        crop_content: 只把内容区域 (去掉留白、扫描黑边、装订孔) 送进引擎，框坐标再换算回整页
+        search_index: 全文检索索引 (SearchIndex 实例或索引文件路径)，转换成功后写入每页识别文字
+        checkpoint_dir: 逐页检查点目录 (None 为不启用)；中断后重跑、或同一路径的文档改版后重跑时，
+            像素没变的页直接复用上次的识别结果
+        profile: 识别参数档位 ("fast" / "balanced" / "accurate" 或 tools/tune_ocr.py 保存的档位)，
+            默认读取环境变量 DOC_AUDIT_OCR_PROFILE (未设置则为 core/ocr_profiles.DEFAULT_TUNING)
+        dpi / det_thresh / det_box_thresh / det_unclip_ratio / use_cls: 单独覆盖档位里的某一项
+        auto_rotate: 整页方向检测 (投影轮廓，见 core/preprocess.detect_orientation)：转了 90° / 180° 的页
+            整页转正后再识别；方向明确的页不再对每个文本框做方向分类，方向不明确的页按 use_cls 处理
+        以下后处理选项的默认值与以前逐框一行的输出一致：
+        min_score: 置信度低于它的文字框当噪点丢弃 (例如 0.5)
+        min_box_height: 框高低于它 (单位：磅，1/72 英寸，按 dpi 换算成像素) 的文字框当噪点丢弃 (例如 4)
+        join_lines: 同一行左右排列的框合成一行输出 (以空格连接)；默认每个框单独一行
+        drop_lone_symbols: 丢弃只有一个非汉字字符的框 (多余的 "1"、页码碎片)，默认开 (以前一直如此)；
+            表格里单独的数字 / 字母也会被丢掉，需要保留时传 False
+        """
+        self.ocr_engine = None
+        self.poppler_path = poppler_path
+        self.queue_size = queue_size
+        self.renderer = renderer
+        self.grayscale = grayscale
+        self.skip_blank_pages = skip_blank_pages
+        self.dedup_pages = dedup_pages
+        self.crop_content = crop_content
+        self.search_index = search_index
+        self.checkpoint_dir = checkpoint_dir
+        self.profile = profile or profile_from_env()
+        self.tuning = resolve_tuning(self.profile, dpi=dpi, det_thresh=det_thresh, det_box_thresh=det_box_thresh,
+                                     det_unclip_ratio=det_unclip_ratio, use_cls=use_cls)
+        self.dpi = self.tuning["dpi"]
+        self.auto_rotate = auto_rotate
+        self.min_score = min_score
+        self.min_box_height = min_box_height
+        self.join_lines = join_lines
+        self.drop_lone_symbols = drop_lone_symbols
+        self.last_stats = []
+        self.last_reused = []
+        self.last_status = None
+        self.last_timed_out = []
+        self.last_skipped = {"blank": [], "duplicate": {}}
+        self.last_page_stats = []
+        self.last_rotated = {}
+
+    # ------------------------------------------------------------------
+    # 子类实现
+    # ------------------------------------------------------------------
+    def recognize(self, img_np, use_cls=None):
+        """
+        调用引擎识别一页，返回引擎的原始结果
+        use_cls: 本页是否做逐行方向分类，None 为按档位 (self.tuning["use_cls"])
+        """
+        raise NotImplementedError
+
+    def parse_result(self, result):
+        """
+        把原始结果整理成 OcrPage (OcrPage.from_boxes 会排好阅读顺序)；
+        拿不到框坐标的引擎也可以返回从上到下排好序的文本列表
+        """
+        raise NotImplementedError
+
+    def checkpoint_signature(self):
+        """ 影响识别结果的参数；与检查点里记录的不一致时，旧结果作废 (子类可补充模型等信息) """
+        return {"engine": f"{type(self).__module__}.{type(self).__name__}", "tuning": self.tuning,
+                "crop_content": self.crop_content, "auto_rotate": self.auto_rotate,
+                "min_score": self.min_score, "min_box_height": self.min_box_height,
+                "join_lines": self.join_lines, "drop_lone_symbols": self.drop_lone_symbols,
+                "replacements": self.REPLACEMENTS}
+
+    def engine_scale(self, page_shape):
+        """
+        引擎处理整页时会把图缩小多少倍 (默认不缩放)
+        裁剪后按同样比例预先缩小，保证引擎看到的文字大小与不裁剪时一致，
+        否则裁剪后的小图会被以更高分辨率检测，反而更慢、结果也不同
+        """
+        return 1.0
+
+    # ------------------------------------------------------------------
+    # 公共逻辑
+    # ------------------------------------------------------------------
+    def is_available(self):
+        return self.ocr_engine is not None
+
+    def warm_up(self):
+        """
+        用一张很小的合成图 (两行印刷体数字) 跑一次推理：检测 / 方向分类 / 识别三个模型都会被调用，
+        ONNX Runtime 的内存分配、线程池在第一个真实任务之前就绪；返回耗时 (秒)，引擎不可用时为 None
+        """
+        if not self.is_available():
+            return None
+        import cv2
+        import numpy as np
+
+        img = np.full((96, 320, 3), 255, dtype=np.uint8)
+        cv2.putText(img, "2024-0318", (12, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        cv2.putText(img, "No. 5721", (12, 82), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        t0 = time.perf_counter()
+        try:
+            self.recognize(img)
+        except Exception as e:
+            print(f"   ⚠️ [{self.ENGINE_NAME}] 预热推理失败 (不影响正常使用): {e}")
+        seconds = time.perf_counter() - t0
+        print(f"   🔥 [{self.ENGINE_NAME}] 引擎预热完成 ({seconds:.2f}s)")
+        return seconds
+
+    def page_result(self, result, offset=(0, 0), scale=1.0):
+        """ 原始结果 -> OcrPage；裁剪过的页把框坐标换算回整页 """
+        page = self.parse_result(result)
+        if not isinstance(page, OcrPage):
+            page = OcrPage.from_texts(page)
+        if offset != (0, 0) or scale != 1.0:
+            page = page.mapped(*offset, scale)
+        return page
+
+    def recognize_page(self, img_np):
+        """ 识别 + 解析 + 后处理，返回 OcrPage """
+        return self.post_process(self.page_result(self.recognize(img_np)))
+
+    def recognize_lines(self, img_np):
+        """ 识别 + 解析 + 后处理，返回一页的有效文本行 (评测 / 校准工具也用它) """
+        return self.output_lines(self.recognize_page(img_np))
+
+    def scanned_pdf_to_html(self, pdf_path, output_path, cancel=None):
+        """
+        pdf_path: PDF 路径，或内存数据 (bytes / 文件对象)
+        output_path: 输出 HTML 路径，或可写流 (io.BytesIO / io.StringIO)
+        cancel: CancelToken (可选)；取消 / 超时时写出已完成的页并返回 False，
+            last_status 记录原因；单页预处理超时的页不做推理，输出占位
+        """
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
+        if not self.is_available():
+            print(f"❌ 错误：{self.UNAVAILABLE_HINT}")
+            return False
+
+        if self.renderer == "poppler" and self.poppler_path and not os.path.exists(self.poppler_path):
+             print(f"❌ 错误：Poppler 路径无效: {self.poppler_path}")
+             return False
+
+        name = source_name(pdf_path, "scanned.pdf")
+        print(f"🔄 [{self.ENGINE_NAME}] 正在处理: {name}")
+
+        checkpoint = None
+        try:
+            if self.checkpoint_dir:
+                checkpoint = PageCheckpoint(self.checkpoint_dir, pdf_path, "ocr", self.checkpoint_signature())
+                if len(checkpoint):
+                    print(f"   ♻️ 找到检查点 ({len(checkpoint)} 页已有结果)，内容未变的页直接复用")
+
+            # 默认 300 DPI 以确保“冻干/冻于”等形近字的清晰度 (档位可调)；分段渲染，与识别重叠进行
+            print(f"   📸 正在将 PDF 转换为高清图像 (DPI={self.dpi}，{self.renderer} 渲染，流水线模式)...")
+            page_htmls = []
+            page_texts = {}   # 页序号 -> 后处理后的文本行 (供重复页复用)
+            indexed_texts = {}   # 页序号 -> 写入全文索引的文字
+            skipped = {"blank": [], "duplicate": {}}
+            reused = []
+            timed_out = []
+            rotated = {}   # 页序号 -> 转正时逆时针旋转的角度
+            oriented = []   # 方向明确 (关闭逐行方向分类) 的页
+            page_stats = []   # 每页: 类型 / 裁掉的像素比例 / 转正角度 / 推理耗时
+            page_filter = None
+            if self.skip_blank_pages or self.dedup_pages:
+                page_filter = PageFilter(skip_blank=self.skip_blank_pages, dedup=self.dedup_pages)
+
+            def render(path):
+                try:
+                    cancel.check()
+                    for item in iter_pdf_pages(path, dpi=self.dpi, renderer=self.renderer,
+                                               poppler_path=self.poppler_path, grayscale=self.grayscale):
+                        yield item
+                        # 渲染下一页之前检查：取消后不再渲染
+                        cancel.check()
+                except ConversionCancelled:
+                    raise
+                except Exception as e:
+                    print(f"❌ PDF 转图片失败: {e}")
+                    raise
+
+            def preprocess(item):
+                i, total, img = item
+                t0 = time.perf_counter()
+                # fitz 渲染出来的已经是指向 pixmap 的数组，不再复制
+                img_np = to_array(img, self.grayscale)
+                page = {"index": i, "total": total, "kind": PageFilter.CONTENT, "ref": None,
+                        "offset": (0, 0), "scale": 1.0, "crop_ratio": 0.0, "rotation": 0, "use_cls": None}
+                if checkpoint is not None:
+                    page["fp"] = pixel_fingerprint(img_np)
+                    page["texts"] = checkpoint.get(page["fp"])
+                    if page["texts"] is not None:
+                        page["kind"] = CACHED
+                        return page, None
+
+                if self.auto_rotate:
+                    # 先整页转正：之后的重复判定、裁边、识别都在正立的页面上进行
+                    k, confident = detect_orientation(img_np)
+                    if confident:
+                        img_np, page["rotation"], page["use_cls"] = rotate_image(img_np, k), k * 90, False
+
+                # 缩略图只算一次：判断空白 / 重复，再找内容区域
+                thumb = thumbnail(img_np) if (page_filter or self.crop_content) else None
+                if page_filter:
+                    page["kind"], page["ref"] = page_filter.classify(i, img_np, thumb)
+                if page["kind"] == PageFilter.CONTENT and self.crop_content:
+                    page_shape = img_np.shape
+                    img_np, page["offset"], page["crop_ratio"] = crop_to_content(img_np, thumb)
+                    scale = self.engine_scale(page_shape) if page["crop_ratio"] else 1.0
+                    if scale < 1.0:
+                        img_np, page["scale"] = resize_image(img_np, scale), scale
+                if page["kind"] == PageFilter.CONTENT and cancel.page_expired(t0):
+                    # 超大图片之类的异常页：预处理就已超时，不再送进引擎
+                    page["kind"] = TIMED_OUT
+                    return page, None
+                return page, img_np
+
+            def infer(item):
+                page, img_np = item
+                if page["kind"] != PageFilter.CONTENT:
+                    return page, None
+                cancel.check()
+                print(f"      📖 正在识别第 {page['index'] + 1}/{page['total']} 页...")
+                t0 = time.perf_counter()
+                try:
+                    if page["use_cls"] is None:
+                        return page, self.recognize(img_np)
+                    return page, self.recognize(img_np, use_cls=page["use_cls"])
+                except Exception as e:
+                    print(f"      ⚠️ 识别 API 报错: {e}")
+                    return page, None
+                finally:
+                    page["infer_sec"] = time.perf_counter() - t0
+
+            def write(item):
+                page, result = item
+                i, kind, ref = page["index"], page["kind"], page["ref"]
+                page_stats.append({key: page.get(key)
+                                   for key in ("index", "kind", "crop_ratio", "rotation", "infer_sec")})
+                if page["use_cls"] is False:
+                    oriented.append(i)
+                if page["rotation"]:
+                    print(f"      🔄 第 {i + 1} 页方向已校正 (逆时针旋转 {page['rotation']}°)")
+                    rotated[i] = page["rotation"]
+                if kind == PageFilter.BLANK:
+                    print(f"      ⏭️ 第 {i + 1} 页为空白页，跳过识别")
+                    skipped["blank"].append(i)
+                    cleaned_texts = []
+                elif kind == PageFilter.DUPLICATE:
+                    if ref not in page_texts:
+                        print(f"      ⚠️ 第 {i + 1} 页与第 {ref + 1} 页相同，但该页识别失败")
+                        return
+                    print(f"      ⏭️ 第 {i + 1} 页与第 {ref + 1} 页相同，复用识别结果")
+                    skipped["duplicate"][i] = ref
+                    cleaned_texts = page_texts[ref]
+                elif kind == CACHED:
+                    print(f"      ♻️ 第 {i + 1} 页与检查点一致，复用上次结果")
+                    reused.append(i)
+                    cleaned_texts = page["texts"]
+                elif kind == TIMED_OUT:
+                    print(f"      ⏱️ 第 {i + 1} 页超出单页时限 ({cancel.page_timeout}s)，已跳过")
+                    timed_out.append(i)
+                    page_htmls.append("<div class='ocr-page'><p><i>[本页处理超时，已跳过]</i></p></div><hr/>")
+                    return
+                else:
+                    if result is None:
+                        return
+                    # 解析结果 (阅读顺序、换算回整页坐标) + 后处理 (过滤噪点、矫正错字)
+                    ocr_page = self.post_process(self.page_result(result, page["offset"], page["scale"]))
+                    cleaned_texts = self.output_lines(ocr_page)
+                    print(f"      ✅ 成功提取: {len(cleaned_texts)} 行有效文字"
+                          + (f" (裁掉 {page['crop_ratio']:.0%} 像素)" if page["crop_ratio"] else ""))
+                    if self.dedup_pages:
+                        page_texts[i] = cleaned_texts
+                indexed_texts[i] = "\n".join(cleaned_texts)
+                cancel.page_done(i, indexed_texts[i])
+                if checkpoint is not None:
+                    checkpoint.record(i, page["fp"], cleaned_texts)
+
+                page_html = []
+                for text in cleaned_texts:
+                    text = text.replace("<", "&lt;").replace(">", "&gt;")
+                    page_html.append(f"<p>{text}</p>")
+
+                page_content = "\n".join(page_html)
+                if not page_content:
+                    page_content = "<p><i>[本页无文字]</i></p>"
+
+                page_htmls.append(f"<div class='ocr-page'>{page_content}</div><hr/>")
+
+            pipeline = OcrPipeline([
+                ("render", render),
+                ("preprocess", preprocess),
+                ("infer", infer),
+                ("write", write),
+            ], queue_size=self.queue_size)
+            status = OK
+            try:
+                self.last_stats = pipeline.run(pdf_path, cancel=cancel)
+            except ConversionCancelled as e:
+                status = e.status
+                self.last_stats = pipeline.stats
+            self.last_skipped = skipped
+            self.last_page_stats = page_stats
+            self.last_reused = reused
+            self.last_timed_out = timed_out
+            self.last_rotated = rotated
+            pipeline.print_report()
+            if reused:
+                print(f"   ♻️ 检查点复用: {len(reused)}/{len(page_stats)} 页")
+            if skipped["blank"] or skipped["duplicate"]:
+                print(f"   ⏭️ 免识别: 空白页 {len(skipped['blank'])} 页，重复页 {len(skipped['duplicate'])} 页")
+            cropped = [p["crop_ratio"] for p in page_stats if p["kind"] == PageFilter.CONTENT]
+            if cropped and any(cropped):
+                print(f"   ✂️ 裁边: 平均裁掉 {sum(cropped) / len(cropped):.0%} 像素")
+            if oriented:
+                print(f"   🧭 方向检测: {len(oriented)} 页方向明确 (其中 {len(rotated)} 页已转正)"
+                      + ("，这些页不再逐行做方向分类" if self.tuning["use_cls"] else ""))
+            if timed_out:
+                print(f"   ⏱️ 单页超时: {len(timed_out)} 页 (第 {', '.join(str(i + 1) for i in timed_out)} 页)")
+
+            if status != OK:
+                # 部分结果：已写出的页照常保存，不入索引；检查点保留，重跑时从中断处继续
+                label = STATUS_LABELS[status]
+                page_htmls.insert(0, f"<div class='ocr-status'><p><b>⚠️ {label}：仅包含前 {len(page_htmls)} 页</b></p></div>")
+                self._save_html("".join(page_htmls), output_path)
+                print(f"⏹️ [OCR {label}] 已保存前 {len(page_htmls) - 1} 页: "
+                      f"{output_path if is_path(output_path) else '(输出流)'}")
+                if checkpoint is not None:
+                    print(f"   💾 已完成的页已保存到检查点，重新运行将从中断处继续: {checkpoint.path}")
+                self.last_status = status
+                return False
+
+            self._save_html("".join(page_htmls), output_path)
+            print(f"✅ [OCR 成功] 已保存: {output_path if is_path(output_path) else '(输出流)'}")
+            index_pages(self.search_index, pdf_path, [indexed_texts.get(i, "") for i in range(len(page_stats))],
+                        "ocr", output_path)
+            if checkpoint is not None:
+                checkpoint.finish()
+            self.last_status = OK
+            return True
+
+        except Exception as e:
+            print(f"❌ [OCR 失败] 未知错误: {e}")
+            if checkpoint is not None:
+                print(f"   💾 已完成的页已保存到检查点，重新运行将从中断处继续: {checkpoint.path}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def post_process(self, page):
+        """
+        核心后处理逻辑：就像一个编辑，负责校对和清洗 (整页一次完成，不逐框判断)
+        1. 噪点过滤：空框；按配置再去掉低置信度、过小的框、孤立的单个非汉字字符
+        2. 关键词矫正：形近字替换 (解决 "冻于" 之类)
+        """
+        min_height = self.min_box_height * self.dpi / 72 if self.min_box_height else None
+        return page.filter(self.min_score, min_height, self.drop_lone_symbols).replace(self.REPLACEMENTS)
+
+    def output_lines(self, page):
+        """ 写进 HTML / 索引的文本行：默认每个框一行 (阅读顺序)，join_lines 时同一行的框合并 """
+        return page.lines() if self.join_lines else page.texts()
+
+    def _save_html(self, content, output):
+        full_html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><meta charset="utf-8">
+        <style>
+            body{{ font-family: "Microsoft YaHei", sans-serif; max-width: 900px; margin: 20px auto; line-height: 1.6; padding: 40px; background: #f5f5f5; color: #333; }}
+            .ocr-page {{ background: white; padding: 50px; box-shadow: 0 4px 10px rgba(0,0,0,0.1); border-radius: 8px; min-height: 1000px; }}
+            p {{ margin-bottom: 0.8em; text-align: justify; }}
+            hr {{ border: 0; margin: 40px 0; border-top: 1px dashed #ccc; }}
+        </style>
+        </head><body>{content}</body></html>
+        """
+        write_output(output, full_html)
@@ -0,0 +1,67 @@
+import os
+import json
+import time
+import platform
+from core.app_paths import app_data_dir, write_json
+
+# =========================================================================
+# 本机 OCR 校准结果 (由 tools/calibrate_ocr.py 实测生成)
+# 记录"这台机器上最快且精度可接受"的后端 + 参数，registry 创建 OCR 转换器时作为默认值
+# =========================================================================
+
+CALIBRATION_FILE = "ocr_calibration.json"
+
+
+def calibration_path():
+    return os.path.join(app_data_dir(create=False), CALIBRATION_FILE)
+
+
+def machine_fingerprint():
+    """ 校准结果只对同一台 (同规格) 机器有效 """
+    return {"cpu_count": os.cpu_count(), "machine": platform.machine(), "system": platform.system()}
+
+
+def save_calibration(choice, results=None, path=None):
+    """
+    choice: {"backend": "core.rapidocr.RapidOcrConverter", "options": {...}, "label", "pages_per_sec", ...}
+    results: 全部候选配置的测量结果 (仅作记录)
+    """
+    path = path or calibration_path()
+    data = {
+        "backend": choice["backend"],
+        "options": choice.get("options", {}),
+        "label": choice.get("label"),
+        "pages_per_sec": choice.get("pages_per_sec"),
+        "peak_rss_mb": choice.get("peak_rss_mb"),
+        "cer": choice.get("cer"),
+        "machine": machine_fingerprint(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results or [],
+    }
+    return write_json(path, data)
+
+
+def load_calibration(path=None):
+    """ 返回校准结果；文件不存在、损坏或来自另一台机器时返回 None """
+    path = path or calibration_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ OCR 校准文件无法读取，已忽略: {e}")
+        return None
+
+    if data.get("machine") != machine_fingerprint():
+        print("⚠️ OCR 校准结果来自另一台机器，已忽略 (可重新运行 tools/calibrate_ocr.py)")
+        return None
+    if "backend" not in data:
+        return None
+    return data
+
+
+def clear_calibration(path=None):
+    path = path or calibration_path()
+    if os.path.exists(path):
+        os.remove(path)
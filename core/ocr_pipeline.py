@@ -0,0 +1,168 @@
+import time
+import queue
+import threading
+from core.cancellation import ConversionCancelled
+
+# =========================================================================
+# 流水线式 OCR：渲染 -> 预处理 -> 推理 -> 写出 四个阶段各占一个线程，
+# 阶段之间用有界队列连接。
+#   - 渲染 (Poppler 子进程 / I/O) 与推理 (ONNX Runtime，释放 GIL) 可以重叠执行
+#   - 队列满时上游阻塞 (背压)，内存中同时存在的页面数有上限，不再一次性渲染整本
+#   - 每个阶段统计忙碌时间与队列深度，用来定位瓶颈阶段
+# =========================================================================
+
+_END = object()
+
+
+class _StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0          # 执行阶段函数的时间
+        self.wait_in = 0.0       # 等上游数据的时间 (饥饿)
+        self.wait_out = 0.0      # 等下游腾出队列的时间 (背压)
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth):
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def as_dict(self, wall):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_sec": round(self.busy, 3),
+            "utilization": round(self.busy / wall, 3) if wall > 0 else 0.0,
+            "wait_in_sec": round(self.wait_in, 3),
+            "wait_out_sec": round(self.wait_out, 3),
+            # 该阶段"输入队列"的深度：长期接近上限说明本阶段是瓶颈
+            # (第一个阶段没有输入队列，为 None)
+            "queue_avg": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else None,
+            "queue_max": self.depth_max if self.depth_samples else None,
+        }
+
+
+class OcrPipeline:
+    """
+    stages: [(名称, 函数), ...]
+        第一个阶段的函数接收 source 并返回可迭代对象 (生成器)，逐个产出页面；
+        其余阶段的函数接收上一阶段的产出，返回值交给下一阶段。
+        最后一个阶段的返回值被忽略 (写出阶段)。
+    queue_size: 相邻阶段之间最多缓存几页
+    """
+
+    def __init__(self, stages, queue_size=2):
+        if len(stages) < 2:
+            raise ValueError("流水线至少需要两个阶段")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = []
+        self.wall_time = 0.0
+
+    def run(self, source, cancel=None):
+        """
+        cancel: CancelToken (可选)；被取消 / 超时时各阶段线程在 0.1s 内退出
+        (正在执行的阶段函数除外，例如一次推理)，随后抛出 ConversionCancelled
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        stats = [_StageStats(name) for name, _ in self.stages]
+        errors = []
+        abort = threading.Event()
+
+        def put(q, item, st):
+            t0 = time.perf_counter()
+            # 带超时轮询，出错中止时不会永远卡在满队列上
+            while not abort.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            st.wait_out += time.perf_counter() - t0
+
+        def producer(func, out_q, st):
+            try:
+                iterator = iter(func(source))
+                while not abort.is_set():
+                    t0 = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    st.busy += time.perf_counter() - t0
+                    st.items += 1
+                    put(out_q, item, st)
+            except BaseException as e:
+                errors.append(e)
+                abort.set()
+            finally:
+                if not abort.is_set():
+                    put(out_q, _END, st)
+
+        def worker(func, in_q, out_q, st):
+            try:
+                while not abort.is_set():
+                    st.sample_depth(in_q.qsize())
+                    t0 = time.perf_counter()
+                    try:
+                        item = in_q.get(timeout=0.1)
+                    except queue.Empty:
+                        st.wait_in += time.perf_counter() - t0
+                        continue
+                    st.wait_in += time.perf_counter() - t0
+                    if item is _END:
+                        break
+
+                    t0 = time.perf_counter()
+                    result = func(item)
+                    st.busy += time.perf_counter() - t0
+                    st.items += 1
+                    if out_q is not None:
+                        put(out_q, result, st)
+            except BaseException as e:
+                errors.append(e)
+                abort.set()
+            finally:
+                if out_q is not None and not abort.is_set():
+                    put(out_q, _END, st)
+
+        threads = [threading.Thread(target=producer, args=(self.stages[0][1], queues[0], stats[0]),
+                                    name=f"ocr-{self.stages[0][0]}", daemon=True)]
+        for i, (name, func) in enumerate(self.stages[1:], start=1):
+            out_q = queues[i] if i < len(queues) else None
+            threads.append(threading.Thread(target=worker, args=(func, queues[i - 1], out_q, stats[i]),
+                                            name=f"ocr-{name}", daemon=True))
+
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=0.1)
+                if cancel is not None and not abort.is_set() and cancel.status is not None:
+                    # 不等哪个阶段函数去检查：直接中止，阻塞在队列上的线程随即退出
+                    errors.append(ConversionCancelled(cancel.status))
+                    abort.set()
+        self.wall_time = time.perf_counter() - t0
+        self.stats = [st.as_dict(self.wall_time) for st in stats]
+
+        if errors:
+            raise errors[0]
+        return self.stats
+
+    def bottleneck(self):
+        """ 利用率最高的阶段即瓶颈 """
+        if not self.stats:
+            return None
+        return max(self.stats, key=lambda s: s["utilization"])["stage"]
+
+    def print_report(self):
+        print(f"   📊 流水线统计 (总耗时 {self.wall_time:.2f}s，瓶颈: {self.bottleneck()})")
+        for s in self.stats:
+            depth = "-" if s["queue_avg"] is None else f"平均 {s['queue_avg']:.1f} 最大 {s['queue_max']}"
+            print(f"      {s['stage']:<10} 页数 {s['items']:>4} | 忙碌 {s['busy_sec']:>7.2f}s "
+                  f"({s['utilization']:.0%}) | 输入队列 {depth}")
+
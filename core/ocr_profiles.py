@@ -0,0 +1,92 @@
+import os
+import json
+import time
+from core.app_paths import app_data_dir, write_json
+
+# =========================================================================
+# OCR 识别参数档位 (fast / balanced / accurate)
+# 两个 OCR 后端共用同一组参数：渲染 DPI、检测二值化阈值、框置信度、框扩张比例、方向分类器开关
+# 内置档位是保守的起点；tools/tune_ocr.py 在标注样例上实测扫参后，
+# 把 Pareto 前沿上选出的档位写进 ocr_profiles.json，同名档位以实测结果为准
+# =========================================================================
+
+PROFILES_FILE = "ocr_profiles.json"
+
+TUNING_KEYS = ("dpi", "det_thresh", "det_box_thresh", "det_unclip_ratio", "use_cls")
+
+# 不指定档位时的参数 (原先写死在两个转换器里的手调值)
+DEFAULT_TUNING = {
+    "dpi": 300,               # 保持 300 DPI 以确保"冻干/冻于"等形近字的清晰度
+    "det_thresh": 0.1,        # 检测阈值极低：让模型更敏感，防止漏掉颜色淡的字
+    "det_box_thresh": 0.3,    # 框置信度
+    "det_unclip_ratio": 2.0,  # 扩张比例：强行合并间距较大的词 (如 "名   称")
+    "use_cls": True,          # 文字方向分类器 (倒置的文字行)
+}
+
+BUILTIN_PROFILES = {
+    "accurate": dict(DEFAULT_TUNING),
+    # 正放的扫描件基本没有倒置文字行，关掉方向分类器省掉一次逐行推理
+    "balanced": {**DEFAULT_TUNING, "use_cls": False},
+    "fast": {**DEFAULT_TUNING, "dpi": 200, "det_box_thresh": 0.5, "use_cls": False},
+}
+
+
+def profiles_path():
+    return os.path.join(app_data_dir(create=False), PROFILES_FILE)
+
+
+def profile_from_env():
+    """ 默认档位，可通过环境变量 DOC_AUDIT_OCR_PROFILE 指定 (未设置为 None，即 DEFAULT_TUNING) """
+    return os.environ.get("DOC_AUDIT_OCR_PROFILE") or None
+
+
+def _read_saved(path=None):
+    path = path or profiles_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("profiles", {})
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"⚠️ OCR 档位文件无法读取，已忽略: {e}")
+        return {}
+
+
+def load_profiles(path=None):
+    """ 返回 {档位名: 参数}；内置档位在前，实测保存的同名档位覆盖内置 """
+    profiles = {name: dict(tuning) for name, tuning in BUILTIN_PROFILES.items()}
+    for name, entry in _read_saved(path).items():
+        tuning = entry.get("tuning", {}) if isinstance(entry, dict) else {}
+        profiles[name] = {**DEFAULT_TUNING, **{k: v for k, v in tuning.items() if k in TUNING_KEYS}}
+    return profiles
+
+
+def resolve_tuning(profile=None, path=None, **overrides):
+    """ 参数优先级：显式传入 (非 None) > 档位 > DEFAULT_TUNING；未知档位抛 ValueError """
+    tuning = dict(DEFAULT_TUNING)
+    if profile:
+        profiles = load_profiles(path)
+        if profile not in profiles:
+            raise ValueError(f"未知 OCR 档位: {profile}，可选 {sorted(profiles)}")
+        tuning.update(profiles[profile])
+    unknown = set(overrides) - set(TUNING_KEYS)
+    if unknown:
+        raise ValueError(f"未知的 OCR 识别参数: {sorted(unknown)}")
+    tuning.update({k: v for k, v in overrides.items() if v is not None})
+    return tuning
+
+
+def save_profiles(chosen, results=None, path=None):
+    """
+    chosen: {档位名: {"tuning": {...}, "label", "sec_per_page", "cer"}}
+    与已保存的档位合并 (本次没选出的档位保留原值)；results 为全部配置的测量结果 (仅作记录)
+    """
+    path = path or profiles_path()
+    profiles = _read_saved(path)
+    profiles.update(chosen)
+    data = {
+        "profiles": profiles,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results or [],
+    }
+    return write_json(path, data)
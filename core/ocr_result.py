@@ -0,0 +1,200 @@
+import numpy as np
+
+# =========================================================================
+# 统一的单页 OCR 结果 (两个后端解析后都是它)
+# 原来各后端解析成纯文本列表：框坐标和置信度在解析时就丢了，PaddleOCR 还要靠递归遍历兜底。
+# 这里每页只保留几块紧凑的数组：
+#   polys     (n, 4, 2) float32   文字框四个顶点 (整页像素坐标)
+#   scores    (n,)      float32   识别置信度
+#   line_ids  (n,)      int32     所在文本行 (同一行左右排列的框同号，按阅读顺序从 0 编号)
+#   text + offsets                所有框的文字拼成一个字符串，第 i 个框是 text[offsets[i]:offsets[i+1]]
+# 框已按阅读顺序 (先行、行内从左到右) 排好；过滤用布尔掩码一次完成，不逐框判断。
+# 一页一两百个框只有几 KB，可以直接缓存或在进程间传递 (to_bytes / from_bytes)
+# 不知道的几何信息 / 置信度为 NaN (只给出文字的后端)，所有与它们相关的过滤条件都不会命中
+# =========================================================================
+
+_MAGIC = b"OCRP1"
+
+
+class OcrPage:
+    """
+    page = OcrPage.from_boxes(框, 文字, 置信度)    # 自动排阅读顺序、分行
+    page = OcrPage.from_texts(["第一行", ...])     # 只有文字 (每条一行)
+    page.filter(min_score=0.5, min_height=16)      # 返回新对象
+    page.texts()                                   # 每个框一条 (阅读顺序)
+    page.lines()                                   # 每行一个字符串 (行内的框以空格连接)
+    """
+
+    def __init__(self, polys, scores, line_ids, text, offsets):
+        """ 直接构造时各数组须已按阅读顺序排好；一般用 from_boxes / from_texts """
+        self.polys = polys
+        self.scores = scores
+        self.line_ids = line_ids
+        self.text = text
+        self.offsets = offsets
+
+    # ------------------------------------------------------------------
+    # 构造
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _pack(texts):
+        texts = [str(t).replace("\n", " ").strip() for t in texts]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        return "".join(texts), offsets
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4, 2), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32),
+                   "", np.zeros(1, np.int32))
+
+    @classmethod
+    def from_texts(cls, texts, scores=None):
+        """ 没有框坐标的结果：每条文字单独成行，顺序不变 """
+        n = len(texts)
+        text, offsets = cls._pack(texts)
+        scores = np.full(n, np.nan, np.float32) if scores is None else np.asarray(scores, np.float32)
+        return cls(np.full((n, 4, 2), np.nan, np.float32), scores, np.arange(n, dtype=np.int32), text, offsets)
+
+    @classmethod
+    def from_boxes(cls, polys, texts, scores=None, line_tolerance=0.5):
+        """
+        polys: n 个四边形 (或 n x 4 x 2 数组)；scores 缺省为 NaN
+        分行：按框的垂直中心排序，与上一个框的中心相差超过 line_tolerance 倍中位框高就另起一行
+        """
+        n = len(texts)
+        if not n:
+            return cls.empty()
+        polys = np.asarray(polys, np.float32).reshape(n, 4, 2)
+        scores = np.full(n, np.nan, np.float32) if scores is None else np.asarray(scores, np.float32)
+
+        ys = polys[:, :, 1]
+        centers = (ys.min(axis=1) + ys.max(axis=1)) / 2
+        heights = ys.max(axis=1) - ys.min(axis=1)
+        by_center = np.argsort(centers, kind="stable")
+        step = np.diff(centers[by_center]) > line_tolerance * max(float(np.median(heights)), 1.0)
+        line_ids = np.empty(n, np.int32)
+        line_ids[by_center] = np.concatenate(([0], np.cumsum(step)))
+
+        order = np.lexsort((polys[:, :, 0].min(axis=1), line_ids))
+        text, offsets = cls._pack([texts[i] for i in order])
+        return cls(polys[order], scores[order], line_ids[order], text, offsets)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return len(self.scores)
+
+    def texts(self):
+        """ 每个框的文字 (阅读顺序) """
+        return [self.text[a:b] for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def lines(self):
+        """ 每行一个字符串：同一行的框以空格连接 """
+        texts = self.texts()
+        if not texts:
+            return []
+        starts = np.flatnonzero(np.diff(self.line_ids, prepend=self.line_ids[0] - 1))
+        bounds = list(starts) + [len(texts)]
+        return [" ".join(texts[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def heights(self):
+        ys = self.polys[:, :, 1]
+        return ys.max(axis=1) - ys.min(axis=1)
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return (self.polys.nbytes + self.scores.nbytes + self.line_ids.nbytes + self.offsets.nbytes
+                + len(self.text.encode("utf-8")))
+
+    # ------------------------------------------------------------------
+    # 变换 / 过滤 (都返回新对象)
+    # ------------------------------------------------------------------
+    def select(self, mask):
+        """ 按布尔掩码 (或下标) 取子集；空出来的行号重新连续编号 """
+        idx = np.flatnonzero(mask) if np.asarray(mask).dtype == bool else np.asarray(mask, np.intp)
+        texts = self.texts()
+        text, offsets = self._pack([texts[i] for i in idx])
+        line_ids = np.unique(self.line_ids[idx], return_inverse=True)[1].astype(np.int32)
+        return OcrPage(self.polys[idx], self.scores[idx], line_ids, text, offsets)
+
+    def mapped(self, dx, dy, scale=1.0):
+        """ 裁剪 (并缩放 scale 倍) 后图上的坐标换算回整页：x / scale + dx """
+        polys = self.polys / np.float32(scale) + np.array([dx, dy], np.float32)
+        return OcrPage(polys, self.scores, self.line_ids, self.text, self.offsets)
+
+    def noise_mask(self, min_score=None, min_height=None, lone_symbols=False):
+        """
+        噪点掩码 (True 为丢弃)：
+        - 空文字
+        - 置信度低于 min_score
+        - 框高 (像素) 低于 min_height：扫描污点、装订孔边缘之类被当成文字的碎块
+        - lone_symbols=True 时，孤零零一个非汉字字符的框 (多余的 "1"、页码、标点碎片)；
+          表格里单独的金额数字、条款字母也是这样的框，所以默认不开
+        """
+        lengths = self.lengths()
+        noise = lengths == 0
+        if lone_symbols and len(self.text):
+            # 整页文字转成码点数组 (UTF-32 一个字符 4 字节，下标与 offsets 对齐)，一次取出所有单字框的字符
+            codes = np.frombuffer(self.text.encode("utf-32-le"), np.uint32)
+            single = lengths == 1
+            chars = codes[np.minimum(self.offsets[:-1], len(codes) - 1)]
+            noise |= single & ((chars < 0x4E00) | (chars > 0x9FA5))
+        if min_score is not None:
+            noise |= self.scores < min_score
+        if min_height is not None:
+            noise |= self.heights() < min_height
+        return noise
+
+    def filter(self, min_score=None, min_height=None, lone_symbols=False):
+        noise = self.noise_mask(min_score, min_height, lone_symbols)
+        return self.select(~noise) if noise.any() else self
+
+    def replace(self, replacements):
+        """ 关键词矫正：整页文字一次替换 (框之间以换行分隔，替换不会跨框) """
+        texts = "\n".join(self.texts())
+        fixed = texts
+        for wrong, correct in replacements.items():
+            if wrong in fixed:
+                fixed = fixed.replace(wrong, correct)
+        if fixed == texts:
+            return self
+        text, offsets = self._pack(fixed.split("\n"))
+        return OcrPage(self.polys, self.scores, self.line_ids, text, offsets)
+
+    # ------------------------------------------------------------------
+    # 序列化 (缓存 / 进程间传递)
+    # ------------------------------------------------------------------
+    def to_bytes(self):
+        text = self.text.encode("utf-8")
+        header = np.array([len(self), len(text)], np.int64).tobytes()
+        return b"".join([_MAGIC, header, self.polys.tobytes(), self.scores.tobytes(),
+                         self.line_ids.tobytes(), self.offsets.tobytes(), text])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("不是 OcrPage 序列化数据")
+        pos = len(_MAGIC)
+        n, text_len = np.frombuffer(data, np.int64, 2, pos)
+        pos += 16
+
+        def take(dtype, count):
+            nonlocal pos
+            arr = np.frombuffer(data, dtype, count, pos).copy()
+            pos += arr.nbytes
+            return arr
+
+        polys = take(np.float32, n * 8).reshape(n, 4, 2)
+        scores = take(np.float32, n)
+        line_ids = take(np.int32, n)
+        offsets = take(np.int32, n + 1)
+        text = bytes(data[pos:pos + text_len]).decode("utf-8")
+        return cls(polys, scores, line_ids, text, offsets)
+
+    def __repr__(self):
+        return f"OcrPage({len(self)} 个框, {int(self.line_ids.max()) + 1 if len(self) else 0} 行, {self.nbytes} 字节)"
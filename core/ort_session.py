@@ -0,0 +1,304 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# =========================================================================
+# ONNX Runtime 会话调优
+# RapidOCR 只透传线程数，执行模式 / 图优化级别 / 内存池等都写死在它内部。
+# 这里在创建引擎时把我们的 SessionOptions 交给它的 det / cls / rec 三个会话
+# (rapidocr_session_options)；没有这个钩子的版本在引擎创建之后重建会话。
+# 两条路都依赖 rapidocr_onnxruntime 1.3/1.4 的内部结构 (requirements.txt 已限定版本)，
+# 结构对不上时不会报错，只打印警告并保留 RapidOCR 自己的默认会话选项。
+# =========================================================================
+
+EXECUTION_MODES = ("sequential", "parallel")
+GRAPH_OPT_LEVELS = ("disable", "basic", "extended", "all")
+
+DEFAULT_OPTIONS = {
+    "intra_op_num_threads": None,     # None = 按 auto_thread_policy 自动分配
+    "inter_op_num_threads": None,
+    "execution_mode": "sequential",   # OCR 模型是单链路图，parallel 基本无收益
+    "graph_optimization_level": "all",
+    "enable_cpu_mem_arena": False,    # 与 RapidOCR 默认一致：关掉内存池，多引擎时省内存
+    "enable_mem_pattern": True,
+}
+
+
+def concurrent_engines_from_env(default=1):
+    """ 同机并发 OCR 引擎数，可通过环境变量 DOC_AUDIT_OCR_ENGINES 声明 """
+    try:
+        return max(1, int(os.environ.get("DOC_AUDIT_OCR_ENGINES", default)))
+    except ValueError:
+        return default
+
+
+def auto_thread_policy(concurrent_engines=1, cpu_count=None):
+    """
+    把 CPU 核数平均分给同时运行的引擎，避免 N 个引擎各自抢占全部核心 (超订)
+    返回 (intra_op_num_threads, inter_op_num_threads)
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    intra = max(1, cpu_count // max(1, concurrent_engines))
+    # sequential 模式下 inter_op 不起作用，固定为 1
+    return intra, 1
+
+
+def resolve_options(options=None, concurrent_engines=1):
+    """ 合并用户配置与默认值，并把自动线程数落成具体数字 """
+    resolved = dict(DEFAULT_OPTIONS)
+    resolved.update({k: v for k, v in (options or {}).items() if v is not None})
+
+    unknown = set(resolved) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"未知的 ONNX Runtime 选项: {sorted(unknown)}")
+    if resolved["execution_mode"] not in EXECUTION_MODES:
+        raise ValueError(f"execution_mode 只能是 {EXECUTION_MODES}")
+    if resolved["graph_optimization_level"] not in GRAPH_OPT_LEVELS:
+        raise ValueError(f"graph_optimization_level 只能是 {GRAPH_OPT_LEVELS}")
+
+    intra, inter = auto_thread_policy(concurrent_engines)
+    if resolved["intra_op_num_threads"] is None:
+        resolved["intra_op_num_threads"] = intra
+    if resolved["inter_op_num_threads"] is None:
+        resolved["inter_op_num_threads"] = inter
+    return resolved
+
+
+def build_session_options(options):
+    """ 由 resolve_options 的结果构造 onnxruntime.SessionOptions """
+    import onnxruntime as ort
+
+    sess_opt = ort.SessionOptions()
+    sess_opt.log_severity_level = 4
+    sess_opt.intra_op_num_threads = options["intra_op_num_threads"]
+    sess_opt.inter_op_num_threads = options["inter_op_num_threads"]
+    sess_opt.execution_mode = {
+        "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+        "parallel": ort.ExecutionMode.ORT_PARALLEL,
+    }[options["execution_mode"]]
+    sess_opt.graph_optimization_level = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[options["graph_optimization_level"]]
+    sess_opt.enable_cpu_mem_arena = options["enable_cpu_mem_arena"]
+    sess_opt.enable_mem_pattern = options["enable_mem_pattern"]
+    return sess_opt
+
+
+def engine_sessions(engine):
+    """
+    返回 RapidOCR 内部的 {名称: OrtInferSession 包装对象}
+    (rapidocr_onnxruntime 1.3/1.4 的属性布局)
+    """
+    return {
+        "det": engine.text_det.infer,
+        "cls": engine.text_cls.infer,
+        "rec": engine.text_rec.session,
+    }
+
+
+def needs_rebuild(options):
+    """
+    线程数可以直接传给 RapidOCR 构造函数；
+    只有其余选项偏离 RapidOCR 内置默认时，才值得再重建一次会话
+    """
+    return any(options[k] != v for k, v in DEFAULT_OPTIONS.items() if not k.endswith("_num_threads"))
+
+
+_SESSION_HOOK_LOCK = threading.Lock()
+
+
+@contextmanager
+def rapidocr_session_options(options_for):
+    """
+    创建 RapidOCR 引擎期间，让它内部的 OrtInferSession 直接用我们的 SessionOptions 建会话
+    (RapidOCR 把图优化级别写死为 ORT_ENABLE_ALL；事后再重建会话等于每个模型优化两遍)
+    options_for(model_path) -> resolve_options 的结果，可以按模型给不同选项
+    产出 True；当前 RapidOCR 版本没有这个钩子时产出 False，调用方改用 apply_session_options 事后重建
+    """
+    try:
+        from rapidocr_onnxruntime.utils.infer_engine import OrtInferSession
+    except ImportError:
+        try:
+            from rapidocr_onnxruntime.utils import OrtInferSession
+        except ImportError:
+            OrtInferSession = None
+    original = OrtInferSession.__dict__.get("_init_sess_opts") if OrtInferSession else None
+    if not isinstance(original, staticmethod):
+        yield False
+        return
+
+    def init_sess_opts(config):
+        return build_session_options(options_for(os.path.abspath(str(config.get("model_path")))))
+
+    # 钩子挂在类上，同一时间只允许一个引擎在创建
+    with _SESSION_HOOK_LOCK:
+        OrtInferSession._init_sess_opts = staticmethod(init_sess_opts)
+        try:
+            yield True
+        finally:
+            OrtInferSession._init_sess_opts = original
+
+
+def apply_session_options(engine, options):
+    """
+    用新的 SessionOptions 重建 RapidOCR 的三个会话，沿用原来的模型路径和执行器配置
+    options 可以是 resolve_options 的结果，也可以是 options(model_path) -> 结果 (按模型给不同选项)
+    成功返回 True；RapidOCR 内部结构对不上时不动原会话，打印警告并返回 False
+    """
+    import onnxruntime as ort
+
+    try:
+        wrappers = list(engine_sessions(engine).values())
+    except AttributeError as e:
+        print(f"      ⚠️ 当前 RapidOCR 版本的引擎结构无法识别 ({e})，会话选项沿用 RapidOCR 默认值")
+        return False
+    model_paths = [getattr(getattr(w, "session", None), "_model_path", None) for w in wrappers]
+    if None in model_paths:
+        print("      ⚠️ 当前 RapidOCR / onnxruntime 版本取不到会话的模型路径，会话选项沿用 RapidOCR 默认值")
+        return False
+
+    for wrapper, model_path in zip(wrappers, model_paths):
+        old = wrapper.session
+        provider_options = old.get_provider_options()
+        wrapper.session = ort.InferenceSession(
+            model_path,
+            sess_options=build_session_options(options(model_path) if callable(options) else options),
+            providers=[(p, provider_options.get(p, {})) for p in old.get_providers()],
+        )
+    return True
+
+
+# =========================================================================
+# 优化后计算图的本地缓存
+# 每次创建会话 ONNX Runtime 都要把原始模型重新做一遍图优化 (算子融合、常量折叠、布局转换)，
+# 短命的批处理进程 / 打包后的 exe 每次冷启动都要付这笔开销。
+# 第一次创建时用 optimized_model_filepath 把优化结果存到 <数据目录>/ort_cache/，
+# 以后直接加载优化好的图，并以 graph_optimization_level="disable" 建会话 (不再重复优化)。缓存键 = 模型内容哈希 + ORT 版本 + 机器架构 + 图优化级别 + 执行器：
+# 换了模型 (量化 / 升级)、升级 onnxruntime、改了优化级别，都会自然落到新的缓存文件上。
+# 布局转换等优化与硬件有关，缓存放在本机数据目录，不随程序分发。
+# 缓存文件旁边有一份 .json 元数据 (来源模型、文件大小)，不一致或加载失败时删掉重建，回退原始模型。
+# =========================================================================
+
+CACHE_VERSION = 1
+
+
+class OptimizedGraphCache:
+    """
+    cache = OptimizedGraphCache()
+    path = cache.lookup(model_path, options)       # 命中返回优化图路径，否则 None
+    cache.store(model_path, options)                # 生成并保存优化图 (原子替换)
+    cache.invalidate(model_path, options)           # 加载失败时删掉
+    """
+
+    def __init__(self, cache_dir=None):
+        from core.app_paths import app_data_dir
+        self.cache_dir = cache_dir or app_data_dir("ort_cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._digests_path = os.path.join(self.cache_dir, "model_digests.json")
+        self._digests = self._read_json(self._digests_path) or {}
+
+    @staticmethod
+    def _read_json(path):
+        import json
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        import json
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def model_digest(self, model_path):
+        """
+        模型内容的 SHA-256；按 (路径, 大小, 修改时间) 记在 model_digests.json 里，
+        模型文件没动过时不必每次启动都把十几 MB 的模型重新读一遍
+        """
+        import hashlib
+        path = os.path.abspath(model_path)
+        stat = os.stat(path)
+        stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        memo = self._digests.get(path)
+        if memo and memo.get("stamp") == stamp:
+            return memo["sha256"]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        self._digests[path] = {"stamp": stamp, "sha256": sha.hexdigest()}
+        try:
+            self._write_json(self._digests_path, self._digests)
+        except OSError:
+            pass
+        return self._digests[path]["sha256"]
+
+    def cache_path(self, model_path, options, providers=("CPUExecutionProvider",)):
+        """ 缓存文件路径 (文件名带缓存键)；键相同即可复用 """
+        import hashlib
+        import json
+        import platform
+        import onnxruntime as ort
+
+        payload = json.dumps({
+            "version": CACHE_VERSION,
+            "model": self.model_digest(model_path),
+            "ort": ort.__version__,
+            "machine": platform.machine(),
+            "graph_optimization_level": options["graph_optimization_level"],
+            "providers": list(providers),
+        }, sort_keys=True)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.cache_dir, f"{stem}.{key}.onnx")
+
+    def lookup(self, model_path, options, providers=("CPUExecutionProvider",)):
+        """ 命中且元数据与文件一致时返回优化图路径；否则 None (残缺的条目顺手删掉) """
+        path = self.cache_path(model_path, options, providers)
+        meta = self._read_json(path + ".json")
+        if meta is None or not os.path.exists(path):
+            return None
+        if meta.get("size") != os.path.getsize(path) or meta.get("version") != CACHE_VERSION:
+            self._remove(path)
+            return None
+        return path
+
+    def store(self, model_path, options, providers=("CPUExecutionProvider",)):
+        """ 用原始模型创建一次会话，让 ORT 把优化后的图写出来；成功返回缓存路径，失败返回 None """
+        import onnxruntime as ort
+
+        path = self.cache_path(model_path, options, providers)
+        tmp = f"{path}.{os.getpid()}.tmp.onnx"
+        try:
+            sess_opt = build_session_options(options)
+            sess_opt.optimized_model_filepath = tmp
+            ort.InferenceSession(model_path, sess_options=sess_opt, providers=list(providers))
+            os.replace(tmp, path)
+            self._write_json(path + ".json", {
+                "version": CACHE_VERSION,
+                "source": os.path.abspath(model_path),
+                "size": os.path.getsize(path),
+            })
+            return path
+        except Exception as e:
+            print(f"      ⚠️ 保存优化图缓存失败 (不影响识别): {e}")
+            self._remove(tmp)
+            return None
+
+    def invalidate(self, model_path, options, providers=("CPUExecutionProvider",)):
+        self._remove(self.cache_path(model_path, options, providers))
+
+    @staticmethod
+    def _remove(path):
+        for p in (path, path + ".json"):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import numpy as np
+from core.doc_io import is_path, open_pdf, read_bytes
+
+# =========================================================================
+# PDF 页面渲染后端
+#   poppler: pdf2image -> pdftoppm 子进程 -> 临时 PPM 文件 -> PIL 图像 (需要安装 Poppler)
+#   fitz   : PyMuPDF 进程内渲染，numpy 数组直接指向 pixmap 缓冲区 (零拷贝，无外部进程)
+# 两者都逐页产出 (页序号, 总页数, 图像)，图像为 PIL.Image 或 numpy 数组
+# 输入可以是路径或内存数据 (bytes / 文件对象)：fitz 直接从内存打开；
+# Poppler 是外部进程只能读文件，内存数据先写一次临时文件，而不是每段各写一次
+# =========================================================================
+
+RENDERERS = ("poppler", "fitz")
+
+
+class PixmapArray(np.ndarray):
+    """
+    直接指向 fitz.Pixmap 内存的 numpy 数组
+    samples_mv 在 pixmap 释放后失效，所以把 pixmap 挂在数组上，
+    由数组 (以及从它切出来的视图) 的生命周期保证缓冲区有效
+    """
+    _pixmap = None
+
+    def __array_finalize__(self, obj):
+        if obj is not None:
+            self._pixmap = getattr(obj, "_pixmap", None)
+
+
+def pixmap_to_array(pix):
+    """ 零拷贝：按 pixmap 的 stride 构造 (h, w, n) 或灰度 (h, w) 视图 """
+    n = pix.n
+    shape = (pix.height, pix.width, n) if n > 1 else (pix.height, pix.width)
+    strides = (pix.stride, n, 1) if n > 1 else (pix.stride, 1)
+    arr = np.ndarray(shape=shape, dtype=np.uint8, buffer=pix.samples_mv, strides=strides)
+    arr = arr.view(PixmapArray)
+    arr._pixmap = pix
+    return arr
+
+
+def iter_pdf_pages_fitz(source, dpi=300, grayscale=False):
+    """
+    PyMuPDF 逐页渲染，产出 (页序号, 总页数, numpy 数组)
+    grayscale=True 时每页只有 1 个通道，内存是 RGB 的 1/3
+    """
+    import fitz
+
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    with open_pdf(source) as doc:
+        total = len(doc)
+        for i, page in enumerate(doc):
+            pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+            yield i, total, pixmap_to_array(pix)
+
+
+def iter_pdf_pages_poppler(pdf_path, dpi=300, poppler_path=None, chunk_size=4, grayscale=False):
+    """
+    分段调用 Poppler 渲染 (每次 chunk_size 页)，边渲染边产出 (页序号, 总页数, PIL 图像)，
+    取代原来 convert_from_path 一次性把整本转成图片
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+
+    if not is_path(pdf_path):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, "input.pdf")
+            with open(tmp_path, "wb") as f:
+                f.write(read_bytes(pdf_path))
+            yield from iter_pdf_pages_poppler(tmp_path, dpi, poppler_path, chunk_size, grayscale)
+        return
+
+    total = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+    for first in range(1, total + 1, chunk_size):
+        last = min(first + chunk_size - 1, total)
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=first, last_page=last,
+                                   poppler_path=poppler_path, grayscale=grayscale)
+        for offset, img in enumerate(images):
+            yield first - 1 + offset, total, img
+
+
+def iter_pdf_pages(pdf_path, dpi=300, renderer="poppler", poppler_path=None, grayscale=False):
+    if renderer == "fitz":
+        return iter_pdf_pages_fitz(pdf_path, dpi=dpi, grayscale=grayscale)
+    if renderer == "poppler":
+        return iter_pdf_pages_poppler(pdf_path, dpi=dpi, poppler_path=poppler_path, grayscale=grayscale)
+    raise ValueError(f"未知渲染后端: {renderer}，可选 {RENDERERS}")
+
+
+def to_array(img, grayscale=False):
+    """
+    统一成引擎可用的 numpy 数组
+    fitz 渲染出来的已经是数组，原样返回 (不复制)；PIL 图像按需转 RGB / 灰度后转数组
+    """
+    if isinstance(img, np.ndarray):
+        return img
+    mode = 'L' if grayscale else 'RGB'
+    if img.mode != mode:
+        img = img.convert(mode)
+    return np.array(img)
@@ -1,184 +1,115 @@
 import fitz  # PyMuPDF
-import os
 import re
+import math
+import time
+import random
 import frontmatter
-from markdown import markdown
-from weasyprint import HTML, CSS
 from collections import Counter
+from core.search_index import index_pages
+from core.checkpoint import PageCheckpoint, page_fingerprint
+from core.doc_io import source_name, open_pdf, read_text, write_output
+from core.cancellation import OK, FAILED, STATUS_LABELS, ConversionCancelled, ensure_token
+
+# Markdown 输出里的分页标记 (HTML 注释，渲染时不可见；core/preview.py 按它分页)
+PAGE_MARKER = "<!-- page {} -->"
 
 class PdfMdConverter:
-    def __init__(self):
-        pass
+    # 页眉页脚判定：边缘文本出现次数超过页数的 30%
+    HF_RATIO = 0.3
+    # 正文字号的抽样置信度低于该值时，改为全量扫描
+    MIN_BODY_CONFIDENCE = 0.6
+    # 页码正则
+    PAGE_NUM_PATTERNS = [
+        r'^\d+$', r'^\-?\s*\d+\s*\-?$', r'^Page\s*\d+', 
+        r'^\d+\s*[\/\|\-]\s*\d+$', r'^\d+\s*of\s*\d+$',
+        r'^第\s*\d+\s*页$', r'^\d+\s*\/\s*\d+$'
+    ]
+
+    def __init__(self, prescan_threshold=200, prescan_sample=60, search_index=None, checkpoint_dir=None):
+        """
+        prescan_threshold: 超过该页数的文档，预扫描只分层抽样 prescan_sample 页来估计
+            正文字号与页眉页脚 (不再逐页扫描全书)；抽样结果不确定时才回退全量扫描
+        search_index: 全文检索索引 (SearchIndex 实例或索引文件路径)，PDF -> Markdown 成功后写入每页正文
+        checkpoint_dir: 逐页检查点目录 (None 为不启用)；同一路径的文档重跑时，内容流没变的页直接复用上次结果
+        """
+        self.prescan_threshold = prescan_threshold
+        self.prescan_sample = prescan_sample
+        self.search_index = search_index
+        self.checkpoint_dir = checkpoint_dir
+        self.last_prescan = None
+        self.last_reused = 0
+        self.last_status = None
+        self.last_timed_out = []
 
     # =========================================================================
     # 1. PDF -> Markdown (V7.0 表格校验 + 粘连解离版)
     # =========================================================================
-    def pdf_to_markdown(self, pdf_path, output_path):
+    def pdf_to_markdown(self, pdf_path, output_path, cancel=None):
+        """
+        输入可以是路径或内存数据 (bytes / 文件对象)，输出可以是路径或可写流 (见 core/doc_io.py)
+        cancel: CancelToken (可选)；取消 / 超时时写出已完成的页 (front matter 带 status) 并返回 False
+        """
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
+        self.last_timed_out = []
         try:
-            doc = fitz.open(pdf_path)
+            cancel.check()
+            doc = open_pdf(pdf_path)
             total_pages = len(doc)
             
-            # --- 步骤 A: 建立页眉页脚特征库 ---
-            text_frequency = Counter()
-            all_font_sizes = []
-            
-            # 预扫描全书
-            for page in doc:
-                page_height = page.rect.height
-                blocks = page.get_text("dict")["blocks"]
-                for b in blocks:
-                    if b['type'] == 0:
-                        for line in b["lines"]:
-                            # 1. 收集字号
-                            for span in line["spans"]:
-                                all_font_sizes.append(round(span["size"], 1))
-                            
-                            # 2. 收集边缘文本频率
-                            text = "".join([span["text"] for span in line["spans"]]).strip()
-                            if len(text) < 2: continue
-                            
-                            bbox = line["bbox"]
-                            y_center = (bbox[1] + bbox[3]) / 2
-                            
-                            # 判定区域：上下 20%
-                            if y_center < page_height * 0.20 or y_center > page_height * 0.80:
-                                # 归一化处理
-                                clean_key = re.sub(r'[\d\s]+', '', text).lower()
-                                if clean_key:
-                                    text_frequency[clean_key] += 1
-
-            # 计算正文基准字号
-            body_font_size = Counter(all_font_sizes).most_common(1)[0][0] if all_font_sizes else 10.5
-            
-            # 筛选高频特征 (频率 > 30%)
-            hf_candidates = {
-                key for key, count in text_frequency.items() 
-                if count > (total_pages * 0.3)
-            }
+            # --- 步骤 A: 建立页眉页脚特征库 (大文档抽样估计) ---
+            body_font_size, hf_candidates, self.last_prescan = self._prescan(doc)
             
             print(f"🕵️ 特征库: {list(hf_candidates)[:5]}...") # 打印前5个看看
 
             # --- 步骤 B: 逐页提取 ---
             md_content = ""
+            page_texts = []   # 每页正文 (已去掉页眉页脚)，写入全文索引
             extracted_headers = set()
             extracted_footers = set()
             
             # 页码正则
-            PAGE_NUM_PATTERNS = [
-                r'^\d+$', r'^\-?\s*\d+\s*\-?$', r'^Page\s*\d+', 
-                r'^\d+\s*[\/\|\-]\s*\d+$', r'^\d+\s*of\s*\d+$',
-                r'^第\s*\d+\s*页$', r'^\d+\s*\/\s*\d+$'
-            ]
-
-            for i, page in enumerate(doc):
-                page_height = page.rect.height
-                
-                # 1. 表格提取 (带合法性校验)
-                tables = page.find_tables(strategy='lines')
-                page_tables_md = {}
-                table_bboxes = []
-                
-                for tab in tables:
-                    # --- 🛑 表格合法性校验 (防止标题变表格) ---
-                    # 规则1: 如果表格只有1行，且列数>3，大概率是标题被拆分了 -> 丢弃
-                    if tab.row_count == 1 and tab.col_count > 3:
-                        continue
-                    # 规则2: 如果表格几乎是空的 -> 丢弃
-                    if len(tab.extract()) < 1:
-                        continue
-                    
-                    # 通过校验，认为是真表格
-                    table_bboxes.append(fitz.Rect(tab.bbox))
-                    page_tables_md[tab.bbox[1]] = tab.to_markdown()
+            PAGE_NUM_PATTERNS = self.PAGE_NUM_PATTERNS
 
-                page_elements = []
-                # 加入表格
-                for y, md_text in page_tables_md.items():
-                    page_elements.append({"y": y, "type": "table", "content": md_text})
+            checkpoint = None
+            if self.checkpoint_dir:
+                # 预扫描结果决定每页怎么切页眉页脚，也作为签名的一部分：它变了，旧的逐页结果就不能用
+                signature = {"body_font_size": body_font_size, "hf_candidates": sorted(hf_candidates)}
+                checkpoint = PageCheckpoint(self.checkpoint_dir, pdf_path, "pdf2md", signature)
 
-                # 2. 文本提取
-                blocks = page.get_text("dict")["blocks"]
-                
-                for b in blocks:
-                    if b['type'] == 0:
-                        # 表格避让
-                        block_rect = fitz.Rect(b["bbox"])
-                        if any(block_rect.intersect(t_rect).get_area() > block_rect.get_area() * 0.5 for t_rect in table_bboxes):
-                            continue
-
-                        for line in b["lines"]:
-                            line_text = "".join([span["text"] for span in line["spans"]]).strip()
-                            if not line_text: continue
-                            
-                            bbox = line["bbox"]
-                            y_center = (bbox[1] + bbox[3]) / 2
-                            line_font_size = max([span["size"] for span in line["spans"]])
-                            
-                            # === 智能判别逻辑 (V7.0) ===
-                            is_top = y_center < page_height * 0.20
-                            is_bottom = y_center > page_height * 0.80
-                            is_strict_zone = y_center < page_height * 0.08 or y_center > page_height * 0.92
-                            
-                            is_hf = False
-                            clean_key = re.sub(r'[\d\s]+', '', line_text).lower()
-                            
-                            # ✂️ 粘连解离检测 (Partial Match)
-                            # 检查这行字是否以某个页眉特征开头？如果是，说明粘连了
-                            matched_candidate = None
-                            if is_top:
-                                for cand in hf_candidates:
-                                    # 简单检查：如果 clean_key 包含 candidate
-                                    if cand in clean_key and len(cand) > 3: 
-                                        matched_candidate = cand
-                                        break
-                            
-                            if matched_candidate:
-                                # 这是一个混合行 (页眉+正文)，我们需要极其小心
-                                # 简单策略：如果整行都很短，或者主要由页眉组成，就视为页眉删掉
-                                # 如果很长，可能是正文，这里为了安全，若位于严格边缘，倾向于删除
-                                is_hf = True
-                            elif clean_key in hf_candidates:
-                                is_hf = True
-                            
-                            # 正则匹配页码
-                            if not is_hf and (is_top or is_bottom):
-                                for pattern in PAGE_NUM_PATTERNS:
-                                    if re.match(pattern, line_text, re.IGNORECASE):
-                                        is_hf = True
-                                        break
-                            
-                            # 🛡️ 正文保护 (Body Guard)
-                            # 如果字号是正文大小，且不在绝对禁区(8%)，且不是完全匹配的高频词 -> 它是正文
-                            is_body_size = abs(line_font_size - body_font_size) < 0.5
-                            if is_hf and is_body_size and not is_strict_zone and clean_key not in hf_candidates:
-                                # 可能是被正则误判的页码 (如 "1." 这种序号)
-                                if not re.match(r'^\d+$', line_text): 
-                                    is_hf = False
-                            
-                            # 执行分类
-                            if is_hf:
-                                if is_top: extracted_headers.add(line_text)
-                                if is_bottom and not re.match(r'^[\d\s\/\-]+$', line_text):
-                                    extracted_footers.add(line_text)
-                                continue 
-                            
-                            # === 正文写入 ===
-                            prefix = ""
-                            if line_font_size >= body_font_size + 4: prefix = "# "
-                            elif line_font_size >= body_font_size + 1.5: prefix = "## "
-                            elif line_font_size >= body_font_size + 0.5:
-                                if not line_text.startswith("**"): line_text = f"**{line_text}**"
-
-                            page_elements.append({
-                                "y": bbox[1],
-                                "type": "text",
-                                "content": f"{prefix}{line_text}"
-                            })
-
-                # 排序并合并
-                page_elements.sort(key=lambda x: x["y"])
-                for el in page_elements:
-                    md_content += el["content"] + "\n\n"
+            status = OK
+            try:
+                for i, page in enumerate(doc):
+                    cancel.check()
+                    result = None
+                    if checkpoint is not None:
+                        fingerprint = page_fingerprint(page)
+                        result = checkpoint.get(fingerprint)
+                    if result is None:
+                        result = self._convert_page(page, body_font_size, hf_candidates, cancel)
+                    # 超时降级的页不进检查点，下次重跑还会完整处理
+                    if checkpoint is not None and i not in self.last_timed_out:
+                        checkpoint.record(i, fingerprint, list(result))
+                    contents, headers, footers = result
+
+                    extracted_headers.update(headers)
+                    extracted_footers.update(footers)
+                    # 合并 (每页前加一个分页标记：HTML 注释，渲染时不可见，结果预览按它分页)
+                    md_content += f"{PAGE_MARKER.format(i + 1)}\n\n"
+                    for content in contents:
+                        md_content += content + "\n\n"
+                    page_texts.append("\n".join(contents))
+                    cancel.page_done(i, "\n\n".join(contents))
+            except ConversionCancelled as e:
+                # 已完成的页照常清洗、写出；检查点保留，重跑时从中断处继续
+                status = e.status
+                print(f"⏹️ {STATUS_LABELS[status]}：已完成 {len(page_texts)}/{total_pages} 页，保存部分结果")
+            finally:
+                if checkpoint is not None:
+                    checkpoint.close()
+            self.last_reused = checkpoint.reused if checkpoint is not None else 0
+            if self.last_reused:
+                print(f"♻️ 检查点复用: {self.last_reused}/{total_pages} 页")
 
             # --- 步骤 C: 最终清洗 (Post-Processing) ---
             # 有时候 PyMuPDF 提取顺序问题导致页码夹在中间，用正则最后扫一遍
@@ -210,29 +141,287 @@ class PdfMdConverter:
             final_footer = max(extracted_footers, key=len) if extracted_footers else ""
             
             post = frontmatter.Post(md_content)
-            post['title'] = os.path.basename(pdf_path)
+            post['title'] = source_name(pdf_path)
             post['header_text'] = final_header
             post['footer_text'] = final_footer
+            if status != OK:
+                post['status'] = STATUS_LABELS[status]
+                post['pages_done'] = f"{len(page_texts)}/{total_pages}"
             
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(frontmatter.dumps(post))
-            
+            write_output(output_path, frontmatter.dumps(post))
+
+            if status != OK:
+                self.last_status = status
+                return False
+            if checkpoint is not None:
+                checkpoint.finish()
+            index_pages(self.search_index, pdf_path, page_texts, "pdf2md", output_path)
+            self.last_status = OK
             return True
 
+        except ConversionCancelled as e:
+            print(f"⏹️ {e}：尚未开始转换")
+            self.last_status = e.status
+            return False
         except Exception as e:
             print(f"❌ 转换失败: {e}")
             import traceback
             traceback.print_exc()
             return False
 
+    def iter_page_markdown(self, doc, cancel=None):
+        """
+        逐页产出 Markdown 片段列表 (已去掉页眉页脚)，预扫描只做一次
+        供其他输出格式 (例如 DocToHtmlConverter 的语义 HTML) 复用同一套标题 / 表格判定
+        cancel: CancelToken (可选)；每页开始前检查，取消 / 超时抛 ConversionCancelled
+        """
+        cancel = ensure_token(cancel)
+        self.last_timed_out = []
+        body_font_size, hf_candidates, self.last_prescan = self._prescan(doc)
+        for page in doc:
+            cancel.check()
+            yield self._convert_page(page, body_font_size, hf_candidates, cancel)[0]
+
+    def _convert_page(self, page, body_font_size, hf_candidates, cancel=None):
+        """
+        转换一页：返回 (按 Y 排好序的 Markdown 片段, 本页识别出的页眉, 本页识别出的页脚)
+        只依赖本页内容与预扫描结果，可以按页缓存到检查点
+        cancel 带单页时限时：取文字已经超时的页 (内容流异常庞大) 不再做表格检测，
+        按纯文本输出，页号记入 last_timed_out
+        """
+        PAGE_NUM_PATTERNS = self.PAGE_NUM_PATTERNS
+        extracted_headers = set()
+        extracted_footers = set()
+
+        page_height = page.rect.height
+        t0 = time.perf_counter()
+        blocks = page.get_text("dict")["blocks"]
+
+        # 1. 表格提取 (带合法性校验)；find_tables 是最慢、耗时最没有上限的一步
+        if cancel is not None and cancel.page_expired(t0):
+            print(f"   ⏱️ 第 {page.number + 1} 页超出单页时限 ({cancel.page_timeout}s)，跳过表格检测")
+            self.last_timed_out.append(page.number)
+            tables = []
+        else:
+            tables = page.find_tables(strategy='lines')
+        page_tables_md = {}
+        table_bboxes = []
+        
+        for tab in tables:
+            # --- 🛑 表格合法性校验 (防止标题变表格) ---
+            # 规则1: 如果表格只有1行，且列数>3，大概率是标题被拆分了 -> 丢弃
+            if tab.row_count == 1 and tab.col_count > 3:
+                continue
+            # 规则2: 如果表格几乎是空的 -> 丢弃
+            if len(tab.extract()) < 1:
+                continue
+            
+            # 通过校验，认为是真表格
+            table_bboxes.append(fitz.Rect(tab.bbox))
+            page_tables_md[tab.bbox[1]] = tab.to_markdown()
+
+        page_elements = []
+        # 加入表格
+        for y, md_text in page_tables_md.items():
+            page_elements.append({"y": y, "type": "table", "content": md_text})
+
+        # 2. 文本提取
+        for b in blocks:
+            if b['type'] == 0:
+                # 表格避让
+                block_rect = fitz.Rect(b["bbox"])
+                if any(block_rect.intersect(t_rect).get_area() > block_rect.get_area() * 0.5 for t_rect in table_bboxes):
+                    continue
+
+                for line in b["lines"]:
+                    line_text = "".join([span["text"] for span in line["spans"]]).strip()
+                    if not line_text: continue
+                    
+                    bbox = line["bbox"]
+                    y_center = (bbox[1] + bbox[3]) / 2
+                    line_font_size = max([span["size"] for span in line["spans"]])
+                    
+                    # === 智能判别逻辑 (V7.0) ===
+                    is_top = y_center < page_height * 0.20
+                    is_bottom = y_center > page_height * 0.80
+                    is_strict_zone = y_center < page_height * 0.08 or y_center > page_height * 0.92
+                    
+                    is_hf = False
+                    clean_key = re.sub(r'[\d\s]+', '', line_text).lower()
+                    
+                    # ✂️ 粘连解离检测 (Partial Match)
+                    # 检查这行字是否以某个页眉特征开头？如果是，说明粘连了
+                    matched_candidate = None
+                    if is_top:
+                        for cand in hf_candidates:
+                            # 简单检查：如果 clean_key 包含 candidate
+                            if cand in clean_key and len(cand) > 3: 
+                                matched_candidate = cand
+                                break
+                    
+                    if matched_candidate:
+                        # 这是一个混合行 (页眉+正文)，我们需要极其小心
+                        # 简单策略：如果整行都很短，或者主要由页眉组成，就视为页眉删掉
+                        # 如果很长，可能是正文，这里为了安全，若位于严格边缘，倾向于删除
+                        is_hf = True
+                    elif clean_key in hf_candidates:
+                        is_hf = True
+                    
+                    # 正则匹配页码
+                    if not is_hf and (is_top or is_bottom):
+                        for pattern in PAGE_NUM_PATTERNS:
+                            if re.match(pattern, line_text, re.IGNORECASE):
+                                is_hf = True
+                                break
+                    
+                    # 🛡️ 正文保护 (Body Guard)
+                    # 如果字号是正文大小，且不在绝对禁区(8%)，且不是完全匹配的高频词 -> 它是正文
+                    is_body_size = abs(line_font_size - body_font_size) < 0.5
+                    if is_hf and is_body_size and not is_strict_zone and clean_key not in hf_candidates:
+                        # 可能是被正则误判的页码 (如 "1." 这种序号)
+                        if not re.match(r'^\d+$', line_text): 
+                            is_hf = False
+                    
+                    # 执行分类
+                    if is_hf:
+                        if is_top: extracted_headers.add(line_text)
+                        if is_bottom and not re.match(r'^[\d\s\/\-]+$', line_text):
+                            extracted_footers.add(line_text)
+                        continue 
+                    
+                    # === 正文写入 ===
+                    prefix = ""
+                    if line_font_size >= body_font_size + 4: prefix = "# "
+                    elif line_font_size >= body_font_size + 1.5: prefix = "## "
+                    elif line_font_size >= body_font_size + 0.5:
+                        if not line_text.startswith("**"): line_text = f"**{line_text}**"
+
+                    page_elements.append({
+                        "y": bbox[1],
+                        "type": "text",
+                        "content": f"{prefix}{line_text}"
+                    })
+
+        # 排序
+        page_elements.sort(key=lambda x: x["y"])
+        return [el["content"] for el in page_elements], sorted(extracted_headers), sorted(extracted_footers)
+
+    # -------------------------------------------------------------------------
+    # 预扫描：字号直方图 + 边缘文本频率
+    # -------------------------------------------------------------------------
+    def _scan_page(self, page, size_hist, text_frequency):
+        """ 统计一页的字号 (直接计入直方图) 与上下 20% 区域的文本频率，返回本页最常见字号 """
+        page_height = page.rect.height
+        page_sizes = Counter()
+        blocks = page.get_text("dict")["blocks"]
+        for b in blocks:
+            if b['type'] == 0:
+                for line in b["lines"]:
+                    # 1. 收集字号
+                    for span in line["spans"]:
+                        page_sizes[round(span["size"], 1)] += 1
+                    
+                    # 2. 收集边缘文本频率
+                    text = "".join([span["text"] for span in line["spans"]]).strip()
+                    if len(text) < 2: continue
+                    
+                    bbox = line["bbox"]
+                    y_center = (bbox[1] + bbox[3]) / 2
+                    
+                    # 判定区域：上下 20%
+                    if y_center < page_height * 0.20 or y_center > page_height * 0.80:
+                        # 归一化处理
+                        clean_key = re.sub(r'[\d\s]+', '', text).lower()
+                        if clean_key:
+                            text_frequency[clean_key] += 1
+
+        size_hist.update(page_sizes)
+        return page_sizes.most_common(1)[0][0] if page_sizes else None
+
+    def _stratified_sample(self, total_pages, n):
+        """ 把全书均分成 n 段，每段随机取一页 (以页数为种子，同一文档结果可复现) """
+        rng = random.Random(total_pages)
+        edges = [total_pages * k // n for k in range(n + 1)]
+        return [rng.randrange(edges[k], edges[k + 1]) for k in range(n) if edges[k + 1] > edges[k]]
+
+    def _estimate(self, size_hist, text_frequency, page_modes, scanned, exact):
+        """
+        返回 (正文字号, 页眉页脚特征, 正文置信度, 页眉页脚置信度, 不确定的特征)
+        正文置信度：有文字的页面中，"本页最常见字号"与全局估计一致的比例
+        页眉页脚置信度：抽样时出现率离 30% 阈值超过两个标准误 (判定明确) 的特征占比
+        """
+        body_font_size = size_hist.most_common(1)[0][0] if size_hist else 10.5
+        voted = [m for m in page_modes if m is not None]
+        body_confidence = sum(1 for m in voted if m == body_font_size) / len(voted) if voted else 1.0
+
+        hf_candidates = {
+            key for key, count in text_frequency.items()
+            if count > (scanned * self.HF_RATIO)
+        }
+
+        ambiguous = []
+        if not exact and text_frequency:
+            margin = 2 * math.sqrt(self.HF_RATIO * (1 - self.HF_RATIO) / scanned)
+            ambiguous = [key for key, count in text_frequency.items()
+                         if abs(count / scanned - self.HF_RATIO) < margin]
+        hf_confidence = 1 - len(ambiguous) / len(text_frequency) if text_frequency else 1.0
+        return body_font_size, hf_candidates, body_confidence, hf_confidence, ambiguous
+
+    def _prescan(self, doc):
+        """ 返回 (正文字号, 页眉页脚特征集合, 统计信息) """
+        total_pages = len(doc)
+        size_hist, text_frequency = Counter(), Counter()
+
+        if total_pages > self.prescan_threshold:
+            pages = self._stratified_sample(total_pages, self.prescan_sample)
+        else:
+            pages = list(range(total_pages))
+        page_modes = [self._scan_page(doc[i], size_hist, text_frequency) for i in pages]
+
+        exact = len(pages) == total_pages
+        body_font_size, hf_candidates, body_conf, hf_conf, ambiguous = self._estimate(
+            size_hist, text_frequency, page_modes, len(pages), exact)
+        mode = "full" if exact else "sampled"
+
+        if not exact and (body_conf < self.MIN_BODY_CONFIDENCE or ambiguous):
+            print(f"   ⚠️ 抽样 {len(pages)} 页估计不确定 (正文置信度 {body_conf:.0%}，"
+                  f"{len(ambiguous)} 个页眉页脚特征接近阈值)，补扫其余页面")
+            sampled = set(pages)
+            for i in range(total_pages):
+                if i not in sampled:
+                    page_modes.append(self._scan_page(doc[i], size_hist, text_frequency))
+            body_font_size, hf_candidates, body_conf, hf_conf, ambiguous = self._estimate(
+                size_hist, text_frequency, page_modes, total_pages, True)
+            mode = "sampled+full"
+
+        stats = {
+            "mode": mode,
+            "pages_scanned": len(page_modes),
+            "total_pages": total_pages,
+            "body_font_size": body_font_size,
+            "body_confidence": round(body_conf, 3),
+            "hf_confidence": round(hf_conf, 3),
+            "ambiguous_keys": ambiguous,
+        }
+        print(f"📐 预扫描 ({mode}): {len(page_modes)}/{total_pages} 页 | 正文字号 {body_font_size} "
+              f"(置信度 {body_conf:.0%}) | 页眉页脚置信度 {hf_conf:.0%}")
+        return body_font_size, hf_candidates, stats
+
     # =========================================================================
     # 2. Markdown -> PDF (样式部分，无需改动)
     # =========================================================================
-    def markdown_to_pdf(self, md_path, output_path):
-        # 保持原有代码，确保样式一致
+    def markdown_to_pdf(self, md_path, output_path, cancel=None):
+        # 保持原有代码，确保样式一致 (输入 / 输出同样可以是内存数据 / 流)
+        # WeasyPrint 排版是一次调用，cancel 只在开始前检查
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
         try:
-            with open(md_path, "r", encoding="utf-8") as f:
-                post = frontmatter.load(f)
+            cancel.check()
+            # WeasyPrint (连带 Pango) 很重，只在真正导出 PDF 时才加载
+            from markdown import markdown
+            from weasyprint import HTML, CSS
+
+            post = frontmatter.loads(read_text(md_path))
             
             body_text = post.content
             header_text = post.get('header_text', '')
@@ -289,8 +478,14 @@ class PdfMdConverter:
 
             html = HTML(string=html_body, base_url=".")
             css = CSS(string=css_string)
+            # write_pdf 既接受文件名也接受可写的二进制流
             html.write_pdf(output_path, stylesheets=[css])
+            self.last_status = OK
             return True
+        except ConversionCancelled as e:
+            print(f"⏹️ {e}：尚未开始转换")
+            self.last_status = e.status
+            return False
         except Exception as e:
             print(f"❌ 还原失败: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,321 @@
+import zlib
+import numpy as np
+
+# =========================================================================
+# OCR 之前的廉价页面分析 (只在缩略图上计算，比一次 300 DPI 检测 + 识别便宜几个数量级)
+#   - 空白页：墨迹像素比例和灰度方差都很低 -> 直接输出占位，不做推理
+#   - 重复页：感知哈希 (dHash) 与本次任务中已识别过的页面一致，且原分辨率墨迹位图逐块核对通过
+#            -> 复用之前的识别结果 (例如重复的封面、条款页)
+#   - 裁边：在缩略图上找出真实内容的外接框 (去掉留白、扫描仪黑边、装订孔)，只把这块送进引擎
+#   - 页面方向：投影轮廓判断整页是正的、转了 90° 还是倒置，整页转正一次；
+#            方向明确的页关掉逐行方向分类 (每个文本框一次分类推理)
+# =========================================================================
+
+
+def to_gray(img_np):
+    """ 灰度图原样返回；RGB 取绿色通道近似亮度 (只是视图，不做整页换算) """
+    return img_np if img_np.ndim == 2 else img_np[..., 1]
+
+
+def block_mean(gray, height, width):
+    """ 面积平均缩放到 (height, width)，比隔点取样更不容易漏掉细笔画 """
+    rows = np.linspace(0, gray.shape[0], height + 1).astype(int)[:-1]
+    cols = np.linspace(0, gray.shape[1], width + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray, rows, axis=0, dtype=np.uint32), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, gray.shape[0])), np.diff(np.append(cols, gray.shape[1])))
+    return sums / counts
+
+
+def thumbnail(img_np, width=384):
+    """ 等比缩略图 (uint8 灰度)，原图比目标还小时不放大 """
+    gray = to_gray(img_np)
+    h, w = gray.shape
+    width = min(width, w)
+    height = max(1, min(h, round(h * width / w)))
+    return block_mean(gray, height, width).astype(np.uint8)
+
+
+def dhash(thumb, size=16, min_step=2.0):
+    """
+    差值哈希：缩到 size x (size+1)，比较水平相邻像素明暗，得到 size*size 位
+    文档大片留白处相邻块几乎一样亮，只有亮度差超过 min_step 才记 1，否则噪声会让这些位随机翻转
+    """
+    small = block_mean(thumb, size, size + 1)
+    return (small[:, 1:] - small[:, :-1] > min_step).ravel()
+
+
+def ink_bitmap(img_np, threshold):
+    """
+    原分辨率墨迹位图，packbits + zlib 压缩后保存 (文字页约 100KB)，返回 (压缩位图, 形状)
+    不能缩小：缩到一半后日期里差一个数字的两页与扫描噪声就分不开了
+    """
+    gray = to_gray(img_np)
+    return zlib.compress(np.packbits(gray < threshold).tobytes(), 1), gray.shape
+
+
+def max_block_difference(bitmap_a, bitmap_b, shape, block=8):
+    """ 两张墨迹位图逐块比较，返回差异最集中的 block x block 小块里不同像素的个数 """
+    a = np.frombuffer(zlib.decompress(bitmap_a), dtype=np.uint8)
+    b = np.frombuffer(zlib.decompress(bitmap_b), dtype=np.uint8)
+    diff = np.unpackbits(a ^ b, count=shape[0] * shape[1]).reshape(shape)
+    rows = np.arange(0, shape[0], block)
+    cols = np.arange(0, shape[1], block)
+    counts = np.add.reduceat(np.add.reduceat(diff, rows, axis=0, dtype=np.uint32), cols, axis=1)
+    return int(counts.max()) if counts.size else 0
+
+
+def ink_stats(thumb, ink_delta=40):
+    """ 返回 (墨迹像素比例, 灰度标准差)；比纸张底色 (90 分位亮度) 暗 ink_delta 以上算墨迹 """
+    background = np.percentile(thumb, 90)
+    ink_ratio = np.count_nonzero(thumb < background - ink_delta) / thumb.size
+    return ink_ratio, float(thumb.std())
+
+
+def _runs(mask):
+    """ 一维布尔数组中连续 True 段的 [(起, 止), ...] (左闭右开) """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def _strip_border(fraction, limit=0.5):
+    """ 从两端剥掉墨迹占比超过 limit 的行 / 列 (扫描仪盖板留下的黑边)，返回保留的 (起, 止) """
+    start, end = 0, len(fraction)
+    while start < end and fraction[start] > limit:
+        start += 1
+    while end > start and fraction[end - 1] > limit:
+        end -= 1
+    return start, end
+
+
+def _is_hole_like(ink, size):
+    """ 实心、近似圆形、直径约为页宽 1.5%~5% 的黑斑 (装订孔)；文字笔画达不到这样的填充率 """
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if not len(rows):
+        return True
+    h, w = rows[-1] - rows[0] + 1, cols[-1] - cols[0] + 1
+    fill = np.count_nonzero(ink) / (h * w)
+    return 0.015 * size <= max(h, w) <= 0.05 * size and 0.6 <= h / w <= 1.6 and fill >= 0.6
+
+
+def _trim_holes(ink, size):
+    """
+    沿列方向 (axis=1) 去掉最外侧的装订孔：与其余内容隔开一段空白、窄、且每个墨迹块都像孔
+    行方向传入转置即可；返回保留的列 (起, 止)
+    """
+    runs = _runs(ink.any(axis=0))
+    if not runs:
+        return 0, 0
+    gap = 0.02 * size
+    for side in (0, -1):
+        if len(runs) < 2:
+            break
+        run = runs[side]
+        neighbour = runs[1] if side == 0 else runs[-2]
+        distance = neighbour[0] - run[1] if side == 0 else run[0] - neighbour[1]
+        if run[1] - run[0] > 0.05 * size or distance < gap:
+            continue
+        strip = ink[:, run[0]:run[1]]
+        blobs = _runs(strip.any(axis=1))
+        if all(_is_hole_like(strip[r0:r1], size) for r0, r1 in blobs):
+            runs.pop(side)
+    return runs[0][0], runs[-1][1]
+
+
+def content_bbox(thumb, ink_delta=40, pad=0.01):
+    """
+    缩略图上真实内容的外接框 (x0, y0, x1, y1)，没有内容时返回 None
+    1. 剥掉贴边的整条黑带 (扫描仪边框)
+    2. 去掉外侧孤立的装订孔
+    3. 四周留 pad (相对页宽) 的余量，避免切到笔画边缘
+    """
+    ink = thumb < np.percentile(thumb, 90) - ink_delta
+    h, w = ink.shape
+    y0, y1 = _strip_border(ink.mean(axis=1))
+    x0, x1 = _strip_border(ink[y0:y1].mean(axis=0))
+    region = ink[y0:y1, x0:x1]
+    if not region.any():
+        return None
+
+    cx0, cx1 = _trim_holes(region, w)
+    cy0, cy1 = _trim_holes(region[:, cx0:cx1].T, w)
+    region = region[cy0:cy1, cx0:cx1]
+    rows = np.flatnonzero(region.any(axis=1))
+    cols = np.flatnonzero(region.any(axis=0))
+    if not len(rows):
+        return None
+
+    margin = max(2, round(pad * w))
+    return (max(0, x0 + cx0 + cols[0] - margin), max(0, y0 + cy0 + rows[0] - margin),
+            min(w, x0 + cx0 + cols[-1] + 1 + margin), min(h, y0 + cy0 + rows[-1] + 1 + margin))
+
+
+def crop_to_content(img_np, thumb, min_gain=0.05, **kwargs):
+    """
+    按缩略图上的内容框裁剪原图，返回 (裁剪后的图像, (dx, dy) 偏移, 裁掉的面积比例)
+    裁掉不到 min_gain 时原样返回 (偏移 0，比例 0)，省一次内存复制
+    """
+    box = content_bbox(thumb, **kwargs)
+    if box is None:
+        return img_np, (0, 0), 0.0
+    full_h, full_w = img_np.shape[:2]
+    sx, sy = full_w / thumb.shape[1], full_h / thumb.shape[0]
+    x0, y0 = int(box[0] * sx), int(box[1] * sy)
+    x1, y1 = min(full_w, int(np.ceil(box[2] * sx))), min(full_h, int(np.ceil(box[3] * sy)))
+
+    ratio = 1 - (x1 - x0) * (y1 - y0) / (full_w * full_h)
+    if ratio < min_gain:
+        return img_np, (0, 0), 0.0
+    # 引擎内部会做 resize / 归一化，给它一块连续内存
+    return np.ascontiguousarray(img_np[y0:y1, x0:x1]), (x0, y0), ratio
+
+
+def _text_lines(ink, min_ink=0.002, min_height=3, min_aspect=4):
+    """
+    按行投影切出文本行 [(起, 止)]；墨迹占行宽不到 min_ink 的行算行间空白
+    只保留宽度至少是高度 min_aspect 倍的长条：把一个单词竖过来时每个字母也是一"行"，但不是长条
+    """
+    lines = []
+    for a, b in _runs(ink.mean(axis=1) > min_ink):
+        cols = np.flatnonzero(ink[a:b].any(axis=0))
+        if b - a >= min_height and cols[-1] - cols[0] + 1 >= min_aspect * (b - a):
+            lines.append((a, b))
+    return lines
+
+
+def _gap_fraction(ink, axis):
+    """ 内容范围内空白行 (axis=1) / 空白列 (axis=0) 的比例；横排文字的行间空白远多于列间空白 """
+    profile = ink.mean(axis=axis)
+    idx = np.flatnonzero(profile)
+    if len(idx) < 2:
+        return 0.0
+    return float(np.mean(profile[idx[0]:idx[-1] + 1] <= 0.002))
+
+
+def upright_score(ink, lines):
+    """
+    横排文字是正立 (> 0) 还是倒置 (< 0)，两条线索相加：
+    1. 行首对齐、行尾参差 (段末短行)：行首偏离左边界的平均距离明显小于行尾偏离右边界的距离
+    2. 字母的上伸部 (b d f h k l t、大写) 远多于下伸部 (g j p q y)：主体带之上的墨迹多于之下
+       (中文字形上下大致对称，这一项接近 0，由第 1 项决定)
+    """
+    lefts, rights, above, below = [], [], 0.0, 0.0
+    for a, b in lines:
+        line = ink[a:b]
+        cols = np.flatnonzero(line.any(axis=0))
+        lefts.append(cols[0])
+        rights.append(cols[-1])
+        profile = line.mean(axis=1)
+        band = np.flatnonzero(profile >= 0.5 * profile.max())
+        above += profile[:band[0]].sum()
+        below += profile[band[-1] + 1:].sum()
+    lefts, rights = np.array(lefts), np.array(rights)
+    left_dev = np.mean(lefts - np.percentile(lefts, 10)).clip(0)
+    right_dev = np.mean(np.percentile(rights, 90) - rights).clip(0)
+    align = (right_dev - left_dev) / (right_dev + left_dev) if right_dev + left_dev else 0.0
+    mass = (above - below) / (above + below) if above + below else 0.0
+    return float(align + 0.5 * mass)
+
+
+def detect_orientation(img_np, thumb_width=1024, ink_delta=40, min_axis_margin=0.15, min_score=0.25, min_lines=3):
+    """
+    整页方向，返回 (k, 是否明确)：np.rot90(图像, k) (逆时针转 k*90°) 后文字正立
+    1. 行 / 列投影的空白比例：行间空白多是横排 (0° / 180°)，列间空白多是转了 90° (90° / 270°)
+    2. 转成横排后用 upright_score 区分正立与倒置
+    两项都要拉开足够差距、且至少有 min_lines 行文字才算明确；不明确时返回 (0, False)，
+    该页保持原样并继续使用逐行方向分类
+    缩略图比空白 / 重复判定用的大一些 (1024 宽)：300 DPI 下五号字约 7 像素高，上伸部还分得清
+    """
+    thumb = thumbnail(img_np, thumb_width)
+    ink = thumb < np.percentile(thumb, 90) - ink_delta
+    row_gap, col_gap = _gap_fraction(ink, 1), _gap_fraction(ink, 0)
+    if abs(row_gap - col_gap) < min_axis_margin:
+        return 0, False
+    k = 0 if row_gap > col_gap else 1
+    if k:
+        ink = np.rot90(ink, k)
+    lines = _text_lines(ink)
+    if len(lines) < min_lines:
+        return 0, False
+    score = upright_score(ink, lines)
+    if abs(score) < min_score:
+        return 0, False
+    return (k if score > 0 else k + 2) % 4, True
+
+
+def rotate_image(img_np, k):
+    """ 逆时针旋转 k*90° (k 为 0 时原样返回)；给引擎一块连续内存 """
+    k %= 4
+    return np.ascontiguousarray(np.rot90(img_np, k)) if k else img_np
+
+
+def resize_image(img_np, scale):
+    """ 按比例缩放 (与 RapidOCR 内部缩放方式一致：cv2 双线性) """
+    import cv2
+    return cv2.resize(img_np, None, fx=scale, fy=scale)
+
+
+class PageFilter:
+    """
+    一次转换任务内使用 (每个任务新建一个)：
+        kind, ref = page_filter.classify(页序号, 图像)
+    kind 为 BLANK / DUPLICATE / CONTENT；DUPLICATE 时 ref 是与之相同的较早页序号
+    重复判定比较保守：哈希相近之外，还要在原分辨率墨迹位图上逐块核对，
+    任何一个 8x8 小块里差异像素过多 (例如日期只差一个数字) 都不算重复。宁可漏判也不误判：
+    同一张纸重新扫描、位置偏了几个像素的页面通常不会被判为重复
+    """
+    BLANK = "blank"
+    DUPLICATE = "duplicate"
+    CONTENT = "content"
+
+    def __init__(self, skip_blank=True, dedup=True, max_ink_ratio=0.00015, max_std=12.0, ink_delta=40,
+                 hash_distance=8, max_block_diff=12, thumb_width=384, max_tracked=256):
+        """
+        max_ink_ratio / max_std: 空白页阈值 (两者都低于阈值才算空白)；墨迹比例阈值很低，
+            只有页码、零星污点的页面算空白，哪怕只写了"同意"两个字也会照常识别
+        以上阈值按流水线的 300 DPI 调校
+        hash_distance: dHash 汉明距离上限
+        max_block_diff: 墨迹位图核对时，单个 8x8 小块允许的差异像素数 (扫描噪声是零散的，内容变化是成片的)
+        max_tracked: 最多记住多少个已识别页面 (每页约 100KB)，超出后丢弃最早的
+        """
+        self.skip_blank = skip_blank
+        self.dedup = dedup
+        self.max_ink_ratio = max_ink_ratio
+        self.max_std = max_std
+        self.ink_delta = ink_delta
+        self.hash_distance = hash_distance
+        self.max_block_diff = max_block_diff
+        self.thumb_width = thumb_width
+        self.max_tracked = max_tracked
+        self._seen = {}   # 页序号 -> (哈希, 墨迹位图, 位图形状)，dict 保持插入顺序
+
+    def is_blank(self, thumb):
+        ink_ratio, std = ink_stats(thumb, self.ink_delta)
+        return ink_ratio <= self.max_ink_ratio and std <= self.max_std
+
+    def find_duplicate(self, page_hash, bits, shape):
+        for ref, (ref_hash, ref_bits, ref_shape) in self._seen.items():
+            if ref_shape != shape or np.count_nonzero(page_hash != ref_hash) > self.hash_distance:
+                continue
+            if max_block_difference(bits, ref_bits, shape) <= self.max_block_diff:
+                return ref
+        return None
+
+    def classify(self, index, img_np, thumb=None):
+        """ thumb: 调用方已算好的缩略图 (与裁边共用)，不传则现算 """
+        if thumb is None:
+            thumb = thumbnail(img_np, self.thumb_width)
+        if self.skip_blank and self.is_blank(thumb):
+            return self.BLANK, None
+
+        if self.dedup:
+            page_hash = dhash(thumb)
+            threshold = np.percentile(thumb, 90) - self.ink_delta
+            bits, shape = ink_bitmap(img_np, threshold)
+            ref = self.find_duplicate(page_hash, bits, shape)
+            if ref is not None:
+                return self.DUPLICATE, ref
+            self._seen[index] = (page_hash, bits, shape)
+            if len(self._seen) > self.max_tracked:
+                self._seen.pop(next(iter(self._seen)))
+        return self.CONTENT, None
@@ -0,0 +1,165 @@
+import re
+import threading
+
+# =========================================================================
+# 转换结果的分页预览
+# 整份 HTML 塞进 components.html / 整篇 Markdown 交给 st.markdown，大文档会让浏览器卡死，
+# 每次页面重跑还要把几 MB 内容再发一遍。这里按转换器已有的分页结构把结果切成页，
+# 只记录每页在原文中的起止位置 (切分一次、O(文档大小))，之后每次只取一页：
+#   OCR        <div class='ocr-page'>
+#   数字 PDF   <div id="pageN" ...>            (PyMuPDF get_text("html") 的每页容器)
+#   精简 HTML  <section class="page" ...>
+#   Markdown   <!-- page N -->                  (core/pdf_md.PAGE_MARKER)
+#   PDF        原生分页，单页渲染成图片
+# 没有分页的结果 (Word -> HTML、旧版 Markdown) 在顶层块的边界处按大小切成若干"页"。
+# 缩略图来自结果本身 (PDF) 或逐页对应的源 PDF (OCR / 数字 PDF / pdf2md)。
+# 只用标准库；PDF 相关的 PyMuPDF 在第一次渲染时才导入
+# =========================================================================
+
+HTML_PAGE_MARKERS = [
+    re.compile(r"<div class='ocr-page'>"),
+    re.compile(r'<section class="page"'),
+    re.compile(r'<div id="page\d+"'),
+]
+MD_PAGE_MARKER = re.compile(r"^<!-- page \d+ -->$", re.MULTILINE)
+
+_BODY_OPEN = re.compile(r"<body[^>]*>", re.IGNORECASE)
+_BODY_CLOSE = re.compile(r"</body\s*>", re.IGNORECASE)
+_BLOCK_TAG = re.compile(r"<(/?)(table|ul|ol|p|h[1-6]|section|div|blockquote|pre|figure)\b[^>]*>", re.IGNORECASE)
+_FRONT_MATTER = re.compile(r"\A---\r?\n.*?\r?\n---\r?\n", re.DOTALL)
+
+
+def _marker_spans(text, start, end, marker):
+    """ 以 marker 出现的位置为每页开头；第一个标记之前的内容 (状态提示等) 并入第 1 页 """
+    starts = [m.start() for m in marker.finditer(text, start, end)]
+    if not starts:
+        return None
+    starts[0] = start
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def _html_block_spans(text, start, end, page_chars):
+    """ 没有分页标记的 HTML：在顶层块 (不在表格 / 列表里) 结束处切，每页至少 page_chars 个字符 """
+    spans, page_start, depth = [], start, 0
+    for m in _BLOCK_TAG.finditer(text, start, end):
+        depth += -1 if m.group(1) else 1
+        if depth < 0:
+            depth = 0
+        if depth == 0 and m.group(1) and m.end() - page_start >= page_chars:
+            spans.append((page_start, m.end()))
+            page_start = m.end()
+    if page_start < end or not spans:
+        spans.append((page_start, end))
+    return spans
+
+
+def _text_block_spans(text, start, end, page_chars):
+    """ 没有分页标记的 Markdown：在空行处切 """
+    spans, page_start = [], start
+    while end - page_start > page_chars:
+        cut = text.find("\n\n", page_start + page_chars, end)
+        if cut < 0:
+            break
+        spans.append((page_start, cut + 2))
+        page_start = cut + 2
+    spans.append((page_start, end))
+    return spans
+
+
+class PagedResult:
+    """
+    doc = PagedResult(data, "合同_ocr.html", source_pdf=上传的 PDF bytes)
+    len(doc)                  页数
+    doc.page(i)               第 i 页：HTML 为可独立显示的完整文档 (带原文的 <head> 样式)，
+                              Markdown 为该页文本，PDF 为 PNG bytes
+    doc.thumbnail(i)          缩略图 PNG bytes；没有可用的 PDF 时为 None (has_thumbnails)
+    """
+
+    def __init__(self, data, output_name, source_pdf=None, page_chars=60000):
+        self.data = data
+        name = output_name.lower()
+        self.kind = "pdf" if name.endswith(".pdf") else "md" if name.endswith(".md") else "html"
+        self._pdf = None
+        self._source = None
+        self._lock = threading.Lock()   # 同一结果在多个会话间共享，PyMuPDF 文档不能并发渲染
+        self._source_data = source_pdf
+
+        self.paginated = True
+        if self.kind == "pdf":
+            self.spans = [(i, i + 1) for i in range(len(self._open_pdf()))]
+            return
+        self.text = data.decode("utf-8", errors="replace") if isinstance(data, (bytes, bytearray)) else data
+        if self.kind == "md":
+            front = _FRONT_MATTER.match(self.text)
+            start = front.end() if front else 0
+            self.spans = (_marker_spans(self.text, start, len(self.text), MD_PAGE_MARKER)
+                          or _text_block_spans(self.text, start, len(self.text), page_chars))
+            self.paginated = MD_PAGE_MARKER.search(self.text, start) is not None
+            return
+
+        body = _BODY_OPEN.search(self.text)
+        start = body.end() if body else 0
+        close = _BODY_CLOSE.search(self.text, start)
+        end = close.start() if close else len(self.text)
+        self.head = self.text[:start] if body else ""
+        self.spans = None
+        for marker in HTML_PAGE_MARKERS:
+            self.spans = _marker_spans(self.text, start, end, marker)
+            if self.spans:
+                break
+        self.paginated = self.spans is not None
+        if self.spans is None:
+            self.spans = _html_block_spans(self.text, start, end, page_chars)
+
+    def __len__(self):
+        return len(self.spans)
+
+    # ------------------------------------------------------------------
+    # 单页内容
+    # ------------------------------------------------------------------
+    def page(self, index, zoom=1.5):
+        if self.kind == "pdf":
+            return self._render(self._open_pdf(), index, zoom)
+        start, end = self.spans[index]
+        if self.kind == "md":
+            return self.text[start:end]
+        return f"{self.head}\n{self.text[start:end]}\n</body></html>" if self.head else self.text[start:end]
+
+    # ------------------------------------------------------------------
+    # 缩略图
+    # ------------------------------------------------------------------
+    @property
+    def has_thumbnails(self):
+        return self._thumbnail_pdf() is not None
+
+    def thumbnail(self, index, width=120):
+        doc = self._thumbnail_pdf()
+        if doc is None or index >= len(doc):
+            return None
+        return self._render(doc, index, width / doc[index].rect.width)
+
+    def _thumbnail_pdf(self):
+        """ 结果本身是 PDF 时用它；否则用逐页对应的源 PDF (页数须与结果页数一致) """
+        if self.kind == "pdf":
+            return self._open_pdf()
+        if self._source is None and self._source_data is not None and self.paginated:
+            try:
+                import fitz
+                with self._lock:
+                    source = fitz.open(stream=self._source_data, filetype="pdf")
+                self._source = source if len(source) == len(self.spans) else False
+            except Exception:
+                self._source = False
+        return self._source or None
+
+    def _open_pdf(self):
+        if self._pdf is None:
+            import fitz
+            with self._lock:
+                self._pdf = fitz.open(stream=self.data, filetype="pdf")
+        return self._pdf
+
+    def _render(self, doc, index, zoom):
+        import fitz
+        with self._lock:
+            return doc[index].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("png")
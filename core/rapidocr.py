@@ -1,7 +1,8 @@
 import os
-import logging
-import numpy as np
-from pdf2image import convert_from_path
+from core import ort_session
+from core.ocr_base import BaseOcrConverter
+from core.ocr_result import OcrPage
+from core.app_paths import app_data_dir
 
 # 1. 尝试导入 RapidOCR
 try:
@@ -10,7 +11,45 @@ try:
 except ImportError:
     HAS_RAPID = False
 
-class RapidOcrConverter:
+# 模型变体：fp32 为 rapidocr_onnxruntime 自带模型；int8_* 由 tools/quantize_models.py 离线生成
+MODEL_VARIANTS = ("fp32", "int8_dynamic", "int8_static")
+
+
+def packaged_model_paths():
+    """ rapidocr_onnxruntime 自带的 det / cls / rec 模型路径 (从它的 config.yaml 读取) """
+    import yaml
+    from rapidocr_onnxruntime import main as rapid_main
+
+    with open(rapid_main.DEFAULT_CFG_PATH, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    root = os.path.dirname(os.path.abspath(rapid_main.__file__))
+    return {key: os.path.join(root, config[section]["model_path"])
+            for key, section in (("det", "Det"), ("cls", "Cls"), ("rec", "Rec"))}
+
+
+def quantized_model_dir(variant):
+    return app_data_dir("models", variant, create=False)
+
+
+def variant_model_paths(variant):
+    """
+    返回某个变体实际可用的模型路径 {det/cls/rec: path}
+    量化文件缺失的模型回退到 FP32 自带模型 (例如只量化了 det)
+    """
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"未知模型变体: {variant}，可选 {MODEL_VARIANTS}")
+    paths = packaged_model_paths()
+    if variant == "fp32":
+        return paths
+    model_dir = quantized_model_dir(variant)
+    for key, fp32_path in paths.items():
+        candidate = os.path.join(model_dir, os.path.basename(fp32_path))
+        if os.path.exists(candidate):
+            paths[key] = candidate
+    return paths
+
+
+class RapidOcrConverter(BaseOcrConverter):
     """
     RapidOCR 版核心转换器 (ONNX Runtime)
     特点：
@@ -18,171 +57,146 @@ class RapidOcrConverter:
     2. 无需安装 PaddlePaddle 框架
     3. 移植了之前 PaddleOCR 版本的所有后处理规则 (Unclip=2.0, 关键词替换等)
     """
+    ENGINE_NAME = "RapidOCR"
+    UNAVAILABLE_HINT = "RapidOCR 库未安装或初始化失败。请运行 pip install rapidocr_onnxruntime"
 
-    def __init__(self, poppler_path=None):
-        self.ocr_engine = None
-        self.poppler_path = poppler_path
+    def __init__(self, poppler_path=None, ort_options=None, concurrent_engines=None, model_variant=None,
+                 graph_cache=None, **kwargs):
+        """
+        ort_options: ONNX Runtime 会话选项 (见 core/ort_session.DEFAULT_OPTIONS)，
+            例如 {"intra_op_num_threads": 4, "graph_optimization_level": "extended"}
+        concurrent_engines: 本机同时运行的引擎数，用于自动划分线程；
+            默认读取环境变量 DOC_AUDIT_OCR_ENGINES (未设置则为 1)
+        model_variant: "fp32" / "int8_dynamic" / "int8_static"，默认读取环境变量
+            DOC_AUDIT_OCR_MODEL (未设置则为 fp32)；INT8 模型需先运行
+            tools/quantize_models.py 生成，缺失时自动回退 FP32
+        graph_cache: 是否缓存 ONNX Runtime 优化后的计算图 (core/ort_session.OptimizedGraphCache)，
+            以后启动直接加载、省掉每次的图优化；默认开启，环境变量 DOC_AUDIT_ORT_CACHE=0 可关闭
+        其余参数 (queue_size / renderer / grayscale / skip_blank_pages ...) 见 core/ocr_base.BaseOcrConverter
+        """
+        super().__init__(poppler_path=poppler_path, **kwargs)
+
+        if concurrent_engines is None:
+            concurrent_engines = ort_session.concurrent_engines_from_env()
+        self.ort_options = ort_session.resolve_options(ort_options, concurrent_engines)
+        if model_variant is None:
+            model_variant = os.environ.get("DOC_AUDIT_OCR_MODEL", "fp32")
+        self.model_variant = model_variant
+        if graph_cache is None:
+            graph_cache = os.environ.get("DOC_AUDIT_ORT_CACHE", "1") != "0"
+        self.graph_cache = graph_cache
 
         if HAS_RAPID:
             try:
                 print("   🚀 正在初始化 RapidOCR 引擎 (ONNX版)...")
-                # === 参数调优 (对标 PaddleOCR 的优化配置) ===
-                self.ocr_engine = RapidOCR(
-                    # 1. 检测阈值 (对应 det_db_thresh=0.1)
-                    # 让模型更敏感，防止漏掉颜色淡的字
-                    det_thresh=0.1,
-
-                    # 2. 框置信度 (对应 det_db_box_thresh=0.3)
-                    det_box_thresh=0.3,
-
-                    # 3. 扩张比例 (对应 det_db_unclip_ratio=2.0)
-                    # 强行合并间距较大的词 (如 "名   称")
-                    det_unclip_ratio=2.0
-                )
+                print(f"      🧵 线程: intra={self.ort_options['intra_op_num_threads']} "
+                      f"inter={self.ort_options['inter_op_num_threads']} (并发引擎 {concurrent_engines})")
+
+                model_kwargs = {}
+                model_paths = variant_model_paths(model_variant)
+                if model_variant != "fp32":
+                    fp32_paths = packaged_model_paths()
+                    for key, path in model_paths.items():
+                        if path == fp32_paths[key]:
+                            print(f"      ⚠️ 未找到 {model_variant} 的 {key} 模型，使用 FP32")
+                        else:
+                            model_kwargs[f"{key}_model_path"] = path
+                    print(f"      🗜️ 模型变体: {model_variant} ({', '.join(model_kwargs) or '全部回退 FP32'})")
+
+                # === 参数调优 (对标 PaddleOCR 的优化配置；取值见 core/ocr_profiles.py 的档位) ===
+                if self.profile:
+                    print(f"      🎚️ 识别档位: {self.profile} {self.tuning}")
+
+                graph_kwargs = self._cached_graphs(model_paths) if graph_cache else {}
+                try:
+                    self.ocr_engine = self._create_engine({**model_kwargs, **graph_kwargs},
+                                                          cached_graphs=graph_kwargs.values())
+                except Exception as e:
+                    if not graph_kwargs:
+                        raise
+                    # 缓存文件损坏 (元数据对得上但加载失败)：删掉，回退原始模型
+                    print(f"      ⚠️ 优化图缓存加载失败，已删除并回退原始模型: {e}")
+                    for key in model_paths:
+                        self._graph_cache.invalidate(model_paths[key], self.ort_options)
+                    self.ocr_engine = self._create_engine(model_kwargs)
             except Exception as e:
                 print(f"⚠️ RapidOCR 初始化失败: {e}")
 
-    def scanned_pdf_to_html(self, pdf_path, output_path):
-        if not HAS_RAPID or self.ocr_engine is None:
-            print("❌ 错误：RapidOCR 库未安装或初始化失败。请运行 pip install rapidocr_onnxruntime")
-            return False
-
-        if self.poppler_path and not os.path.exists(self.poppler_path):
-             print(f"❌ 错误：Poppler 路径无效: {self.poppler_path}")
-             return False
-
-        print(f"🔄 [RapidOCR] 正在处理: {os.path.basename(pdf_path)}")
-
+    def _cached_graphs(self, model_paths):
+        """
+        det / cls / rec 的优化图缓存路径 (作为 RapidOCR 的 *_model_path 参数)
+        未命中的当场生成一份：只有第一次启动多花一次图优化，以后都直接加载
+        缓存目录不可用时返回 {}，照常用原始模型
+        """
         try:
-            # 1. Poppler 转图
-            # 保持 300 DPI 以确保“冻干/冻于”等形近字的清晰度
-            print("   📸 正在将 PDF 转换为高清图像 (DPI=300)...")
-            try:
-                images = convert_from_path(pdf_path, dpi=300, poppler_path=self.poppler_path)
-            except Exception as e:
-                print(f"❌ PDF 转图片失败: {e}")
-                return False
-
-            html_body = ""
-            total_pages = len(images)
-
-            for i, img in enumerate(images):
-                print(f"      📖 正在识别第 {i + 1}/{total_pages} 页...")
-
-                # RapidOCR 也可以直接处理 PIL Image，但转成 numpy 更稳妥
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                img_np = np.array(img)
-
-                try:
-                    # RapidOCR 调用方式：result, elapse = engine(img)
-                    result, _ = self.ocr_engine(img_np)
-                except Exception as e:
-                    print(f"      ⚠️ 识别 API 报错: {e}")
-                    continue
-
-                # 2. 解析结果
-                # RapidOCR 返回结构通常是: [[box, text, score], [box, text, score], ...]
-                # 如果没识别到，返回 None
-                if result is None:
-                    result = []
-
-                # 提取文本并排序
-                raw_texts = self._parse_rapid_result(result)
-
-                # 3. 后处理 (规则引擎，与 Paddle 版本保持一致)
-                cleaned_texts = self._post_process_texts(raw_texts)
-
-                print(f"      ✅ 成功提取: {len(cleaned_texts)} 行有效文字")
-
-                page_html = []
-                for text in cleaned_texts:
-                    text = text.replace("<", "&lt;").replace(">", "&gt;")
-                    page_html.append(f"<p>{text}</p>")
-
-                page_content = "\n".join(page_html)
-                if not page_content:
-                    page_content = "<p><i>[本页无文字]</i></p>"
-
-                html_body += f"<div class='ocr-page'>{page_content}</div><hr/>"
-
-            self._save_html(html_body, output_path)
-            print(f"✅ [OCR 成功] 已保存: {output_path}")
-            return True
-
+            self._graph_cache = ort_session.OptimizedGraphCache()
         except Exception as e:
-            print(f"❌ [OCR 失败] 未知错误: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-    def _parse_rapid_result(self, result):
+            print(f"      ⚠️ 优化图缓存不可用: {e}")
+            return {}
+        graph_kwargs, hits = {}, 0
+        for key, path in model_paths.items():
+            cached = self._graph_cache.lookup(path, self.ort_options)
+            hits += cached is not None
+            cached = cached or self._graph_cache.store(path, self.ort_options)
+            if cached:
+                graph_kwargs[f"{key}_model_path"] = cached
+        print(f"      💾 优化图缓存: 命中 {hits}/{len(model_paths)} ({self._graph_cache.cache_dir})")
+        return graph_kwargs
+
+    def _session_options_for(self, model_path, cached_graphs=()):
+        """ 某个模型的会话选项：已经优化过的缓存图关掉图优化，其余按 ort_options """
+        if model_path in cached_graphs:
+            return {**self.ort_options, "graph_optimization_level": "disable"}
+        return self.ort_options
+
+    def _create_engine(self, model_kwargs, cached_graphs=()):
+        """ cached_graphs: model_kwargs 里哪些路径是优化图缓存 (这些会话不再做图优化) """
+        cached_graphs = {os.path.abspath(p) for p in cached_graphs}
+        with ort_session.rapidocr_session_options(lambda path: self._session_options_for(path, cached_graphs)) as hooked:
+            engine = RapidOCR(
+                # 0. 线程数 (RapidOCR 会下发给 det/cls/rec 三个会话)
+                intra_op_num_threads=self.ort_options["intra_op_num_threads"],
+                inter_op_num_threads=self.ort_options["inter_op_num_threads"],
+
+                # 1. 检测阈值 (对应 det_db_thresh)
+                det_thresh=self.tuning["det_thresh"],
+
+                # 2. 框置信度 (对应 det_db_box_thresh)
+                det_box_thresh=self.tuning["det_box_thresh"],
+
+                # 3. 扩张比例 (对应 det_db_unclip_ratio)
+                det_unclip_ratio=self.tuning["det_unclip_ratio"],
+
+                **model_kwargs
+            )
+        # 钩子不可用时：其余会话选项 RapidOCR 不透传，偏离默认值或加载了缓存图时事后重建会话
+        if not hooked and (cached_graphs or ort_session.needs_rebuild(self.ort_options)):
+            ort_session.apply_session_options(
+                engine, lambda path: self._session_options_for(os.path.abspath(path), cached_graphs))
+        return engine
+
+    def recognize(self, img_np, use_cls=None):
+        # RapidOCR 调用方式：result, elapse = engine(img)
+        # 返回结构通常是: [[box, text, score], ...]；没识别到时为 None
+        if use_cls is None:
+            use_cls = self.tuning["use_cls"]
+        result, _ = self.ocr_engine(img_np, use_cls=use_cls)
+        return result if result is not None else []
+
+    def checkpoint_signature(self):
+        return {**super().checkpoint_signature(), "model_variant": self.model_variant}
+
+    def engine_scale(self, page_shape):
+        # RapidOCR 会先把长边超过 max_side_len (默认 2000) 的图缩小，检测和识别都在缩小后的图上做
+        return min(1.0, self.ocr_engine.max_side_len / max(page_shape[:2]))
+
+    def parse_result(self, result):
         """
         解析 RapidOCR 的结果列表
-        Item 结构: [ [[x1,y1], [x2,y2]...], "文本内容", 置信度 ]
-        """
-        parsed_lines = []
-        for item in result:
-            # item 长度通常是 3
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                try:
-                    box = item[0]
-                    text = item[1]
-                    # score = item[2]
-
-                    # 获取 Y 坐标用于排序 (左上角 Y)
-                    y_coord = box[0][1] if isinstance(box, (list, np.ndarray)) else 0
-                    parsed_lines.append((y_coord, text))
-                except:
-                    continue
-
-        # 按 Y 轴排序
-        if parsed_lines:
-            parsed_lines.sort(key=lambda x: x[0])
-            return [item[1] for item in parsed_lines]
-        return []
-
-    def _post_process_texts(self, text_list):
-        """
-        后处理规则 (与 Paddle 版本完全一致)
-        """
-        valid_texts = []
-        for text in text_list:
-            text = text.strip()
-
-            # 规则1: 噪点过滤
-            if len(text) == 1 and not '\u4e00' <= text <= '\u9fa5':
-                 continue
-
-            # 规则2: 关键词矫正字典
-            replacements = {
-                "冻于": "冻干",
-                "国é采": "国e采",
-                "010--": "010-",
-                "卢的": "卢昀",
-            }
-
-            for wrong, correct in replacements.items():
-                if wrong in text:
-                    text = text.replace(wrong, correct)
-
-            if text:
-                valid_texts.append(text)
-
-        return valid_texts
-
-    def _save_html(self, content, path):
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head><meta charset="utf-8">
-        <style>
-            body{{ font-family: "Microsoft YaHei", sans-serif; max-width: 900px; margin: 20px auto; line-height: 1.6; padding: 40px; background: #f5f5f5; color: #333; }}
-            .ocr-page {{ background: white; padding: 50px; box-shadow: 0 4px 10px rgba(0,0,0,0.1); border-radius: 8px; min-height: 1000px; }}
-            p {{ margin-bottom: 0.8em; text-align: justify; }}
-            hr {{ border: 0; margin: 40px 0; border-top: 1px dashed #ccc; }}
-        </style>
-        </head><body>{content}</body></html>
+        Item 结构: [ [[x1,y1], [x2,y2], [x3,y3], [x4,y4]], "文本内容", 置信度 ]
         """
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(full_html)
\ No newline at end of file
+        items = [item for item in result if isinstance(item, (list, tuple)) and len(item) >= 3]
+        if not items:
+            return OcrPage.empty()
+        boxes, texts, scores = zip(*(item[:3] for item in items))
+        return OcrPage.from_boxes(boxes, texts, scores)
@@ -0,0 +1,217 @@
+import io
+import importlib
+import threading
+
+# =========================================================================
+# 转换器注册表 (延迟导入)
+# 每个模式只记录"去哪里找"，真正的 import 发生在第一次使用该模式时。
+# 这样启动界面时不会提前加载 onnxruntime / numpy / PyMuPDF / WeasyPrint / mammoth。
+# =========================================================================
+CONVERTERS = {
+    "ocr": {
+        "label": "📄 扫描件 OCR -> HTML",
+        # 按顺序尝试，第一个能导入的即为当前 OCR 引擎
+        # (运行过 tools/calibrate_ocr.py 时，本机校准选出的后端排在最前，并带上校准参数)
+        "candidates": [
+            ("core.rapidocr", "RapidOcrConverter", "RapidOCR (极速)"),
+            ("core.ocr_pdf_html", "OcrConverter", "PaddleOCR (精准)"),
+        ],
+        "method": "scanned_pdf_to_html",
+        # 转换结果可写入全文检索索引 (构造参数 search_index)
+        "searchable": True,
+        # 支持逐页检查点 (构造参数 checkpoint_dir)
+        "resumable": True,
+        # 单页时限的缩放系数 (乘以 cancellation.PAGE_TIMEOUT_SEC)；没有此项的模式不检查单页时限
+        "page_timeout_scale": 1.0,
+        "suffix": "_ocr.html",
+        "file_types": [("PDF", "*.pdf")],
+    },
+    "digital_pdf": {
+        "label": "💻 数字 PDF -> HTML",
+        "candidates": [("core.word_pdf_html", "DocToHtmlConverter", "PyMuPDF")],
+        "method": "pdf_to_html",
+        "searchable": True,
+        "suffix": "_digital.html",
+        "file_types": [("PDF", "*.pdf")],
+    },
+    "digital_pdf_compact": {
+        "label": "🪶 数字 PDF -> 精简 HTML",
+        "candidates": [("core.word_pdf_html", "DocToHtmlConverter", "PyMuPDF + markdown")],
+        "method": "pdf_to_html",
+        # 该模式固定的构造参数 (调用方显式传入的参数优先)
+        "options": {"pdf_html_mode": "semantic"},
+        "searchable": True,
+        "suffix": "_compact.html",
+        "file_types": [("PDF", "*.pdf")],
+    },
+    "word": {
+        "label": "📝 Word -> HTML",
+        "candidates": [("core.word_pdf_html", "DocToHtmlConverter", "mammoth")],
+        "method": "word_to_html",
+        "searchable": True,
+        "suffix": "_word.html",
+        "file_types": [("Word", "*.docx")],
+    },
+    "word_fast": {
+        "label": "⚡ Word -> HTML (大文件流式)",
+        "candidates": [("core.word_pdf_html", "DocToHtmlConverter", "流式 XML 解析")],
+        "method": "word_to_html",
+        "options": {"word_html_mode": "stream"},
+        "searchable": True,
+        "suffix": "_wordfast.html",
+        "file_types": [("Word", "*.docx")],
+    },
+    "pdf2md": {
+        "label": "⬇️ PDF -> Markdown",
+        "candidates": [("core.pdf_md", "PdfMdConverter", "PyMuPDF")],
+        "method": "pdf_to_markdown",
+        "searchable": True,
+        "resumable": True,
+        # 单页时限只用来跳过表格检测，正常页远用不了一次 OCR 推理的时间
+        "page_timeout_scale": 0.25,
+        "suffix": ".md",
+        "file_types": [("PDF", "*.pdf")],
+    },
+    "md2pdf": {
+        "label": "⬆️ Markdown -> PDF",
+        "candidates": [("core.pdf_md", "PdfMdConverter", "WeasyPrint")],
+        "method": "markdown_to_pdf",
+        "suffix": "_restored.pdf",
+        "file_types": [("Markdown", "*.md")],
+    },
+}
+
+_resolved = {}
+_lock = threading.Lock()
+
+
+def _calibration(mode):
+    """ 本机校准结果 (目前只有 OCR 模式有)，没有则为 None """
+    if mode != "ocr":
+        return None
+    from core.ocr_calibration import load_calibration
+    return load_calibration()
+
+
+def _ordered_candidates(mode, calibration=None):
+    """ 校准选中的后端排到最前，其余保持原顺序 """
+    candidates = CONVERTERS[mode]["candidates"]
+    if not calibration:
+        return list(candidates)
+    preferred = [c for c in candidates if f"{c[0]}.{c[1]}" == calibration["backend"]]
+    return preferred + [c for c in candidates if c not in preferred]
+
+
+def resolve(mode):
+    """
+    导入并返回 (转换器类, 引擎名称)，结果会缓存
+    所有候选都导入失败时抛出 ImportError (附带每个候选的失败原因)
+    """
+    if mode in _resolved:
+        return _resolved[mode]
+
+    with _lock:
+        if mode in _resolved:
+            return _resolved[mode]
+
+        errors = []
+        for module_name, class_name, engine_name in _ordered_candidates(mode, _calibration(mode)):
+            try:
+                module = importlib.import_module(module_name)
+                _resolved[mode] = (getattr(module, class_name), engine_name)
+                return _resolved[mode]
+            # WeasyPrint 缺少 Pango 时抛的是 OSError，也算"不可用"
+            except (ImportError, OSError, AttributeError) as e:
+                errors.append(f"{module_name}.{class_name}: {e}")
+
+        raise ImportError(f"模式 {mode} 没有可用的转换器: " + "; ".join(errors))
+
+
+def is_loaded(mode):
+    return mode in _resolved
+
+
+def engine_name(mode):
+    """ 已加载时返回引擎名称，未加载时不触发导入，返回 None """
+    entry = _resolved.get(mode)
+    return entry[1] if entry else None
+
+
+def _fit_calibrated_threads(options, concurrent_engines):
+    """
+    校准时只跑一个引擎，测出的线程数是"独占整机"时的最优值；
+    同机有多个引擎 (调度器工作线程、异步接口、DOC_AUDIT_OCR_ENGINES) 时
+    不能超过每个引擎分到的核数，否则又回到 N 个引擎各占全部核心的超订
+    """
+    from core.ort_session import auto_thread_policy
+    share, _ = auto_thread_policy(concurrent_engines)
+    options = dict(options)
+    ort_options = options.get("ort_options")
+    if ort_options and ort_options.get("intra_op_num_threads"):
+        options["ort_options"] = {**ort_options,
+                                  "intra_op_num_threads": min(ort_options["intra_op_num_threads"], share)}
+    if options.get("cpu_threads"):
+        options["cpu_threads"] = min(options["cpu_threads"], share)
+    return options
+
+
+def create_converter(mode, **kwargs):
+    """ 参数优先级：显式传入 > 本机校准参数 > 模式固定参数 """
+    converter_class, _ = resolve(mode)
+    options = dict(CONVERTERS[mode].get("options", {}))
+    calibration = _calibration(mode)
+    if calibration and calibration["backend"] == f"{converter_class.__module__}.{converter_class.__name__}":
+        from core.ort_session import concurrent_engines_from_env
+        engines = kwargs.get("concurrent_engines") or concurrent_engines_from_env()
+        options.update(_fit_calibrated_threads(calibration.get("options", {}), engines))
+    return converter_class(**{**options, **kwargs})
+
+
+def is_searchable(mode):
+    return CONVERTERS[mode].get("searchable", False)
+
+
+def is_resumable(mode):
+    return CONVERTERS[mode].get("resumable", False)
+
+
+def page_timeout(mode, base=None):
+    """
+    该模式提交任务时用的单页时限 (秒)：base 默认取 cancellation.page_timeout_from_env()
+    不检查单页时限的模式 (整页一次性转换，没有可以跳过的阶段) 返回 None
+    """
+    scale = CONVERTERS[mode].get("page_timeout_scale")
+    if base is None:
+        from core.cancellation import page_timeout_from_env
+        base = page_timeout_from_env()
+    if not scale or not base:
+        return None
+    return base * scale
+
+
+def output_name(mode, base_name):
+    return f"{base_name}{CONVERTERS[mode]['suffix']}"
+
+
+def convert(mode, input_path, output_path, converter=None, cancel=None, **kwargs):
+    """
+    统一入口：按模式分发到对应转换器方法
+    input_path / output_path 可以是路径，也可以是内存数据 / 可写流 (见 core/doc_io.py)
+    converter 可传入已创建好的实例 (复用 OCR 引擎)，否则用 kwargs 新建
+    cancel: CancelToken (core/cancellation.py)，用于取消 / 限时；结束后 converter.last_status 给出原因
+    """
+    if converter is None:
+        converter = create_converter(mode, **kwargs)
+    method = getattr(converter, CONVERTERS[mode]["method"])
+    return method(input_path, output_path, cancel=cancel)
+
+
+def convert_to_bytes(mode, source, converter=None, cancel=None, **kwargs):
+    """
+    内存版入口：source 为 bytes 或文件对象 (例如 Streamlit 的 UploadedFile)，
+    成功时返回结果文件内容 (bytes)，失败 / 取消 / 超时返回 None；全程不读写磁盘 (Poppler 渲染除外)
+    """
+    buffer = io.BytesIO()
+    if not convert(mode, source, buffer, converter=converter, cancel=cancel, **kwargs):
+        return None
+    return buffer.getvalue()
@@ -0,0 +1,298 @@
+import io
+import os
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+from core import registry
+from core.cancellation import CancelToken, OK, FAILED, CANCELLED
+from core.warmup import ConverterCache, LOADING, READY
+from core.warmup import FAILED as LOAD_FAILED
+
+# =========================================================================
+# 进程级转换调度器 (Streamlit 多会话共用)
+# 每个会话各自在脚本线程里转换、各自建 OCR 引擎时，几个人同时上传扫描件就是几个
+# 占满全部核心的推理会话在抢 CPU，内存也按人数翻倍。这里改为：
+#   - 固定数量的工作线程，每个线程把用过的转换器 (连同 OCR 引擎) 留着复用 (热引擎)
+#   - 按用户轮转取任务 (公平队列)：一个人一次提交多份，不会把其他人排到最后
+#   - 准入控制：每个用户同时在排队 / 处理的任务数有上限，总排队数满了直接拒绝
+#   - 任务可查询排队位置、可取消 (排队中直接移出，处理中走 CancelToken)
+# =========================================================================
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+
+
+class AdmissionRejected(Exception):
+    """ 队列已满或该用户的任务数已达上限 """
+
+
+class Job:
+    """
+    一次转换任务；由 ConversionScheduler.submit() 创建
+    state: queued -> running -> finished
+    status: 结束后的结果 (core/cancellation.py 的 ok / failed / cancelled / timeout)
+    result: output 为 None 时是结果文件内容 (bytes)，否则为 None (结果已写入 output)；
+        submit_task() 提交的任务为 task 返回的结果
+    """
+
+    def __init__(self, job_id, scheduler, user, mode, source, output, options, cancel, task=None):
+        self.id = job_id
+        self.user = user
+        self.mode = mode
+        self.source = source
+        self.output = output
+        self.options = options
+        self.cancel_token = cancel
+        self.task = task
+        self.state = QUEUED
+        self.status = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._scheduler = scheduler
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def wait(self, timeout=None):
+        """ 等待结束，返回是否已结束 """
+        return self._done.wait(timeout)
+
+    def position(self):
+        """ 前面还有几个排队的任务 (按公平轮转的实际出队顺序计算)；不在排队时为 None """
+        return self._scheduler.position(self)
+
+    def cancel(self):
+        self._scheduler.cancel(self)
+
+
+class ConversionScheduler:
+    """
+    scheduler = ConversionScheduler(workers=2, max_queue=20, per_user=2)
+    job = scheduler.submit(用户, 模式, 输入, output=None, options={构造参数}, timeout=秒)
+    job = scheduler.submit_task(用户, 名称, task)   # 不是单个转换的任务 (如版本比对)，同样排队、限流
+    job.position() / job.wait() / job.cancel()
+    引擎参数相同的任务在同一工作线程里复用同一个转换器实例 (每个工作线程最多留两个，见 core/warmup.py)；
+    warm_up() 可在第一个任务之前预热
+    """
+
+    def __init__(self, workers=2, max_queue=20, per_user=2):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()   # 用户 -> deque[Job]；出队按用户轮转
+        self._active = {}              # 用户 -> 排队中 + 处理中的任务数
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._closed = False
+        self._ids = itertools.count(1)
+        # 每个工作线程一个转换器缓存 (热引擎)；预热时各缓存在后台同时加载
+        self._caches = [ConverterCache() for _ in range(workers)]
+        self._threads = [threading.Thread(target=self._worker, args=(cache,), name=f"convert-worker-{i}",
+                                          daemon=True)
+                         for i, cache in enumerate(self._caches)]
+        for t in self._threads:
+            t.start()
+
+    # ------------------------------------------------------------------
+    # 提交 / 查询 / 取消
+    # ------------------------------------------------------------------
+    def submit(self, user, mode, source, output=None, options=None, timeout=None, page_timeout=None):
+        """ 返回 Job；队列满或超出个人上限时抛 AdmissionRejected """
+        if mode not in registry.CONVERTERS:
+            raise ValueError(f"未知模式: {mode}")
+        return self._enqueue(user, lambda job_id: Job(
+            job_id, self, user, mode, source, output, dict(options or {}),
+            CancelToken(timeout=timeout, page_timeout=page_timeout)))
+
+    def submit_task(self, user, name, task, timeout=None, page_timeout=None):
+        """
+        task(converters, cancel) 在工作线程里运行，返回 (状态, 结果)：
+            converters 为该工作线程的转换器缓存 (要用 OCR 等引擎时从这里取，复用热引擎)，
+            cancel 为任务的 CancelToken；状态为 core/cancellation.py 的 ok / failed / cancelled / timeout
+        准入控制、公平排队、取消与 submit() 相同
+        """
+        return self._enqueue(user, lambda job_id: Job(
+            job_id, self, user, name, None, None, {},
+            CancelToken(timeout=timeout, page_timeout=page_timeout), task=task))
+
+    def _enqueue(self, user, make_job):
+        with self._cond:
+            if self._closed:
+                raise AdmissionRejected("调度器已关闭")
+            if self._active.get(user, 0) >= self.per_user:
+                self._rejected += 1
+                raise AdmissionRejected(f"您已有 {self.per_user} 个任务在排队或处理中，请等其完成后再提交")
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise AdmissionRejected(f"服务器繁忙 (排队已满 {self.max_queue} 个)，请稍后再试")
+
+            job = make_job(next(self._ids))
+            self._queues.setdefault(user, deque()).append(job)
+            self._active[user] = self._active.get(user, 0) + 1
+            self._queued += 1
+            self._cond.notify()
+            return job
+
+    def _dispatch_order(self):
+        """ 按当前队列模拟轮转出队的顺序 (不修改队列) """
+        queues = [(user, list(q)) for user, q in self._queues.items()]
+        order = []
+        for round_jobs in itertools.zip_longest(*(jobs for _, jobs in queues)):
+            order.extend(job for job in round_jobs if job is not None)
+        return order
+
+    def position(self, job):
+        with self._cond:
+            if job.state != QUEUED:
+                return None
+            return self._dispatch_order().index(job)
+
+    def cancel(self, job):
+        """ 排队中的任务直接移出；处理中的任务通知转换器在下一页前停止 """
+        job.cancel_token.cancel()
+        with self._cond:
+            if job.state != QUEUED:
+                return
+            queue = self._queues[job.user]
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.user]
+            self._queued -= 1
+            job.status = CANCELLED
+            self._finish(job)
+
+    def warm_up(self, mode, options=None):
+        """ 让每个工作线程在后台预先创建该模式的转换器并预热 (已加载 / 正在加载的不重复) """
+        for cache in self._caches:
+            cache.start(mode, options)
+
+    def retry_warm_up(self, mode, options=None):
+        """ 忘掉加载失败的结果并立即重新预热 (界面上的"重试"按钮用；warm_up 对失败的要等重试间隔) """
+        for cache in self._caches:
+            cache.reset(mode, options)
+        self.warm_up(mode, options)
+
+    def warm_state(self, mode, options=None):
+        """ 所有工作线程都已就绪为 "ready"；任一失败为 "failed"；否则 "loading" / None (未预热) """
+        states = [cache.state(mode, options) for cache in self._caches]
+        if LOAD_FAILED in states:
+            return LOAD_FAILED
+        if all(state == READY for state in states):
+            return READY
+        return LOADING if LOADING in states or READY in states else None
+
+    def stats(self):
+        with self._cond:
+            return {"workers": self.workers, "running": self._running, "queued": self._queued,
+                    "completed": self._completed, "rejected": self._rejected,
+                    "users": len(self._active)}
+
+    def shutdown(self, wait=True):
+        """ 不再接受新任务；已排队的任务处理完后工作线程退出 """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    # ------------------------------------------------------------------
+    # 工作线程
+    # ------------------------------------------------------------------
+    def _next_job(self):
+        """ 取队首用户的第一个任务，该用户还有任务就排到队尾 (调用方持有锁) """
+        user, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        if queue:
+            self._queues.move_to_end(user)
+        else:
+            del self._queues[user]
+        self._queued -= 1
+        return job
+
+    def _finish(self, job):
+        """ 调用方持有锁 """
+        job.state = FINISHED
+        job.finished = time.time()
+        self._active[job.user] -= 1
+        if not self._active[job.user]:
+            del self._active[job.user]
+        self._completed += 1
+        job._done.set()
+
+    def _worker(self, converters):
+        while True:
+            with self._cond:
+                while not self._queues and not self._closed:
+                    self._cond.wait()
+                if not self._queues:
+                    return
+                job = self._next_job()
+                job.state = RUNNING
+                job.started = time.time()
+                self._running += 1
+
+            try:
+                self._execute(job, converters)
+            except Exception as e:
+                print(f"❌ 任务 #{job.id} ({job.mode}) 出错: {e}")
+                job.status, job.error = FAILED, str(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._finish(job)
+
+    def _execute(self, job, converters):
+        if job.task is not None:
+            job.status, job.result = job.task(converters, job.cancel_token)
+            return
+        # 预热过的直接取用 (正在预热就等它完成)，否则当场创建并留在缓存里
+        converter = converters.get(job.mode, job.options)
+        output = io.BytesIO() if job.output is None else job.output
+        ok = registry.convert(job.mode, job.source, output, converter=converter, cancel=job.cancel_token)
+        job.status = getattr(converter, "last_status", None) or (OK if ok else FAILED)
+        if ok and job.output is None:
+            job.result = output.getvalue()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _env_int(name, default):
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def get_scheduler():
+    """
+    进程内唯一的调度器 (第一次调用时创建)
+    工作线程数 / 总排队上限 / 每人上限分别由环境变量
+    DOC_AUDIT_WORKERS (默认 2) / DOC_AUDIT_MAX_QUEUE (默认 20) / DOC_AUDIT_PER_USER (默认 2) 配置
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            workers = _env_int("DOC_AUDIT_WORKERS", 2)
+            # 让每个 OCR 引擎只拿 1/workers 的核心 (见 core/ort_session.auto_thread_policy)
+            os.environ.setdefault("DOC_AUDIT_OCR_ENGINES", str(workers))
+            _scheduler = ConversionScheduler(workers=workers,
+                                             max_queue=_env_int("DOC_AUDIT_MAX_QUEUE", 20),
+                                             per_user=_env_int("DOC_AUDIT_PER_USER", 2))
+        return _scheduler
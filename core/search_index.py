@@ -0,0 +1,254 @@
+import os
+import re
+import html
+import time
+import sqlite3
+from core.app_paths import app_data_dir
+from core.doc_io import source_key, is_path
+
+# =========================================================================
+# 全文检索索引 (SQLite FTS5，只用标准库)
+# 各转换器转换成功后，把"每页提取出的文字"连同文档信息写进本地索引：
+#   documents : 一行一个源文件 (路径、标题、模式、输出文件、页数、入库时间)
+#   pages     : FTS5 虚表，一行一页文字
+#   page_bigrams : FTS5 影子表，与 pages 同 rowid，存每页文字的两字滑窗 (空格分隔)
+#   page_rows : 普通表，页 rowid -> doc_id (带索引)；FTS5 表里的 doc_id 是 UNINDEXED 列，
+#               按它删除要扫全表，重新入库 / 删除文档时改为先查这里再按 rowid 删
+# 分词用 trigram：中文没有空格，按三字滑窗建索引才能搜到句子中间的"供应商"；
+# trigram 搜不了两个字的词 (中文里最常见的"甲方""违约")，这类词查 page_bigrams 的整词索引；
+# 只有单个字的词才退回 LIKE 逐行匹配 (与其他词同时出现时只在命中结果里过滤)
+# =========================================================================
+
+INDEX_FILE = "search_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    title TEXT,
+    mode TEXT,
+    output_path TEXT,
+    page_count INTEGER,
+    indexed_at TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text, doc_id UNINDEXED, page UNINDEXED, tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_bigrams USING fts5(
+    bigrams, doc_id UNINDEXED, tokenize='unicode61', detail='none'
+);
+CREATE TABLE IF NOT EXISTS page_rows (
+    rowid INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS page_rows_doc ON page_rows (doc_id);
+"""
+
+
+def default_index_path():
+    return os.path.join(app_data_dir(), INDEX_FILE)
+
+
+def html_to_text(content):
+    """ 去掉标签 / 样式，块级元素换行，返回纯文本 (Word / 数字 PDF 转出的 HTML 入库前用) """
+    content = re.sub(r"(?is)<(script|style)\b.*?</\1>", "", content)
+    content = re.sub(r"(?i)<br\s*/?>|</(p|div|h[1-6]|li|tr|table)>", "\n", content)
+    content = re.sub(r"(?s)<[^>]+>", "", content)
+    lines = (line.strip() for line in html.unescape(content).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _bigrams(text):
+    """
+    文字 -> 空格分隔的两字滑窗 ("甲方违约" -> "甲方 方违 违约")；标点、空白处断开，不跨过它们配对
+    两字表只用来判断"这页有没有这个词" (detail='none'，不存位置与词频)，重复的只留一个
+    """
+    grams = {}
+    for run in re.findall(r"\w{2,}", (text or "").lower()):
+        grams.update(dict.fromkeys(run[i:i + 2] for i in range(len(run) - 1)))
+    return " ".join(grams)
+
+
+def _quote(terms):
+    # 每个词按短语引用，避免用户输入里的 AND / OR / 引号被当成 FTS5 语法
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms) or None
+
+
+def _parse_query(query):
+    """
+    按空白拆成多个词 (同时出现才算命中)
+    返回 (pages 的 MATCH 表达式 或 None, page_bigrams 的 MATCH 表达式 或 None, 其余短词列表)
+    """
+    terms = [t for t in query.split() if t]
+    long_terms = [t for t in terms if len(t) >= 3]
+    # 两个字都是文字 (非标点) 的词才能在两字索引里查到
+    bigram_terms = [t for t in terms if len(t) == 2 and re.fullmatch(r"\w{2}", t)]
+    short_terms = [t for t in terms if len(t) < 3 and t not in bigram_terms]
+    return _quote(long_terms), _quote(bigram_terms), short_terms
+
+
+class SearchIndex:
+    """
+    index = SearchIndex()                         # 默认 ~/.doc_audit/search_index.sqlite
+    index.add_document(源文件, [第1页文字, 第2页文字, ...], mode="ocr", output_path=...)
+    hits = index.search("供应商 合同")            # 按相关度排好序的 [{path, title, page, snippet, ...}]
+    每次操作单独打开连接：转换在后台线程里跑，sqlite 连接不能跨线程共用
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        conn = self._connect()
+        try:
+            with conn:
+                existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+                conn.executescript(_SCHEMA)
+                # 旧版本建的索引没有两字表 / rowid 对照表：按已有页面补齐一次 (与 pages 同 rowid)
+                if "page_bigrams" not in existing:
+                    conn.create_function("bigrams", 1, _bigrams, deterministic=True)
+                    conn.execute("INSERT INTO page_bigrams (rowid, bigrams, doc_id) "
+                                 "SELECT rowid, bigrams(text), doc_id FROM pages")
+                if "page_rows" not in existing:
+                    conn.execute("INSERT INTO page_rows (rowid, doc_id) SELECT rowid, doc_id FROM pages")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add_document(self, path, pages, mode=None, output_path=None, title=None):
+        """ 写入 (或替换) 一个文档的全部页面，返回入库的页数 """
+        return self.add_documents([{"path": path, "pages": pages, "mode": mode,
+                                    "output_path": output_path, "title": title}])
+
+    def add_documents(self, docs):
+        """
+        批量写入：所有文档在同一个事务里，每个文档的页面用 executemany 一次插入
+        docs: [{"path", "pages", "mode", "output_path", "title"}, ...]
+        path 是文档标识，原样保存 (转换器传入的是绝对路径，内存数据则是文件名，见 doc_io.source_key)
+        """
+        indexed_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        count = 0
+        conn = self._connect()
+        try:
+            with conn:
+                for doc in docs:
+                    path = doc["path"]
+                    self._delete(conn, path)
+                    pages = [(text, page) for page, text in enumerate(doc["pages"], start=1) if text and text.strip()]
+                    cursor = conn.execute(
+                        "INSERT INTO documents (path, title, mode, output_path, page_count, indexed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, doc.get("title") or os.path.basename(path), doc.get("mode"),
+                         doc.get("output_path"), len(doc["pages"]), indexed_at))
+                    # 三张表用同一个 rowid，rowid 由 page_rows (普通表，取最大值不用扫描) 分配
+                    first = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM page_rows").fetchone()[0]
+                    rows = [(first + i, text, cursor.lastrowid, page) for i, (text, page) in enumerate(pages)]
+                    conn.executemany("INSERT INTO pages (rowid, text, doc_id, page) VALUES (?, ?, ?, ?)", rows)
+                    conn.executemany("INSERT INTO page_bigrams (rowid, bigrams, doc_id) VALUES (?, ?, ?)",
+                                     [(rowid, _bigrams(text), doc_id) for rowid, text, doc_id, _ in rows])
+                    conn.executemany("INSERT INTO page_rows (rowid, doc_id) VALUES (?, ?)",
+                                     [(rowid, doc_id) for rowid, _, doc_id, _ in rows])
+                    count += len(pages)
+        finally:
+            conn.close()
+        return count
+
+    def _delete(self, conn, path):
+        row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            rowids = conn.execute("SELECT rowid FROM page_rows WHERE doc_id = ?", (row["id"],)).fetchall()
+            # FTS5 按 rowid 删除是点查；按 doc_id (UNINDEXED) 删除要扫全表
+            conn.executemany("DELETE FROM pages WHERE rowid = ?", rowids)
+            conn.executemany("DELETE FROM page_bigrams WHERE rowid = ?", rowids)
+            conn.execute("DELETE FROM page_rows WHERE doc_id = ?", (row["id"],))
+            conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+        return row is not None
+
+    def remove_document(self, path):
+        conn = self._connect()
+        try:
+            with conn:
+                return self._delete(conn, path)
+        finally:
+            conn.close()
+
+    def search(self, query, limit=20, mode=None):
+        """
+        返回命中页面 [{path, title, mode, output_path, page, snippet, score}]
+        有三字以上的词时按 bm25 相关度排序 (score 越小越相关)；只有一两个字的词时按入库先后
+        """
+        match, bigram_match, short_terms = _parse_query(query)
+        if not match and not bigram_match and not short_terms:
+            return []
+
+        where, params = [], []
+        if match:
+            where.append("pages MATCH ?")
+            params.append(match)
+        if bigram_match:
+            where.append("pages.rowid IN (SELECT rowid FROM page_bigrams WHERE page_bigrams MATCH ?)")
+            params.append(bigram_match)
+        for term in short_terms:
+            where.append("pages.text LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", term) + "%")
+        if mode:
+            where.append("documents.mode = ?")
+            params.append(mode)
+
+        if match:
+            snippet, score, order = "snippet(pages, 0, '【', '】', '…', 16)", "bm25(pages)", "rank"
+        else:
+            snippet, score, order = "pages.text", "0.0", "documents.id, pages.page"
+        sql = (f"SELECT documents.path, documents.title, documents.mode, documents.output_path, "
+               f"pages.page, {snippet} AS snippet, {score} AS score "
+               f"FROM pages JOIN documents ON documents.id = pages.doc_id "
+               f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?")
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        finally:
+            conn.close()
+        hits = [dict(row) for row in rows]
+        if not match:
+            terms = [t for t in query.split() if len(t) < 3]
+            for hit in hits:
+                hit["snippet"] = _snippet(hit["snippet"], terms)
+        return hits
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            docs = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        finally:
+            conn.close()
+        return {"documents": docs, "pages": pages, "path": self.path}
+
+
+def _snippet(text, terms, width=40):
+    """ 只有一两个字的词时 (没有 FTS5 snippet 可用) 截取第一个词前后的一段并标记命中 """
+    start = max(0, text.find(terms[0]) - width // 2)
+    text = ("…" if start else "") + text[start:start + width * 2].replace("\n", " ")
+    for term in terms:
+        text = text.replace(term, f"【{term}】")
+    return text
+
+
+def index_pages(search_index, source, pages, mode, output_path):
+    """
+    转换器成功后调用：search_index 为 None 时不做任何事；可传 SearchIndex 实例或索引文件路径
+    source / output_path 可以是路径或内存数据 (内存数据以文件名入库，没有输出文件)
+    索引失败只打印警告，不影响转换结果
+    """
+    if search_index is None:
+        return
+    try:
+        if not isinstance(search_index, SearchIndex):
+            search_index = SearchIndex(search_index)
+        count = search_index.add_document(source_key(source), pages, mode=mode,
+                                          output_path=os.fspath(output_path) if is_path(output_path) else None)
+        print(f"   🔎 已加入全文索引: {len(pages)} 页 ({count} 页有文字)")
+    except Exception as e:
+        print(f"   ⚠️ 写入全文索引失败 (不影响转换结果): {e}")
@@ -0,0 +1,143 @@
+import time
+import threading
+from collections import OrderedDict
+from core import registry
+
+# =========================================================================
+# 转换器缓存 + 后台预热
+# 界面启动时就在后台线程里导入所选模式的重型模块、创建转换器 (OCR 引擎加载模型)，
+# 并用一张很小的合成图跑一次推理，让 ONNX Runtime 提前分配好内存；
+# 用户第一次点"开始处理"时直接拿到热引擎，而不是干等模型加载
+# 同样的 (模式, 构造参数) 只创建一次，之后的任务继续复用；每个缓存最多留 MAX_ENTRIES 个转换器，
+# 多了按最近最少使用淘汰 (每个 OCR 转换器都带一整套模型，不能随模式 / 选项组合无限增加)
+# 加载失败的结果也会记住：界面每次刷新都会调用 start()，失败后要过 RETRY_AFTER_SEC 秒
+# (或显式 reset()) 才会在后台重试，不会每次刷新都重新加载一遍模型；get() 是真正要用引擎，总会重试
+# =========================================================================
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+STATE_LABELS = {
+    None: "⚪ 未加载",
+    LOADING: "⏳ 正在加载引擎...",
+    READY: "✅ 引擎已就绪",
+    FAILED: "❌ 引擎加载失败",
+}
+
+
+# 只影响每次转换、不影响引擎的构造参数：不进缓存键，get() 时按本次参数设到转换器的同名属性上
+# (勾选 / 取消"加入索引"不会再多加载一个 OCR 引擎)
+RUNTIME_OPTIONS = ("search_index", "checkpoint_dir")
+
+
+def converter_key(mode, options=None):
+    engine_options = {k: v for k, v in (options or {}).items() if k not in RUNTIME_OPTIONS}
+    return mode, repr(sorted(engine_options.items()))
+
+
+class _Entry:
+    def __init__(self):
+        self.state = LOADING
+        self.converter = None
+        self.error = None
+        self.seconds = None
+        self.failed_at = None
+        self.done = threading.Event()
+
+
+class ConverterCache:
+    """
+    cache.start(模式, 参数)   # 后台预热，立即返回
+    cache.state(模式, 参数)   # None / "loading" / "ready" / "failed"
+    cache.get(模式, 参数)     # 取转换器：正在预热则等它完成，没预热过 (或上次失败) 就当场创建
+    cache.reset(模式, 参数)   # 忘掉加载失败的结果，下次 start() 立即重试
+    同一个缓存里的转换器不应被多个线程同时使用 (调度器每个工作线程各有一个缓存)
+    """
+
+    # 预热失败后多久 start() 才会再试 (秒)
+    RETRY_AFTER_SEC = 300
+    # 最多缓存几个转换器 (调度器每个工作线程一个缓存，即每个工作线程最多这么多套引擎)
+    MAX_ENTRIES = 2
+
+    def __init__(self, retry_after=None, max_entries=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.retry_after = self.RETRY_AFTER_SEC if retry_after is None else retry_after
+        self.max_entries = max_entries or self.MAX_ENTRIES
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _claim(self, mode, options, retry_failed):
+        """ 返回 (条目, 是否由调用方负责加载)；retry_failed 为 False 时失败的条目要等过了重试间隔 """
+        key = converter_key(mode, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is not None and entry.state != FAILED:
+                return entry, False
+            if entry is not None and not retry_failed and time.monotonic() - entry.failed_at < self.retry_after:
+                return entry, False
+            entry = self._entries[key] = _Entry()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                # 淘汰最久没用的；正在用它的任务手里还有引用，用完才释放
+                self._entries.popitem(last=False)
+            return entry, True
+
+    def _load(self, entry, mode, options):
+        t0 = time.perf_counter()
+        try:
+            converter = registry.create_converter(mode, **(options or {}))
+            # OCR 转换器的引擎初始化失败时构造函数不抛异常，只是 is_available() 为 False：同样算加载失败
+            is_available = getattr(converter, "is_available", None)
+            if is_available is not None and not is_available():
+                raise RuntimeError(getattr(converter, "UNAVAILABLE_HINT", None) or "引擎初始化失败")
+            warm_up = getattr(converter, "warm_up", None)
+            if warm_up is not None:
+                warm_up()
+            entry.converter, entry.state = converter, READY
+        except Exception as e:
+            entry.error, entry.state = f"{type(e).__name__}: {e}", FAILED
+            entry.failed_at = time.monotonic()
+            print(f"⚠️ 预加载 {mode} 失败: {entry.error}")
+        finally:
+            entry.seconds = time.perf_counter() - t0
+            entry.done.set()
+
+    def start(self, mode, options=None):
+        entry, owner = self._claim(mode, options, retry_failed=False)
+        if owner:
+            threading.Thread(target=self._load, args=(entry, mode, options),
+                             name=f"warmup-{mode}", daemon=True).start()
+        return entry
+
+    def state(self, mode, options=None):
+        entry = self._entries.get(converter_key(mode, options))
+        return entry.state if entry is not None else None
+
+    def reset(self, mode, options=None):
+        """ 丢掉加载失败的条目 (已就绪 / 正在加载的不动)，返回是否丢掉了 """
+        key = converter_key(mode, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.state != FAILED:
+                return False
+            del self._entries[key]
+            return True
+
+    def get(self, mode, options=None):
+        """ 返回转换器；创建失败时抛 RuntimeError (附带原因) """
+        entry, owner = self._claim(mode, options, retry_failed=True)
+        if owner:
+            self._load(entry, mode, options)
+        entry.done.wait()
+        if entry.state != READY:
+            raise RuntimeError(entry.error)
+        converter = entry.converter
+        for name in RUNTIME_OPTIONS:
+            if hasattr(converter, name):
+                setattr(converter, name, (options or {}).get(name))
+        return converter
@@ -1,29 +1,79 @@
 import os
-import fitz  # PyMuPDF
+import html
 import mammoth
+from core.search_index import index_pages, html_to_text
+from core.doc_io import is_path, source_exists, source_name, open_binary, open_pdf, write_output, open_text_output
+from core.cancellation import OK, FAILED, STATUS_LABELS, ConversionCancelled, ensure_token
 
 class DocToHtmlConverter:
     """
     Word 和 PDF 转换为 HTML
+    输入可以是路径或内存数据 (bytes / 文件对象)，输出可以是路径或可写流 (见 core/doc_io.py)
     """
 
-    def word_to_html(self, docx_path, output_path):
+    # 紧凑语义 HTML 的共用样式 (元素 / 类选择器，正文里不再有内联样式)
+    SEMANTIC_CSS = """
+        body { font-family: "Microsoft YaHei", sans-serif; max-width: 860px; margin: 20px auto; padding: 0 20px; line-height: 1.6; color: #333; }
+        section.page { border-bottom: 1px dashed #ccc; padding-bottom: 1em; margin-bottom: 2em; }
+        h1 { font-size: 1.6em; text-align: center; }
+        h2 { font-size: 1.25em; border-left: 4px solid #007bff; padding-left: 8px; }
+        table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+        th, td { border: 1px solid #999; padding: 4px 8px; text-align: left; }
+        th { background: #f2f2f2; }
+        figure.page-images img { max-width: 100%; display: block; margin: 0.5em auto; }
+    """
+
+    def __init__(self, search_index=None, pdf_html_mode="layout", images="skip", word_html_mode="mammoth"):
+        """
+        search_index: 全文检索索引 (SearchIndex 实例或索引文件路径)，转换成功后写入文字
+        pdf_html_mode: PDF -> HTML 的输出方式
+            "layout"   保留原始版式 (get_text("html")：绝对定位 + 内联样式 + base64 内嵌图片，体积往往是 PDF 的数倍)
+            "semantic" 紧凑语义 HTML：段落 / 标题 / 表格 + 共用 CSS，标题与表格判定与 PdfMdConverter 相同
+        images: semantic / stream 模式下的图片："skip" 不输出；"external" 另存到 "<输出文件名>_files/"
+            并以相对路径引用 (输出为流时没有落脚的目录，按 skip 处理)
+        word_html_mode: Word -> HTML 的方式
+            "mammoth" 完整语义转换 (图片 base64 内嵌)，整篇在内存里建模后一次写出
+            "stream"  流式快速文字模式 (core/docx_stream.py)：边解析 document.xml 边写出段落 / 标题 / 表格，
+                      内存不随文档长度增长，适合几百页的大文件
+        """
+        if pdf_html_mode not in ("layout", "semantic"):
+            raise ValueError(f"未知 pdf_html_mode: {pdf_html_mode}，可选 layout / semantic")
+        if word_html_mode not in ("mammoth", "stream"):
+            raise ValueError(f"未知 word_html_mode: {word_html_mode}，可选 mammoth / stream")
+        if images not in ("skip", "external"):
+            raise ValueError(f"未知 images: {images}，可选 skip / external")
+        self.search_index = search_index
+        self.pdf_html_mode = pdf_html_mode
+        self.word_html_mode = word_html_mode
+        self.images = images
+        self.last_status = None
+        self.last_timed_out = []
+
+    def word_to_html(self, docx_path, output_path, cancel=None):
         """
         功能：Word (.docx) -> HTML
         使用 mammoth，只提取语义内容。
+        mammoth 一次转换整篇，cancel 在转换前后各检查一次；word_html_mode="stream" 时逐段检查
         """
-        if not os.path.exists(docx_path):
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
+        if not source_exists(docx_path):
             print(f"❌ 错误：找不到文件 {docx_path}")
             return False
 
-        print(f"🔄 [Word -> HTML] 正在转换: {os.path.basename(docx_path)}")
+        name = source_name(docx_path, "document.docx")
+        print(f"🔄 [Word -> HTML] 正在转换: {name}")
+        if self.word_html_mode == "stream":
+            return self._word_to_stream_html(docx_path, output_path, name, cancel)
 
         try:
-            with open(docx_path, "rb") as docx_file:
+            cancel.check()
+            with open_binary(docx_path) as docx_file:
                 # convert_to_html 会把 word 里的图片转成 base64 内嵌在 html 里
                 result = mammoth.convert_to_html(docx_file)
                 html_content = result.value
                 messages = result.messages  # 警告信息（如果有的话）
+            cancel.check()
 
             # 简单的包装一下，让它变成合法的 HTML 文档
             full_html = f"""
@@ -31,7 +81,7 @@ class DocToHtmlConverter:
             <html>
             <head>
                 <meta charset="utf-8">
-                <title>{os.path.basename(docx_path)}</title>
+                <title>{name}</title>
                 <style>
                     body {{ font-family: sans-serif; max-width: 800px; margin: 20px auto; line-height: 1.6; }}
                     table {{ border-collapse: collapse; width: 100%; }}
@@ -44,38 +94,109 @@ class DocToHtmlConverter:
             </html>
             """
 
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(full_html)
+            write_output(output_path, full_html)
             
-            print(f"✅ [成功] 已保存至: {output_path}")
+            print(f"✅ [成功] 已保存至: {output_path if is_path(output_path) else '(输出流)'}")
             if messages:
                 print(f"   ⚠️ 转换警告: {[m.message for m in messages]}")
+            # Word 没有固定分页，整篇作为第 1 页入库
+            index_pages(self.search_index, docx_path, [html_to_text(html_content)], "word", output_path)
+            self.last_status = OK
             return True
 
+        except ConversionCancelled as e:
+            print(f"⏹️ [Word -> HTML] {e}，未写出结果")
+            self.last_status = e.status
+            return False
+        except Exception as e:
+            print(f"❌ [失败] Word 转 HTML 出错: {e}")
+            return False
+
+    def _word_to_stream_html(self, docx_path, output_path, name, cancel):
+        """ 流式模式：片段边产出边写出；取消 / 超时时在已写出的内容末尾加提示并正常收尾 """
+        from core.docx_stream import iter_docx_html
+
+        image_dir = None
+        if self.images == "external":
+            if is_path(output_path):
+                image_dir = os.path.splitext(os.fspath(output_path))[0] + "_files"
+            else:
+                print("   ⚠️ 输出为流，图片无法另存，已跳过")
+
+        texts = [] if self.search_index is not None else None
+        blocks = 0
+        status = OK
+        try:
+            cancel.check()
+            with open_binary(docx_path) as docx_file, open_text_output(output_path) as write:
+                write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                      f'<title>{html.escape(name)}</title>\n<style>{self.SEMANTIC_CSS}</style>\n</head>\n<body>\n')
+                try:
+                    for fragment, text in iter_docx_html(docx_file, image_dir):
+                        cancel.check()
+                        write(fragment)
+                        blocks += 1
+                        if texts is not None and text:
+                            texts.append(text)
+                except ConversionCancelled as e:
+                    status = e.status
+                    write(f'\n<p class="status"><b>⚠️ {STATUS_LABELS[status]}：仅包含前 {blocks} 个段落 / 表格行</b></p>')
+                write("\n</body>\n</html>\n")
+        except ConversionCancelled as e:
+            print(f"⏹️ [Word -> HTML] {e}，未写出结果")
+            self.last_status = e.status
+            return False
         except Exception as e:
             print(f"❌ [失败] Word 转 HTML 出错: {e}")
             return False
 
-    def pdf_to_html(self, pdf_path, output_path):
+        target = output_path if is_path(output_path) else '(输出流)'
+        if status != OK:
+            print(f"⏹️ [{STATUS_LABELS[status]}] 部分结果已保存至: {target}")
+            self.last_status = status
+            return False
+        print(f"✅ [成功] 已保存至: {target} (流式模式，{blocks} 个段落 / 表格行)")
+        if texts is not None:
+            index_pages(self.search_index, docx_path, ["\n".join(texts)], "word_fast", output_path)
+        self.last_status = OK
+        return True
+
+    def pdf_to_html(self, pdf_path, output_path, cancel=None):
         """
         功能：PDF -> HTML
-        特点：保留 PDF 的原始布局结构
+        特点：默认保留 PDF 的原始布局结构；pdf_html_mode="semantic" 时输出紧凑语义 HTML
+        cancel: CancelToken (可选)；逐页检查，取消 / 超时时写出已完成的页并返回 False
         """
-        if not os.path.exists(pdf_path):
+        cancel = ensure_token(cancel)
+        self.last_status = FAILED
+        self.last_timed_out = []
+        if not source_exists(pdf_path):
             print(f"❌ 错误：找不到文件 {pdf_path}")
             return False
 
-        print(f"🔄 [PDF -> HTML] 正在转换: {os.path.basename(pdf_path)}")
+        print(f"🔄 [PDF -> HTML] 正在转换: {source_name(pdf_path, 'document.pdf')}")
         
         try:
-            doc = fitz.open(pdf_path)
+            doc = open_pdf(pdf_path)
+            if self.pdf_html_mode == "semantic":
+                return self._pdf_to_semantic_html(doc, pdf_path, output_path, cancel)
             body_content = ""
+            page_texts = []
+            status = OK
             
             for i, page in enumerate(doc):
+                if cancel.status is not None:
+                    status = cancel.status
+                    body_content = self._status_banner(status, i, len(doc)) + body_content
+                    break
                 # 插入分页标记，方便查看
                 #body_content += f'<div class="page-marker">--- 第 {i+1} 页 ---</div>'
                 # get_text("html") 会生成带有绝对定位样式的 HTML
-                body_content += page.get_text("html")
+                page_html = page.get_text("html")
+                body_content += page_html
+                cancel.page_done(i, page_html)
+                if self.search_index is not None:
+                    page_texts.append(page.get_text())
                 #body_content += "<hr/>"
             
             full_html = f"""
@@ -93,12 +214,94 @@ class DocToHtmlConverter:
             </html>
             """
             
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(full_html)
-                
-            print(f"✅ [成功] 已保存至: {output_path}")
+            write_output(output_path, full_html)
+
+            if status != OK:
+                print(f"⏹️ [{STATUS_LABELS[status]}] 部分结果已保存至: {output_path if is_path(output_path) else '(输出流)'}")
+                self.last_status = status
+                return False
+            print(f"✅ [成功] 已保存至: {output_path if is_path(output_path) else '(输出流)'}")
+            index_pages(self.search_index, pdf_path, page_texts, "digital_pdf", output_path)
+            self.last_status = OK
             return True
 
         except Exception as e:
             print(f"❌ [失败] PDF 转 HTML 出错: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def _status_banner(self, status, done, total):
+        """ 部分结果开头的提示 (取消 / 超时) """
+        return f'<p class="status"><b>⚠️ {STATUS_LABELS[status]}：仅包含前 {done}/{total} 页</b></p>'
+
+    def _pdf_to_semantic_html(self, doc, pdf_path, output_path, cancel):
+        """ 逐页：PdfMdConverter 的 Markdown 片段 -> markdown 库渲染成语义 HTML，每页一个 <section> """
+        from markdown import markdown
+        from core.pdf_md import PdfMdConverter
+
+        image_dir = None
+        if self.images == "external":
+            if is_path(output_path):
+                image_dir = os.path.splitext(os.fspath(output_path))[0] + "_files"
+            else:
+                print("   ⚠️ 输出为流，图片无法另存，已跳过")
+        saved_images = {}   # xref -> 文件名 (同一图片在多页出现时只存一份)
+
+        sections = []
+        page_texts = []
+        status = OK
+        md_converter = PdfMdConverter()
+        try:
+            for i, contents in enumerate(md_converter.iter_page_markdown(doc, cancel)):
+                # PDF 里的 "<"、"&" 是正文字符，转义后再交给 markdown，避免被当成标签
+                page_md = "\n\n".join(html.escape(c, quote=False) for c in contents)
+                body = markdown(page_md, extensions=["tables"])
+                if image_dir:
+                    body += self._external_images(doc, doc[i], image_dir, saved_images)
+                sections.append(f'<section class="page" id="page-{i + 1}">\n{body}\n</section>')
+                cancel.page_done(i, sections[-1])
+                if self.search_index is not None:
+                    page_texts.append(doc[i].get_text())
+        except ConversionCancelled as e:
+            status = e.status
+            sections.insert(0, self._status_banner(status, len(sections), len(doc)))
+        self.last_timed_out = md_converter.last_timed_out
+
+        title = html.escape(source_name(pdf_path, "document.pdf"))
+        full_html = (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+                     f'<style>{self.SEMANTIC_CSS}</style>\n</head>\n<body>\n'
+                     + "\n".join(sections) + "\n</body>\n</html>\n")
+        write_output(output_path, full_html)
+
+        if status != OK:
+            print(f"⏹️ [{STATUS_LABELS[status]}] 部分结果已保存至: {output_path if is_path(output_path) else '(输出流)'}")
+            self.last_status = status
+            return False
+        print(f"✅ [成功] 已保存至: {output_path if is_path(output_path) else '(输出流)'} "
+              f"(语义模式，{len(full_html.encode('utf-8')) / 1024:.0f} KB"
+              + (f"，图片 {len(saved_images)} 张" if saved_images else "") + ")")
+        index_pages(self.search_index, pdf_path, page_texts, "digital_pdf_compact", output_path)
+        self.last_status = OK
+        return True
+
+    def _external_images(self, doc, page, image_dir, saved_images):
+        """ 把本页引用的图片另存到 image_dir，返回 <figure> 片段 (按页面上从上到下的顺序) """
+        tags = []
+        infos = sorted(page.get_image_info(xrefs=True), key=lambda info: info["bbox"][1])
+        for info in infos:
+            xref = info.get("xref", 0)
+            if xref <= 0:   # 内联图片没有 xref，无法单独提取
+                continue
+            if xref not in saved_images:
+                image = doc.extract_image(xref)
+                if not image:
+                    continue
+                os.makedirs(image_dir, exist_ok=True)
+                file_name = f"img-{xref}.{image['ext']}"
+                with open(os.path.join(image_dir, file_name), "wb") as f:
+                    f.write(image["image"])
+                saved_images[xref] = file_name
+            src = f"{os.path.basename(image_dir)}/{saved_images[xref]}"
+            tags.append(f'<img src="{html.escape(src)}" alt="" loading="lazy">')
+        if not tags:
+            return ""
+        return '\n<figure class="page-images">' + "".join(tags) + "</figure>"
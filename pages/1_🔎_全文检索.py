@@ -0,0 +1,61 @@
+import streamlit as st
+import os
+import time
+
+# 检索只用标准库 sqlite3，不加载任何转换器
+from core.search_index import SearchIndex
+from core import registry
+
+st.set_page_config(page_title="全文检索 - 智能文档审计系统", layout="wide", page_icon="🔎")
+
+st.title("🔎 全文检索")
+
+
+@st.cache_resource
+def get_index():
+    return SearchIndex()
+
+
+index = get_index()
+stats = index.stats()
+st.caption(f"索引中共有 {stats['documents']} 个文档、{stats['pages']} 页 ({stats['path']})")
+
+col_query, col_mode, col_limit = st.columns([4, 2, 1])
+with col_query:
+    query = st.text_input("关键词", placeholder="例如：供应商名称 合同编号 (空格分隔的多个词需同时出现)",
+                          help="两个字以上的词走索引；单个字的词要逐页扫描，文档多时较慢，建议与其他词一起搜")
+with col_mode:
+    modes = [None] + [m for m in registry.CONVERTERS if registry.is_searchable(m)]
+    mode = st.selectbox("来源", modes, format_func=lambda m: "全部" if m is None else registry.CONVERTERS[m]["label"])
+with col_limit:
+    limit = st.number_input("最多", min_value=10, max_value=500, value=50, step=10)
+
+if query.strip():
+    t0 = time.perf_counter()
+    hits = index.search(query, limit=int(limit), mode=mode)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    if not hits:
+        st.info(f"没有找到包含「{query}」的页面 ({elapsed_ms:.1f} ms)")
+    else:
+        # 按文档分组，文档顺序取其最相关一页的名次
+        grouped = {}
+        for hit in hits:
+            grouped.setdefault(hit["path"], []).append(hit)
+        st.success(f"{len(grouped)} 个文档 / {len(hits)} 页命中 ({elapsed_ms:.1f} ms)")
+
+        for path, doc_hits in grouped.items():
+            first = doc_hits[0]
+            pages = "、".join(str(h["page"]) for h in doc_hits)
+            with st.expander(f"📄 {first['title']} — 第 {pages} 页", expanded=len(grouped) <= 5):
+                st.caption(path)
+                for h in doc_hits:
+                    snippet = h["snippet"].replace("【", "**").replace("】", "**")
+                    st.markdown(f"- 第 {h['page']} 页：{snippet}")
+                output_path = first["output_path"]
+                if output_path and os.path.exists(output_path):
+                    with open(output_path, "rb") as f:
+                        st.download_button("💾 下载转换结果", data=f, file_name=os.path.basename(output_path),
+                                           mime="application/octet-stream", key=f"dl-{path}")
+else:
+    st.info("输入关键词开始检索；在主页转换文件时勾选「加入全文检索索引」即可入库")
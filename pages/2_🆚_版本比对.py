@@ -0,0 +1,74 @@
+import streamlit as st
+import streamlit.components.v1 as components
+import os
+import uuid
+
+# 比对模块本身只用标准库，提取文字用到的转换器在工作线程里才加载
+from core.doc_diff import KINDS, diff_task
+from core.cancellation import STATUS_LABELS, OK
+from core.scheduler import get_scheduler, AdmissionRejected
+
+st.set_page_config(page_title="版本比对 - 智能文档审计系统", layout="wide", page_icon="🆚")
+
+st.title("🆚 版本比对")
+st.caption("上传同一份文档的两个版本 (例如合同 v3 / v4)：未改动的页按指纹直接跳过，只列出增删改的行")
+
+KIND_LABELS = {
+    None: "自动判断",
+    "pdf": "数字 PDF (版面文字)",
+    "ocr": "扫描件 PDF (OCR，较慢)",
+    "word": "Word (.docx)",
+    "md": "Markdown / 文本",
+}
+
+col_old, col_new = st.columns(2)
+with col_old:
+    old_file = st.file_uploader("旧版", type=["pdf", "docx", "md", "txt"], key="old")
+with col_new:
+    new_file = st.file_uploader("新版", type=["pdf", "docx", "md", "txt"], key="new")
+kind = st.selectbox("文字来源", [None] + list(KINDS), format_func=KIND_LABELS.get)
+
+# 与主页共用调度器：比对同样排队、受准入控制，扫描件的 OCR 用工作线程里的热引擎
+scheduler = get_scheduler()
+if "user_id" not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
+
+if old_file and new_file and st.button("🚀 开始比对", type="primary"):
+    try:
+        # OCR 参数与主页的 OCR 模式一致，才能复用主页预热好的引擎
+        st.session_state.diff_job = scheduler.submit_task(
+            st.session_state.user_id, "diff", diff_task(old_file, new_file, kind, ocr_options={"poppler_path": None}))
+        st.session_state.diff_stem = f"{os.path.splitext(old_file.name)[0]}_vs_{os.path.splitext(new_file.name)[0]}"
+    except AdmissionRejected as e:
+        st.warning(f"⏳ {e}")
+
+job = st.session_state.get("diff_job")
+if job is not None:
+    if not job.done:
+        if st.button("⏹️ 取消比对"):
+            job.cancel()
+        status_box = st.empty()
+        while not job.wait(0.5):
+            position = job.position()
+            if position is None:
+                status_box.info(f"⚙️ 正在提取文字并比对 #{job.id}，请稍候...")
+            else:
+                status_box.info(f"⏳ 排队中：前面还有 {position} 个任务")
+        status_box.empty()
+
+    if job.status != OK:
+        st.error(f"比对{STATUS_LABELS.get(job.status, '失败')}，请检查两个文件的格式 (控制台有详细信息) {job.error or ''}")
+    else:
+        result, report = job.result["summary"], job.result["report"]
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("未改动的页", f"{result['unchanged_pages']}/{result['old_pages']}")
+        c2.metric("新增行", result["added"])
+        c3.metric("删除行", result["removed"])
+        c4.metric("修改行", result["changed"])
+        st.caption(f"提取文字 {result['timings']['extract']:.1f}s，比对 {result['timings']['diff'] * 1000:.0f} ms")
+
+        st.download_button("💾 下载比对报告 (HTML)", data=report, file_name=f"{st.session_state.diff_stem}.html",
+                           mime="text/html")
+        components.html(report.decode("utf-8"), height=700, scrolling=True)
+elif not (old_file and new_file):
+    st.info("分别上传旧版与新版后开始比对")
@@ -0,0 +1,146 @@
+import io
+import os
+import sys
+import asyncio
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+from core.aio import AsyncConverter
+from core.cancellation import OK, CANCELLED, FAILED
+
+TMP_DIR = make_tmp_dir("aio_test")
+
+WORDS = ["delivery", "payment", "warranty", "inspection", "liability", "termination", "notice",
+         "storage", "transport", "acceptance", "invoice", "penalty", "dispute"]
+
+def _make_pdf(path, pages):
+    """ 每页文字不同 (相同的行会被当成页眉页脚去掉) """
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for j in range(12):
+            word = WORDS[(i * 5 + j) % len(WORDS)]
+            page.insert_text((72, 140 + j * 20), f"Clause {i + 1}.{j + 1} covers {word} {'x' * (i % 7)}",
+                             fontsize=11)
+    doc.save(path)
+    doc.close()
+
+def test_pages_stream_and_result():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "stream.pdf")
+    out_path = os.path.join(TMP_DIR, "stream.md")
+    _make_pdf(pdf_path, 3)
+
+    async def main():
+        async with AsyncConverter(max_jobs=2) as service:
+            job = service.submit("pdf2md", pdf_path, out_path)
+            pages = [item async for item in job]
+            ok = await job
+            # 不落盘：结果以 bytes 返回
+            data = await service.convert_to_bytes("pdf2md", pdf_path)
+            return job, pages, ok, data
+
+    job, pages, ok, data = asyncio.run(main())
+    assert ok is True and job.status == OK
+    assert [i for i, _ in pages] == [0, 1, 2]
+    assert "Clause 2.1" in pages[1][1] and "Clause 3.1" not in pages[1][1]
+    assert os.path.exists(out_path) and b"Clause 3.12" in data
+
+def test_semaphore_limits_jobs_and_loop_stays_responsive():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "limit.pdf")
+    _make_pdf(pdf_path, 20)
+
+    async def main():
+        service = AsyncConverter(max_jobs=1)
+        peak, ticks = 0, 0
+        jobs = [service.submit("pdf2md", pdf_path, None, stream=False) for _ in range(3)]
+        while not all(job.done for job in jobs):
+            # 转换在线程池里跑，事件循环照常调度其他协程
+            peak = max(peak, service.running)
+            ticks += 1
+            await asyncio.sleep(0.005)
+        results = [await job for job in jobs]
+        service.shutdown()
+        return peak, ticks, results, service
+
+    peak, ticks, results, service = asyncio.run(main())
+    assert peak == 1 and ticks > 3
+    assert all(isinstance(r, bytes) for r in results)
+    assert service.running == 0 and service.queued == 0
+
+def test_cancelling_the_await_stops_the_conversion():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "cancel.pdf")
+    out_path = os.path.join(TMP_DIR, "cancel.md")
+    _make_pdf(pdf_path, 300)
+
+    async def main():
+        service = AsyncConverter(max_jobs=1)
+        running = service.submit("pdf2md", pdf_path, out_path)
+        queued = service.submit("pdf2md", pdf_path, None)
+        # 第一页出来就取消：转换器在下一页前停止，写出部分结果
+        async for _ in running:
+            running.cancel()
+            break
+        queued.cancel()
+        outcomes = []
+        for job in (running, queued):
+            try:
+                await job
+                outcomes.append("finished")
+            except asyncio.CancelledError:
+                outcomes.append("cancelled")
+        service.shutdown()
+        return running, queued, outcomes
+
+    running, queued, outcomes = asyncio.run(main())
+    assert outcomes == ["cancelled", "cancelled"]
+    assert running.status == CANCELLED and queued.status == CANCELLED
+    with open(out_path, encoding="utf-8") as f:
+        md = f.read()
+    assert "status:" in md and "/300" in md
+
+def test_process_executor():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "process.pdf")
+    _make_pdf(pdf_path, 2)
+
+    async def main():
+        async with AsyncConverter(max_jobs=1, use_processes=True) as service:
+            with open(pdf_path, "rb") as f:
+                job = service.submit("pdf2md", f.read(), None)
+            pages = [i async for i, _ in job]
+            return pages, await job
+
+    pages, data = asyncio.run(main())
+    assert pages == [0, 1] and b"Clause 2.12" in data
+
+def test_failed_conversion_returns_none_or_false():
+    async def main(use_processes):
+        async with AsyncConverter(max_jobs=1, use_processes=use_processes) as service:
+            data = await service.convert_to_bytes("pdf2md", b"not a pdf")
+            stream = io.BytesIO()
+            ok = await service.convert("pdf2md", b"not a pdf", stream)
+            job = service.submit("pdf2md", b"not a pdf", None, stream=False)
+            return data, ok, await job, job.status
+
+    for use_processes in (False, True):
+        data, ok, job_result, status = asyncio.run(main(use_processes))
+        # 同 registry.convert_to_bytes：失败返回 None (不是 b"")；写进流的转换失败返回 False
+        assert data is None and job_result is None, use_processes
+        assert ok is False and status == FAILED, use_processes
+
+if __name__ == "__main__":
+    test_pages_stream_and_result()
+    test_semaphore_limits_jobs_and_loop_stays_responsive()
+    test_cancelling_the_await_stops_the_conversion()
+    test_process_executor()
+    test_failed_conversion_returns_none_or_false()
+    print("✅ asyncio 接口测试通过")
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import tempfile
+import multiprocessing as mp
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from tools.benchmark import percentile, compare_with_baseline, wait_for_child
+from tools.synth_corpus import generate_corpus
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3.0], 90) == 3.0
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert abs(percentile([1, 2, 3, 4], 90) - 3.7) < 1e-9
+
+def test_baseline_regression():
+    baseline = {"results": {"pdf2md": {"pages_per_sec": 100.0, "latency_p90": 1.0}}}
+
+    # 吞吐下降 5%，在容忍范围内
+    ok, regressed = compare_with_baseline({"pdf2md": {"pages_per_sec": 95.0, "latency_p90": 1.0}}, baseline)
+    assert not regressed
+    assert not ok["pdf2md"]["pages_per_sec"]["regression"]
+
+    # 吞吐下降 30%，必须报退化
+    bad, regressed = compare_with_baseline({"pdf2md": {"pages_per_sec": 70.0, "latency_p90": 1.0}}, baseline)
+    assert regressed
+    assert bad["pdf2md"]["pages_per_sec"]["regression"]
+
+def test_docx_corpus_is_reproducible():
+    with tempfile.TemporaryDirectory() as tmp:
+        a = generate_corpus(os.path.join(tmp, "a"), [3], seed=7, kinds=["docx", "md"])
+        b = generate_corpus(os.path.join(tmp, "b"), [3], seed=7, kinds=["docx", "md"])
+        with open(a["md"][0]["path"], encoding="utf-8") as fa, open(b["md"][0]["path"], encoding="utf-8") as fb:
+            assert fa.read() == fb.read()
+        assert a["docx"][0]["pages"] == 3
+
+def test_wait_for_child_survives_crash_and_hang():
+    ctx = mp.get_context("spawn")
+    # 子进程没交结果就退出 (崩溃 / 被 OOM 杀掉)
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=os._exit, args=(3,))
+    proc.start()
+    assert wait_for_child(proc, result_queue, timeout=60, poll_sec=0.2) == {"error": "子进程异常退出 (exitcode=3)"}
+
+    # 子进程卡住：超时后终止
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=time.sleep, args=(60,))
+    proc.start()
+    t0 = time.perf_counter()
+    result = wait_for_child(proc, result_queue, timeout=1, poll_sec=0.2)
+    assert "超时" in result["error"] and time.perf_counter() - t0 < 30 and not proc.is_alive()
+
+if __name__ == "__main__":
+    test_percentile()
+    test_baseline_regression()
+    test_docx_corpus_is_reproducible()
+    test_wait_for_child_survives_crash_and_hang()
+    print("✅ benchmark 测试通过")
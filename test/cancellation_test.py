@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import shutil
+import threading
+from unittest import mock
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import fitz
+import frontmatter
+from core import registry
+from core.cancellation import CancelToken, ConversionCancelled, CANCELLED, TIMEOUT, OK, PAGE_TIMEOUT_SEC
+from core.ocr_pipeline import OcrPipeline
+from core.pdf_md import PdfMdConverter
+from core.checkpoint import PageCheckpoint
+
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+from ocr_base_test import FakeBackend
+
+TMP_DIR = make_tmp_dir("cancellation_test")
+
+class CountdownToken(CancelToken):
+    """ 前 n 次检查放行，之后视为已取消：不依赖计时，结果确定 """
+    def __init__(self, n, **kwargs):
+        super().__init__(**kwargs)
+        self.n = n
+
+    @property
+    def status(self):
+        self.n -= 1
+        return CANCELLED if self.n < 0 else None
+
+class CancellingBackend(FakeBackend):
+    """ 识别到第 cancel_at 页时，模拟用户点了"取消" """
+    def __init__(self, token, cancel_at, **kwargs):
+        super().__init__(skip_blank_pages=False, dedup_pages=False, crop_content=False, **kwargs)
+        self.token = token
+        self.cancel_at = cancel_at
+
+    def recognize(self, img_np, use_cls=None):
+        if self.calls + 1 == self.cancel_at:
+            self.token.cancel()
+        return super().recognize(img_np, use_cls)
+
+def _fresh_dir(name):
+    path = os.path.join(TMP_DIR, name)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+def _make_pdf(path, pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 400), f"Section {i} body text", fontsize=11)
+    doc.save(path)
+    doc.close()
+
+def test_ocr_cancel_keeps_partial_output_and_checkpoint():
+    work = _fresh_dir("ocr")
+    pdf_path = os.path.join(work, "scan.pdf")
+    out_path = os.path.join(work, "scan_ocr.html")
+    checkpoints = os.path.join(work, "checkpoints")
+    _make_pdf(pdf_path, 8)
+
+    token = CancelToken()
+    converter = CancellingBackend(token, cancel_at=3, checkpoint_dir=checkpoints)
+    assert converter.scanned_pdf_to_html(pdf_path, out_path, cancel=token) is False
+    assert converter.last_status == CANCELLED
+    # 取消后不再推理新页 (正在推理的那一页照常完成)
+    assert converter.calls == 3
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+    done = html.count("class='ocr-page'")
+    assert "已取消" in html and 1 <= done <= 3
+
+    # 已完成的页在检查点里，重跑只处理剩下的
+    saved = len(PageCheckpoint(checkpoints, pdf_path, "ocr", converter.checkpoint_signature()))
+    assert saved == done
+    resumed = CancellingBackend(CancelToken(), cancel_at=None, checkpoint_dir=checkpoints)
+    assert resumed.scanned_pdf_to_html(pdf_path, out_path) and resumed.last_status == OK
+    assert resumed.calls == 8 - saved
+
+def test_ocr_page_timeout_skips_inference():
+    work = _fresh_dir("ocr_page")
+    pdf_path = os.path.join(work, "scan.pdf")
+    out_path = os.path.join(work, "scan_ocr.html")
+    _make_pdf(pdf_path, 3)
+
+    converter = FakeBackend(skip_blank_pages=False, dedup_pages=False)
+    assert converter.scanned_pdf_to_html(pdf_path, out_path, cancel=CancelToken(page_timeout=1e-9))
+    assert converter.calls == 0 and converter.last_timed_out == [0, 1, 2]
+    with open(out_path, encoding="utf-8") as f:
+        assert f.read().count("本页处理超时") == 3
+
+def test_pdf_to_markdown_partial_result_and_page_timeout():
+    work = _fresh_dir("md")
+    pdf_path = os.path.join(work, "report.pdf")
+    out_path = os.path.join(work, "report.md")
+    _make_pdf(pdf_path, 6)
+
+    converter = PdfMdConverter()
+    assert converter.pdf_to_markdown(pdf_path, out_path, cancel=CountdownToken(3)) is False
+    assert converter.last_status == CANCELLED
+    with open(out_path, encoding="utf-8") as f:
+        post = frontmatter.load(f)
+    assert post["status"] == "已取消" and post["pages_done"] == "2/6"
+    assert "Section 1 body text" in post.content and "Section 2" not in post.content
+
+    # 单页超时：跳过表格检测，文字照常输出，不写检查点
+    checkpoints = os.path.join(work, "checkpoints")
+    slow = PdfMdConverter(checkpoint_dir=checkpoints)
+    assert slow.pdf_to_markdown(pdf_path, out_path, cancel=CancelToken(page_timeout=1e-9))
+    assert slow.last_timed_out == list(range(6))
+    with open(out_path, encoding="utf-8") as f:
+        assert "Section 5 body text" in f.read()
+    for name in os.listdir(checkpoints):
+        with open(os.path.join(checkpoints, name), encoding="utf-8") as f:
+            assert len(f.readlines()) == 1   # 只有表头
+
+def test_registry_passes_token_and_deadline():
+    work = _fresh_dir("registry")
+    pdf_path = os.path.join(work, "doc.pdf")
+    _make_pdf(pdf_path, 4)
+
+    converter = registry.create_converter("digital_pdf_compact")
+    out_path = os.path.join(work, "doc_compact.html")
+    assert registry.convert("digital_pdf_compact", pdf_path, out_path, converter=converter,
+                            cancel=CountdownToken(2)) is False
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+    assert converter.last_status == CANCELLED and html.count('<section class="page"') == 2
+    assert "仅包含前 2/4 页" in html
+
+    # 文档时限已过：不开始转换
+    expired = CancelToken(timeout=1e-6)
+    time.sleep(0.01)
+    converter = registry.create_converter("pdf2md")
+    assert registry.convert_to_bytes("pdf2md", open(pdf_path, "rb").read(), converter=converter, cancel=expired) is None
+    assert converter.last_status == TIMEOUT
+
+def test_pipeline_stops_promptly_when_cancelled():
+    token = CancelToken()
+
+    def produce(_):
+        for i in range(1000):
+            yield i
+
+    def slow(item):
+        time.sleep(0.05)
+        return item
+
+    pipeline = OcrPipeline([("produce", produce), ("slow", slow), ("sink", lambda item: None)], queue_size=2)
+    threading.Timer(0.2, token.cancel).start()
+    t0 = time.perf_counter()
+    try:
+        pipeline.run(None, cancel=token)
+        assert False, "应当被取消"
+    except ConversionCancelled as e:
+        assert e.status == CANCELLED
+    assert time.perf_counter() - t0 < 1.0
+
+def test_page_timeout_is_shared_and_scaled_per_mode():
+    with mock.patch.dict(os.environ):
+        os.environ.pop("DOC_AUDIT_PAGE_TIMEOUT", None)
+        assert registry.page_timeout("ocr") == PAGE_TIMEOUT_SEC
+        assert 0 < registry.page_timeout("pdf2md") < PAGE_TIMEOUT_SEC
+        # 整页一次性转换的模式不检查单页时限
+        assert registry.page_timeout("word") is None and registry.page_timeout("digital_pdf") is None
+
+        os.environ["DOC_AUDIT_PAGE_TIMEOUT"] = "60"
+        assert registry.page_timeout("ocr") == 60 and registry.page_timeout("pdf2md") == 15
+        os.environ["DOC_AUDIT_PAGE_TIMEOUT"] = "0"
+        assert registry.page_timeout("ocr") is None
+        os.environ["DOC_AUDIT_PAGE_TIMEOUT"] = "abc"
+        assert registry.page_timeout("ocr") == PAGE_TIMEOUT_SEC
+    assert registry.page_timeout("ocr", base=10) == 10
+
+if __name__ == "__main__":
+    test_ocr_cancel_keeps_partial_output_and_checkpoint()
+    test_ocr_page_timeout_skips_inference()
+    test_pdf_to_markdown_partial_result_and_page_timeout()
+    test_registry_passes_token_and_deadline()
+    test_pipeline_stops_promptly_when_cancelled()
+    test_page_timeout_is_shared_and_scaled_per_mode()
+    print("✅ 取消与超时测试通过")
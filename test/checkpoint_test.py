@@ -0,0 +1,171 @@
+import io
+import os
+import sys
+import time
+import shutil
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+from core.checkpoint import PageCheckpoint, prune_checkpoints
+from core.ocr_base import BaseOcrConverter
+from core.pdf_md import PdfMdConverter
+
+TMP_DIR = make_tmp_dir("checkpoint_test")
+
+class Crash(BaseException):
+    """ 模拟进程被杀 / 断电：不会被转换器的 except Exception 吞掉 """
+
+class TextBackend(BaseOcrConverter):
+    """ 假引擎：返回页面上最暗像素所在的行号，页面内容不同结果就不同 """
+    ENGINE_NAME = "Fake"
+
+    def __init__(self, crash_at=None, **kwargs):
+        super().__init__(renderer="fitz", skip_blank_pages=False, dedup_pages=False, crop_content=False, **kwargs)
+        self.ocr_engine = object()
+        self.calls = 0
+        self.crash_at = crash_at
+
+    def recognize(self, img_np, use_cls=None):
+        self.calls += 1
+        if self.calls == self.crash_at:
+            raise Crash()
+        rows = (img_np.min(axis=2) < 128).any(axis=1).nonzero()[0]
+        return [f"墨迹行 {rows[0]}-{rows[-1]}"]
+
+    def parse_result(self, result):
+        return result
+
+def _fresh_dir(name):
+    path = os.path.join(TMP_DIR, name)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+def _make_pdf(path, offsets):
+    """ 每页在不同高度写一行字 (offsets 决定每页内容) """
+    doc = fitz.open()
+    for y in offsets:
+        doc.new_page(width=300, height=400).insert_text((40, y), f"Clause at {y}", fontsize=14)
+    doc.save(path)
+    doc.close()
+
+def test_checkpoint_roundtrip_signature_and_torn_write():
+    work = _fresh_dir("unit")
+    cp = PageCheckpoint(work, "/any/dir/contract.pdf", "ocr", {"engine": "a"})
+    cp.record(0, "fp0", ["第一页"])
+    cp.record(1, "fp1", ["第二页"])
+    cp.close()
+    # 中途崩溃可能留下写了一半的行
+    with open(cp.path, "a", encoding="utf-8") as f:
+        f.write('{"page": 2, "fp": "fp2", "res')
+
+    again = PageCheckpoint(work, "/any/dir/contract.pdf", "ocr", {"engine": "a"})
+    assert len(again) == 2 and again.get("fp1") == ["第二页"] and again.get("fp2") is None
+    # 另一个目录里的同名合同是另一份文档
+    assert len(PageCheckpoint(work, "/other/dir/contract.pdf", "ocr", {"engine": "a"})) == 0
+    # 换了引擎参数：旧结果作废
+    assert len(PageCheckpoint(work, "/any/dir/contract.pdf", "ocr", {"engine": "b"})) == 0
+
+    # 成功结束后只保留本次文档用到的页；重写不留临时文件
+    again.record(0, "fp1", ["第二页"])
+    again.finish()
+    assert len(PageCheckpoint(work, "/any/dir/contract.pdf", "ocr", {"engine": "a"})) == 1
+    assert not [n for n in os.listdir(work) if n.endswith(".tmp")]
+
+def test_in_memory_sources_are_keyed_by_content_and_pruned():
+    work = _fresh_dir("memory")
+    upload = io.BytesIO(b"%PDF v3")
+    upload.name = "合同.pdf"
+    upload.seek(3)
+    cp = PageCheckpoint(work, upload, "ocr")
+    assert upload.tell() == 3
+    cp.record(0, "fp0", ["甲"])
+    cp.close()
+    assert len(PageCheckpoint(work, b"%PDF v3", "ocr")) == 0   # 没有文件名
+    other = io.BytesIO(b"%PDF another contract")
+    other.name = "合同.pdf"
+    assert len(PageCheckpoint(work, other, "ocr")) == 0
+    same = io.BytesIO(b"%PDF v3")
+    same.name = "合同.pdf"
+    assert len(PageCheckpoint(work, same, "ocr")) == 1
+
+    # 过期的检查点与崩溃残留的临时文件被清理
+    stale = os.path.join(work, "ocr_stale.jsonl.abc.tmp")
+    open(stale, "w").close()
+    old = time.time() - 40 * 86400
+    os.utime(stale, (old, old))
+    os.utime(cp.path, (old, old))
+    assert prune_checkpoints(work) == 2 and not os.listdir(work)
+
+def test_ocr_resumes_after_crash_and_redoes_only_changed_pages():
+    work = _fresh_dir("ocr")
+    pdf_path = os.path.join(work, "scan.pdf")
+    out_path = os.path.join(work, "scan_ocr.html")
+    checkpoints = os.path.join(work, "checkpoints")
+    _make_pdf(pdf_path, [60, 100, 140, 180, 220])
+
+    # 第 4 次推理时"崩溃"
+    crashing = TextBackend(crash_at=4, checkpoint_dir=checkpoints)
+    try:
+        crashing.scanned_pdf_to_html(pdf_path, out_path)
+        assert False, "应当中断"
+    except Crash:
+        pass
+    saved = len(PageCheckpoint(checkpoints, pdf_path, "ocr", crashing.checkpoint_signature()))
+    assert 1 <= saved <= 3
+
+    # 续跑：已完成的页不再推理，输出与一次跑完完全一致
+    resumed = TextBackend(checkpoint_dir=checkpoints)
+    assert resumed.scanned_pdf_to_html(pdf_path, out_path)
+    assert resumed.calls == 5 - saved and len(resumed.last_reused) == saved
+    with open(out_path, encoding="utf-8") as f:
+        resumed_html = f.read()
+    reference_path = os.path.join(work, "reference.html")
+    assert TextBackend().scanned_pdf_to_html(pdf_path, reference_path)
+    with open(reference_path, encoding="utf-8") as f:
+        assert f.read() == resumed_html
+
+    # 改版：第 2 页内容变化、末尾插入一页 -> 只处理这两页
+    _make_pdf(pdf_path, [60, 300, 140, 180, 220, 260])
+    revised = TextBackend(checkpoint_dir=checkpoints)
+    assert revised.scanned_pdf_to_html(pdf_path, out_path)
+    assert revised.calls == 2 and revised.last_reused == [0, 2, 3, 4]
+
+def test_pdf_to_markdown_reuses_unchanged_pages():
+    work = _fresh_dir("md")
+    pdf_path = os.path.join(work, "report.pdf")
+    checkpoints = os.path.join(work, "checkpoints")
+
+    def build(texts):
+        doc = fitz.open()
+        for text in texts:
+            doc.new_page().insert_text((72, 400), text, fontsize=11)
+        doc.save(pdf_path)
+        doc.close()
+
+    build([f"Section {i} body text" for i in range(6)])
+    first = PdfMdConverter(checkpoint_dir=checkpoints)
+    assert first.pdf_to_markdown(pdf_path, os.path.join(work, "a.md")) and first.last_reused == 0
+
+    build([f"Section {i} body text" if i != 3 else "Section 3 amended" for i in range(6)])
+    second = PdfMdConverter(checkpoint_dir=checkpoints)
+    out_path = os.path.join(work, "b.md")
+    assert second.pdf_to_markdown(pdf_path, out_path) and second.last_reused == 5
+
+    fresh_path = os.path.join(work, "fresh.md")
+    assert PdfMdConverter().pdf_to_markdown(pdf_path, fresh_path)
+    with open(out_path, encoding="utf-8") as a, open(fresh_path, encoding="utf-8") as b:
+        assert a.read() == b.read()
+
+if __name__ == "__main__":
+    test_checkpoint_roundtrip_signature_and_torn_write()
+    test_in_memory_sources_are_keyed_by_content_and_pruned()
+    test_ocr_resumes_after_crash_and_redoes_only_changed_pages()
+    test_pdf_to_markdown_reuses_unchanged_pages()
+    print("✅ 检查点测试通过")
@@ -0,0 +1,150 @@
+import os
+import sys
+from unittest import mock
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import fitz
+from core import registry
+from core.cancellation import OK
+from core.doc_diff import DocDiffer, diff_versions, chunk_lines, page_fingerprint, line_fingerprint, diff_task
+from core.scheduler import ConversionScheduler, AdmissionRejected
+
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+from ocr_base_test import FakeBackend
+
+TMP_DIR = make_tmp_dir("doc_diff_test")
+
+WORDS = ["交付货物", "支付货款", "质量保证", "到货验收", "违约责任", "开具发票", "冷链运输", "批次检验", "争议解决"]
+
+def _pages(n, lines=20):
+    """ 每页文字不同 (各页同一位置相似的行会被 pdf2md 当成页眉页脚去掉) """
+    return [[f"第{p + 1}.{i + 1}条 乙方应按期{WORDS[(p * 5 + i) % len(WORDS)] * (1 + (p + i) % 3)}" for i in range(lines)]
+            for p in range(n)]
+
+def _make_pdf(path, pages):
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for j, line in enumerate(lines):
+            page.insert_text((50, 60 + j * 24), line, fontname="china-s", fontsize=11)
+    doc.save(path)
+    doc.close()
+
+def test_fingerprints_ignore_layout_whitespace():
+    assert line_fingerprint("甲方  应于\t五日内") == line_fingerprint(" 甲方 应于 五日内 ")
+    fps = [line_fingerprint(s) for s in ("甲", "乙")]
+    assert page_fingerprint(fps) != page_fingerprint(fps[::-1])
+
+def test_unchanged_pages_are_skipped():
+    old = _pages(200)
+    new = [list(p) for p in old]
+    new[10][5] = new[10][5].replace("按期", "按时")
+    new.insert(50, ["新增页 补充条款"])
+    del new[150]
+    new[180].append("新增一行：质保期两年")
+
+    result = diff_versions(old, new)
+    assert result["old_pages"] == 200 and result["new_pages"] == 200
+    assert result["unchanged_pages"] == 197
+    spans = [(h["old"], h["new"]) for h in result["hunks"]]
+    assert spans == [((10, 11), (10, 11)), ((50, 50), (50, 51)), ((149, 150), (150, 150)), ((180, 181), (180, 181))]
+    changed = result["hunks"][0]["lines"]
+    assert len(changed) == 1 and changed[0]["op"] == "replace"
+    assert "<del>期</del>" in changed[0]["old"] and "<ins>时</ins>" in changed[0]["new"]
+    assert result["added"] == 2 and result["removed"] == 20 and result["changed"] == 1
+
+def test_content_defined_chunks_survive_insertions():
+    lines = [line for page in _pages(30) for line in page]
+    chunks = chunk_lines(lines)
+    edited = chunk_lines(lines[:300] + ["插入的一段文字"] + lines[300:])
+    # 只有插入处所在的块变了，其余块 (包括后面的) 原样对齐
+    assert len(set(map(tuple, chunks)) - set(map(tuple, edited))) == 1
+    result = diff_versions(chunks, edited)
+    assert len(result["hunks"]) == 1 and result["added"] == 1
+
+def test_compare_pdfs_and_markdown():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    old_pdf, new_pdf = os.path.join(TMP_DIR, "v3.pdf"), os.path.join(TMP_DIR, "v4.pdf")
+    old = _pages(6, lines=12)
+    new = [list(p) for p in old]
+    new[3][2] = new[3][2].replace("按期", "按期全部")
+    _make_pdf(old_pdf, old)
+    _make_pdf(new_pdf, new)
+
+    differ = DocDiffer()
+    assert differ.detect_kind(old_pdf) == "pdf"
+    out_path = os.path.join(TMP_DIR, "report.html")
+    assert differ.compare(old_pdf, new_pdf, out_path)
+    assert differ.last_result["unchanged_pages"] == 5
+    with open(out_path, encoding="utf-8") as f:
+        report = f.read()
+    assert "旧版 第 4 页 ↔ 新版 第 4 页" in report and "<ins>全部</ins>" in report
+
+    # 内存输入没有扩展名时指定 kind
+    md_differ = DocDiffer(kind="md")
+    old_md = "\n".join(line for page in old for line in page).encode("utf-8")
+    assert md_differ.compare(old_md, old_md, os.path.join(TMP_DIR, "same.html"))
+    assert md_differ.last_result["hunks"] == []
+
+def test_scanned_pdf_uses_ocr_lines():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    scan_path = os.path.join(TMP_DIR, "scan.pdf")
+    doc = fitz.open()
+    for _ in range(2):
+        doc.new_page(width=200, height=200)
+    doc.save(scan_path)
+    doc.close()
+
+    differ = DocDiffer(ocr_converter=FakeBackend(skip_blank_pages=False, dedup_pages=False))
+    assert differ.detect_kind(scan_path) == "ocr"
+    pages = differ.extract_pages(scan_path)
+    assert pages == [["第 1 页", "第二行 冻干"], ["第 2 页", "第二行 冻干"]]
+    try:
+        DocDiffer(kind="html")
+        assert False, "未知 kind 应抛出 ValueError"
+    except ValueError:
+        pass
+
+def test_diff_runs_in_scheduler_with_cached_ocr_engine():
+    scan_path = os.path.join(TMP_DIR, "sched_scan.pdf")
+    doc = fitz.open()
+    doc.new_page(width=200, height=200)
+    doc.save(scan_path)
+    doc.close()
+
+    created = []
+    def create(mode, **options):
+        created.append(mode)
+        return FakeBackend(skip_blank_pages=False, dedup_pages=False)
+
+    scheduler = ConversionScheduler(workers=1, per_user=1)
+    try:
+        with mock.patch.object(registry, "create_converter", create):
+            for _ in range(2):
+                job = scheduler.submit_task("u1", "diff", diff_task(scan_path, scan_path, "ocr"))
+                # 比对与转换共用准入控制
+                try:
+                    scheduler.submit_task("u1", "diff", diff_task(scan_path, scan_path, "ocr"))
+                    assert False, "超出个人上限应被拒绝"
+                except AdmissionRejected:
+                    pass
+                assert job.wait(30) and job.status == OK
+                assert job.result["summary"]["old_pages"] == 1 and job.result["report"].startswith(b"<")
+        # 第二次比对复用工作线程里的 OCR 引擎，不再新建
+        assert created == ["ocr"]
+    finally:
+        scheduler.shutdown()
+
+if __name__ == "__main__":
+    test_fingerprints_ignore_layout_whitespace()
+    test_unchanged_pages_are_skipped()
+    test_content_defined_chunks_survive_insertions()
+    test_compare_pdfs_and_markdown()
+    test_scanned_pdf_uses_ocr_lines()
+    test_diff_runs_in_scheduler_with_cached_ocr_engine()
+    print("✅ 版本比对测试通过")
@@ -0,0 +1,99 @@
+import io
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import fitz
+from core import registry
+from core.doc_io import source_name, write_output
+from core.pdf_md import PdfMdConverter
+from core.word_pdf_html import DocToHtmlConverter
+from core.search_index import SearchIndex
+from tools.synth_corpus import write_docx
+
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+from ocr_base_test import FakeBackend
+
+TMP_DIR = make_tmp_dir("doc_io_test")
+
+class Upload(io.BytesIO):
+    """ 模拟 Streamlit 的 UploadedFile：BytesIO + name """
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+def _pdf_bytes():
+    doc = fitz.open()
+    for i in range(3):
+        doc.new_page().insert_text((72, 400), f"Section {i} of the supply contract", fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def _read(path, mode="r"):
+    with open(path, mode, **({"encoding": "utf-8"} if mode == "r" else {})) as f:
+        return f.read()
+
+def test_pdf_converters_accept_bytes_and_streams():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    data = _pdf_bytes()
+    pdf_path = os.path.join(TMP_DIR, "contract.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(data)
+
+    # Markdown：文件名相同时，内存版与路径版输出逐字节一致
+    md_path = os.path.join(TMP_DIR, "contract.md")
+    assert PdfMdConverter().pdf_to_markdown(pdf_path, md_path)
+    out = io.BytesIO()
+    assert PdfMdConverter().pdf_to_markdown(Upload(data, "contract.pdf"), out)
+    assert out.getvalue() == _read(md_path, "rb")
+
+    # 数字 PDF -> HTML：bytes 输入，文本流输出
+    text_out = io.StringIO()
+    assert DocToHtmlConverter().pdf_to_html(data, text_out)
+    assert "Section 2 of the supply contract" in text_out.getvalue()
+
+def test_word_and_registry_in_memory():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    docx_path = os.path.join(TMP_DIR, "memo.docx")
+    write_docx(docx_path, 2)
+    html_path = os.path.join(TMP_DIR, "memo_word.html")
+    assert DocToHtmlConverter().word_to_html(docx_path, html_path)
+
+    with open(docx_path, "rb") as f:
+        result = registry.convert_to_bytes("word", Upload(f.read(), "memo.docx"))
+    assert result.decode("utf-8") == _read(html_path)
+    assert registry.convert_to_bytes("pdf2md", b"not a pdf") is None
+
+def test_ocr_and_index_from_memory():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    index_path = os.path.join(TMP_DIR, "index.sqlite")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    converter = FakeBackend(skip_blank_pages=False, dedup_pages=False, search_index=index_path)
+    out = io.BytesIO()
+    assert converter.scanned_pdf_to_html(Upload(_pdf_bytes(), "scan.pdf"), out)
+    assert out.getvalue().decode("utf-8").count("class='ocr-page'") == 3
+
+    # 内存输入以文件名入库，没有输出文件
+    hits = SearchIndex(index_path).search("冻干")
+    assert {(h["path"], h["output_path"]) for h in hits} == {("scan.pdf", None)}
+
+def test_helpers():
+    assert source_name(b"raw", "fallback.pdf") == "fallback.pdf"
+    assert source_name(os.path.join("a", "b.pdf")) == "b.pdf"
+    buffer = io.BytesIO()
+    write_output(buffer, "中文")
+    assert buffer.getvalue() == "中文".encode("utf-8")
+
+if __name__ == "__main__":
+    test_pdf_converters_accept_bytes_and_streams()
+    test_word_and_registry_in_memory()
+    test_ocr_and_index_from_memory()
+    test_helpers()
+    print("✅ 内存输入输出测试通过")
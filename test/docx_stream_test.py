@@ -0,0 +1,148 @@
+import io
+import os
+import sys
+import zipfile
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+from core import registry
+from core.cancellation import CancelToken, CANCELLED
+from core.docx_stream import iter_docx_html
+from core.word_pdf_html import DocToHtmlConverter
+from tools.synth_corpus import write_docx
+
+TMP_DIR = make_tmp_dir("docx_stream_test")
+
+_NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+       'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+       'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"')
+
+STYLES = f"""<w:styles {_NS}>
+<w:style w:type="paragraph" w:styleId="1"><w:name w:val="heading 1"/></w:style>
+<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/></w:style>
+</w:styles>"""
+
+NUMBERING = f"""<w:numbering {_NS}>
+<w:abstractNum w:abstractNumId="0"><w:lvl w:ilvl="0"><w:numFmt w:val="bullet"/></w:lvl></w:abstractNum>
+<w:abstractNum w:abstractNumId="1"><w:lvl w:ilvl="0"><w:numFmt w:val="decimal"/></w:lvl></w:abstractNum>
+<w:num w:numId="1"><w:abstractNumId w:val="0"/></w:num>
+<w:num w:numId="2"><w:abstractNumId w:val="1"/></w:num>
+</w:numbering>"""
+
+RELS = """<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId7" Type="image" Target="media/image1.png"/>
+<Relationship Id="rId8" Type="hyperlink" Target="https://example.com/?a=1&amp;b=2" TargetMode="External"/>
+</Relationships>"""
+
+def _p(inner, ppr=""):
+    return f"<w:p><w:pPr>{ppr}</w:pPr>{inner}</w:p>"
+
+def _r(text, rpr=""):
+    return f'<w:r><w:rPr>{rpr}</w:rPr><w:t xml:space="preserve">{text}</w:t></w:r>'
+
+def _li(text, num_id):
+    return _p(_r(text), f'<w:numPr><w:ilvl w:val="0"/><w:numId w:val="{num_id}"/></w:numPr>')
+
+BODY = "".join([
+    _p(_r("招标文件"), '<w:pStyle w:val="Title"/>'),
+    _p(_r("第一章 总则"), '<w:pStyle w:val="1"/>'),
+    _p(_r("投标人须") + _r("严格", "<w:b/>") + _r("遵守 &lt;规定&gt;") + _r("删掉", "")
+       .replace("<w:r>", "<w:del><w:r>").replace("</w:r>", "</w:r></w:del>").replace("w:t ", "w:delText ")
+       .replace("</w:t>", "</w:delText>")),
+    _p(_r("见", "") + '<w:hyperlink r:id="rId8">' + _r("官网") + "</w:hyperlink>"),
+    _li("资格证明", 1), _li("报价单", 1), _li("第一步", 2),
+    _p(_r("二级条款"), '<w:outlineLvl w:val="1"/>'),
+    _p('<w:r><w:drawing><a:blip r:embed="rId7"/></w:drawing></w:r>'),
+    "<w:tbl><w:tblPr/>"
+    '<w:tr><w:trPr><w:tblHeader/></w:trPr><w:tc>' + _p(_r("品名")) + '</w:tc><w:tc>' + _p(_r("数量")) + "</w:tc></w:tr>"
+    '<w:tr><w:tc><w:tcPr><w:vMerge w:val="restart"/></w:tcPr>' + _p(_r("疫苗")) + "</w:tc><w:tc>" + _p(_r("10")) + "</w:tc></w:tr>"
+    '<w:tr><w:tc><w:tcPr><w:vMerge/></w:tcPr>' + _p("") + "</w:tc><w:tc>" + _p(_r("20")) + _p(_r("备注")) + "</w:tc></w:tr>"
+    '<w:sdt><w:sdtContent><w:tr><w:tc><w:tcPr><w:gridSpan w:val="2"/></w:tcPr>' + _p(_r("合计 30")) + "</w:tc></w:tr></w:sdtContent></w:sdt>"
+    "</w:tbl>",
+    _p(_r("结束语")),
+    "<w:sectPr/>",
+])
+
+def _make_docx(path):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", f'<?xml version="1.0" encoding="UTF-8"?><w:document {_NS}><w:body>{BODY}</w:body></w:document>')
+        zf.writestr("word/styles.xml", STYLES)
+        zf.writestr("word/numbering.xml", NUMBERING)
+        zf.writestr("word/_rels/document.xml.rels", RELS)
+        zf.writestr("word/media/image1.png", b"\x89PNG fake")
+    return path
+
+def test_blocks_render_semantic_html():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = _make_docx(os.path.join(TMP_DIR, "rich.docx"))
+    fragments = list(iter_docx_html(path))
+    body = "".join(h for h, _ in fragments)
+    assert "<h1>招标文件</h1>" in body and "<h1>第一章 总则</h1>" in body and "<h2>二级条款</h2>" in body
+    assert "<p>投标人须<strong>严格</strong>遵守 &lt;规定&gt;</p>" in body and "删掉" not in body
+    assert '<a href="https://example.com/?a=1&amp;b=2">官网</a>' in body
+    assert "<ul><li>资格证明</li>\n<li>报价单</li>\n</ul><ol><li>第一步</li>\n</ol><h2>" in body
+    # 图片默认跳过
+    assert "<img" not in body
+    # 表头行、纵向合并的续行留空、单元格多段落、内容控件里的行
+    assert "<tr><th>品名</th><th>数量</th></tr>" in body
+    assert "<tr><td></td><td><p>20</p>\n<p>备注</p></td></tr>" in body
+    assert '<tr><td colspan="2">合计 30</td></tr>\n</table>' in body
+    assert body.rstrip().endswith("<p>结束语</p>")
+    texts = [t for _, t in fragments if t]
+    assert "疫苗\t10" in texts and "投标人须严格遵守 <规定>" in texts
+
+def test_external_images():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = _make_docx(os.path.join(TMP_DIR, "images.docx"))
+    out_path = os.path.join(TMP_DIR, "images.html")
+    assert DocToHtmlConverter(word_html_mode="stream", images="external").word_to_html(path, out_path)
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+    assert '<img src="images_files/rId7-image1.png"' in html
+    assert os.path.exists(os.path.join(TMP_DIR, "images_files", "rId7-image1.png"))
+
+def test_registry_mode_matches_mammoth_text():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = write_docx(os.path.join(TMP_DIR, "synth.docx"), 3)
+    fast = registry.convert_to_bytes("word_fast", path).decode("utf-8")
+    full = registry.convert_to_bytes("word", path).decode("utf-8")
+    # 结构与文字同 mammoth (mammoth 单元格里多套一层 <p>)
+    for tag in ("<h1>", "<h2>", "<table>", "<tr>", "国药控股", "。"):
+        assert fast.count(tag) == full.count(tag), tag
+    try:
+        DocToHtmlConverter(word_html_mode="sax")
+        assert False, "未知 word_html_mode 应抛出 ValueError"
+    except ValueError:
+        pass
+
+def test_cancel_keeps_written_part():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = write_docx(os.path.join(TMP_DIR, "cancel.docx"), 50)
+    token = CancelToken()
+    writes = []
+
+    class Output(io.StringIO):
+        def write(self, text):
+            writes.append(text)
+            if len(writes) == 20:
+                token.cancel()
+            return super().write(text)
+
+    output = Output()
+    converter = DocToHtmlConverter(word_html_mode="stream")
+    assert converter.word_to_html(path, output, cancel=token) is False
+    assert converter.last_status == CANCELLED
+    html = output.getvalue()
+    assert "仅包含前 19 个段落 / 表格行" in html and html.rstrip().endswith("</html>")
+
+if __name__ == "__main__":
+    test_blocks_render_semantic_html()
+    test_external_images()
+    test_registry_mode_matches_mammoth_text()
+    test_cancel_keeps_written_part()
+    print("✅ Word 流式转换测试通过")
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+import numpy as np
+from core.ocr_base import BaseOcrConverter
+from core.ocr_result import OcrPage
+from core import ocr_calibration, registry
+from tools.calibrate_ocr import candidate_configs, pick_best
+
+TMP_DIR = make_tmp_dir("ocr_base_test")
+
+class FakeBackend(BaseOcrConverter):
+    """ 假引擎：每页返回乱序的 (y, 文本)，验证公共驱动循环只依赖 recognize / parse_result """
+    ENGINE_NAME = "Fake"
+
+    def __init__(self, **kwargs):
+        super().__init__(renderer="fitz", **kwargs)
+        self.ocr_engine = object()
+        self.calls = 0
+
+    def recognize(self, img_np, use_cls=None):
+        self.calls += 1
+        return [(200, "第二行 冻于"), (100, f"第 {self.calls} 页"), (300, "1")]
+
+    def parse_result(self, result):
+        return [text for _, text in sorted(result)]
+
+def _make_pdf(path, pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=200, height=200)
+    doc.save(path)
+    doc.close()
+
+def test_shared_driver_runs_any_backend():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "blank.pdf")
+    out_path = os.path.join(TMP_DIR, "blank_ocr.html")
+    _make_pdf(pdf_path, 3)
+
+    # 页面是空白的，这里关掉空白 / 重复页跳过，只验证驱动循环本身
+    converter = FakeBackend(skip_blank_pages=False, dedup_pages=False)
+    assert converter.scanned_pdf_to_html(pdf_path, out_path)
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+
+    assert html.count("class='ocr-page'") == 3
+    # 排序 + 噪点过滤 + 关键词矫正都由基类完成；单独的 "1" 默认当噪点去掉
+    assert html.index("第 1 页") < html.index("第二行 冻干")
+    assert "冻于" not in html and "<p>1</p>" not in html
+    assert [s["items"] for s in converter.last_stats] == [3, 3, 3, 3]
+
+    # 关掉 drop_lone_symbols 后保留 (例如表格里单独的数字)
+    keep = FakeBackend(skip_blank_pages=False, dedup_pages=False, drop_lone_symbols=False)
+    assert keep.scanned_pdf_to_html(pdf_path, out_path)
+    with open(out_path, encoding="utf-8") as f:
+        assert "<p>1</p>" in f.read()
+
+def test_blank_and_duplicate_pages_skip_inference():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "packet.pdf")
+    out_path = os.path.join(TMP_DIR, "packet_ocr.html")
+    doc = fitz.open()
+    for text in ["Cover Sheet", None, "Terms page", "Cover Sheet", None]:
+        page = doc.new_page(width=300, height=400)
+        if text:
+            for j in range(6):
+                page.insert_text((30, 60 + j * 30), f"{text} line {j}", fontsize=14)
+    doc.save(pdf_path)
+    doc.close()
+
+    converter = FakeBackend()
+    assert converter.scanned_pdf_to_html(pdf_path, out_path)
+    # 5 页里只有 2 页真正做了推理
+    assert converter.calls == 2
+    assert converter.last_skipped == {"blank": [1, 4], "duplicate": {3: 0}}
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+    assert html.count("class='ocr-page'") == 5
+    assert html.count("[本页无文字]") == 2
+    # 重复页复用第 1 页的结果
+    assert html.count("第 1 页") == 2
+
+class ScalingBackend(FakeBackend):
+    """ 模拟会把整页缩小一半的引擎：返回内容框左上角在送入图像中的坐标 """
+    def engine_scale(self, page_shape):
+        return 0.5
+
+    def recognize(self, img_np, use_cls=None):
+        self.calls += 1
+        self.shapes.append(img_np.shape)
+        rows = np.flatnonzero((img_np.min(axis=2) < 128).any(axis=1))
+        cols = np.flatnonzero((img_np.min(axis=2) < 128).any(axis=0))
+        return [(int(rows[0]), int(cols[0]), "首行")]
+
+    def parse_result(self, result):
+        return OcrPage.from_boxes([[(x, y), (x + 40, y), (x + 40, y + 20), (x, y + 20)] for y, x, _ in result],
+                                  [text for _, _, text in result], [0.9] * len(result))
+
+    def post_process(self, page):
+        self.pages.append(page)
+        return super().post_process(page)
+
+def test_cropped_pages_map_back_to_page_coordinates():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "cropped.pdf")
+    out_path = os.path.join(TMP_DIR, "cropped_ocr.html")
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=400)
+    page.draw_rect(fitz.Rect(100, 150, 200, 250), color=(0, 0, 0), fill=(0, 0, 0))
+    doc.save(pdf_path)
+    doc.close()
+
+    converter = ScalingBackend(skip_blank_pages=False)
+    converter.shapes, converter.pages = [], []
+    assert converter.scanned_pdf_to_html(pdf_path, out_path)
+
+    # 300 DPI 下整页 1250x1667，送进引擎的是裁剪后再缩小一半的内容区域
+    full_h = 1667
+    h, w = converter.shapes[0][:2]
+    assert h < full_h * 0.5 * 0.5 and w < 1250 * 0.5 * 0.5
+    stats = converter.last_page_stats[0]
+    assert stats["crop_ratio"] > 0.8 and stats["infer_sec"] is not None
+    # 黑块左上角 (100pt, 150pt) -> (417px, 625px)，框坐标换算回整页后误差在缩放取整范围内
+    x, y = converter.pages[0].polys[0, 0]
+    assert abs(x - 417) <= 3 and abs(y - 625) <= 3
+
+class OrientationBackend(FakeBackend):
+    """ 记录每页送进引擎的图像形状和逐行方向分类开关 """
+    def recognize(self, img_np, use_cls=None):
+        self.seen.append((img_np.shape[:2], use_cls))
+        return super().recognize(img_np, use_cls)
+
+def test_rotated_pages_are_turned_upright_once():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "rotated.pdf")
+    out_path = os.path.join(TMP_DIR, "rotated_ocr.html")
+    doc = fitz.open()
+    for rotation in (0, 90, 180):
+        page = doc.new_page(width=300, height=400)
+        for j, words in enumerate([9, 6, 9, 3, 9, 5]):
+            indent = 20 if j in (0, 2, 4) else 0
+            page.insert_text((30 + indent, 60 + j * 30), " ".join(["clause"] * words)[:40 - indent // 5], fontsize=11)
+        page.set_rotation(rotation)
+    doc.save(pdf_path)
+    doc.close()
+
+    converter = OrientationBackend(dedup_pages=False, crop_content=False)
+    converter.seen = []
+    assert converter.scanned_pdf_to_html(pdf_path, out_path)
+    # 横放的页整页转回竖版；三页方向都明确，引擎不再逐行做方向分类
+    assert converter.last_rotated == {1: 90, 2: 180}
+    assert all(h > w and use_cls is False for (h, w), use_cls in converter.seen)
+    assert [p["rotation"] for p in converter.last_page_stats] == [0, 90, 180]
+
+    # 关掉方向检测时按档位处理
+    converter = OrientationBackend(dedup_pages=False, auto_rotate=False)
+    converter.seen = []
+    assert converter.scanned_pdf_to_html(pdf_path, out_path)
+    assert converter.last_rotated == {} and [c for _, c in converter.seen] == [None] * 3
+
+def test_unavailable_backend_fails_cleanly():
+    converter = FakeBackend()
+    converter.ocr_engine = None
+    assert converter.scanned_pdf_to_html("missing.pdf", "out.html") is False
+
+def test_pick_best_respects_accuracy_and_memory():
+    results = [
+        {"label": "slow", "pages_per_sec": 1.0, "peak_rss_mb": 500, "texts": ["冻干甲型流感"]},
+        {"label": "fast_wrong", "pages_per_sec": 5.0, "peak_rss_mb": 400, "texts": ["冻于甲型流感"]},
+        {"label": "fast_fat", "pages_per_sec": 3.0, "peak_rss_mb": 4000, "texts": ["冻干甲型流感"]},
+        {"label": "ok", "pages_per_sec": 2.0, "peak_rss_mb": 600, "texts": ["冻干甲型流感"]},
+        {"label": "broken", "error": "未安装"},
+    ]
+    best = pick_best(results, max_cer=0.05, max_memory_mb=1000)
+    assert best["label"] == "ok"
+    assert results[1]["acceptable"] is False and results[2]["acceptable"] is False
+
+    assert pick_best([{"label": "broken", "error": "未安装"}]) is None
+    labels = [c["label"] for c in candidate_configs(cpu_count=4)]
+    assert labels[0] == "rapidocr intra=4" and any("mkldnn=on" in label for label in labels)
+
+    # 没有标准答案时每个后端只和自己的默认配置比，另一个引擎的写法不同不算错
+    results = [
+        {"backend": "rapid", "label": "rapid default", "pages_per_sec": 1.0, "peak_rss_mb": 1, "texts": ["冻干 甲型"]},
+        {"backend": "paddle", "label": "paddle default", "pages_per_sec": 2.0, "peak_rss_mb": 1, "texts": ["冻干甲型"]},
+        {"backend": "paddle", "label": "paddle mkldnn", "pages_per_sec": 3.0, "peak_rss_mb": 1, "texts": ["冻于甲型"]},
+    ]
+    assert pick_best(results, max_cer=0.05)["label"] == "paddle default"
+    assert [r["cer"] for r in results[:2]] == [0.0, 0.0] and results[2]["acceptable"] is False
+
+def test_calibrated_threads_respect_concurrent_engines():
+    options = {"ort_options": {"intra_op_num_threads": 16}, "cpu_threads": 16, "rec_batch_num": 16}
+    cpu_count = os.cpu_count() or 1
+    fitted = registry._fit_calibrated_threads(options, 1)
+    assert fitted["ort_options"]["intra_op_num_threads"] == min(16, cpu_count)
+    fitted = registry._fit_calibrated_threads(options, 1000)
+    assert fitted["ort_options"]["intra_op_num_threads"] == 1 and fitted["cpu_threads"] == 1
+    assert fitted["rec_batch_num"] == 16 and options["ort_options"]["intra_op_num_threads"] == 16
+
+def test_calibration_roundtrip_and_registry_order():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = os.path.join(TMP_DIR, "ocr_calibration.json")
+    choice = {"backend": "core.ocr_pdf_html.OcrConverter", "label": "paddleocr mkldnn=on batch=16",
+              "options": {"enable_mkldnn": True, "rec_batch_num": 16}}
+    ocr_calibration.save_calibration(choice, path=path)
+
+    data = ocr_calibration.load_calibration(path)
+    assert data["options"] == {"enable_mkldnn": True, "rec_batch_num": 16}
+    # 校准选中的后端排在最前
+    order = [c[1] for c in registry._ordered_candidates("ocr", data)]
+    assert order == ["OcrConverter", "RapidOcrConverter"]
+    assert [c[1] for c in registry._ordered_candidates("ocr")] == ["RapidOcrConverter", "OcrConverter"]
+
+    # 换了机器的校准结果不生效
+    data["machine"]["cpu_count"] = -1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert ocr_calibration.load_calibration(path) is None
+    ocr_calibration.clear_calibration(path)
+    assert not os.path.exists(path)
+
+if __name__ == "__main__":
+    test_shared_driver_runs_any_backend()
+    test_blank_and_duplicate_pages_skip_inference()
+    test_cropped_pages_map_back_to_page_coordinates()
+    test_rotated_pages_are_turned_upright_once()
+    test_unavailable_backend_fails_cleanly()
+    test_pick_best_respects_accuracy_and_memory()
+    test_calibration_roundtrip_and_registry_order()
+    test_calibrated_threads_respect_concurrent_engines()
+    print("✅ OCR 后端公共层测试通过")
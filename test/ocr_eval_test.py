@@ -0,0 +1,35 @@
+import os
+import sys
+from unittest import mock
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+from tools.ocr_eval import levenshtein, char_error_rate
+from core.rapidocr import packaged_model_paths, variant_model_paths
+from tools.quant_compare import compare, fallback_models
+
+def test_char_error_rate():
+    assert levenshtein("冻干疫苗", "冻于疫苗") == 1
+    assert levenshtein("", "abc") == 3
+    # 空白 / 换行差异不计入错误
+    assert char_error_rate("冻干 甲型\n疫苗", "冻干甲型疫苗") == 0.0
+    assert abs(char_error_rate("冻于甲型疫苗", "冻干甲型疫苗") - 1 / 6) < 1e-9
+
+def test_missing_quantized_models_fall_back(tmp_path=None):
+    home = str(tmp_path or make_tmp_dir("empty_home"))
+    with mock.patch.dict(os.environ, {"DOC_AUDIT_HOME": home}):
+        assert variant_model_paths("int8_static") == packaged_model_paths()
+        # 对比工具不会把回退后的 FP32 结果记成 INT8
+        assert fallback_models("int8_static") == ["det", "cls", "rec"] and fallback_models("fp32") == []
+        report = compare([{"name": "p1", "image": None, "reference": None}], ["int8_static"])
+        assert "error" in report["int8_static"] and "sec_per_page" not in report["int8_static"]
+
+if __name__ == "__main__":
+    test_char_error_rate()
+    test_missing_quantized_models_fall_back()
+    print("✅ ocr_eval 测试通过")
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import threading
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core.ocr_pipeline import OcrPipeline
+
+def test_pipeline_keeps_order_and_bounds_memory():
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    written = []
+
+    def render(n):
+        for i in range(n):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            yield i
+
+    def slow_infer(i):
+        time.sleep(0.01)   # 模拟推理是瓶颈
+        return i * 10
+
+    def write(v):
+        written.append(v)
+        with lock:
+            in_flight["now"] -= 1
+
+    pipeline = OcrPipeline([("render", render), ("preprocess", lambda i: i),
+                            ("infer", slow_infer), ("write", write)], queue_size=2)
+    stats = pipeline.run(30)
+
+    assert written == [i * 10 for i in range(30)]
+    # 背压：3 个队列各 2 页 + 每个阶段手上 1 页，远小于总页数
+    assert in_flight["max"] <= 3 * 2 + 4
+    assert pipeline.bottleneck() == "infer"
+    assert [s["items"] for s in stats] == [30, 30, 30, 30]
+
+def test_pipeline_propagates_errors():
+    def render(n):
+        yield from range(n)
+
+    def broken(i):
+        if i == 3:
+            raise RuntimeError("坏页")
+        return i
+
+    pipeline = OcrPipeline([("render", render), ("infer", broken), ("write", lambda v: None)])
+    try:
+        pipeline.run(100)
+        assert False, "阶段异常应当抛出"
+    except RuntimeError as e:
+        assert "坏页" in str(e)
+
+if __name__ == "__main__":
+    test_pipeline_keeps_order_and_bounds_memory()
+    test_pipeline_propagates_errors()
+    print("✅ ocr_pipeline 测试通过")
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import numpy as np
+from core.ocr_profiles import DEFAULT_TUNING, load_profiles, resolve_tuning, save_profiles
+from tools.tune_ocr import build_grid, run_sweep, pareto_front, choose_profiles
+
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+from ocr_base_test import FakeBackend
+
+TMP_DIR = make_tmp_dir("ocr_profiles_test")
+
+class TunableBackend(FakeBackend):
+    """ 假引擎：DPI 越高越准；关掉方向分类器时漏掉一个字 """
+    def recognize(self, img_np, use_cls=None):
+        text = "冻干甲型流感疫苗批次" if self.tuning["dpi"] >= 300 else "冻干甲型流感疫亩批次"
+        if not self.tuning["use_cls"]:
+            text = text[:-1]
+        return [(0, text)]
+
+def test_resolve_tuning_precedence_and_saved_profiles():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = os.path.join(TMP_DIR, "ocr_profiles.json")
+    if os.path.exists(path):
+        os.remove(path)
+
+    assert resolve_tuning() == DEFAULT_TUNING
+    assert resolve_tuning("fast", path=path)["dpi"] == 200
+    # 显式参数优先于档位
+    assert resolve_tuning("fast", path=path, dpi=250)["dpi"] == 250
+    try:
+        resolve_tuning("turbo", path=path)
+        assert False, "未知档位应报错"
+    except ValueError:
+        pass
+
+    # 实测保存的档位覆盖同名内置档位，其他档位不受影响
+    save_profiles({"fast": {"tuning": {**DEFAULT_TUNING, "dpi": 240}, "cer": 0.01}}, path=path)
+    save_profiles({"scanner_a": {"tuning": {"det_thresh": 0.2}}}, path=path)
+    profiles = load_profiles(path)
+    assert profiles["fast"]["dpi"] == 240 and profiles["accurate"] == DEFAULT_TUNING
+    assert profiles["scanner_a"] == {**DEFAULT_TUNING, "det_thresh": 0.2}
+
+def test_concurrent_saves_do_not_clobber_each_other():
+    directory = os.path.join(TMP_DIR, "concurrent")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "ocr_profiles.json")
+    errors = []
+
+    def save(i):
+        try:
+            for _ in range(20):
+                save_profiles({f"scanner_{i}": {"tuning": {"dpi": 200 + i}}}, path=path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 各写各的临时文件：没有报错、没有残留，结果是一份完整的 JSON
+    assert errors == [] and os.listdir(directory) == ["ocr_profiles.json"]
+    assert load_profiles(path)["accurate"] == DEFAULT_TUNING
+
+def test_converter_uses_profile():
+    converter = FakeBackend(profile="balanced", det_thresh=0.2)
+    assert converter.tuning["use_cls"] is False and converter.tuning["det_thresh"] == 0.2
+    assert converter.dpi == 300
+    assert converter.checkpoint_signature()["tuning"] == converter.tuning
+    assert FakeBackend(profile="fast").dpi == 200
+
+def test_sweep_front_and_profile_choice():
+    samples = [{"name": "p1", "image_path": None, "image_dpi": 300, "reference": "冻干甲型流感疫苗批次"}]
+    configs = build_grid({"dpi": [200, 300], "det_thresh": [0.1], "det_box_thresh": [0.3],
+                          "det_unclip_ratio": [2.0], "use_cls": [True, False]})
+    # 默认值组合排在第一个
+    assert configs[0] == DEFAULT_TUNING and len(configs) == 4
+
+    # 不真正渲染：每个 DPI 一张空白图
+    cache = {("p1", dpi): np.zeros((dpi, dpi, 3), np.uint8) for dpi in (200, 300)}
+    import tools.tune_ocr as tune_ocr
+    original = tune_ocr.sample_image
+    tune_ocr.sample_image = lambda sample, dpi, _cache: cache[(sample["name"], dpi)]
+    try:
+        results = run_sweep(lambda tuning: TunableBackend(**tuning), samples, configs)
+    finally:
+        tune_ocr.sample_image = original
+    assert all("error" not in r for r in results)
+
+    # 人为给定耗时，使前沿可预期：越准越慢
+    speed = {(300, True): 1.0, (300, False): 0.8, (200, True): 0.6, (200, False): 0.5}
+    for r in results:
+        r["sec_per_page"] = speed[(r["tuning"]["dpi"], r["tuning"]["use_cls"])]
+    front = pareto_front(results)
+    # 300 DPI 关分类器 (CER 10%，0.8s) 被 200 DPI 开分类器 (CER 10%，0.6s) 支配
+    assert [(r["tuning"]["dpi"], r["tuning"]["use_cls"]) for r in front] == [(200, False), (200, True), (300, True)]
+
+    chosen = choose_profiles(front, balanced_tolerance=0.15, fast_tolerance=0.25)
+    assert chosen["accurate"]["tuning"] == DEFAULT_TUNING and chosen["accurate"]["cer"] == 0
+    assert (chosen["balanced"]["tuning"]["dpi"], chosen["balanced"]["tuning"]["use_cls"]) == (200, True)
+    assert (chosen["fast"]["tuning"]["dpi"], chosen["fast"]["tuning"]["use_cls"]) == (200, False)
+
+if __name__ == "__main__":
+    test_resolve_tuning_precedence_and_saved_profiles()
+    test_concurrent_saves_do_not_clobber_each_other()
+    test_converter_uses_profile()
+    test_sweep_front_and_profile_choice()
+    print("✅ OCR 档位测试通过")
@@ -0,0 +1,116 @@
+import os
+import sys
+import pickle
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import numpy as np
+from core.ocr_result import OcrPage
+from core.ocr_base import BaseOcrConverter
+from core.rapidocr import RapidOcrConverter
+from core.ocr_pdf_html import OcrConverter
+
+def _box(x, y, w=200, h=40):
+    return [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+
+# 引擎原始结果：同一行的两个框 (上沿差几个像素)、乱序
+RAPID_RAW = [
+    [_box(400, 103), "冻于甲型流感疫苗", 0.97],
+    [_box(50, 300), "第二行", 0.95],
+    [_box(50, 100), "名称：", 0.99],
+    [_box(60, 500, 20, 40), "1", 0.99],
+    [_box(50, 700), "噪点", 0.2],
+    [_box(50, 900, 200, 8), "污点碎块", 0.9],
+]
+
+def test_reading_order_and_lines():
+    page = RapidOcrConverter.parse_result(None, RAPID_RAW)
+    assert page.texts()[:3] == ["名称：", "冻于甲型流感疫苗", "第二行"]
+    assert page.lines()[:2] == ["名称： 冻于甲型流感疫苗", "第二行"]
+    assert page.line_ids.tolist() == [0, 0, 1, 2, 3, 4]
+    assert page.polys.dtype == np.float32 and page.polys.shape == (6, 4, 2)
+
+def test_vectorised_filters_and_replacements():
+    page = RapidOcrConverter.parse_result(None, RAPID_RAW)
+    cleaned = page.filter(min_score=0.5, min_height=16, lone_symbols=True).replace({"冻于": "冻干"})
+    # 低置信度、过小的框、孤立的 "1" 一次去掉；行号重新连续编号
+    assert cleaned.lines() == ["名称： 冻干甲型流感疫苗", "第二行"]
+    assert cleaned.line_ids.tolist() == [0, 0, 1]
+    assert np.allclose(cleaned.scores, [0.99, 0.97, 0.95])
+    # 单个汉字照常保留；不知道置信度 / 框高的结果只按文字判断
+    texts_only = OcrPage.from_texts(["甲", "7", "  条款  ", "", "B"])
+    assert texts_only.filter(min_score=0.5, min_height=16, lone_symbols=True).lines() == ["甲", "条款"]
+    # 单字符过滤默认关闭：表格里单独的金额、条款字母不丢
+    assert texts_only.filter(min_score=0.5, min_height=16).lines() == ["甲", "7", "条款", "B"]
+    # 替换不会跨框
+    assert OcrPage.from_texts(["冻", "于"]).replace({"冻于": "冻干"}).texts() == ["冻", "于"]
+
+class RapidParser(BaseOcrConverter):
+    """ 只借用 RapidOCR 的解析，走基类的默认后处理 """
+    parse_result = RapidOcrConverter.parse_result
+
+    def __init__(self, **kwargs):
+        super().__init__(renderer="fitz", **kwargs)
+
+def _legacy_lines(raw, replacements):
+    """ 引入 OcrPage 之前的输出：每个框一行、按左上角 Y 排序，丢弃单个非汉字字符，再做关键词矫正 """
+    lines = []
+    for _, text in sorted(((item[0][0][1], item[1]) for item in raw), key=lambda x: x[0]):
+        text = text.strip()
+        if len(text) == 1 and not "\u4e00" <= text <= "\u9fa5":
+            continue
+        for wrong, correct in replacements.items():
+            text = text.replace(wrong, correct)
+        if text:
+            lines.append(text)
+    return lines
+
+def test_default_output_matches_previous_converter():
+    converter = RapidParser()
+    default = converter.output_lines(converter.post_process(converter.page_result(RAPID_RAW)))
+    legacy = _legacy_lines(RAPID_RAW, converter.REPLACEMENTS)
+    # 默认输出与以前完全一致：不按置信度 / 框高过滤、不合并同一行，单独的 "1" 照旧丢掉
+    assert default == legacy
+    keep = RapidParser(drop_lone_symbols=False)
+    assert keep.output_lines(keep.post_process(keep.page_result(RAPID_RAW))) == legacy[:3] + ["1"] + legacy[3:]
+
+    # 新的过滤与合并都要显式打开
+    tuned = RapidParser(min_score=0.5, min_box_height=4, join_lines=True, dpi=300)
+    assert tuned.output_lines(tuned.post_process(tuned.page_result(RAPID_RAW))) == ["名称： 冻干甲型流感疫苗", "第二行"]
+
+def test_mapping_and_serialisation():
+    page = RapidOcrConverter.parse_result(None, RAPID_RAW)
+    mapped = page.mapped(100, 50, scale=0.5)
+    assert np.allclose(mapped.polys[0, 0], [50 / 0.5 + 100, 100 / 0.5 + 50])
+
+    data = page.to_bytes()
+    restored = OcrPage.from_bytes(data)
+    assert restored.texts() == page.texts() and np.array_equal(restored.polys, page.polys)
+    assert np.array_equal(restored.line_ids, page.line_ids) and np.allclose(restored.scores, page.scores)
+    # 数组 + 一段文字：比逐框的 Python 列表小得多，pickle 也只多一点开销
+    assert len(data) < page.nbytes + 64 and len(pickle.dumps(page)) < 2 * len(data) + 512
+    assert OcrPage.from_bytes(OcrPage.empty().to_bytes()).lines() == []
+
+def test_paddle_results_share_the_model():
+    # 旧版 (2.x)：[[框, (文本, 置信度)], ...]
+    v2 = [[[_box(50, 300), ("第二行", 0.95)], [_box(50, 100), ("第一行", 0.98)]]]
+    assert OcrConverter.parse_result(None, v2).lines() == ["第一行", "第二行"]
+    assert len(OcrConverter.parse_result(None, [None])) == 0
+    # 新版 (3.x)：每页一个 dict
+    v3 = [{"rec_texts": ["第二行", "第一行"], "rec_scores": np.array([0.95, 0.98]),
+           "rec_polys": [np.array(_box(50, 300)), np.array(_box(50, 100))]}]
+    page = OcrConverter.parse_result(None, v3)
+    assert page.lines() == ["第一行", "第二行"] and np.allclose(page.scores, [0.98, 0.95])
+    # 没有框坐标时保持原顺序
+    assert OcrConverter.parse_result(None, [{"rec_texts": ["甲方", "乙方"]}]).lines() == ["甲方", "乙方"]
+
+if __name__ == "__main__":
+    test_reading_order_and_lines()
+    test_vectorised_filters_and_replacements()
+    test_default_output_matches_previous_converter()
+    test_mapping_and_serialisation()
+    test_paddle_results_share_the_model()
+    print("✅ OCR 结果模型测试通过")
@@ -0,0 +1,159 @@
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import numpy as np
+from core import ort_session
+
+TMP_DIR = make_tmp_dir("ort_session_test")
+
+def test_auto_thread_policy_divides_cores():
+    assert ort_session.auto_thread_policy(1, cpu_count=16) == (16, 1)
+    assert ort_session.auto_thread_policy(4, cpu_count=16) == (4, 1)
+    # 引擎数超过核数时每个引擎至少 1 线程
+    assert ort_session.auto_thread_policy(32, cpu_count=16) == (1, 1)
+
+def test_resolve_options():
+    opts = ort_session.resolve_options({"intra_op_num_threads": 3})
+    assert opts["intra_op_num_threads"] == 3
+    assert opts["execution_mode"] == "sequential"
+    assert not ort_session.needs_rebuild(opts)
+
+    opts = ort_session.resolve_options({"graph_optimization_level": "basic"})
+    assert ort_session.needs_rebuild(opts)
+
+    try:
+        ort_session.resolve_options({"execution_mode": "turbo"})
+        assert False, "非法 execution_mode 应当报错"
+    except ValueError:
+        pass
+
+def _cls_model():
+    from core.rapidocr import packaged_model_paths
+    return packaged_model_paths()["cls"]
+
+def _run(path, x):
+    import onnxruntime as ort
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    return session.run(None, {session.get_inputs()[0].name: x})[0]
+
+def test_optimized_graph_cache_roundtrip():
+    cache_dir = os.path.join(TMP_DIR, "roundtrip")
+    for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+        os.remove(os.path.join(cache_dir, name))
+    cache = ort_session.OptimizedGraphCache(cache_dir)
+    options = ort_session.resolve_options()
+    model = _cls_model()
+
+    assert cache.lookup(model, options) is None
+    path = cache.store(model, options)
+    assert path and cache.lookup(model, options) == path
+    # 优化后的图与原始模型输出一致
+    x = np.random.default_rng(0).random((1, 3, 48, 192), dtype=np.float32)
+    assert np.allclose(_run(path, x), _run(model, x), atol=1e-5)
+    # 优化级别不同 -> 另一个缓存文件；模型哈希只算一次 (按大小 + 修改时间记住)
+    assert cache.cache_path(model, ort_session.resolve_options({"graph_optimization_level": "basic"})) != path
+    assert ort_session.OptimizedGraphCache(cache_dir)._digests[os.path.abspath(model)]["sha256"] == cache.model_digest(model)
+
+    # 文件残缺 (大小与元数据不符)：视为未命中并删掉
+    with open(path, "r+b") as f:
+        f.truncate(1024)
+    assert cache.lookup(model, options) is None and not os.path.exists(path)
+
+def test_converter_falls_back_from_corrupt_cache():
+    from core.rapidocr import RapidOcrConverter, HAS_RAPID
+    if not HAS_RAPID:
+        return
+    home = os.path.join(TMP_DIR, "home")
+    old_home = os.environ.get("DOC_AUDIT_HOME")
+    os.environ["DOC_AUDIT_HOME"] = home
+    try:
+        first = RapidOcrConverter()
+        cached = [s._model_path for s in (w.session for w in ort_session.engine_sessions(first.ocr_engine).values())]
+        assert all(p.startswith(home) for p in cached)
+
+        # 大小不变但内容损坏：加载失败 -> 删掉缓存、回退原始模型，引擎照常可用
+        size = os.path.getsize(cached[0])
+        with open(cached[0], "wb") as f:
+            f.write(b"\0" * size)
+        second = RapidOcrConverter()
+        assert second.is_available()
+        paths = [w.session._model_path for w in ort_session.engine_sessions(second.ocr_engine).values()]
+        assert not any(p.startswith(home) for p in paths) and not os.path.exists(cached[0])
+    finally:
+        if old_home is None:
+            os.environ.pop("DOC_AUDIT_HOME", None)
+        else:
+            os.environ["DOC_AUDIT_HOME"] = old_home
+
+def test_cached_graphs_load_without_reoptimizing():
+    from core.rapidocr import RapidOcrConverter, HAS_RAPID
+    if not HAS_RAPID:
+        return
+    import onnxruntime as ort
+    home = os.path.join(TMP_DIR, "home_levels")
+    old_home = os.environ.get("DOC_AUDIT_HOME")
+    os.environ["DOC_AUDIT_HOME"] = home
+    try:
+        for _ in range(2):   # 第一次生成缓存，第二次命中：两次都直接加载优化图
+            converter = RapidOcrConverter(ort_options={"intra_op_num_threads": 1})
+            sessions = [w.session for w in ort_session.engine_sessions(converter.ocr_engine).values()]
+            assert all(s._model_path.startswith(home) for s in sessions)
+            for s in sessions:
+                opts = s.get_session_options()
+                assert opts.graph_optimization_level == ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                assert opts.intra_op_num_threads == 1
+
+        # 不用缓存时照常做完整图优化
+        plain = RapidOcrConverter(graph_cache=False)
+        for w in ort_session.engine_sessions(plain.ocr_engine).values():
+            assert w.session.get_session_options().graph_optimization_level == ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    finally:
+        if old_home is None:
+            os.environ.pop("DOC_AUDIT_HOME", None)
+        else:
+            os.environ["DOC_AUDIT_HOME"] = old_home
+
+def test_unknown_rapidocr_internals_keep_default_sessions():
+    class Wrapper:
+        def __init__(self):
+            self.session = object()   # 没有 _model_path 的会话
+
+    class Part:
+        def __init__(self):
+            self.infer = self.session = Wrapper()
+
+    engine = type("Engine", (), {})()
+    engine.text_det, engine.text_cls, engine.text_rec = Part(), Part(), Part()
+    before = [w.session for w in ort_session.engine_sessions(engine).values()]
+    assert ort_session.apply_session_options(engine, ort_session.resolve_options()) is False
+    assert [w.session for w in ort_session.engine_sessions(engine).values()] == before
+    assert ort_session.apply_session_options(object(), ort_session.resolve_options()) is False
+
+    try:
+        from rapidocr_onnxruntime.utils.infer_engine import OrtInferSession
+    except ImportError:
+        return
+    # 新版本去掉了 _init_sess_opts：钩子不可用，调用方改走事后重建
+    original = OrtInferSession.__dict__["_init_sess_opts"]
+    del OrtInferSession._init_sess_opts
+    try:
+        with ort_session.rapidocr_session_options(lambda path: ort_session.resolve_options()) as hooked:
+            assert hooked is False
+    finally:
+        OrtInferSession._init_sess_opts = original
+
+if __name__ == "__main__":
+    test_auto_thread_policy_divides_cores()
+    test_resolve_options()
+    test_optimized_graph_cache_roundtrip()
+    test_converter_falls_back_from_corrupt_cache()
+    test_cached_graphs_load_without_reoptimizing()
+    test_unknown_rapidocr_internals_keep_default_sessions()
+    print("✅ ort_session 测试通过")
@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+import numpy as np
+from core import registry
+from core.word_pdf_html import DocToHtmlConverter
+
+TMP_DIR = make_tmp_dir("pdf_html_semantic_test")
+
+def _make_pdf(path, pages=6):
+    """ 每页：大字号标题 + 正文 (含 "<" 等字符) + 带框线的表格 + 一张图片 """
+    rng = np.random.default_rng(0)
+    noise = (rng.random((120, 160, 3)) * 255).astype(np.uint8)
+    png = fitz.Pixmap(fitz.csRGB, 160, 120, noise.tobytes(), False).tobytes("png")
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 300), f"Chapter {i + 1}", fontsize=20)
+        for j in range(8):
+            page.insert_text((72, 330 + j * 16), f"Body line {j}: amount < limit & approved", fontsize=10.5)
+        for r in range(4):
+            for c in range(3):
+                rect = fitz.Rect(72 + c * 120, 480 + r * 20, 192 + c * 120, 500 + r * 20)
+                page.draw_rect(rect, color=(0, 0, 0), width=0.8)
+                page.insert_text((rect.x0 + 4, rect.y1 - 6), f"R{r}C{c}", fontsize=9)
+        page.insert_image(fitz.Rect(72, 580, 232, 700), stream=png)
+    doc.save(path)
+    doc.close()
+
+def test_semantic_html_is_compact_and_structured():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "report.pdf")
+    _make_pdf(pdf_path)
+
+    layout_path = os.path.join(TMP_DIR, "report_layout.html")
+    semantic_path = os.path.join(TMP_DIR, "report_compact.html")
+    assert DocToHtmlConverter().pdf_to_html(pdf_path, layout_path)
+    assert DocToHtmlConverter(pdf_html_mode="semantic").pdf_to_html(pdf_path, semantic_path)
+
+    # 至少小一个数量级
+    assert os.path.getsize(semantic_path) * 10 < os.path.getsize(layout_path)
+    with open(semantic_path, encoding="utf-8") as f:
+        html = f.read()
+    assert html.count('<section class="page"') == 6
+    assert "<h1>Chapter 3</h1>" in html or "<h2>Chapter 3</h2>" in html
+    assert html.count("<table>") == 6 and "R3C2" in html
+    # 正文里的 "<"、"&" 被转义，没有内联样式和内嵌图片
+    assert "amount &lt; limit &amp; approved" in html
+    assert 'style="' not in html and "base64" not in html and "<img" not in html
+
+def test_external_images_and_stream_output():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "report.pdf")
+    _make_pdf(pdf_path, pages=2)
+
+    out_path = os.path.join(TMP_DIR, "with_images.html")
+    assert DocToHtmlConverter(pdf_html_mode="semantic", images="external").pdf_to_html(pdf_path, out_path)
+    with open(out_path, encoding="utf-8") as f:
+        html = f.read()
+    # 两页引用同一张图片，只另存一份
+    files = os.listdir(os.path.join(TMP_DIR, "with_images_files"))
+    assert len(files) == 1 and html.count(f'src="with_images_files/{files[0]}"') == 2
+
+    # 输出为流时没有图片目录，跳过图片；registry 的精简模式默认就是语义输出
+    result = registry.convert_to_bytes("digital_pdf_compact", open(pdf_path, "rb").read(), images="external")
+    assert b'<section class="page"' in result and b"<img" not in result
+
+if __name__ == "__main__":
+    test_semantic_html_is_compact_and_structured()
+    test_external_images_and_stream_output()
+    print("✅ 精简语义 HTML 测试通过")
@@ -0,0 +1,79 @@
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+from core.pdf_md import PdfMdConverter
+
+TMP_DIR = make_tmp_dir("pdf_md_prescan_test")
+
+def _make_pdf(path, pages, extra_header_every=None):
+    """ 每页: 固定页眉 + 若干行 10.5 号正文 + 页码；extra_header_every 控制第二个页眉出现的比例 """
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((60, 40), "Audit Report Confidential", fontsize=9)
+        if extra_header_every and i % 10 < extra_header_every:
+            page.insert_text((60, 60), "Appendix Working Paper", fontsize=9)
+        for j in range(8):
+            page.insert_text((60, 200 + j * 20), f"Body line {j} of page {i}", fontsize=10.5)
+        page.insert_text((290, 800), str(i + 1), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def test_large_document_is_sampled():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "large.pdf")
+    md_path = os.path.join(TMP_DIR, "large.md")
+    _make_pdf(pdf_path, 90)
+
+    converter = PdfMdConverter(prescan_threshold=40, prescan_sample=15)
+    assert converter.pdf_to_markdown(pdf_path, md_path)
+    stats = converter.last_prescan
+
+    assert stats["mode"] == "sampled"
+    assert stats["pages_scanned"] == 15 and stats["total_pages"] == 90
+    assert stats["body_font_size"] == 10.5 and stats["body_confidence"] == 1.0
+    with open(md_path, encoding="utf-8") as f:
+        md = f.read()
+    # 页眉仍被识别并从正文中移除
+    assert "Body line 3 of page 77" in md
+    assert "Audit Report Confidential" not in md.split("---", 2)[2]
+
+def test_ambiguous_sample_falls_back_to_full_scan():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "ambiguous.pdf")
+    # 第二个页眉恰好出现在 30% 的页面上，抽样无法判断是否超过阈值
+    _make_pdf(pdf_path, 90, extra_header_every=3)
+
+    converter = PdfMdConverter(prescan_threshold=40, prescan_sample=15)
+    doc = fitz.open(pdf_path)
+    body_font_size, hf_candidates, stats = converter._prescan(doc)
+    doc.close()
+
+    assert stats["mode"] == "sampled+full"
+    assert stats["pages_scanned"] == 90 and stats["hf_confidence"] == 1.0
+    assert "auditreportconfidential" in hf_candidates
+    assert body_font_size == 10.5
+
+def test_small_document_scans_every_page():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = os.path.join(TMP_DIR, "small.pdf")
+    _make_pdf(pdf_path, 5)
+
+    doc = fitz.open(pdf_path)
+    _, _, stats = PdfMdConverter()._prescan(doc)
+    doc.close()
+    assert stats["mode"] == "full" and stats["pages_scanned"] == 5
+
+if __name__ == "__main__":
+    test_large_document_is_sampled()
+    test_ambiguous_sample_falls_back_to_full_scan()
+    test_small_document_scans_every_page()
+    print("✅ 预扫描测试通过")
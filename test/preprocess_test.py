@@ -0,0 +1,128 @@
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import fitz
+import numpy as np
+from core.preprocess import PageFilter, thumbnail, dhash, content_bbox, crop_to_content, detect_orientation, rotate_image
+
+rng = np.random.default_rng(0)
+
+def _render(lines, footer="", dpi=300, fontname="helv"):
+    doc = fitz.open()
+    page = doc.new_page()
+    for j, text in enumerate(lines):
+        page.insert_text((50, 60 + j * 24), text, fontsize=11, fontname=fontname)
+    if footer:
+        page.insert_text((50, 800), footer, fontsize=11)
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3).copy()
+
+def _noisy(img, sigma=8):
+    return np.clip(img + rng.normal(0, sigma, img.shape), 0, 255).astype(np.uint8)
+
+TERMS = [f"Standard terms and conditions clause {j} of the agreement" for j in range(25)]
+
+def test_blank_pages_detected():
+    f = PageFilter()
+    blank = _noisy(np.full((3508, 2480, 3), 248, dtype=np.uint8))
+    # 零星的扫描污点仍算空白页
+    specks = blank.copy()
+    specks[rng.random(specks.shape[:2]) < 0.001] = 0
+    # 只有页码的页面算空白，只写了很短一行字的页面不算
+    page_number = _render([], "- 3 -")
+    one_line = _render(["OK"])
+
+    assert f.classify(0, blank) == (PageFilter.BLANK, None)
+    assert f.classify(1, specks) == (PageFilter.BLANK, None)
+    assert f.classify(2, page_number) == (PageFilter.BLANK, None)
+    assert f.classify(3, one_line)[0] == PageFilter.CONTENT
+
+def test_duplicates_found_but_small_edits_are_not():
+    f = PageFilter()
+    cover = _render(TERMS, "Date: 2023-01-05")
+    assert f.classify(0, cover) == (PageFilter.CONTENT, None)
+    # 同一页带扫描噪声 -> 重复
+    assert f.classify(1, _noisy(cover)) == (PageFilter.DUPLICATE, 0)
+    # 日期只差一个数字 -> 不是重复
+    assert f.classify(2, _render(TERMS, "Date: 2023-01-06")) == (PageFilter.CONTENT, None)
+    assert f.classify(3, _render(TERMS[::-1])) == (PageFilter.CONTENT, None)
+
+def test_hash_is_stable_on_white_space():
+    page = _render(TERMS)
+    a, b = dhash(thumbnail(page)), dhash(thumbnail(_noisy(page)))
+    assert np.count_nonzero(a != b) <= 2
+
+def _scanned_with_holes_and_border(page):
+    """ 模拟扫描件：左侧两个装订孔 + 底部扫描仪黑边 """
+    scan = page.copy()
+    h, w = scan.shape[:2]
+    yy, xx = np.ogrid[:h, :w]
+    r = int(w * 0.012)
+    for cy in (h // 3, 2 * h // 3):
+        scan[(yy - cy) ** 2 + (xx - int(w * 0.03)) ** 2 <= r * r] = 20
+    scan[-int(h * 0.03):] = 10
+    return scan
+
+def test_content_bbox_ignores_holes_and_border():
+    page = _render(TERMS[:8], "Page footer 1/3")
+    scan = _scanned_with_holes_and_border(page)
+    thumb = thumbnail(scan)
+    x0, y0, x1, y1 = content_bbox(thumb)
+    clean = content_bbox(thumbnail(page))
+    # 装订孔和黑边不影响内容框，页脚保留在框内
+    assert abs(x0 - clean[0]) <= 1 and abs(y1 - clean[3]) <= 1
+    assert y1 * scan.shape[0] / thumb.shape[0] > 800 / 842 * scan.shape[0]
+
+    crop, (dx, dy), ratio = crop_to_content(scan, thumb)
+    assert ratio > 0.3 and dx > 0 and dy > 0
+    assert crop.flags["C_CONTIGUOUS"] and crop.shape[0] < scan.shape[0]
+
+def test_crop_skipped_when_gain_is_small():
+    page = np.full((400, 300), 250, dtype=np.uint8)
+    page[5:395, 5:295] = rng.integers(0, 255, (390, 290))
+    crop, offset, ratio = crop_to_content(page, thumbnail(page))
+    assert crop is page and offset == (0, 0) and ratio == 0.0
+
+# 段落：首行缩进，段末短行
+PARAGRAPHS = ["    The supplier shall deliver all goods within thirty days of signing",
+              "the contract and shall provide the inspection report for each batch.",
+              "    Payment of the total amount shall be made in two installments.",
+              "    Either party in breach shall pay liquidated damages amounting to",
+              "five percent of the total contract price to the other party.",
+              "    This agreement is made in duplicate and takes effect upon signature."]
+PARAGRAPHS_ZH = ["　　甲方与乙方经友好协商，就冻干甲型流感疫苗采购事宜达成如下协议，",
+                 "双方共同遵守。",
+                 "　　乙方应于合同签订后三十日内交付全部货物，并提供每批次的检验报告，",
+                 "验收合格后方可入库。",
+                 "　　任何一方违约，应向守约方支付合同总额百分之五的违约金。"]
+
+def test_orientation_detected_for_every_rotation():
+    for lines, fontname in [(PARAGRAPHS, "helv"), (PARAGRAPHS_ZH, "china-s")]:
+        page = _noisy(_render(lines, fontname=fontname))
+        for k in range(4):
+            # 逆时针转了 k*90° 的页，要再转 (4-k)*90° 才正
+            assert detect_orientation(np.rot90(page, k)) == ((4 - k) % 4, True), (fontname, k)
+        turned = rotate_image(np.rot90(page, 1), 3)
+        assert turned.flags["C_CONTIGUOUS"] and np.array_equal(turned, page)
+
+def test_orientation_not_guessed_without_evidence():
+    # 空白页、只有一行字的页：方向不明确，保持原样 (继续用逐行方向分类)
+    assert detect_orientation(np.full((3508, 2480), 250, dtype=np.uint8)) == (0, False)
+    assert detect_orientation(_render(["Signature"])) == (0, False)
+    page = _render(PARAGRAPHS)
+    assert rotate_image(page, 0) is page
+
+if __name__ == "__main__":
+    test_blank_pages_detected()
+    test_duplicates_found_but_small_edits_are_not()
+    test_hash_is_stable_on_white_space()
+    test_content_bbox_ignores_holes_and_border()
+    test_crop_skipped_when_gain_is_small()
+    test_orientation_detected_for_every_rotation()
+    test_orientation_not_guessed_without_evidence()
+    print("✅ 页面预处理测试通过")
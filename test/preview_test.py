@@ -0,0 +1,102 @@
+import html
+import io
+import os
+import sys
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import fitz
+from core import registry
+from core.preview import PagedResult
+
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+from ocr_base_test import FakeBackend
+
+TMP_DIR = make_tmp_dir("preview_test")
+
+WORDS = ["交付货物", "支付货款", "质量保证", "到货验收", "违约责任", "开具发票", "冷链运输", "批次检验", "争议解决"]
+
+def _make_pdf(path, n):
+    doc = fitz.open()
+    for p in range(n):
+        # 各页文字不同 (各页相似的行会被当成页眉页脚去掉)
+        page = doc.new_page()
+        for j in range(6):
+            page.insert_text((50, 60 + j * 24), f"第{p + 1}页 第{j + 1}条 乙方应按期{WORDS[(p * 5 + j) % len(WORDS)] * (1 + (p + j) % 3)}",
+                             fontname="china-s", fontsize=11)
+    doc.save(path)
+    doc.close()
+    return path
+
+def _pdf_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_ocr_html_pages_with_source_thumbnails():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = _make_pdf(os.path.join(TMP_DIR, "scan.pdf"), 3)
+    output = io.StringIO()
+    assert FakeBackend(skip_blank_pages=False, dedup_pages=False).scanned_pdf_to_html(pdf_path, output)
+
+    doc = PagedResult(output.getvalue().encode("utf-8"), "scan_ocr.html", source_pdf=_pdf_bytes(pdf_path))
+    assert len(doc) == 3 and doc.paginated
+    page = doc.page(1)
+    # 每页都是带原样式的完整文档，只含这一页
+    assert page.startswith("<!DOCTYPE") or "<head>" in page
+    assert ".ocr-page" in page and page.rstrip().endswith("</html>")
+    assert "第 2 页" in page and "第 1 页" not in page and "第 3 页" not in page
+    assert doc.has_thumbnails and doc.thumbnail(2).startswith(b"\x89PNG")
+
+def test_digital_html_and_markdown_pages():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    pdf_path = _make_pdf(os.path.join(TMP_DIR, "digital.pdf"), 4)
+    source = _pdf_bytes(pdf_path)
+    for mode in ("digital_pdf", "digital_pdf_compact", "pdf2md"):
+        data = registry.convert_to_bytes(mode, pdf_path)
+        doc = PagedResult(data, registry.output_name(mode, "digital"), source_pdf=source)
+        assert len(doc) == 4 and doc.paginated, mode
+        page = html.unescape(doc.page(2))   # 版面 HTML 里中文是字符实体
+        assert "第3页" in page and "第2页" not in page, mode
+        assert doc.has_thumbnails, mode
+
+    # Markdown 的 front matter 不算一页；页数与源 PDF 不一致时不给缩略图
+    md = "---\ntitle: 合同\n---\n<!-- page 1 -->\n\n甲\n\n<!-- page 2 -->\n\n乙\n".encode("utf-8")
+    doc = PagedResult(md, "a.md", source_pdf=source)
+    assert len(doc) == 2 and doc.page(1).strip().endswith("乙") and "title" not in doc.page(0)
+    assert not doc.has_thumbnails and doc.thumbnail(0) is None
+
+def test_unmarked_results_are_chunked_at_block_boundaries():
+    rows = "".join(f"<tr><td>{i}</td><td>{'冻干' * 20}</td></tr>" for i in range(200))
+    paras = "".join(f"<p>第{i}段 {'内容' * 50}</p>" for i in range(200))
+    source = f"<html><head><style>p{{}}</style></head><body>{paras}<table>{rows}</table>{paras}</body></html>"
+    doc = PagedResult(source.encode("utf-8"), "a.html", page_chars=5000)
+    assert not doc.paginated and len(doc) > 3
+    pages = [doc.page(i) for i in range(len(doc))]
+    # 表格不会被切开，各段拼回去就是原文
+    assert sum("<table>" in p for p in pages) == 1 and any("<table>" in p and "</table>" in p for p in pages)
+    assert all(p.startswith("<html><head><style>") for p in pages)
+    assert "".join(doc.text[s:e] for s, e in doc.spans) == source[source.index("<body>") + 6:source.index("</body>")]
+
+    text = "\n\n".join(f"段落 {i} " + "字" * 100 for i in range(100))
+    doc = PagedResult(text, "old.md", page_chars=2000)
+    assert len(doc) > 1 and "".join(doc.page(i) for i in range(len(doc))) == text
+
+def test_pdf_result_renders_single_pages():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    data = _pdf_bytes(_make_pdf(os.path.join(TMP_DIR, "result.pdf"), 5))
+    doc = PagedResult(data, "合同.pdf")
+    assert len(doc) == 5 and doc.has_thumbnails
+    page, thumb = doc.page(4), doc.thumbnail(4, width=100)
+    assert page.startswith(b"\x89PNG") and thumb.startswith(b"\x89PNG") and len(thumb) < len(page)
+    assert fitz.Pixmap(thumb).width == 100
+
+if __name__ == "__main__":
+    test_ocr_html_pages_with_source_thumbnails()
+    test_digital_html_and_markdown_pages()
+    test_unmarked_results_are_chunked_at_block_boundaries()
+    test_pdf_result_renders_single_pages()
+    print("✅ 分页预览测试通过")
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+from core.scheduler import ConversionScheduler, AdmissionRejected, QUEUED, FINISHED
+from core.cancellation import OK, CANCELLED
+
+class GatedScheduler(ConversionScheduler):
+    """ 假任务：记录执行顺序，等测试放行 gate 后才结束 """
+    def __init__(self, **kwargs):
+        self.gate = threading.Event()
+        self.order = []
+        super().__init__(**kwargs)
+
+    def _execute(self, job, converters):
+        self.order.append(job.source)
+        self.gate.wait(5)
+        job.status = OK
+
+def _wait_running(scheduler, n):
+    for _ in range(500):
+        if scheduler.stats()["running"] == n:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("工作线程没有取到任务")
+
+def test_fair_queue_positions_and_admission():
+    scheduler = GatedScheduler(workers=1, max_queue=5, per_user=3)
+    first = scheduler.submit("alice", "pdf2md", "a1")
+    _wait_running(scheduler, 1)
+
+    # alice 又提交两份，之后 bob 才来：bob 仍排在 alice 的第二份之前 (按人轮转)
+    a2 = scheduler.submit("alice", "pdf2md", "a2")
+    a3 = scheduler.submit("alice", "pdf2md", "a3")
+    b1 = scheduler.submit("bob", "pdf2md", "b1")
+    assert first.position() is None
+    assert [a2.position(), b1.position(), a3.position()] == [0, 1, 2]
+
+    # 每人上限 3 (含处理中)；总排队上限 5
+    try:
+        scheduler.submit("alice", "pdf2md", "a4")
+        assert False, "应当拒绝"
+    except AdmissionRejected:
+        pass
+    scheduler.submit("carol", "pdf2md", "c1")
+    scheduler.submit("dave", "pdf2md", "d1")
+    try:
+        scheduler.submit("erin", "pdf2md", "e1")
+        assert False, "应当拒绝"
+    except AdmissionRejected:
+        pass
+    assert scheduler.stats()["rejected"] == 2
+
+    # 排队中取消：直接移出，后面的任务前移
+    a3.cancel()
+    assert a3.done and a3.status == CANCELLED and a3.state == FINISHED
+
+    scheduler.gate.set()
+    scheduler.shutdown()
+    assert scheduler.order == ["a1", "a2", "b1", "c1", "d1"]
+    assert all(job.ok for job in (first, a2, b1))
+
+def test_workers_reuse_converters_and_return_bytes():
+    tmp_dir = make_tmp_dir("scheduler_test")
+    os.makedirs(tmp_dir, exist_ok=True)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 400), "Scheduled conversion body", fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+
+    created = []
+
+    class CountingScheduler(ConversionScheduler):
+        def _execute(self, job, converters):
+            before = len(converters)
+            super()._execute(job, converters)
+            if len(converters) > before:
+                created.append(job.id)
+
+    scheduler = CountingScheduler(workers=1, max_queue=5, per_user=5)
+    jobs = [scheduler.submit("alice", "pdf2md", data) for _ in range(3)]
+    out_path = os.path.join(tmp_dir, "scheduled.md")
+    jobs.append(scheduler.submit("alice", "pdf2md", data, output=out_path))
+    for job in jobs:
+        assert job.wait(30) and job.ok
+    scheduler.shutdown()
+
+    # 同一工作线程、同样的构造参数：只建一次转换器
+    assert created == [jobs[0].id]
+    assert b"Scheduled conversion body" in jobs[0].result
+    assert jobs[-1].result is None and os.path.exists(out_path)
+
+if __name__ == "__main__":
+    test_fair_queue_positions_and_admission()
+    test_workers_reuse_converters_and_return_bytes()
+    print("✅ 调度器测试通过")
@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+sys.path.append(current_dir)
+from tmp_dirs import make_tmp_dir
+
+import fitz
+from core.search_index import SearchIndex, html_to_text
+from core.pdf_md import PdfMdConverter
+from core.word_pdf_html import DocToHtmlConverter
+from tools.build_index import build_index, detect_mode
+from tools.synth_corpus import WORDS, SUPPLIERS
+
+TMP_DIR = make_tmp_dir("search_index_test")
+
+def _fresh_index(name):
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = os.path.join(TMP_DIR, name)
+    if os.path.exists(path):
+        os.remove(path)
+    return SearchIndex(path)
+
+def test_chinese_substring_and_short_terms():
+    index = _fresh_index("basic.sqlite")
+    index.add_document("a.pdf", ["本合同由甲方与华东医药有限公司签订", "附件：验收报告"], mode="ocr")
+    index.add_document("b.pdf", ["国药控股为本项目供应商", "华东医药 华东医药 华东医药"], mode="pdf2md")
+
+    # 三字以上：FTS5 trigram，按相关度排序 (b.pdf 第 2 页出现三次，排最前)
+    hits = index.search("华东医药")
+    assert [(os.path.basename(h["path"]), h["page"]) for h in hits] == [("b.pdf", 2), ("a.pdf", 1)]
+    assert "【华东医药】" in hits[0]["snippet"]
+    # 两个字的词查两字索引；多个词需同时出现
+    assert [h["page"] for h in index.search("合同")] == [1]
+    assert "【合同】" in index.search("合同")[0]["snippet"]
+    assert [os.path.basename(h["path"]) for h in index.search("华东医药 合同")] == ["a.pdf"]
+    assert index.search("华东医药", mode="ocr")[0]["mode"] == "ocr"
+    # FTS5 语法字符按普通文字处理
+    assert index.search('"OR" AND') == []
+
+def test_two_character_terms_use_bigram_index():
+    index = _fresh_index("bigram.sqlite")
+    index.add_document("a.pdf", ["甲方逾期付款的，应承担违约责任。", "乙方：国药控股"])
+    index.add_document("b.pdf", ["甲、方案已确认", "Total 42 USD"])
+    # 标点两边的字不配对："甲、方案"里没有"甲方"
+    assert [(os.path.basename(h["path"]), h["page"]) for h in index.search("甲方")] == [("a.pdf", 1)]
+    assert [h["page"] for h in index.search("违约 甲方")] == [1]
+    assert [h["page"] for h in index.search("违约责任 甲方")] == [1]
+    assert [os.path.basename(h["path"]) for h in index.search("42")] == ["b.pdf"]
+    # 单字与带标点的两字词仍按 LIKE 匹配
+    assert [h["page"] for h in index.search("乙")] == [2]
+    assert [os.path.basename(h["path"]) for h in index.search("甲、")] == ["b.pdf"]
+    assert index.remove_document("a.pdf") and index.search("甲方") == []
+
+def test_old_index_gets_bigrams_backfilled():
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = os.path.join(TMP_DIR, "legacy.sqlite")
+    if os.path.exists(path):
+        os.remove(path)
+    # 旧版本的索引：只有 documents 与 trigram 的 pages
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE documents (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, title TEXT, mode TEXT,
+                                output_path TEXT, page_count INTEGER, indexed_at TEXT);
+        CREATE VIRTUAL TABLE pages USING fts5(text, doc_id UNINDEXED, page UNINDEXED, tokenize='trigram');
+        INSERT INTO documents (id, path, title, page_count) VALUES (1, 'old.pdf', 'old.pdf', 2);
+        INSERT INTO pages (text, doc_id, page) VALUES ('封面', 1, 1), ('本合同由甲方起草', 1, 2);
+    """)
+    conn.commit()
+    conn.close()
+    index = SearchIndex(path)
+    assert [h["page"] for h in index.search("甲方")] == [2]
+    # 再次打开不会重复补齐
+    assert [h["page"] for h in SearchIndex(path).search("甲方")] == [2]
+    # 补齐了 rowid 对照表：旧文档可以按 rowid 删除 / 替换
+    index.add_document("old.pdf", ["新的封面"])
+    assert index.search("甲方") == [] and index.stats()["pages"] == 1
+
+def test_reindex_replaces_document():
+    index = _fresh_index("replace.sqlite")
+    index.add_document("c.pdf", ["旧版本条款内容"])
+    index.add_document("c.pdf", ["新版本条款内容", ""])
+    assert index.search("旧版本") == []
+    assert len(index.search("新版本")) == 1
+    assert index.stats()["documents"] == 1 and index.stats()["pages"] == 1
+    assert index.remove_document("c.pdf")
+    assert index.stats()["pages"] == 0
+
+def test_converters_index_pages():
+    index = _fresh_index("converters.sqlite")
+    pdf_path = os.path.join(TMP_DIR, "supplier.pdf")
+    doc = fitz.open()
+    for text in ["Purchase agreement with Acme Supplies", "Delivery schedule and penalties"]:
+        doc.new_page().insert_text((72, 400), text, fontsize=12)
+    doc.save(pdf_path)
+    doc.close()
+
+    md_path = os.path.join(TMP_DIR, "supplier.md")
+    assert PdfMdConverter(search_index=index).pdf_to_markdown(pdf_path, md_path)
+    hits = index.search("penalties")
+    assert [(h["mode"], h["page"], h["output_path"]) for h in hits] == [("pdf2md", 2, md_path)]
+
+    # 同一源文件再转一次：覆盖之前的条目，不会重复命中
+    html_path = os.path.join(TMP_DIR, "supplier_digital.html")
+    assert DocToHtmlConverter(search_index=index.path).pdf_to_html(pdf_path, html_path)
+    assert [(h["mode"], h["page"]) for h in index.search("penalties")] == [("digital_pdf", 2)]
+    assert index.stats()["documents"] == 1
+
+    # 已有结果文件补建索引：数字 PDF 的 HTML 与带页标记的 Markdown 都能还原分页
+    backfill = _fresh_index("backfill.sqlite")
+    assert detect_mode("x_ocr.html") == "ocr" and detect_mode("x.pdf") is None
+    docs, pages = build_index(TMP_DIR, backfill)
+    assert docs == 2 and pages == 4
+    assert [h["page"] for h in backfill.search("penalties", mode="digital_pdf")] == [2]
+    assert [h["page"] for h in backfill.search("penalties", mode="pdf2md")] == [2]
+
+def test_html_to_text():
+    assert html_to_text("<style>p{}</style><h1>标题</h1><p>甲方&amp;乙方</p>") == "标题\n甲方&乙方"
+
+def test_search_is_fast_on_bulk_index():
+    index = _fresh_index("bulk.sqlite")
+    rng = random.Random(0)
+    docs = [{"path": f"contract_{d}.pdf", "mode": "ocr",
+             "pages": ["".join(rng.choice(WORDS) for _ in range(200)) + rng.choice(SUPPLIERS) for _ in range(5)]}
+            for d in range(2000)]
+    t0 = time.perf_counter()
+    assert index.add_documents(docs) == 10000
+    print(f"⏱️ 批量入库 10000 页: {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    hits = index.search("九州通", limit=20)
+    elapsed = time.perf_counter() - t0
+    print(f"⏱️ 检索: {elapsed * 1000:.1f} ms")
+    assert len(hits) == 20 and elapsed < 0.5
+    # 重新入库一个文档按 rowid 删除旧页，不扫整张 FTS 表：SQLite 执行的指令数与索引大小无关
+    conn = index._connect()
+    steps = []
+    conn.set_progress_handler(lambda: steps.append(1), 100)
+    with conn:
+        assert index._delete(conn, "contract_7.pdf")
+    conn.close()
+    assert len(steps) * 100 < 5000, f"删除一个文档执行了约 {len(steps) * 100} 条指令"
+    index.add_document("contract_7.pdf", ["改版后的条款 九州通"])
+    assert index.stats()["pages"] == 9996
+    assert [h["page"] for h in index.search("改版后", limit=5)] == [1]
+    # 两个字的词同样走索引
+    t0 = time.perf_counter()
+    assert len(index.search("九州", limit=20)) == 20 and time.perf_counter() - t0 < 0.5
+
+if __name__ == "__main__":
+    test_chinese_substring_and_short_terms()
+    test_two_character_terms_use_bigram_index()
+    test_old_index_gets_bigrams_backfilled()
+    test_reindex_replaces_document()
+    test_converters_index_pages()
+    test_html_to_text()
+    test_search_is_fast_on_bulk_index()
+    print("✅ 全文检索测试通过")
@@ -0,0 +1,103 @@
+import os
+import sys
+import ast
+import json
+import subprocess
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+# 启动阶段绝不能出现的重型依赖
+HEAVY_MODULES = ["numpy", "onnxruntime", "rapidocr_onnxruntime", "pdf2image",
+                 "fitz", "pymupdf", "weasyprint", "mammoth", "paddleocr"]
+
+# 启动导入耗时预算 (秒)，慢机器上可用环境变量放宽
+IMPORT_BUDGET_SEC = float(os.environ.get("DOC_AUDIT_IMPORT_BUDGET", "1.0"))
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+def _run_probe(code):
+    """ 在干净的子进程里执行探测代码，返回它最后一行输出的 JSON """
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=project_root, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    return json.loads(out)
+
+def _probe_import(module=None, imports=()):
+    """ 在干净的子进程里导入入口模块 (或执行一组 import 语句)，返回 (耗时, 已加载模块集合) """
+    data = _run_probe(PROBE.format(imports="\n".join(imports) if imports else f"import {module}"))
+    return data["elapsed"], set(data["modules"])
+
+def _heavy(modules):
+    return sorted({m.split(".")[0] for m in modules} & set(HEAVY_MODULES))
+
+def test_gui_startup_is_lazy():
+    elapsed, modules = _probe_import("app_gui")
+    loaded = _heavy(modules)
+    print(f"⏱️ app_gui 导入耗时: {elapsed * 1000:.0f} ms")
+    assert not loaded, f"启动时加载了重型依赖: {loaded}"
+    assert elapsed < IMPORT_BUDGET_SEC, f"启动导入耗时 {elapsed:.2f}s 超出预算 {IMPORT_BUDGET_SEC}s"
+
+# 每个模式解析后允许出现的重型依赖 (其余模式的依赖一个都不能带进来)
+MODE_MODULES = {
+    "ocr": {"numpy", "onnxruntime", "rapidocr_onnxruntime", "paddleocr"},
+    "pdf2md": {"fitz", "pymupdf"},
+    "word": {"fitz", "pymupdf", "mammoth"},
+}
+
+RESOLVE_PROBE = """
+import sys, json
+from core import registry
+before = sorted(sys.modules)
+try:
+    registry.resolve({mode!r})
+    ok = True
+except Exception:
+    ok = False
+print(json.dumps({{"ok": ok, "before": before, "after": sorted(sys.modules)}}))
+"""
+
+def test_registry_loads_on_demand():
+    from core import registry
+    assert set(registry.CONVERTERS) == {"ocr", "digital_pdf", "digital_pdf_compact", "word", "word_fast", "pdf2md", "md2pdf"}
+    assert registry.output_name("pdf2md", "a") == "a.md"
+
+    for mode, allowed in MODE_MODULES.items():
+        data = _run_probe(RESOLVE_PROBE.format(mode=mode))
+        assert not _heavy(data["before"]), f"导入注册表就加载了重型依赖: {_heavy(data['before'])}"
+        if not data["ok"]:
+            print(f"⚠️ 本机没有 {mode} 模式的依赖，跳过")
+            continue
+        extra = [m for m in _heavy(data["after"]) if m not in allowed]
+        assert not extra, f"解析 {mode} 时带进了其他模式的依赖: {extra}"
+
+def test_streamlit_entry_imports_are_lazy():
+    """ app_streamlit.py 与 pages/ 顶层导入的全部模块 (不执行页面脚本本身) """
+    scripts = [os.path.join(project_root, "app_streamlit.py")]
+    pages_dir = os.path.join(project_root, "pages")
+    scripts += [os.path.join(pages_dir, name) for name in sorted(os.listdir(pages_dir)) if name.endswith(".py")]
+    imports = []
+    for script in scripts:
+        with open(script, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        imports += [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    assert "from core import registry" in imports
+
+    elapsed, loaded = _probe_import(imports=list(dict.fromkeys(imports)))
+    print(f"⏱️ Streamlit 入口依赖导入耗时: {elapsed * 1000:.0f} ms")
+    assert not _heavy(loaded), f"Streamlit 入口加载了重型依赖: {_heavy(loaded)}"
+
+if __name__ == "__main__":
+    test_gui_startup_is_lazy()
+    test_registry_loads_on_demand()
+    test_streamlit_entry_imports_are_lazy()
+    print("✅ 启动测试通过")
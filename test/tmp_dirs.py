@@ -0,0 +1,9 @@
+import atexit
+import shutil
+import tempfile
+
+def make_tmp_dir(name):
+    """ 测试产物写到系统临时目录 (进程退出时删除)，不落进仓库；pytest 与直接运行测试文件时都可用 """
+    path = tempfile.mkdtemp(prefix=f"{name}_")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
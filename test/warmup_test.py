@@ -0,0 +1,146 @@
+import os
+import sys
+from unittest import mock
+
+# --- 路径配置 ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core import registry
+from core.warmup import ConverterCache, READY, FAILED
+from core.scheduler import ConversionScheduler
+
+sys.path.append(current_dir)
+from ocr_base_test import FakeBackend
+
+def test_cache_warms_in_background_and_reuses():
+    cache = ConverterCache()
+    assert cache.state("pdf2md") is None
+    entry = cache.start("pdf2md")
+    # 重复 start 不会再开一个加载线程
+    assert cache.start("pdf2md") is entry
+    assert entry.done.wait(30)
+    assert cache.state("pdf2md") == READY
+    converter = cache.get("pdf2md")
+    assert cache.get("pdf2md") is converter and len(cache) == 1
+    # 构造参数不同就是另一个转换器；只影响单次转换的参数 (索引、检查点) 不算
+    assert cache.state("pdf2md", {"prescan_threshold": 10}) is None
+    assert cache.state("pdf2md", {"search_index": "a.sqlite", "checkpoint_dir": "ckpt"}) == READY
+    assert cache.get("pdf2md", {"search_index": "a.sqlite"}) is converter
+    assert converter.search_index == "a.sqlite" and converter.checkpoint_dir is None
+    assert cache.get("pdf2md").search_index is None
+
+def test_cache_evicts_least_recently_used():
+    created = []
+    def create(mode, **options):
+        created.append(options["prescan_threshold"])
+        return object()
+
+    with mock.patch.object(registry, "create_converter", create):
+        cache = ConverterCache(max_entries=2)
+        first = cache.get("pdf2md", {"prescan_threshold": 1})
+        cache.get("pdf2md", {"prescan_threshold": 2})
+        assert cache.get("pdf2md", {"prescan_threshold": 1}) is first    # 1 变成最近用过的
+        cache.get("pdf2md", {"prescan_threshold": 3})                     # 淘汰 2
+        assert len(cache) == 2
+        assert cache.state("pdf2md", {"prescan_threshold": 2}) is None
+        assert cache.state("pdf2md", {"prescan_threshold": 1}) == READY
+        assert created == [1, 2, 3]
+
+def test_failed_load_is_reported_and_retried():
+    cache = ConverterCache()
+    cache.start("pdf2md", {"no_such_option": 1}).done.wait(30)
+    assert cache.state("pdf2md", {"no_such_option": 1}) == FAILED
+    try:
+        cache.get("pdf2md", {"no_such_option": 1})
+        assert False, "创建失败应抛出 RuntimeError"
+    except RuntimeError as e:
+        assert "no_such_option" in str(e)
+
+def test_failed_load_waits_before_background_retry():
+    calls = []
+    def create(mode, **options):
+        calls.append(mode)
+        raise ValueError("模型文件缺失")
+
+    with mock.patch.object(registry, "create_converter", create):
+        cache = ConverterCache()
+        cache.start("pdf2md").done.wait(30)
+        # 界面每次刷新都调 start()：重试间隔内不会重新加载
+        for _ in range(5):
+            assert cache.start("pdf2md").done.wait(30)
+        assert cache.state("pdf2md") == FAILED and calls == ["pdf2md"]
+        # 显式 reset 后立即重试
+        assert cache.reset("pdf2md") and not cache.reset("pdf2md")
+        cache.start("pdf2md").done.wait(30)
+        assert len(calls) == 2
+        # 真正要用引擎时 (get) 总会重试
+        try:
+            cache.get("pdf2md")
+        except RuntimeError:
+            pass
+        assert len(calls) == 3
+
+        # 过了重试间隔，start() 自己会重试
+        cache = ConverterCache(retry_after=0)
+        cache.start("pdf2md").done.wait(30)
+        cache.start("pdf2md").done.wait(30)
+        assert len(calls) == 5
+
+        scheduler = ConversionScheduler(workers=2)
+        try:
+            scheduler.warm_up("pdf2md")
+            for cache in scheduler._caches:
+                cache.start("pdf2md").done.wait(30)
+            assert scheduler.warm_state("pdf2md") == FAILED and len(calls) == 7
+            scheduler.warm_up("pdf2md")
+            assert len(calls) == 7
+            scheduler.retry_warm_up("pdf2md")
+            for cache in scheduler._caches:
+                cache.start("pdf2md").done.wait(30)
+            assert len(calls) == 9
+        finally:
+            scheduler.shutdown()
+
+def test_unavailable_engine_is_reported_as_failed():
+    class NoEngine(FakeBackend):
+        UNAVAILABLE_HINT = "模型文件缺失"
+        def is_available(self):
+            return False
+
+    with mock.patch.object(registry, "create_converter", lambda mode, **options: NoEngine()):
+        cache = ConverterCache()
+        cache.start("ocr").done.wait(30)
+        assert cache.state("ocr") == FAILED
+        try:
+            cache.get("ocr")
+            assert False, "引擎不可用应抛出 RuntimeError"
+        except RuntimeError as e:
+            assert "模型文件缺失" in str(e)
+
+def test_ocr_warm_up_runs_one_inference():
+    converter = FakeBackend()
+    assert converter.warm_up() is not None
+    assert converter.calls == 1
+
+def test_scheduler_warm_up_state():
+    scheduler = ConversionScheduler(workers=2)
+    try:
+        assert scheduler.warm_state("pdf2md") is None
+        scheduler.warm_up("pdf2md")
+        for cache in scheduler._caches:
+            cache.start("pdf2md").done.wait(30)
+        assert scheduler.warm_state("pdf2md") == READY
+    finally:
+        scheduler.shutdown()
+
+if __name__ == "__main__":
+    test_cache_warms_in_background_and_reuses()
+    test_cache_evicts_least_recently_used()
+    test_failed_load_is_reported_and_retried()
+    test_failed_load_waits_before_background_retry()
+    test_unavailable_engine_is_reported_as_failed()
+    test_ocr_warm_up_runs_one_inference()
+    test_scheduler_warm_up_state()
+    print("✅ 预热测试通过")
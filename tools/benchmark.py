@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import platform
+import tempfile
+import multiprocessing as mp
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core import registry
+from tools.synth_corpus import generate_corpus
+
+# 模式 -> 使用哪类语料 (模式名与 app_gui.py 保持一致)
+MODE_CORPUS = {
+    "ocr": "scanned_pdf",
+    "digital_pdf": "digital_pdf",
+    "digital_pdf_compact": "digital_pdf",
+    "word": "docx",
+    "word_fast": "docx",
+    "pdf2md": "digital_pdf",
+    "md2pdf": "md",
+}
+
+# 基线对比时各指标的"好"方向：+1 越大越好，-1 越小越好
+METRIC_DIRECTION = {
+    "pages_per_sec": +1,
+    "latency_p50": -1,
+    "latency_p90": -1,
+    "peak_rss_mb": -1,
+}
+
+
+def percentile(values, q):
+    """ 线性插值百分位 (不依赖 numpy，子进程里也能用) """
+    if not values:
+        return None
+    data = sorted(values)
+    k = (len(data) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (k - lo)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_mode(mode, docs, out_dir, repeat, poppler_path, result_queue):
+    """
+    子进程入口：单独测一个模式，这样峰值内存互不干扰
+    计时的转换全程不开 tracemalloc (它会让 Python 分配明显变慢)；
+    Python 堆峰值在计时结束后、对最大的文档单独再转一次时测量
+    """
+    import io
+    import tracemalloc
+    import contextlib
+
+    result = {"mode": mode, "docs": len(docs)}
+    try:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            kwargs = {"poppler_path": poppler_path} if mode == "ocr" else {}
+            converter = registry.create_converter(mode, **kwargs)
+        result["init_sec"] = time.perf_counter() - t0
+        result["engine"] = registry.engine_name(mode)
+
+        latencies, page_latencies, total_pages, failures = [], [], 0, 0
+        for doc in docs:
+            stem = os.path.splitext(os.path.basename(doc["path"]))[0]
+            output_path = os.path.join(out_dir, registry.output_name(mode, stem))
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                # 转换器内部大量 print，计时时屏蔽掉，避免终端 I/O 干扰结果
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ok = registry.convert(mode, doc["path"], output_path, converter=converter)
+                elapsed = time.perf_counter() - t0
+                if not ok:
+                    failures += 1
+                    continue
+                latencies.append(elapsed)
+                page_latencies.append(elapsed / max(doc["pages"], 1))
+                total_pages += doc["pages"]
+
+        total_sec = sum(latencies)
+        result.update({
+            "runs": len(latencies),
+            "failures": failures,
+            "pages": total_pages,
+            "total_sec": total_sec,
+            "pages_per_sec": total_pages / total_sec if total_sec > 0 else None,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p90": percentile(latencies, 90),
+            "latency_p99": percentile(latencies, 99),
+            "page_latency_p50": percentile(page_latencies, 50),
+            "page_latency_p90": percentile(page_latencies, 90),
+            "peak_rss_mb": _peak_rss_mb(),
+        })
+
+        # 不计时的一轮：只测 Python 堆峰值
+        doc = max(docs, key=lambda d: d["pages"])
+        stem = os.path.splitext(os.path.basename(doc["path"]))[0]
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                registry.convert(mode, doc["path"], os.path.join(out_dir, registry.output_name(mode, stem)),
+                                 converter=converter)
+            result["py_heap_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result_queue.put(result)
+
+
+def wait_for_child(proc, result_queue, timeout=None, poll_sec=1.0):
+    """
+    等子进程交回结果：子进程崩溃 / 被杀 (没有结果且已退出) 或超时 (强制结束) 时返回 {"error": ...}，
+    不会一直卡在 queue.get() 上
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            result = result_queue.get(timeout=poll_sec)
+            proc.join()
+            return result
+        except queue.Empty:
+            pass
+        if not proc.is_alive():
+            try:
+                # 退出前刚放进队列的结果可能还在管道里
+                return result_queue.get(timeout=poll_sec)
+            except queue.Empty:
+                return {"error": f"子进程异常退出 (exitcode={proc.exitcode})"}
+        if deadline is not None and time.monotonic() > deadline:
+            proc.terminate()
+            proc.join()
+            return {"error": f"超时 ({timeout:.0f}s)，已终止子进程"}
+
+
+def run_benchmark(corpus, modes, out_dir, repeat=1, poppler_path=None, timeout=None):
+    """ 每个模式起一个 spawn 子进程测量，返回 {mode: metrics}；timeout 为每个模式的时限 (秒) """
+    ctx = mp.get_context("spawn")
+    results = {}
+    for mode in modes:
+        docs = corpus.get(MODE_CORPUS[mode], [])
+        if not docs:
+            results[mode] = {"mode": mode, "error": "语料缺失"}
+            continue
+
+        print(f"⏱️ 正在测量 {mode} ({len(docs)} 份 x {repeat} 次)...")
+        result_queue = ctx.Queue()
+        proc = ctx.Process(target=_run_mode, args=(mode, docs, out_dir, repeat, poppler_path, result_queue))
+        proc.start()
+        result = {"mode": mode, **wait_for_child(proc, result_queue, timeout)}
+        results[mode] = result
+
+        if "error" in result:
+            print(f"   ⚠️ {mode} 失败: {result['error']}")
+        else:
+            print(f"   ✅ {result['pages_per_sec'] or 0:.2f} 页/秒 | p90 {result['latency_p90'] or 0:.3f}s")
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.10):
+    """
+    与基线对比，返回 (对比表, 是否存在退化)
+    退化：指标朝"坏"方向变化超过 tolerance (相对值)
+    """
+    comparison = {}
+    regressed = False
+    for mode, cur in results.items():
+        base = baseline.get("results", {}).get(mode)
+        if not base or "error" in cur or "error" in base:
+            continue
+        rows = {}
+        for metric, direction in METRIC_DIRECTION.items():
+            old, new = base.get(metric), cur.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            is_regression = change * direction < -tolerance
+            regressed = regressed or is_regression
+            rows[metric] = {"baseline": old, "current": new, "change": change, "regression": is_regression}
+        comparison[mode] = rows
+    return comparison, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="文档转换性能基准")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20], help="合成文档页数")
+    parser.add_argument("--docs", type=int, default=2, help="每种页数的文档份数")
+    parser.add_argument("--repeat", type=int, default=1, help="每份文档重复转换次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", default=list(MODE_CORPUS), choices=list(MODE_CORPUS))
+    parser.add_argument("--corpus-dir", help="语料目录 (默认临时目录，用完即删)")
+    parser.add_argument("--poppler", default=None, help="Poppler bin 路径 (OCR 模式)")
+    parser.add_argument("--output", default=None, help="结果 JSON 输出路径 (默认打印到终端)")
+    parser.add_argument("--baseline", default=None, help="基线 JSON，用于对比")
+    parser.add_argument("--save-baseline", default=None, help="把本次结果另存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="允许的相对退化比例")
+    parser.add_argument("--timeout", type=float, default=3600, help="每个模式的时限 (秒)，超时终止子进程")
+    args = parser.parse_args(argv)
+
+    kinds = {MODE_CORPUS[m] for m in args.modes}
+    if "scanned_pdf" in kinds:
+        kinds.add("digital_pdf")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = args.corpus_dir or os.path.join(tmp_dir, "corpus")
+        out_dir = os.path.join(tmp_dir, "out")
+        os.makedirs(out_dir)
+
+        print(f"🧪 正在生成合成语料: 页数={args.pages} 每档 {args.docs} 份 (seed={args.seed})")
+        corpus = generate_corpus(corpus_dir, args.pages, args.docs, args.seed, kinds=kinds)
+        results = run_benchmark(corpus, args.modes, out_dir, args.repeat, args.poppler, args.timeout)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pages": args.pages,
+            "docs": args.docs,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"], regressed = compare_with_baseline(results, baseline, args.tolerance)
+        for mode, rows in report["comparison"].items():
+            for metric, row in rows.items():
+                flag = "❌" if row["regression"] else "✅"
+                print(f"{flag} {mode}.{metric}: {row['baseline']:.4g} -> {row['current']:.4g} ({row['change']:+.1%})")
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"💾 结果已保存: {args.output}")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"💾 基线已保存: {args.save_baseline}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
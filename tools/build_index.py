@@ -0,0 +1,97 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core.registry import CONVERTERS
+from core.search_index import SearchIndex, html_to_text, default_index_path
+
+# =========================================================================
+# 把已有的转换结果 (output_result/ 下的 .html / .md) 批量补进全文检索索引
+# 源文件通常已不在手边，这里以结果文件本身作为索引里的"文档路径"
+# 每 --batch 个文档一个事务，两万份文档也只需几十次提交
+# =========================================================================
+
+
+def detect_mode(filename):
+    """ 按结果文件后缀判断来源模式 (后缀最长者优先，例如 _ocr.html 先于 .html) """
+    for mode, spec in sorted(CONVERTERS.items(), key=lambda kv: -len(kv[1]["suffix"])):
+        if spec.get("searchable") and filename.endswith(spec["suffix"]):
+            return mode
+    return None
+
+
+def split_pages(content, mode):
+    """ 从结果文件内容还原每页文字 """
+    if mode == "ocr":
+        parts = re.split(r"<div class='ocr-page'>", content)[1:]
+    elif mode == "digital_pdf":
+        # page.get_text("html") 每页以 <div id="page0" ...> 开头
+        parts = re.split(r'<div id="page\d+"', content)[1:]
+    elif mode == "digital_pdf_compact":
+        parts = re.split(r'<section class="page"', content)[1:]
+    elif mode == "pdf2md":
+        import frontmatter
+        from core.preview import MD_PAGE_MARKER
+        # 带页标记 (<!-- page N -->) 的结果按页入索引，旧结果整篇算一页
+        pages = MD_PAGE_MARKER.split(frontmatter.loads(content).content)
+        return [page.strip() for page in pages[1:]] if len(pages) > 1 else pages
+    else:
+        parts = [content]
+    return [html_to_text(part.replace("[本页无文字]", "")) for part in parts]
+
+
+def iter_output_docs(root):
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            mode = detect_mode(name)
+            if mode is None:
+                continue
+            path = os.path.abspath(os.path.join(dirpath, name))
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    pages = split_pages(f.read(), mode)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ 跳过 {path}: {e}")
+                continue
+            yield {"path": path, "pages": pages, "mode": mode, "output_path": path}
+
+
+def build_index(root, index, batch=200):
+    """ 返回 (文档数, 入库页数) """
+    docs, pages, pending = 0, 0, []
+    for doc in iter_output_docs(root):
+        pending.append(doc)
+        if len(pending) >= batch:
+            pages += index.add_documents(pending)
+            docs += len(pending)
+            pending = []
+            print(f"   📥 已入库 {docs} 个文档...")
+    if pending:
+        pages += index.add_documents(pending)
+        docs += len(pending)
+    return docs, pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把已有转换结果补进全文检索索引")
+    parser.add_argument("root", help="结果目录 (例如 output_result)")
+    parser.add_argument("--index", default=None, help=f"索引文件 (默认 {default_index_path()})")
+    parser.add_argument("--batch", type=int, default=200, help="每个事务写入的文档数")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.index)
+    t0 = time.perf_counter()
+    docs, pages = build_index(args.root, index, args.batch)
+    print(f"✅ 入库 {docs} 个文档 / {pages} 页，用时 {time.perf_counter() - t0:.1f}s -> {index.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core.ocr_calibration import save_calibration, calibration_path
+from tools.ocr_eval import char_error_rate, load_reference_texts
+from tools.ort_bench import thread_choices
+from tools.benchmark import wait_for_child
+
+# =========================================================================
+# 本机 OCR 校准：在样例页上实测每个已安装后端的若干配置，
+# 记录 页/秒 与峰值内存，选出"最快且精度可接受"的一个保存为本机默认
+#   RapidOCR : 不同的 intra_op 线程数
+#   PaddleOCR: MKL-DNN 开/关 x 识别批大小
+# 精度以 --reference-pdf 的文本层为标准答案；没有时每个后端只和自己的默认配置 (该后端第一个成功的配置) 比，
+# 不同引擎之间没有共同参照，这时精度只能在同一后端内部比较，跨后端的选择请提供 --reference-pdf
+# 保存的线程数是单引擎独占整机时的最优值；registry 创建转换器时会按同机并发引擎数封顶
+# =========================================================================
+
+# 后端名 -> "模块.类名" (与 core/registry.py 的候选写法一致)
+BACKENDS = {
+    "rapidocr": "core.rapidocr.RapidOcrConverter",
+    "paddleocr": "core.ocr_pdf_html.OcrConverter",
+}
+
+
+def candidate_configs(cpu_count=None, backends=None):
+    """ 生成要测的配置列表 [{"backend", "label", "options"}]，options 即转换器构造参数 """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    backends = backends or list(BACKENDS)
+    configs = []
+    if "rapidocr" in backends:
+        # 线程数从多到少：第一个 (默认策略) 同时作为精度参照
+        for n in sorted(thread_choices(cpu_count), reverse=True):
+            configs.append({
+                "backend": BACKENDS["rapidocr"],
+                "label": f"rapidocr intra={n}",
+                "options": {"ort_options": {"intra_op_num_threads": n}},
+            })
+    if "paddleocr" in backends:
+        # 第一个 (PaddleOCR 默认：MKL-DNN 关、批大小 6) 是该后端的精度参照
+        for mkldnn in (False, True):
+            for batch in (6, 16):
+                configs.append({
+                    "backend": BACKENDS["paddleocr"],
+                    "label": f"paddleocr mkldnn={'on' if mkldnn else 'off'} batch={batch}",
+                    "options": {"enable_mkldnn": mkldnn, "rec_batch_num": batch, "cpu_threads": cpu_count},
+                })
+    return configs
+
+
+def _measure(config, pdf_path, dpi, max_pages, repeat, result_queue):
+    """ 子进程入口：单独测一个配置，峰值内存互不干扰 """
+    import io
+    import importlib
+    import contextlib
+    from tools.benchmark import _peak_rss_mb
+    from tools.ocr_eval import load_sample_pages
+
+    result = {"label": config["label"]}
+    try:
+        module_name, class_name = config["backend"].rsplit(".", 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            converter_class = getattr(importlib.import_module(module_name), class_name)
+            converter = converter_class(**config["options"])
+        if not converter.is_available():
+            raise RuntimeError("引擎不可用 (未安装或初始化失败)")
+
+        pages = load_sample_pages(pdf_path, dpi, max_pages)
+        converter.recognize_lines(pages[0])  # 预热
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            texts = ["\n".join(converter.recognize_lines(img)) for img in pages]
+        elapsed = time.perf_counter() - t0
+
+        result.update({
+            "pages_per_sec": repeat * len(pages) / elapsed,
+            "peak_rss_mb": _peak_rss_mb(),
+            "texts": texts,
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result_queue.put(result)
+
+
+def run_calibration(configs, pdf_path, dpi=300, max_pages=1, repeat=1, timeout=1800):
+    ctx = mp.get_context("spawn")
+    results = []
+    for config in configs:
+        print(f"⏱️ 正在测量 {config['label']}...")
+        result_queue = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(config, pdf_path, dpi, max_pages, repeat, result_queue))
+        proc.start()
+        result = {"label": config["label"], **wait_for_child(proc, result_queue, timeout)}
+        result.update({"backend": config["backend"], "options": config["options"]})
+        results.append(result)
+
+        if "error" in result:
+            print(f"   ⚠️ 跳过: {result['error']}")
+        else:
+            print(f"   ✅ {result['pages_per_sec']:.3f} 页/秒 | 峰值内存 {result['peak_rss_mb'] or 0:.0f} MB")
+    return results
+
+
+def pick_best(results, references=None, max_cer=0.02, max_memory_mb=None):
+    """
+    给每个成功的结果标注 cer / acceptable，返回可接受结果中最快的一个 (都不可接受时为 None)
+    references: 每页标准答案；为 None 时每个后端以它自己第一个成功结果 (默认配置) 的输出为参照
+    """
+    ok = [r for r in results if "error" not in r]
+    if not ok:
+        return None
+    own_defaults = {}
+    for r in ok:
+        own_defaults.setdefault(r.get("backend"), r["texts"])
+
+    for r in ok:
+        refs = references if references is not None else own_defaults[r.get("backend")]
+        cers = [char_error_rate(t, ref) for t, ref in zip(r["texts"], refs)]
+        r["cer"] = sum(cers) / len(cers) if cers else 0.0
+        within_memory = max_memory_mb is None or (r["peak_rss_mb"] or 0) <= max_memory_mb
+        r["acceptable"] = r["cer"] <= max_cer and within_memory
+
+    acceptable = [r for r in ok if r["acceptable"]]
+    if not acceptable:
+        return None
+    return max(acceptable, key=lambda r: r["pages_per_sec"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本机 OCR 后端 / 参数校准")
+    parser.add_argument("--pdf", default=os.path.join(project_root, "input", "scanned.pdf"), help="样例扫描件")
+    parser.add_argument("--pages", type=int, default=1, help="取样例的前几页")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--reference-pdf", default=None, help="与样例对应的数字 PDF (文本层作标准答案)")
+    parser.add_argument("--max-cer", type=float, default=0.02, help="可接受的最大字符错误率")
+    parser.add_argument("--max-memory-mb", type=float, default=None, help="可接受的最大峰值内存")
+    parser.add_argument("--dry-run", action="store_true", help="只测量，不保存为本机默认")
+    args = parser.parse_args(argv)
+
+    references = load_reference_texts(args.reference_pdf, args.pages) if args.reference_pdf else None
+    if references is None and len(args.backends) > 1:
+        print("⚠️ 未提供 --reference-pdf：各后端只与自己的默认配置比较精度，不同后端之间的精度无法比较")
+    results = run_calibration(candidate_configs(backends=args.backends), args.pdf, args.dpi, args.pages, args.repeat)
+    best = pick_best(results, references, args.max_cer, args.max_memory_mb)
+
+    print(f"\n{'配置':<34}{'页/秒':>10}{'内存MB':>10}{'CER':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['label']:<34}  ⚠️ {r['error']}")
+            continue
+        mark = "🏆" if r is best else ("  " if r["acceptable"] else "❌")
+        print(f"{r['label']:<34}{r['pages_per_sec']:>10.3f}{r['peak_rss_mb'] or 0:>10.0f}{r['cer']:>10.2%} {mark}")
+
+    if best is None:
+        print("❌ 没有满足精度 / 内存要求的配置，未保存")
+        return 1
+    if args.dry_run:
+        print(f"🧪 最佳: {best['label']} (dry-run，未保存)")
+        return 0
+
+    for r in results:
+        r.pop("texts", None)
+    path = save_calibration(best, results)
+    print(f"💾 本机默认已设为 {best['label']}: {path}")
+    print(f"   (删除 {calibration_path()} 即可恢复默认选择)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
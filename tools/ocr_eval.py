@@ -0,0 +1,74 @@
+import os
+import sys
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+# =========================================================================
+# OCR 评测公共工具：样例页渲染、字符错误率 (CER)
+# 供 ort_bench / quant_compare 等工具共用
+# =========================================================================
+
+
+def load_sample_pages(pdf_path, dpi=300, max_pages=None):
+    """ 用 PyMuPDF 把 PDF 页渲染成 RGB numpy 图像 (与 OCR 流程同等分辨率) """
+    import fitz
+    import numpy as np
+
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        n = len(doc) if max_pages is None else min(max_pages, len(doc))
+        for page in doc.pages(0, n):
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+            pages.append(img)
+    return pages
+
+
+def load_reference_texts(pdf_path, max_pages=None):
+    """ 数字 PDF 的文本层即为对应扫描件的标准答案 """
+    import fitz
+
+    texts = []
+    with fitz.open(pdf_path) as doc:
+        n = len(doc) if max_pages is None else min(max_pages, len(doc))
+        for page in doc.pages(0, n):
+            texts.append(page.get_text("text"))
+    return texts
+
+
+def normalize_text(text):
+    """ 比较前去掉所有空白：OCR 的断行、空格与文本层不同，不应计为错误 """
+    return "".join(text.split())
+
+
+def levenshtein(a, b):
+    """ 编辑距离 (两行滚动数组，O(len(a) * len(b)) 时间，O(len(b)) 内存) """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,                # 删除
+                current[j - 1] + 1,             # 插入
+                previous[j - 1] + (ca != cb),   # 替换
+            ))
+        previous = current
+    return previous[-1]
+
+
+def char_error_rate(hypothesis, reference):
+    """ CER = 编辑距离 / 参考文本长度 (均先去空白) """
+    hyp, ref = normalize_text(hypothesis), normalize_text(reference)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return levenshtein(hyp, ref) / len(ref)
+
+
+def ocr_page_text(converter, img_np):
+    """ 用转换器的引擎 + 后处理识别一页，返回拼接后的文本 (任意 OCR 后端) """
+    return "\n".join(converter.recognize_lines(img_np))
@@ -0,0 +1,126 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import itertools
+import contextlib
+import threading
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core import ort_session
+from tools.ocr_eval import load_sample_pages
+
+
+def thread_choices(cpu_count):
+    choices = {1, cpu_count}
+    n = 2
+    while n < cpu_count:
+        choices.add(n)
+        n *= 2
+    return sorted(choices)
+
+
+def build_grid(cpu_count=None, engines=1, full=False):
+    """
+    生成要测的配置列表
+    默认只扫线程数 (+ 自动策略)；full=True 时再叉乘执行模式 / 图优化 / 内存池
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    grid = [{"label": "auto", "options": {}}]
+    for intra in thread_choices(cpu_count):
+        grid.append({"label": f"intra={intra}", "options": {"intra_op_num_threads": intra}})
+
+    if full:
+        for mode, level, arena in itertools.product(
+                ort_session.EXECUTION_MODES, ("basic", "all"), (False, True)):
+            grid.append({
+                "label": f"{mode}/{level}/arena={'on' if arena else 'off'}",
+                "options": {"execution_mode": mode, "graph_optimization_level": level,
+                            "enable_cpu_mem_arena": arena},
+            })
+    return grid
+
+
+def run_config(pages, options, engines=1, rounds=1):
+    """
+    起 engines 个引擎并发识别同一批页面，返回总吞吐 (页/秒)
+    线程足够：ONNX Runtime 推理期间会释放 GIL
+    """
+    from core.rapidocr import RapidOcrConverter
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converters = [RapidOcrConverter(ort_options=options, concurrent_engines=engines)
+                      for _ in range(engines)]
+    if any(c.ocr_engine is None for c in converters):
+        raise RuntimeError("RapidOCR 引擎初始化失败")
+
+    # 预热一页，排除首次分配内存的开销
+    converters[0].ocr_engine(pages[0])
+
+    def worker(conv):
+        for _ in range(rounds):
+            for img in pages:
+                conv.ocr_engine(img)
+
+    threads = [threading.Thread(target=worker, args=(c,)) for c in converters]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    total_pages = engines * rounds * len(pages)
+    return {
+        "resolved": converters[0].ort_options,
+        "pages": total_pages,
+        "seconds": elapsed,
+        "pages_per_sec": total_pages / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RapidOCR 会话配置吞吐对比 (本机)")
+    parser.add_argument("--pdf", default=os.path.join(project_root, "input", "scanned.pdf"))
+    parser.add_argument("--pages", type=int, default=2, help="取样例 PDF 的前几页")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--engines", type=int, default=1, help="同时运行的引擎数 (模拟多 worker)")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--full", action="store_true", help="同时扫描执行模式/图优化/内存池")
+    parser.add_argument("--output", default=None, help="结果 JSON 输出路径")
+    args = parser.parse_args(argv)
+
+    pages = load_sample_pages(args.pdf, args.dpi, args.pages)
+    print(f"🧪 样例: {os.path.basename(args.pdf)} {len(pages)} 页 | 并发引擎 {args.engines} | CPU {os.cpu_count()}")
+
+    results = []
+    for cfg in build_grid(engines=args.engines, full=args.full):
+        try:
+            r = run_config(pages, cfg["options"], args.engines, args.rounds)
+            r["label"] = cfg["label"]
+            print(f"   {cfg['label']:<32} {r['pages_per_sec']:.3f} 页/秒")
+        except Exception as e:
+            r = {"label": cfg["label"], "error": str(e)}
+            print(f"   {cfg['label']:<32} ⚠️ {e}")
+        results.append(r)
+
+    ok = [r for r in results if "error" not in r]
+    if ok:
+        best = max(ok, key=lambda r: r["pages_per_sec"])
+        print(f"🏆 最快: {best['label']} ({best['pages_per_sec']:.3f} 页/秒)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cpu_count": os.cpu_count(), "engines": args.engines, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core.rapidocr import MODEL_VARIANTS, packaged_model_paths, variant_model_paths
+from tools.ocr_eval import load_sample_pages, load_reference_texts, char_error_rate, ocr_page_text
+
+# =========================================================================
+# FP32 vs INT8 对比：每个变体在同一批页面上跑一遍，报告速度提升与字符错误率
+#   - 合成扫描件：有数字 PDF 文本层作标准答案，报告绝对 CER
+#   - 真实扫描件 (input/scanned.pdf)：没有标准答案，以 FP32 输出为参照报告相对 CER
+# =========================================================================
+
+
+def build_samples(scan_pdfs, synth_pages, dpi, max_pages, seed=0, work_dir=None):
+    """ 返回 [{"name", "image", "reference"}]，reference 为 None 表示无标准答案 """
+    samples = []
+    for pdf_path in scan_pdfs:
+        for i, img in enumerate(load_sample_pages(pdf_path, dpi, max_pages)):
+            samples.append({"name": f"{os.path.basename(pdf_path)}#{i + 1}", "image": img, "reference": None})
+
+    if synth_pages:
+        from tools.synth_corpus import generate_corpus
+        try:
+            corpus = generate_corpus(work_dir, [synth_pages], seed=seed, kinds=["digital_pdf", "scanned_pdf"])
+        except Exception as e:
+            print(f"⚠️ 合成扫描件生成失败 (需要 WeasyPrint)，仅使用真实扫描件: {e}")
+            return samples
+        for digital, scan in zip(corpus["digital_pdf"], corpus["scanned_pdf"]):
+            refs = load_reference_texts(digital["path"], max_pages)
+            images = load_sample_pages(scan["path"], dpi, max_pages)
+            for i, (img, ref) in enumerate(zip(images, refs)):
+                samples.append({"name": f"{os.path.basename(scan['path'])}#{i + 1}", "image": img, "reference": ref})
+    return samples
+
+
+def fallback_models(variant):
+    """ 该变体里缺少量化文件、实际会回退 FP32 的模型 ([] 表示都已就绪) """
+    if variant == "fp32":
+        return []
+    fp32_paths = packaged_model_paths()
+    return [key for key, path in variant_model_paths(variant).items() if path == fp32_paths[key]]
+
+
+def run_variant(variant, samples):
+    from core.rapidocr import RapidOcrConverter
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter = RapidOcrConverter(model_variant=variant)
+    if converter.ocr_engine is None:
+        raise RuntimeError("引擎初始化失败")
+
+    ocr_page_text(converter, samples[0]["image"])  # 预热
+    texts, seconds = [], 0.0
+    for sample in samples:
+        t0 = time.perf_counter()
+        texts.append(ocr_page_text(converter, sample["image"]))
+        seconds += time.perf_counter() - t0
+    return texts, seconds
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def compare(samples, variants):
+    outputs, report = {}, {}
+    for variant in variants:
+        # 转换器的"未找到 … 使用 FP32"提示在测量时被屏蔽，这里先查，免得把 FP32 的数字记成 INT8
+        missing = fallback_models(variant)
+        if len(missing) == 3:
+            print(f"   ⚠️ {variant} 缺少量化模型，跳过 (先运行 tools/quantize_models.py)")
+            report[variant] = {"error": "缺少量化模型 (先运行 tools/quantize_models.py)"}
+            continue
+        if missing:
+            print(f"   ⚠️ {variant} 的 {', '.join(missing)} 模型缺失，这部分按 FP32 运行")
+        print(f"⏱️ 正在测试 {variant} ({len(samples)} 页)...")
+        try:
+            outputs[variant], seconds = run_variant(variant, samples)
+        except Exception as e:
+            print(f"   ⚠️ {variant} 失败: {e}")
+            report[variant] = {"error": str(e)}
+            continue
+        report[variant] = {"sec_per_page": seconds / len(samples)}
+        if missing:
+            report[variant]["fp32_fallback"] = missing
+
+    base = report.get("fp32", {}).get("sec_per_page")
+    for variant, texts in outputs.items():
+        row = report[variant]
+        row["speedup"] = base / row["sec_per_page"] if base else None
+        row["cer"] = _mean([char_error_rate(t, s["reference"])
+                            for t, s in zip(texts, samples) if s["reference"] is not None])
+        if "fp32" in outputs:
+            row["cer_vs_fp32"] = _mean([char_error_rate(t, ref) for t, ref in zip(texts, outputs["fp32"])])
+    return report
+
+
+def _fmt(value, pattern):
+    return pattern.format(value) if value is not None else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FP32 / INT8 OCR 模型速度与精度对比")
+    parser.add_argument("--scans", nargs="*", default=[os.path.join(project_root, "input", "scanned.pdf")])
+    parser.add_argument("--synth-pages", type=int, default=3, help="额外生成几页合成扫描件 (0 为不生成)")
+    parser.add_argument("--max-pages", type=int, default=4)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--variants", nargs="+", default=list(MODEL_VARIANTS), choices=list(MODEL_VARIANTS))
+    parser.add_argument("--output", default=None, help="结果 JSON 输出路径")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        samples = build_samples(args.scans, args.synth_pages, args.dpi, args.max_pages, work_dir=tmp_dir)
+    if not samples:
+        print("❌ 没有可用的样例页")
+        return 1
+
+    variants = ["fp32"] + [v for v in args.variants if v != "fp32"]
+    report = compare(samples, variants)
+
+    print(f"\n{'变体':<14}{'秒/页':>10}{'加速比':>10}{'CER':>10}{'CER(对FP32)':>14}")
+    for variant, row in report.items():
+        if "error" in row:
+            print(f"{variant:<14}  ⚠️ {row['error']}")
+            continue
+        note = f"  (FP32: {', '.join(row['fp32_fallback'])})" if row.get("fp32_fallback") else ""
+        print(f"{variant:<14}{_fmt(row['sec_per_page'], '{:.3f}'):>10}{_fmt(row['speedup'], '{:.2f}x'):>10}"
+              f"{_fmt(row['cer'], '{:.2%}'):>10}{_fmt(row.get('cer_vs_fp32'), '{:.2%}'):>14}{note}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pages": len(samples), "results": report}, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
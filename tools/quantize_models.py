@@ -0,0 +1,174 @@
+import os
+import io
+import sys
+import argparse
+import tempfile
+import contextlib
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core import ort_session
+from core.rapidocr import packaged_model_paths, quantized_model_dir
+from tools.ocr_eval import load_sample_pages
+
+# =========================================================================
+# 离线生成 INT8 量化模型 (需要额外安装 onnx: pip install onnx)
+#   dynamic: 只量化 MatMul/Gemm 权重，激活在运行时动态量化，无需校准数据
+#   static : 权重 + 激活都量化 (QDQ 格式)，用样例扫描件跑一遍 FP32 流程收集校准输入
+# 生成的模型放在 ~/.doc_audit/models/<variant>/，文件名与自带模型一致
+# =========================================================================
+
+
+class _RecordingSession:
+    """ 包一层 InferenceSession，记录每次 run 的输入，用作静态量化的校准数据 """
+
+    def __init__(self, session, limit):
+        self._session = session
+        self._limit = limit
+        self.records = []
+
+    def run(self, output_names, input_feed, *args, **kwargs):
+        # cls / rec 是按批 (默认 6 条) 调用的，拆成单条记录：
+        # 校准时整批的中间张量会成倍占用内存 (rec 模型一批就能吃掉数 GB)
+        batch = len(next(iter(input_feed.values())))
+        for i in range(batch):
+            if len(self.records) >= self._limit:
+                break
+            self.records.append({k: v[i:i + 1].copy() for k, v in input_feed.items()})
+        return self._session.run(output_names, input_feed, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def collect_calibration_inputs(sample_pdfs, dpi=300, max_pages=4, limit=64):
+    """ 在 FP32 引擎上识别样例页，截获 det / cls / rec 各自的真实输入张量 """
+    from core.rapidocr import RapidOcrConverter
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter = RapidOcrConverter()
+    if converter.ocr_engine is None:
+        raise RuntimeError("RapidOCR 引擎初始化失败，无法收集校准数据")
+
+    recorders = {}
+    for key, wrapper in ort_session.engine_sessions(converter.ocr_engine).items():
+        recorders[key] = _RecordingSession(wrapper.session, limit)
+        wrapper.session = recorders[key]
+
+    for pdf_path in sample_pdfs:
+        for img in load_sample_pages(pdf_path, dpi, max_pages):
+            converter.ocr_engine(img)
+
+    return {key: rec.records for key, rec in recorders.items()}
+
+
+class _ListDataReader:
+    """ onnxruntime.quantization 要求的 CalibrationDataReader 接口 (含分段校准用的 set_range) """
+
+    def __init__(self, records):
+        self._records = records
+        self._iter = iter(records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def set_range(self, start_index, end_index):
+        self._iter = iter(self._records[start_index:end_index])
+
+    def get_next(self):
+        return next(self._iter, None)
+
+
+def _preprocessed(src, tmp_dir):
+    """
+    量化前预处理：
+    1. 自带模型是 opset 11/12，逐通道量化的 DequantizeLinear(axis) 需要 opset 13，先升级
+    2. PaddlePaddle 导出的模型把部分 Conv 权重放在 Constant 节点里，
+       量化器要求权重是 initializer，再做一遍常量折叠 + 形状推断
+    """
+    import onnx
+    from onnx import version_converter
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    model = onnx.load(src)
+    opset = max(o.version for o in model.opset_import if o.domain in ("", "ai.onnx"))
+    upgraded = os.path.join(tmp_dir, "opset13_" + os.path.basename(src))
+    if opset < 13:
+        model = version_converter.convert_version(model, 13)
+    onnx.save(model, upgraded)
+
+    dst = os.path.join(tmp_dir, os.path.basename(src))
+    quant_pre_process(upgraded, dst, skip_symbolic_shape=True)
+    return dst
+
+
+def quantize_dynamic_models(output_dir, keys=("det", "cls", "rec")):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for key, src in packaged_model_paths().items():
+            if key not in keys:
+                continue
+            dst = os.path.join(output_dir, os.path.basename(src))
+            print(f"   🗜️ [dynamic] {key}: {os.path.basename(src)}")
+            # 动态量化只处理 MatMul/Gemm：Conv 会变成 ConvInteger，
+            # 在 CPU 上既慢又会让 rec 模型几乎完全识别错误 (实测 CER > 90%)
+            quantize_dynamic(_preprocessed(src, tmp_dir), dst, weight_type=QuantType.QInt8,
+                             op_types_to_quantize=["MatMul", "Gemm"])
+    return output_dir
+
+
+def quantize_static_models(output_dir, sample_pdfs, keys=("det", "cls", "rec"), dpi=300, max_pages=4):
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+
+    print("   📊 正在收集校准数据 (FP32 跑样例页)...")
+    calibration = collect_calibration_inputs(sample_pdfs, dpi, max_pages)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for key, src in packaged_model_paths().items():
+            if key not in keys:
+                continue
+            if not calibration.get(key):
+                print(f"   ⚠️ [static] {key}: 样例中没有触发该模型，跳过")
+                continue
+            dst = os.path.join(output_dir, os.path.basename(src))
+            print(f"   🗜️ [static] {key}: {os.path.basename(src)} ({len(calibration[key])} 组校准输入)")
+            quantize_static(
+                _preprocessed(src, tmp_dir), dst, _ListDataReader(calibration[key]),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+                # 逐条校准再合并 min/max：rec 模型中间张量很多，一次性收集会吃掉数 GB 内存
+                extra_options={"CalibStridedMinMax": 1},
+            )
+    return output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成 RapidOCR 的 INT8 量化模型")
+    parser.add_argument("--variant", choices=["int8_dynamic", "int8_static", "all"], default="all")
+    parser.add_argument("--models", nargs="+", default=["det", "cls", "rec"], choices=["det", "cls", "rec"])
+    parser.add_argument("--samples", nargs="+", default=[os.path.join(project_root, "input", "scanned.pdf")],
+                        help="静态量化用的样例扫描件 PDF")
+    parser.add_argument("--max-pages", type=int, default=4, help="每份样例最多取几页")
+    args = parser.parse_args(argv)
+
+    variants = ["int8_dynamic", "int8_static"] if args.variant == "all" else [args.variant]
+    for variant in variants:
+        output_dir = quantized_model_dir(variant)
+        print(f"🔧 正在生成 {variant} -> {output_dir}")
+        if variant == "int8_dynamic":
+            quantize_dynamic_models(output_dir, args.models)
+        else:
+            quantize_static_models(output_dir, args.samples, args.models, max_pages=args.max_pages)
+    print("✅ 量化完成，可用 RapidOcrConverter(model_variant=...) 加载")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import os
+import sys
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+# 合成语料用的词库 (审计场景常见用语，保证 OCR / 字号识别有真实的中文负载)
+WORDS = [
+    "采购", "合同", "供应商", "审计", "付款", "发票", "验收", "招标", "中标", "预算",
+    "冻干", "疫苗", "甲型", "批次", "数量", "单价", "金额", "条款", "违约", "责任",
+    "甲方", "乙方", "签订", "履行", "质保", "交付", "检验", "报告", "附件", "说明",
+]
+SUPPLIERS = ["华东医药", "国药控股", "上海医药", "九州通", "华润医药", "重庆医药"]
+
+PAGE_BREAK = '<div style="page-break-after: always"></div>'
+
+
+def _sentence(rng, n_words):
+    return "".join(rng.choice(WORDS) for _ in range(n_words)) + "。"
+
+
+def _paragraph(rng):
+    return "".join(_sentence(rng, rng.randint(6, 14)) for _ in range(rng.randint(2, 4)))
+
+
+def _table_rows(rng, n_rows):
+    rows = []
+    for r in range(n_rows):
+        rows.append([
+            f"{r + 1}",
+            rng.choice(SUPPLIERS),
+            rng.choice(WORDS) + rng.choice(WORDS),
+            f"{rng.randint(1, 500)}",
+            f"{rng.randint(100, 99999) / 100:.2f}",
+        ])
+    return rows
+
+
+def build_markdown(n_pages, seed=0, title="合成审计文档"):
+    """
+    生成 n_pages 页的 Markdown 正文 (不含 frontmatter)
+    每页：二级标题 + 若干段落 + 一张带框线的表格 + 强制分页
+    """
+    rng = random.Random(seed)
+    parts = [f"# {title}", ""]
+    header = ["序号", "供应商", "品名", "数量", "单价"]
+
+    for i in range(n_pages):
+        parts.append(f"## 第 {i + 1} 部分 {rng.choice(WORDS)}{rng.choice(WORDS)}")
+        parts.append("")
+        for _ in range(3):
+            parts.append(_paragraph(rng))
+            parts.append("")
+
+        parts.append("| " + " | ".join(header) + " |")
+        parts.append("|" + "------|" * len(header))
+        for row in _table_rows(rng, 6):
+            parts.append("| " + " | ".join(row) + " |")
+        parts.append("")
+
+        if i < n_pages - 1:
+            parts.append(PAGE_BREAK)
+            parts.append("")
+
+    return "\n".join(parts)
+
+
+def write_markdown(md_path, n_pages, seed=0):
+    """ 写出带页眉页脚 frontmatter 的 Markdown (markdown_to_pdf 会把它们渲染成页眉页脚) """
+    import frontmatter
+
+    post = frontmatter.Post(build_markdown(n_pages, seed=seed))
+    post['title'] = os.path.basename(md_path)
+    post['header_text'] = "XX市疾病预防控制中心 采购审计资料"
+    post['footer_text'] = "内部资料 注意保密"
+
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(frontmatter.dumps(post))
+    return md_path
+
+
+def rasterize_pdf(pdf_path, output_path, dpi=200, noise=0.002, seed=0):
+    """
+    模拟扫描件：把数字 PDF 逐页栅格化为灰度图，再装回一个纯图片 PDF
+    noise 为椒盐噪点比例，用来模拟扫描仪的脏点
+    """
+    import fitz
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    src = fitz.open(pdf_path)
+    out = fitz.open()
+
+    for page in src:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        if noise > 0:
+            buf = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+            buf = buf.copy()
+            mask = rng.random(buf.shape) < noise
+            buf[mask] = rng.integers(0, 256, size=int(mask.sum()), dtype=np.uint8)
+            pix = fitz.Pixmap(fitz.csGRAY, pix.width, pix.height, buf.tobytes(), False)
+
+        new_page = out.new_page(width=page.rect.width, height=page.rect.height)
+        new_page.insert_image(new_page.rect, pixmap=pix)
+
+    out.save(output_path, deflate=True)
+    out.close()
+    src.close()
+    return output_path
+
+
+# =========================================================================
+# 最小 .docx 生成 (不引入 python-docx，直接拼 OOXML)
+# =========================================================================
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOC_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/></w:style>
+<w:style w:type="paragraph" w:styleId="Heading2"><w:name w:val="heading 2"/></w:style>
+</w:styles>"""
+
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _w_para(text, style=None):
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f'<w:p>{ppr}<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _w_table(rows):
+    xml = ['<w:tbl>']
+    for row in rows:
+        xml.append('<w:tr>')
+        for cell in row:
+            xml.append(f'<w:tc>{_w_para(cell)}</w:tc>')
+        xml.append('</w:tr>')
+    xml.append('</w:tbl>')
+    return "".join(xml)
+
+
+def write_docx(docx_path, n_pages, seed=0):
+    """ 生成与 Markdown 语料结构一致的 .docx (标题/段落/表格)，供 Word -> HTML 基准使用 """
+    rng = random.Random(seed)
+    body = [_w_para("合成审计文档", "Heading1")]
+    for i in range(n_pages):
+        body.append(_w_para(f"第 {i + 1} 部分 {rng.choice(WORDS)}{rng.choice(WORDS)}", "Heading2"))
+        for _ in range(3):
+            body.append(_w_para(_paragraph(rng)))
+        body.append(_w_table([["序号", "供应商", "品名", "数量", "单价"]] + _table_rows(rng, 6)))
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document {_W_NS}><w:body>{"".join(body)}</w:body></w:document>'
+    )
+
+    with zipfile.ZipFile(docx_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOC_RELS)
+        zf.writestr("word/styles.xml", _STYLES)
+        zf.writestr("word/document.xml", document)
+    return docx_path
+
+
+def generate_corpus(out_dir, page_counts=(5,), docs_per_size=1, seed=0, scan_dpi=200, kinds=None):
+    """
+    生成一套可复现的合成语料
+    返回 {"md": [...], "digital_pdf": [...], "scanned_pdf": [...], "docx": [...]}，
+    每项为 {"path": ..., "pages": N}
+    kinds 可限定只生成其中几类 (例如缺少 WeasyPrint 时只生成 docx)
+    """
+    kinds = set(kinds or ("md", "digital_pdf", "scanned_pdf", "docx"))
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = {k: [] for k in ("md", "digital_pdf", "scanned_pdf", "docx")}
+
+    need_pdf = kinds & {"digital_pdf", "scanned_pdf"}
+    converter = None
+    if need_pdf:
+        from core.pdf_md import PdfMdConverter
+        converter = PdfMdConverter()
+
+    for n_pages in page_counts:
+        for d in range(docs_per_size):
+            doc_seed = seed * 100003 + n_pages * 101 + d
+            stem = f"synth_{n_pages:04d}p_{d:02d}"
+
+            md_path = os.path.join(out_dir, f"{stem}.md")
+            if kinds & {"md"} or need_pdf:
+                write_markdown(md_path, n_pages, seed=doc_seed)
+                if "md" in kinds:
+                    corpus["md"].append({"path": md_path, "pages": n_pages})
+
+            if need_pdf:
+                pdf_path = os.path.join(out_dir, f"{stem}.pdf")
+                if not converter.markdown_to_pdf(md_path, pdf_path):
+                    raise RuntimeError(f"markdown_to_pdf 生成失败: {md_path}")
+                if "digital_pdf" in kinds:
+                    corpus["digital_pdf"].append({"path": pdf_path, "pages": n_pages})
+
+                if "scanned_pdf" in kinds:
+                    scan_path = os.path.join(out_dir, f"{stem}_scan.pdf")
+                    rasterize_pdf(pdf_path, scan_path, dpi=scan_dpi, seed=doc_seed)
+                    corpus["scanned_pdf"].append({"path": scan_path, "pages": n_pages})
+
+            if "docx" in kinds:
+                docx_path = os.path.join(out_dir, f"{stem}.docx")
+                write_docx(docx_path, n_pages, seed=doc_seed)
+                corpus["docx"].append({"path": docx_path, "pages": n_pages})
+
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成可复现的合成基准语料")
+    parser.add_argument("out_dir", help="输出目录")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5], help="每份文档的页数，可给多个")
+    parser.add_argument("--docs", type=int, default=1, help="每种页数生成几份")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scan-dpi", type=int, default=200)
+    args = parser.parse_args()
+
+    result = generate_corpus(args.out_dir, args.pages, args.docs, args.seed, args.scan_dpi)
+    for kind, items in result.items():
+        print(f"📄 {kind}: {len(items)} 份")
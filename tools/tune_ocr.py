@@ -0,0 +1,241 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import itertools
+import contextlib
+
+# --- 路径配置 (确保能找到 core 文件夹) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from core.ocr_profiles import DEFAULT_TUNING, save_profiles, profiles_path
+from tools.ocr_eval import char_error_rate, load_reference_texts
+
+# =========================================================================
+# OCR 识别参数扫参：在带标准答案的样例页上，对 DPI / 检测阈值 / 框置信度 /
+# 扩张比例 / 方向分类器 做网格扫描，测每个配置的 秒/页 与字符错误率 (CER)，
+# 打印 Pareto 前沿 (没有别的配置又快又准)，从前沿上选出 fast / balanced / accurate
+# 三个档位保存到 ocr_profiles.json，转换器用 profile="fast" 之类的名字加载
+# 标准答案两种来源：
+#   --truth 目录：图片 (png/jpg) + 同名 .txt (图片按 --image-dpi 扫描，换 DPI 时按比例缩放)
+#   --pdf 扫描件 + --reference-pdf 对应的数字 PDF (文本层作标准答案，按各 DPI 重新渲染)
+# =========================================================================
+
+# 后端名 -> "模块.类名" (与 tools/calibrate_ocr.py 一致)
+BACKENDS = {
+    "rapidocr": "core.rapidocr.RapidOcrConverter",
+    "paddleocr": "core.ocr_pdf_html.OcrConverter",
+}
+
+DEFAULT_GRID = {
+    "dpi": [200, 300],
+    "det_thresh": [0.1, 0.3],
+    "det_box_thresh": [0.3, 0.5],
+    "det_unclip_ratio": [1.6, 2.0],
+    "use_cls": [True, False],
+}
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def load_truth_dir(directory, image_dpi=300):
+    """ 图片 + 同名 .txt；没有 .txt 的图片跳过 """
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        txt_path = os.path.join(directory, stem + ".txt")
+        if ext.lower() not in IMAGE_SUFFIXES or not os.path.exists(txt_path):
+            continue
+        with open(txt_path, "r", encoding="utf-8") as f:
+            reference = f.read()
+        samples.append({"name": name, "image_path": os.path.join(directory, name),
+                        "image_dpi": image_dpi, "reference": reference})
+    return samples
+
+
+def load_truth_pdf(scan_pdf, reference_pdf, max_pages=None):
+    references = load_reference_texts(reference_pdf, max_pages)
+    return [{"name": f"{os.path.basename(scan_pdf)}#{i + 1}", "pdf": scan_pdf, "page": i, "reference": ref}
+            for i, ref in enumerate(references)]
+
+
+def sample_image(sample, dpi, cache):
+    """ 样例页在指定 DPI 下的 RGB 图像 (按 (样例, DPI) 缓存，换参数时不重复渲染) """
+    key = (sample["name"], dpi)
+    if key not in cache:
+        import numpy as np
+        if "pdf" in sample:
+            import fitz
+            with fitz.open(sample["pdf"]) as doc:
+                pix = doc[sample["page"]].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+                img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3).copy()
+        else:
+            import cv2
+            from core.preprocess import resize_image
+            img = cv2.cvtColor(cv2.imread(sample["image_path"]), cv2.COLOR_BGR2RGB)
+            if dpi != sample["image_dpi"]:
+                img = resize_image(img, dpi / sample["image_dpi"])
+        cache[key] = img
+    return cache[key]
+
+
+def build_grid(grid=None):
+    """ 网格 -> 配置列表 [{dpi, det_thresh, ...}]；第一个配置排的是最接近默认值的组合 """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    keys = list(DEFAULT_TUNING)
+    values = [sorted(grid[k], key=lambda v: v != DEFAULT_TUNING[k]) for k in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def config_label(tuning):
+    return (f"dpi={tuning['dpi']} thr={tuning['det_thresh']} box={tuning['det_box_thresh']} "
+            f"unclip={tuning['det_unclip_ratio']} cls={'on' if tuning['use_cls'] else 'off'}")
+
+
+def measure(converter, samples, dpi, repeat=1, cache=None):
+    """ 返回 (秒/页, 平均 CER)；计时只含识别 + 后处理 (渲染结果已缓存) """
+    cache = {} if cache is None else cache
+    images = [sample_image(s, dpi, cache) for s in samples]
+    converter.recognize_lines(images[0])  # 预热
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        texts = ["\n".join(converter.recognize_lines(img)) for img in images]
+    seconds = (time.perf_counter() - t0) / (repeat * len(images))
+    cers = [char_error_rate(text, s["reference"]) for text, s in zip(texts, samples)]
+    return seconds, sum(cers) / len(cers)
+
+
+def run_sweep(converter_factory, samples, configs, repeat=1):
+    """ converter_factory(tuning) -> 转换器；返回每个配置的结果 (出错的配置带 error) """
+    cache, results = {}, []
+    for n, tuning in enumerate(configs, 1):
+        label = config_label(tuning)
+        print(f"⏱️ [{n}/{len(configs)}] {label}")
+        result = {"label": label, "tuning": tuning}
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                converter = converter_factory(tuning)
+            if not converter.is_available():
+                raise RuntimeError("引擎不可用 (未安装或初始化失败)")
+            result["sec_per_page"], result["cer"] = measure(converter, samples, tuning["dpi"], repeat, cache)
+            print(f"   ✅ {result['sec_per_page']:.3f} 秒/页 | CER {result['cer']:.2%}")
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            print(f"   ⚠️ 跳过: {result['error']}")
+        results.append(result)
+    return results
+
+
+def pareto_front(results):
+    """ 没有被"同样快或更快、且同样准或更准 (至少一项严格更好)"的配置支配的结果，按速度排序 """
+    ok = [r for r in results if "error" not in r]
+    front = []
+    for r in ok:
+        dominated = any(
+            o["sec_per_page"] <= r["sec_per_page"] and o["cer"] <= r["cer"]
+            and (o["sec_per_page"] < r["sec_per_page"] or o["cer"] < r["cer"])
+            for o in ok
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["sec_per_page"])
+
+
+def choose_profiles(front, balanced_tolerance=0.005, fast_tolerance=0.02):
+    """
+    accurate: 前沿上 CER 最低的配置
+    balanced / fast: CER 不超过 最低 CER + 容差 的配置里最快的一个
+    """
+    if not front:
+        return {}
+    best_cer = min(r["cer"] for r in front)
+
+    def fastest_within(tolerance):
+        return min((r for r in front if r["cer"] <= best_cer + tolerance), key=lambda r: r["sec_per_page"])
+
+    chosen = {
+        "accurate": min(front, key=lambda r: (r["cer"], r["sec_per_page"])),
+        "balanced": fastest_within(balanced_tolerance),
+        "fast": fastest_within(fast_tolerance),
+    }
+    return {name: {"tuning": r["tuning"], "label": r["label"], "sec_per_page": round(r["sec_per_page"], 4),
+                   "cer": round(r["cer"], 4)} for name, r in chosen.items()}
+
+
+def _backend_factory(backend):
+    import importlib
+    module_name, class_name = BACKENDS[backend].rsplit(".", 1)
+    converter_class = getattr(importlib.import_module(module_name), class_name)
+    return lambda tuning: converter_class(**tuning)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 识别参数扫参 (速度 vs 精度)")
+    parser.add_argument("--truth", default=None, help="标注样例目录 (图片 + 同名 .txt)")
+    parser.add_argument("--image-dpi", type=int, default=300, help="--truth 图片的扫描 DPI")
+    parser.add_argument("--pdf", default=None, help="扫描件 PDF (配合 --reference-pdf)")
+    parser.add_argument("--reference-pdf", default=None, help="与扫描件对应的数字 PDF (文本层作标准答案)")
+    parser.add_argument("--pages", type=int, default=None, help="PDF 只取前几页")
+    parser.add_argument("--backend", default="rapidocr", choices=list(BACKENDS))
+    parser.add_argument("--dpi", type=int, nargs="+", default=DEFAULT_GRID["dpi"])
+    parser.add_argument("--det-thresh", type=float, nargs="+", default=DEFAULT_GRID["det_thresh"])
+    parser.add_argument("--det-box-thresh", type=float, nargs="+", default=DEFAULT_GRID["det_box_thresh"])
+    parser.add_argument("--det-unclip-ratio", type=float, nargs="+", default=DEFAULT_GRID["det_unclip_ratio"])
+    parser.add_argument("--cls", choices=["on", "off", "both"], default="both", help="方向分类器")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--balanced-tolerance", type=float, default=0.005, help="balanced 允许比最准配置多出的 CER")
+    parser.add_argument("--fast-tolerance", type=float, default=0.02, help="fast 允许比最准配置多出的 CER")
+    parser.add_argument("--output", default=None, help="全部测量结果另存为 JSON")
+    parser.add_argument("--dry-run", action="store_true", help="只测量，不保存档位")
+    args = parser.parse_args(argv)
+
+    if args.truth:
+        samples = load_truth_dir(args.truth, args.image_dpi)
+    elif args.pdf and args.reference_pdf:
+        samples = load_truth_pdf(args.pdf, args.reference_pdf, args.pages)
+    else:
+        parser.error("需要 --truth 目录，或 --pdf 与 --reference-pdf")
+    if not samples:
+        print("❌ 没有可用的标注样例")
+        return 1
+
+    configs = build_grid({
+        "dpi": args.dpi, "det_thresh": args.det_thresh, "det_box_thresh": args.det_box_thresh,
+        "det_unclip_ratio": args.det_unclip_ratio,
+        "use_cls": {"on": [True], "off": [False], "both": [True, False]}[args.cls],
+    })
+    print(f"🎛️ {len(samples)} 页样例 x {len(configs)} 个配置 ({args.backend})")
+    results = run_sweep(_backend_factory(args.backend), samples, configs, args.repeat)
+    front = pareto_front(results)
+    chosen = choose_profiles(front, args.balanced_tolerance, args.fast_tolerance)
+
+    print(f"\n📈 Pareto 前沿 ({len(front)}/{len([r for r in results if 'error' not in r])} 个配置)")
+    print(f"{'配置':<58}{'秒/页':>10}{'CER':>10}")
+    for r in front:
+        names = [name for name, c in chosen.items() if c["label"] == r["label"]]
+        print(f"{r['label']:<58}{r['sec_per_page']:>10.3f}{r['cer']:>10.2%} {' '.join(names)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"samples": len(samples), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 测量结果已保存: {args.output}")
+
+    if not chosen:
+        print("❌ 没有成功的配置，未保存档位")
+        return 1
+    if args.dry_run:
+        print("🧪 dry-run，未保存档位")
+        return 0
+    path = save_profiles(chosen, results)
+    print(f"💾 档位已保存: {path}")
+    print('   使用: registry.create_converter("ocr", profile="fast") 或设置环境变量 DOC_AUDIT_OCR_PROFILE=fast')
+    print(f"   (删除 {profiles_path()} 即恢复内置档位)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())